@@ -0,0 +1,228 @@
+"""
+Exportaciones en segundo plano - Arte Ideas Analytics
+
+Las vistas de exportación encolan un `ExportJob` y responden 202 al instante.
+El comando `procesar_exportaciones` reclama los trabajos pendientes, los
+ejecuta en un pool de procesos (`ejecutar_exportacion_en_worker`) y guarda
+el archivo en MEDIA_ROOT/exportaciones/. Los archivos y trabajos vencidos se eliminan con
+`limpiar_exportaciones_expiradas` al cumplirse EXPORTACIONES_TTL.
+"""
+import logging
+import tempfile
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.analytics.models import ExportJob
+from .services import CATEGORIAS_REPORTE
+from .exporters import ExcelExporter, PDFExporter
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CONTENT_TYPE_PDF = 'application/pdf'
+
+
+def get_ttl():
+    """Segundos que se conservan los archivos exportados"""
+    return getattr(settings, 'EXPORTACIONES_TTL', 24 * 60 * 60)
+
+
+def get_timeout():
+    """Segundos tras los que un trabajo en proceso se considera abandonado"""
+    return getattr(settings, 'EXPORTACIONES_TIMEOUT', 30 * 60)
+
+
+def _sello_fecha():
+    return timezone.localtime().strftime('%Y%m%d_%H%M%S')
+
+
+# =============================================================================
+# EXPORTADORES POR TIPO
+# Cada uno recibe el trabajo y devuelve (bloques de bytes, nombre, content_type)
+# =============================================================================
+
+def _exportar_reporte(job, formato):
+    categoria = job.parametros['categoria']
+    info = CATEGORIAS_REPORTE[categoria]
+    fecha_inicio = date.fromisoformat(job.parametros['fecha_inicio'])
+    fecha_fin = date.fromisoformat(job.parametros['fecha_fin'])
+
+    service = info['service'](job.tenant, fecha_inicio, fecha_fin)
+    datos = {
+        'titulo': info['titulo'],
+        'metricas': service.get_metrics(),
+        'detalle': service.iter_detalle(),
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'categoria': categoria,
+    }
+
+    if formato == 'excel':
+        bloques = ExcelExporter().export_report_stream(**datos)
+        return bloques, f"{info['nombre_archivo']}_{_sello_fecha()}.xlsx", CONTENT_TYPE_EXCEL
+
+    contenido = PDFExporter().export_report(**datos)
+    return [contenido], f"{info['nombre_archivo']}_{_sello_fecha()}.pdf", CONTENT_TYPE_PDF
+
+
+def exportar_reporte_excel(job):
+    return _exportar_reporte(job, 'excel')
+
+
+def exportar_reporte_pdf(job):
+    return _exportar_reporte(job, 'pdf')
+
+
+def _contratos_filtrados(job):
+    """Contratos de la exportación con el alcance, filtros, búsqueda y orden de la vista"""
+    from apps.crm.contratos.views import ContratoViewSet
+
+    if job.usuario is None:
+        raise ValueError('El usuario que solicitó la exportación ya no existe')
+    return ContratoViewSet.queryset_exportacion(job.usuario, job.parametros)
+
+
+def exportar_contratos_excel(job):
+    from apps.crm.contratos.services import ContractExcelService
+
+    excel_file = ContractExcelService.generate_contracts_report(_contratos_filtrados(job), job.tenant)
+    nombre = f"contratos_{job.tenant.slug}_{_sello_fecha()}.xlsx"
+    return [excel_file.getvalue()], nombre, CONTENT_TYPE_EXCEL
+
+
+def exportar_pagos_contratos_excel(job):
+    from apps.crm.contratos.services import ContractExcelService
+
+    contratos = _contratos_filtrados(job).prefetch_related('pagos')
+    excel_file = ContractExcelService.generate_payments_report(contratos, job.tenant)
+    nombre = f"pagos_contratos_{job.tenant.slug}_{_sello_fecha()}.xlsx"
+    return [excel_file.getvalue()], nombre, CONTENT_TYPE_EXCEL
+
+
+def exportar_contrato_pdf(job):
+    from apps.crm.contratos.models import Contrato
+    from apps.crm.contratos.services import ContractPDFService
+
+    contrato = Contrato.objects.select_related('cliente', 'tenant').get(
+        pk=job.parametros['contrato_id'], tenant=job.tenant
+    )
+    pdf_file = ContractPDFService.generate(contrato)
+    return [pdf_file.getvalue()], f"contrato_{contrato.numero_contrato}.pdf", CONTENT_TYPE_PDF
+
+
+EXPORTADORES = {
+    'reporte_excel': exportar_reporte_excel,
+    'reporte_pdf': exportar_reporte_pdf,
+    'contratos_excel': exportar_contratos_excel,
+    'pagos_contratos_excel': exportar_pagos_contratos_excel,
+    'contrato_pdf': exportar_contrato_pdf,
+}
+
+
+# =============================================================================
+# COLA DE TRABAJOS
+# =============================================================================
+
+def encolar_exportacion(tenant, usuario, tipo, parametros):
+    """Registrar un trabajo de exportación pendiente"""
+    if tipo not in EXPORTADORES:
+        raise ValueError(f'Tipo de exportación "{tipo}" no válido')
+    return ExportJob.objects.create(
+        tenant=tenant,
+        usuario=usuario if getattr(usuario, 'is_authenticated', False) else None,
+        tipo=tipo,
+        parametros=parametros,
+    )
+
+
+def reclamar_exportaciones(limite):
+    """
+    Marcar como en proceso hasta `limite` trabajos pendientes (los más antiguos)
+
+    El UPDATE condicionado al estado hace que, con varios workers, cada
+    trabajo lo reclame un único proceso.
+    """
+    if limite <= 0:
+        return []
+
+    candidatos = ExportJob.objects.filter(estado='pendiente').order_by('created_at', 'id')
+    reclamados = []
+    for job_id in candidatos.values_list('id', flat=True)[:limite]:
+        actualizados = ExportJob.objects.filter(pk=job_id, estado='pendiente').update(
+            estado='en_proceso',
+            iniciado_en=timezone.now(),
+        )
+        if actualizados:
+            reclamados.append(job_id)
+    return reclamados
+
+
+def reencolar_exportaciones_abandonadas():
+    """Devolver a pendientes los trabajos cuyo worker murió sin terminarlos"""
+    limite = timezone.now() - timedelta(seconds=get_timeout())
+    return ExportJob.objects.filter(estado='en_proceso', iniciado_en__lt=limite).update(
+        estado='pendiente',
+        iniciado_en=None,
+    )
+
+
+def ejecutar_exportacion(job_id):
+    """
+    Ejecutar un trabajo ya reclamado y guardar el resultado
+
+    Recibe solo el id (se envía a los procesos del pool) y carga el trabajo
+    desde la base de datos.
+    """
+    job = ExportJob.objects.select_related('tenant', 'usuario').get(pk=job_id)
+
+    try:
+        bloques, nombre, content_type = EXPORTADORES[job.tipo](job)
+        with tempfile.TemporaryFile() as temporal:
+            for bloque in bloques:
+                temporal.write(bloque)
+            temporal.seek(0)
+            job.archivo.save(nombre, File(temporal, name=nombre), save=False)
+        job.nombre_archivo = nombre
+        job.content_type = content_type
+        job.estado = 'completado'
+        job.error = ''
+    except Exception as e:
+        logger.exception('Error procesando la exportación %s', job_id)
+        job.estado = 'error'
+        job.error = str(e)
+
+    job.finalizado_en = timezone.now()
+    job.expira_en = job.finalizado_en + timedelta(seconds=get_ttl())
+    job.save(update_fields=[
+        'archivo', 'nombre_archivo', 'content_type', 'estado', 'error',
+        'finalizado_en', 'expira_en', 'updated_at',
+    ])
+    return job.estado
+
+
+def ejecutar_exportacion_en_worker(job_id):
+    """
+    Punto de entrada de los procesos del pool
+
+    Descarta las conexiones vencidas o rotas antes y después del trabajo,
+    como hace Django al inicio y fin de cada request. No se llama en el modo
+    en línea porque cerraría la conexión del proceso que lo invoca.
+    """
+    close_old_connections()
+    try:
+        return ejecutar_exportacion(job_id)
+    finally:
+        close_old_connections()
+
+
+def limpiar_exportaciones_expiradas(ahora=None):
+    """Eliminar archivos y trabajos cuyo TTL ya venció. Devuelve cuántos se eliminaron"""
+    expirados = ExportJob.objects.filter(expira_en__lte=ahora or timezone.now())
+    for job in expirados.exclude(archivo='').only('id', 'archivo').iterator():
+        job.archivo.delete(save=False)
+    eliminados, _ = expirados.delete()
+    return eliminados
@@ -4,10 +4,30 @@ Funcionalidad para exportar reportes a Excel y PDF
 """
 from io import BytesIO
 from datetime import datetime
+import tempfile
 from decimal import Decimal
+from itertools import chain
 import json
 
 
+def _preparar_detalle(detalle):
+    """
+    Encabezados y filas del detalle sin materializarlo
+
+    `detalle` puede ser una lista o un generador (ReportService.iter_detalle);
+    se lee solo la primera fila para obtener los encabezados.
+    """
+    filas = iter(detalle)
+    primera = next(filas, None)
+    if primera is None:
+        return [], iter(())
+    return list(primera.keys()), chain([primera], filas)
+
+
+# Tamaño de los bloques enviados en exportaciones streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class ExcelExporter:
     """Exportador de reportes a Excel"""
     
@@ -16,7 +36,9 @@ class ExcelExporter:
             from openpyxl import Workbook
             from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
             from openpyxl.utils import get_column_letter
+            from openpyxl.cell import WriteOnlyCell
             self.Workbook = Workbook
+            self.WriteOnlyCell = WriteOnlyCell
             self.Font = Font
             self.PatternFill = PatternFill
             self.Alignment = Alignment
@@ -46,6 +68,110 @@ class ExcelExporter:
         else:
             raise ImportError("Se requiere openpyxl o xlsxwriter para exportar a Excel. Instale con: pip install openpyxl")
     
+    def export_report_stream(self, titulo, metricas, detalle, fecha_inicio, fecha_fin, categoria,
+                             chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Exportar reporte a Excel en modo streaming
+        Generador de bloques de bytes para StreamingHttpResponse
+        
+        Con openpyxl usa un workbook write-only: las filas del detalle se
+        consumen del iterador y se escriben a disco una a una, por lo que la
+        memoria no crece con el tamaño del reporte.
+        """
+        if not self.openpyxl_available:
+            # xlsxwriter: sin modo streaming, se entrega el archivo completo
+            yield self.export_report(titulo, metricas, detalle, fecha_inicio, fecha_fin, categoria)
+            return
+        
+        with tempfile.TemporaryFile() as archivo:
+            wb = self._build_write_only_workbook(titulo, metricas, detalle, fecha_inicio, fecha_fin)
+            wb.save(archivo)
+            archivo.seek(0)
+            while True:
+                bloque = archivo.read(chunk_size)
+                if not bloque:
+                    break
+                yield bloque
+    
+    def _build_write_only_workbook(self, titulo, metricas, detalle, fecha_inicio, fecha_fin):
+        """Construir el workbook en modo write-only (sin celdas combinadas)"""
+        wb = self.Workbook(write_only=True)
+        ws = wb.create_sheet("Reporte")
+        
+        # Estilos
+        header_fill = self.PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_font = self.Font(bold=True, color="FFFFFF", size=12)
+        bold_font = self.Font(bold=True)
+        border = self.Border(
+            left=self.Side(style='thin'),
+            right=self.Side(style='thin'),
+            top=self.Side(style='thin'),
+            bottom=self.Side(style='thin')
+        )
+        
+        def celda(value, font=None, fill=None, alignment=None, cell_border=None):
+            cell = self.WriteOnlyCell(ws, value=value)
+            if font:
+                cell.font = font
+            if fill:
+                cell.fill = fill
+            if alignment:
+                cell.alignment = alignment
+            if cell_border:
+                cell.border = cell_border
+            return cell
+        
+        headers, filas = _preparar_detalle(detalle)
+        
+        # En write-only el ancho de columnas debe definirse antes de escribir filas
+        for col_idx in range(max(len(headers), 4)):
+            ws.column_dimensions[self.get_column_letter(col_idx + 1)].width = 20
+        
+        # Título e información del período
+        ws.append([celda(titulo, font=self.Font(bold=True, size=14))])
+        ws.append([])
+        ws.append([
+            celda("Período:", font=bold_font),
+            f"{fecha_inicio.strftime('%d/%m/%Y')} - {fecha_fin.strftime('%d/%m/%Y')}",
+            celda("Fecha de Generación:", font=bold_font),
+            datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+        ])
+        ws.append([])
+        
+        # Métricas (2 pares etiqueta/valor por fila)
+        ws.append([celda("MÉTRICAS DE RESUMEN", font=header_font, fill=header_fill)])
+        fila = []
+        for key, value in metricas.items():
+            if len(fila) >= 4:
+                ws.append(fila)
+                fila = []
+            fila.append(celda(self._format_metric_label(key), font=bold_font))
+            fila.append(self._format_metric_value(value))
+        if fila:
+            ws.append(fila)
+        
+        # Tabla de detalle
+        if headers:
+            ws.append([])
+            ws.append([celda("DETALLE", font=header_font, fill=header_fill)])
+            ws.append([
+                celda(
+                    self._format_header(header),
+                    font=header_font,
+                    fill=header_fill,
+                    alignment=self.Alignment(horizontal='center', vertical='center'),
+                    cell_border=border
+                )
+                for header in headers
+            ])
+            for item in filas:
+                ws.append([
+                    celda(self._format_cell_value(item.get(header, '')), cell_border=border)
+                    for header in headers
+                ])
+        
+        return wb
+    
     def _export_with_openpyxl(self, titulo, metricas, detalle, fecha_inicio, fecha_fin, categoria):
         """Exportar usando openpyxl"""
         wb = self.Workbook()
@@ -106,8 +232,9 @@ class ExcelExporter:
             
             metric_col += 2
         
-        # Tabla de detalle
-        if detalle:
+        # Tabla de detalle (consumida de forma perezosa, fila por fila)
+        headers, filas = _preparar_detalle(detalle)
+        if headers:
             row += 2
             ws[f'A{row}'] = "DETALLE"
             ws[f'A{row}'].font = metric_font
@@ -117,32 +244,30 @@ class ExcelExporter:
             row += 1
             
             # Encabezados
-            if detalle:
-                headers = list(detalle[0].keys())
+            for col_idx, header in enumerate(headers):
+                col_letter = self.get_column_letter(col_idx + 1)
+                cell = ws[f'{col_letter}{row}']
+                cell.value = self._format_header(header)
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = self.Alignment(horizontal='center', vertical='center')
+                cell.border = border
+            
+            # Datos
+            row += 1
+            for item in filas:
                 for col_idx, header in enumerate(headers):
                     col_letter = self.get_column_letter(col_idx + 1)
                     cell = ws[f'{col_letter}{row}']
-                    cell.value = self._format_header(header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = self.Alignment(horizontal='center', vertical='center')
+                    value = item.get(header, '')
+                    cell.value = self._format_cell_value(value)
                     cell.border = border
-                
-                # Datos
                 row += 1
-                for item in detalle:
-                    for col_idx, header in enumerate(headers):
-                        col_letter = self.get_column_letter(col_idx + 1)
-                        cell = ws[f'{col_letter}{row}']
-                        value = item.get(header, '')
-                        cell.value = self._format_cell_value(value)
-                        cell.border = border
-                    row += 1
-                
-                # Ajustar ancho de columnas
-                for col_idx, header in enumerate(headers):
-                    col_letter = self.get_column_letter(col_idx + 1)
-                    ws.column_dimensions[col_letter].width = 20
+            
+            # Ajustar ancho de columnas
+            for col_idx, header in enumerate(headers):
+                col_letter = self.get_column_letter(col_idx + 1)
+                ws.column_dimensions[col_letter].width = 20
         
         # Guardar en BytesIO
         output = BytesIO()
@@ -199,18 +324,18 @@ class ExcelExporter:
             worksheet.write(row, metric_col + 1, self._format_metric_value(value))
             metric_col += 2
         
-        # Tabla de detalle
-        if detalle:
+        # Tabla de detalle (consumida de forma perezosa, fila por fila)
+        headers, filas = _preparar_detalle(detalle)
+        if headers:
             row += 2
             worksheet.write(row, 0, 'DETALLE', header_format)
             row += 1
             
-            headers = list(detalle[0].keys())
             for col_idx, header in enumerate(headers):
                 worksheet.write(row, col_idx, self._format_header(header), header_format)
             
             row += 1
-            for item in detalle:
+            for item in filas:
                 for col_idx, header in enumerate(headers):
                     value = item.get(header, '')
                     worksheet.write(row, col_idx, self._format_cell_value(value))
@@ -362,16 +487,16 @@ class PDFExporter:
         elements.append(metric_table)
         elements.append(self.Spacer(1, 0.3 * self.inch))
         
-        # Tabla de detalle
-        if detalle:
+        # Tabla de detalle (consumida de forma perezosa, fila por fila)
+        headers, filas = _preparar_detalle(detalle)
+        if headers:
             elements.append(self.Paragraph("<b>DETALLE</b>", styles['Heading2']))
             elements.append(self.Spacer(1, 0.1 * self.inch))
             
             # Preparar datos de la tabla
-            headers = list(detalle[0].keys())
             table_data = [headers]
             
-            for item in detalle:
+            for item in filas:
                 row = [str(self._format_cell_value(item.get(header, ''))) for header in headers]
                 table_data.append(row)
             
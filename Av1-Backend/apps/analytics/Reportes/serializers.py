@@ -1,8 +1,11 @@
 """
 Analytics Serializers - Arte Ideas
 """
+from django.urls import reverse
 from rest_framework import serializers
 
+from apps.analytics.models import ExportJob
+
 
 class MetricCardSerializer(serializers.Serializer):
     """Serializer para tarjetas de métricas"""
@@ -31,4 +34,28 @@ class ReportSerializer(serializers.Serializer):
     periodo_fin = serializers.CharField()  # Se recibe como string ISO format
     metricas = serializers.DictField()
     detalle = serializers.ListField(child=serializers.DictField())
+    paginacion = serializers.DictField(required=False)
     fecha_generacion = serializers.CharField()  # Se recibe como string ISO format
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer para el estado de los trabajos de exportación"""
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    url_descarga = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'tipo', 'tipo_display', 'estado', 'estado_display', 'parametros',
+            'nombre_archivo', 'error', 'url_descarga', 'created_at', 'iniciado_en',
+            'finalizado_en', 'expira_en'
+        ]
+        read_only_fields = fields
+
+    def get_url_descarga(self, obj):
+        if not obj.disponible:
+            return None
+        url = reverse('analytics:analytics:exportaciones-descargar', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
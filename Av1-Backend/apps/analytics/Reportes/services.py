@@ -2,22 +2,80 @@
 Servicios para Generación de Reportes - Arte Ideas Analytics
 Servicios que obtienen y procesan datos de diferentes módulos para reportes
 """
-from django.db.models import Sum, Count, Avg, Q, F, DecimalField
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Sum, Count, Avg, Q, F, DecimalField, Case, When, Value, BooleanField
 from django.db.models.functions import TruncDate, TruncMonth, TruncYear
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
 
 from apps.commerce.pedidos.models import Order, OrderItem, OrderPayment
 from apps.commerce.inventario.models import (
     MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral,
+    InventarioCatalogo
 )
 from apps.crm.clientes.models import Cliente, HistorialCliente
 from apps.crm.contratos.models import Contrato, PagoContrato
 from apps.operations.produccion.models import OrdenProduccion
 
 
+DETALLE_CHUNK_SIZE = 2000
+RESUMEN_LIMITE = 10
+
+
+@lru_cache(maxsize=None)
+def etiquetas_choices(model, campo):
+    """Etiquetas de un campo con choices (equivalente a get_<campo>_display)"""
+    return dict(model._meta.get_field(campo).flatchoices)
+
+
+def etiqueta(model, campo, valor):
+    return etiquetas_choices(model, campo).get(valor, valor)
+
+
+def nombre_completo(nombres, apellidos):
+    """Equivalente a Cliente.obtener_nombre_completo() sobre valores sueltos"""
+    return f"{nombres or ''} {apellidos or ''}".strip()
+
+
+class DetalleReporte:
+    """
+    Filas de detalle de un reporte sin materializarlas en memoria
+
+    Envuelve un queryset `.values()` y aplica `formatear` a cada fila. Iterar
+    usa `.iterator(chunk_size)`, `len()` hace un COUNT y el slicing un
+    LIMIT/OFFSET, por lo que sirve directamente a los paginadores de Django/DRF.
+    """
+    
+    def __init__(self, queryset, formatear, chunk_size=None):
+        self.queryset = queryset
+        self.formatear = formatear
+        self.chunk_size = chunk_size or DETALLE_CHUNK_SIZE
+        self._count = None
+    
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+    
+    def __len__(self):
+        return self.count()
+    
+    def __iter__(self):
+        for fila in self.queryset.iterator(chunk_size=self.chunk_size):
+            yield self.formatear(fila)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.formatear(fila) for fila in self.queryset[index]]
+        return self.formatear(self.queryset[index])
+
+
 class ReportService:
     """Servicio base para generar reportes"""
     
@@ -26,6 +84,37 @@ class ReportService:
         self.fecha_inicio = fecha_inicio or (timezone.now() - timedelta(days=30)).date()
         self.fecha_fin = fecha_fin or timezone.now().date()
     
+    def get_detalle_queryset(self):
+        """Queryset `.values()` ordenado con las filas del detalle"""
+        raise NotImplementedError
+    
+    def formatear_fila(self, fila):
+        """Convertir una fila de `.values()` en una fila del detalle"""
+        raise NotImplementedError
+    
+    def get_detalle(self):
+        """
+        Obtener tabla detallada como secuencia perezosa: soporta len(),
+        slicing (paginación con LIMIT/OFFSET) e iteración por bloques
+        """
+        return DetalleReporte(self.get_detalle_queryset(), self.formatear_fila)
+    
+    def iter_detalle(self, chunk_size=None):
+        """Generador de filas del detalle (para exportaciones)"""
+        return iter(DetalleReporte(self.get_detalle_queryset(), self.formatear_fila, chunk_size))
+    
+    def get_resumen(self, limite=RESUMEN_LIMITE):
+        """
+        Métricas, primeras `limite` filas (LIMIT) y total de registros (COUNT)
+        sin materializar el detalle completo
+        """
+        detalle = self.get_detalle()
+        return {
+            'metricas': self.get_metrics(),
+            'detalle': detalle[:limite],
+            'total_registros': detalle.count(),
+        }
+    
     def get_date_filter(self, field_name='created_at'):
         """Obtener filtro de fechas para queries"""
         # Si el campo es DateField, usar directamente
@@ -47,21 +136,23 @@ class VentasReportService(ReportService):
             order_date__lte=self.fecha_fin
         )
         
-        total_ventas = orders.aggregate(
-            total=Sum('total', default=0)
-        )['total'] or Decimal('0')
+        # Una sola consulta con agregación condicional
+        totales = orders.aggregate(
+            total_ventas=Sum('total', default=Decimal('0')),
+            total_pagado=Sum('paid_amount', default=Decimal('0')),
+            total_pedidos=Count('id'),
+            pedidos_completados=Count('id', filter=Q(status='completado')),
+        )
         
-        total_pedidos = orders.count()
+        total_ventas = totales['total_ventas']
+        total_pedidos = totales['total_pedidos']
+        total_pagado = totales['total_pagado']
         
         promedio_venta = total_ventas / total_pedidos if total_pedidos > 0 else Decimal('0')
         
-        pedidos_completados = orders.filter(status='completado').count()
+        pedidos_completados = totales['pedidos_completados']
         tasa_completitud = (pedidos_completados / total_pedidos * 100) if total_pedidos > 0 else 0
         
-        total_pagado = orders.aggregate(
-            total=Sum('paid_amount', default=0)
-        )['total'] or Decimal('0')
-        
         saldo_pendiente = total_ventas - total_pagado
         
         return {
@@ -73,30 +164,30 @@ class VentasReportService(ReportService):
             'saldo_pendiente': float(saldo_pendiente),
         }
     
-    def get_detalle(self):
-        """Obtener tabla detallada de ventas"""
-        orders = Order.objects.filter(
+    def get_detalle_queryset(self):
+        return Order.objects.filter(
             tenant=self.tenant,
             order_date__gte=self.fecha_inicio,
             order_date__lte=self.fecha_fin
-        ).select_related('cliente').order_by('-order_date')
-        
-        detalle = []
-        for order in orders:
-            detalle.append({
-                'id': order.id,
-                'numero_pedido': order.order_number,
-                'cliente': order.cliente.obtener_nombre_completo(),
-                'fecha': order.order_date.isoformat(),
-                'tipo_documento': order.get_document_type_display(),
-                'total': float(order.total),
-                'pagado': float(order.paid_amount),
-                'saldo': float(order.balance),
-                'estado': order.get_status_display(),
-                'estado_pago': order.get_payment_status_display(),
-            })
-        
-        return detalle
+        ).order_by('-order_date', '-id').values(
+            'id', 'order_number', 'cliente__nombres', 'cliente__apellidos', 'order_date',
+            'document_type', 'total', 'paid_amount', 'balance', 'status', 'payment_status'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle de ventas"""
+        return {
+            'id': fila['id'],
+            'numero_pedido': fila['order_number'],
+            'cliente': nombre_completo(fila['cliente__nombres'], fila['cliente__apellidos']),
+            'fecha': fila['order_date'].isoformat(),
+            'tipo_documento': etiqueta(Order, 'document_type', fila['document_type']),
+            'total': float(fila['total']),
+            'pagado': float(fila['paid_amount']),
+            'saldo': float(fila['balance']),
+            'estado': etiqueta(Order, 'status', fila['status']),
+            'estado_pago': etiqueta(Order, 'payment_status', fila['payment_status']),
+        }
 
 
 class InventarioReportService(ReportService):
@@ -104,74 +195,68 @@ class InventarioReportService(ReportService):
     
     def get_metrics(self):
         """Obtener métricas de resumen de inventario"""
-        # Obtener todos los modelos de inventario
-        all_models = [
-            MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-            Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
-        ]
+        # Valorización resuelta en la base de datos sobre el catálogo unificado
+        totales = InventarioCatalogo.objects.filter(
+            tenant=self.tenant, is_active=True
+        ).valorizacion()
         
-        total_productos = 0
-        total_stock = 0
-        total_valor_inventario = Decimal('0')
-        productos_bajo_stock = 0
-        
-        for model in all_models:
-            productos = model.objects.filter(tenant=self.tenant, is_active=True)
-            total_productos += productos.count()
-            
-            for producto in productos:
-                total_stock += producto.stock_disponible
-                total_valor_inventario += producto.costo_total
-                if producto.alerta_stock:
-                    productos_bajo_stock += 1
+        total_productos = totales['total_productos']
+        productos_bajo_stock = totales['alertas_stock']
         
         return {
             'total_productos': total_productos,
-            'total_stock': total_stock,
-            'total_valor_inventario': float(total_valor_inventario),
+            'total_stock': totales['stock_total'],
+            'total_valor_inventario': float(totales['valor_total']),
             'productos_bajo_stock': productos_bajo_stock,
             'productos_ok_stock': total_productos - productos_bajo_stock,
         }
     
-    def get_detalle(self):
-        """Obtener tabla detallada de inventario"""
-        detalle = []
-        
-        # Lista de modelos con sus nombres
-        models_data = [
-            (MolduraListon, 'Moldura Listón'),
-            (MolduraPrearmada, 'Moldura Prearmada'),
-            (VidrioTapaMDF, 'Vidrio/Tapa MDF'),
-            (Paspartu, 'Paspartú'),
-            (Minilab, 'Minilab'),
-            (Cuadro, 'Cuadro'),
-            (Anuario, 'Anuario'),
-            (CorteLaser, 'Corte Láser'),
-            (MarcoAccesorio, 'Marco/Accesorio'),
-            (HerramientaGeneral, 'Herramienta General'),
-        ]
-        
-        for model, categoria in models_data:
-            productos = model.objects.filter(tenant=self.tenant, is_active=True)
-            for producto in productos:
-                detalle.append({
-                    'id': producto.id,
-                    'categoria': categoria,
-                    'nombre': producto.nombre_producto,
-                    'codigo': producto.codigo_producto or '',
-                    'stock_disponible': producto.stock_disponible,
-                    'stock_minimo': producto.stock_minimo,
-                    'costo_unitario': float(producto.costo_unitario),
-                    'precio_venta': float(producto.precio_venta),
-                    'valor_total': float(producto.costo_total),
-                    'alerta_stock': producto.alerta_stock,
-                    'proveedor': producto.proveedor or '',
-                })
-        
-        # Ordenar por alerta de stock primero, luego por nombre
-        detalle.sort(key=lambda x: (not x['alerta_stock'], x['nombre']))
-        
-        return detalle
+    # Nombres de categoría mostrados en el detalle
+    CATEGORIAS_DETALLE = {
+        MolduraListon: 'Moldura Listón',
+        MolduraPrearmada: 'Moldura Prearmada',
+        VidrioTapaMDF: 'Vidrio/Tapa MDF',
+        Paspartu: 'Paspartú',
+        Minilab: 'Minilab',
+        Cuadro: 'Cuadro',
+        Anuario: 'Anuario',
+        CorteLaser: 'Corte Láser',
+        MarcoAccesorio: 'Marco/Accesorio',
+        HerramientaGeneral: 'Herramienta General',
+    }
+    
+    def get_detalle_queryset(self):
+        # Una sola consulta sobre el catálogo: alertas de stock primero, luego por nombre
+        return InventarioCatalogo.objects.filter(
+            tenant=self.tenant,
+            is_active=True
+        ).annotate(
+            alerta=Case(
+                When(stock_disponible__lte=F('stock_minimo'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        ).order_by('-alerta', 'nombre_producto', 'id').values(
+            'producto_id', 'categoria', 'nombre_producto', 'codigo_producto', 'stock_disponible',
+            'stock_minimo', 'costo_unitario', 'precio_venta', 'alerta', 'proveedor'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle de inventario"""
+        modelo = InventarioCatalogo.modelo_de_categoria(fila['categoria'])
+        return {
+            'id': fila['producto_id'],
+            'categoria': self.CATEGORIAS_DETALLE.get(modelo, fila['categoria']),
+            'nombre': fila['nombre_producto'],
+            'codigo': fila['codigo_producto'] or '',
+            'stock_disponible': fila['stock_disponible'],
+            'stock_minimo': fila['stock_minimo'],
+            'costo_unitario': float(fila['costo_unitario']),
+            'precio_venta': float(fila['precio_venta']),
+            'valor_total': float(fila['costo_unitario'] * fila['stock_disponible']),
+            'alerta_stock': bool(fila['alerta']),
+            'proveedor': fila['proveedor'] or '',
+        }
 
 
 class ProduccionReportService(ReportService):
@@ -185,17 +270,25 @@ class ProduccionReportService(ReportService):
             fecha_estimada__lte=self.fecha_fin
         )
         
-        total_ordenes = ordenes.count()
-        ordenes_completadas = ordenes.filter(estado='terminado').count()
-        ordenes_en_proceso = ordenes.filter(estado='en_proceso').count()
-        ordenes_pendientes = ordenes.filter(estado='pendiente').count()
-        ordenes_vencidas = sum(1 for o in ordenes if o.is_vencida)
+        # Una sola consulta; vencidas con el mismo criterio que OrdenProduccion.is_vencida
+        # y el promedio de horas ignora las órdenes sin tiempo real (NULL)
+        totales = ordenes.aggregate(
+            total_ordenes=Count('id'),
+            ordenes_completadas=Count('id', filter=Q(estado='terminado')),
+            ordenes_en_proceso=Count('id', filter=Q(estado='en_proceso')),
+            ordenes_pendientes=Count('id', filter=Q(estado='pendiente')),
+            ordenes_vencidas=Count('id', filter=Q(fecha_estimada__lt=date.today()) & ~Q(
+                estado__in=['terminado', 'entregado', 'cancelado']
+            )),
+            tiempo_promedio=Avg('tiempo_real_horas'),
+        )
         
-        # Calcular tiempo promedio
-        ordenes_con_tiempo = ordenes.filter(tiempo_real_horas__isnull=False)
-        tiempo_promedio = ordenes_con_tiempo.aggregate(
-            avg=Avg('tiempo_real_horas')
-        )['avg'] or 0
+        total_ordenes = totales['total_ordenes']
+        ordenes_completadas = totales['ordenes_completadas']
+        ordenes_en_proceso = totales['ordenes_en_proceso']
+        ordenes_pendientes = totales['ordenes_pendientes']
+        ordenes_vencidas = totales['ordenes_vencidas']
+        tiempo_promedio = totales['tiempo_promedio'] or 0
         
         tasa_completitud = (ordenes_completadas / total_ordenes * 100) if total_ordenes > 0 else 0
         
@@ -209,33 +302,46 @@ class ProduccionReportService(ReportService):
             'tasa_completitud': round(tasa_completitud, 2),
         }
     
-    def get_detalle(self):
-        """Obtener tabla detallada de producción"""
-        ordenes = OrdenProduccion.objects.filter(
+    def get_detalle_queryset(self):
+        return OrdenProduccion.objects.filter(
             tenant=self.tenant,
             fecha_estimada__gte=self.fecha_inicio,
             fecha_estimada__lte=self.fecha_fin
-        ).select_related('pedido', 'cliente', 'operario').order_by('-fecha_estimada')
-        
-        detalle = []
-        for orden in ordenes:
-            detalle.append({
-                'id': orden.id,
-                'numero_op': orden.numero_op,
-                'pedido': orden.pedido.order_number if orden.pedido else '',
-                'cliente': orden.cliente.obtener_nombre_completo(),
-                'tipo': orden.get_tipo_display(),
-                'estado': orden.get_estado_display(),
-                'prioridad': orden.get_prioridad_display(),
-                'fecha_estimada': orden.fecha_estimada.isoformat(),
-                'fecha_finalizacion': orden.fecha_finalizacion_real.date().isoformat() if orden.fecha_finalizacion_real else None,
-                'operario': orden.operario.get_full_name() if (orden.operario and orden.operario.first_name) else (orden.operario.username if orden.operario else ''),
-                'tiempo_estimado': float(orden.tiempo_estimado_horas) if orden.tiempo_estimado_horas else None,
-                'tiempo_real': float(orden.tiempo_real_horas) if orden.tiempo_real_horas else None,
-                'vencida': orden.is_vencida,
-            })
+        ).order_by('-fecha_estimada', '-id').values(
+            'id', 'numero_op', 'pedido__order_number', 'cliente__nombres', 'cliente__apellidos',
+            'tipo', 'estado', 'prioridad', 'fecha_estimada', 'fecha_finalizacion_real',
+            'operario__first_name', 'operario__last_name', 'operario__username',
+            'tiempo_estimado_horas', 'tiempo_real_horas'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle de producción"""
+        if fila['operario__first_name']:
+            operario = f"{fila['operario__first_name']} {fila['operario__last_name']}".strip()
+        else:
+            operario = fila['operario__username'] or ''
+        
+        # Misma regla que OrdenProduccion.is_vencida
+        vencida = (
+            fila['estado'] not in ['terminado', 'entregado', 'cancelado']
+            and date.today() > fila['fecha_estimada']
+        )
         
-        return detalle
+        return {
+            'id': fila['id'],
+            'numero_op': fila['numero_op'],
+            'pedido': fila['pedido__order_number'] or '',
+            'cliente': nombre_completo(fila['cliente__nombres'], fila['cliente__apellidos']),
+            'tipo': etiqueta(OrdenProduccion, 'tipo', fila['tipo']),
+            'estado': etiqueta(OrdenProduccion, 'estado', fila['estado']),
+            'prioridad': etiqueta(OrdenProduccion, 'prioridad', fila['prioridad']),
+            'fecha_estimada': fila['fecha_estimada'].isoformat(),
+            'fecha_finalizacion': fila['fecha_finalizacion_real'].date().isoformat() if fila['fecha_finalizacion_real'] else None,
+            'operario': operario,
+            'tiempo_estimado': float(fila['tiempo_estimado_horas']) if fila['tiempo_estimado_horas'] else None,
+            'tiempo_real': float(fila['tiempo_real_horas']) if fila['tiempo_real_horas'] else None,
+            'vencida': vencida,
+        }
 
 
 class ClientesReportService(ReportService):
@@ -243,63 +349,47 @@ class ClientesReportService(ReportService):
     
     def get_metrics(self):
         """Obtener métricas de resumen de clientes"""
-        clientes = Cliente.objects.filter(tenant=self.tenant, activo=True)
-        
-        total_clientes = clientes.count()
-        
-        clientes_por_tipo = clientes.values('tipo_cliente').annotate(
-            count=Count('id')
+        activos = Q(activo=True)
+        
+        # Una sola consulta; los clientes nuevos del período incluyen inactivos
+        return Cliente.objects.filter(tenant=self.tenant).aggregate(
+            total_clientes=Count('id', filter=activos),
+            clientes_particulares=Count('id', filter=activos & Q(tipo_cliente='particular')),
+            clientes_colegios=Count('id', filter=activos & Q(tipo_cliente='colegio')),
+            clientes_empresas=Count('id', filter=activos & Q(tipo_cliente='empresa')),
+            clientes_nuevos=Count('id', filter=Q(
+                creado_en__date__gte=self.fecha_inicio,
+                creado_en__date__lte=self.fecha_fin
+            )),
         )
-        
-        clientes_particulares = next((c['count'] for c in clientes_por_tipo if c['tipo_cliente'] == 'particular'), 0)
-        clientes_colegios = next((c['count'] for c in clientes_por_tipo if c['tipo_cliente'] == 'colegio'), 0)
-        clientes_empresas = next((c['count'] for c in clientes_por_tipo if c['tipo_cliente'] == 'empresa'), 0)
-        
-        # Clientes nuevos en el período
-        clientes_nuevos = Cliente.objects.filter(
-            tenant=self.tenant,
-            creado_en__date__gte=self.fecha_inicio,
-            creado_en__date__lte=self.fecha_fin
-        ).count()
-        
-        return {
-            'total_clientes': total_clientes,
-            'clientes_particulares': clientes_particulares,
-            'clientes_colegios': clientes_colegios,
-            'clientes_empresas': clientes_empresas,
-            'clientes_nuevos': clientes_nuevos,
-        }
     
-    def get_detalle(self):
-        """Obtener tabla detallada de clientes"""
-        clientes = Cliente.objects.filter(
+    def get_detalle_queryset(self):
+        # Totales de pedidos por cliente en la misma consulta agrupada
+        return Cliente.objects.filter(
             tenant=self.tenant,
             activo=True
-        ).order_by('apellidos', 'nombres')
-        
-        # Contar pedidos por cliente
-        detalle = []
-        for cliente in clientes:
-            total_pedidos = cliente.pedidos.count()
-            total_ventas = cliente.pedidos.aggregate(
-                total=Sum('total', default=0)
-            )['total'] or Decimal('0')
-            
-            detalle.append({
-                'id': cliente.id,
-                'tipo_cliente': cliente.get_tipo_cliente_display(),
-                'nombres': cliente.nombres,
-                'apellidos': cliente.apellidos,
-                'nombre_completo': cliente.obtener_nombre_completo(),
-                'email': cliente.email,
-                'telefono': cliente.telefono,
-                'dni': cliente.dni,
-                'total_pedidos': total_pedidos,
-                'total_ventas': float(total_ventas),
-                'fecha_registro': cliente.creado_en.date().isoformat(),
-            })
-        
-        return detalle
+        ).con_estadisticas_pedidos().order_by('apellidos', 'nombres', 'id').values(
+            'id', 'tipo_cliente', 'nombres', 'apellidos', 'email', 'telefono', 'dni',
+            'total_pedidos', 'valor_total', 'ultimo_pedido', 'saldo_pendiente', 'creado_en'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle de clientes"""
+        return {
+            'id': fila['id'],
+            'tipo_cliente': etiqueta(Cliente, 'tipo_cliente', fila['tipo_cliente']),
+            'nombres': fila['nombres'],
+            'apellidos': fila['apellidos'],
+            'nombre_completo': nombre_completo(fila['nombres'], fila['apellidos']),
+            'email': fila['email'],
+            'telefono': fila['telefono'],
+            'dni': fila['dni'],
+            'total_pedidos': fila['total_pedidos'],
+            'total_ventas': float(fila['valor_total']),
+            'ultimo_pedido': fila['ultimo_pedido'].isoformat() if fila['ultimo_pedido'] else None,
+            'saldo_pendiente': float(fila['saldo_pendiente']),
+            'fecha_registro': fila['creado_en'].date().isoformat(),
+        }
 
 
 class FinancieroReportService(ReportService):
@@ -314,29 +404,21 @@ class FinancieroReportService(ReportService):
             order_date__lte=self.fecha_fin
         )
         
-        total_ingresos = orders.aggregate(
-            total=Sum('total', default=0)
-        )['total'] or Decimal('0')
-        
-        total_pagado = orders.aggregate(
-            total=Sum('paid_amount', default=0)
-        )['total'] or Decimal('0')
+        totales = orders.aggregate(
+            total_ingresos=Sum('total', default=Decimal('0')),
+            total_pagado=Sum('paid_amount', default=Decimal('0')),
+        )
+        total_ingresos = totales['total_ingresos']
+        total_pagado = totales['total_pagado']
         
-        # Pagos recibidos
-        pagos = OrderPayment.objects.filter(
+        # Pagos recibidos (otra tabla: segunda y última consulta)
+        total_pagos_recibidos = OrderPayment.objects.filter(
             order__tenant=self.tenant,
             payment_date__gte=self.fecha_inicio,
             payment_date__lte=self.fecha_fin
-        )
-        
-        total_pagos_recibidos = pagos.aggregate(
-            total=Sum('amount', default=0)
-        )['total'] or Decimal('0')
-        
-        # Pagos por método
-        pagos_por_metodo = pagos.values('payment_method').annotate(
-            total=Sum('amount', default=0)
-        )
+        ).aggregate(
+            total=Sum('amount', default=Decimal('0'))
+        )['total']
         
         # Saldo pendiente total
         saldo_pendiente = total_ingresos - total_pagado
@@ -353,28 +435,28 @@ class FinancieroReportService(ReportService):
             'ingresos_netos': float(total_ingresos - igv_recaudado),
         }
     
-    def get_detalle(self):
-        """Obtener tabla detallada financiera"""
-        pagos = OrderPayment.objects.filter(
+    def get_detalle_queryset(self):
+        return OrderPayment.objects.filter(
             order__tenant=self.tenant,
             payment_date__gte=self.fecha_inicio,
             payment_date__lte=self.fecha_fin
-        ).select_related('order', 'order__cliente').order_by('-payment_date')
-        
-        detalle = []
-        for pago in pagos:
-            detalle.append({
-                'id': pago.id,
-                'fecha': pago.payment_date.isoformat(),
-                'numero_pedido': pago.order.order_number,
-                'cliente': pago.order.cliente.obtener_nombre_completo(),
-                'monto': float(pago.amount),
-                'metodo_pago': pago.get_payment_method_display(),
-                'numero_referencia': pago.reference_number or '',
-                'notas': pago.notes or '',
-            })
-        
-        return detalle
+        ).order_by('-payment_date', '-id').values(
+            'id', 'payment_date', 'order__order_number', 'order__cliente__nombres',
+            'order__cliente__apellidos', 'amount', 'payment_method', 'reference_number', 'notes'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle financiero"""
+        return {
+            'id': fila['id'],
+            'fecha': fila['payment_date'].isoformat(),
+            'numero_pedido': fila['order__order_number'],
+            'cliente': nombre_completo(fila['order__cliente__nombres'], fila['order__cliente__apellidos']),
+            'monto': float(fila['amount']),
+            'metodo_pago': etiqueta(OrderPayment, 'payment_method', fila['payment_method']),
+            'numero_referencia': fila['reference_number'] or '',
+            'notas': fila['notes'] or '',
+        }
 
 
 class ContratosReportService(ReportService):
@@ -388,56 +470,139 @@ class ContratosReportService(ReportService):
             fecha_inicio__lte=self.fecha_fin
         )
         
-        total_contratos = contratos.count()
-        
-        total_monto = contratos.aggregate(
-            total=Sum('monto_total', default=0)
-        )['total'] or Decimal('0')
-        
-        total_adelantos = contratos.aggregate(
-            total=Sum('adelanto', default=0)
-        )['total'] or Decimal('0')
-        
-        total_saldo_pendiente = contratos.aggregate(
-            total=Sum('saldo_pendiente', default=0)
-        )['total'] or Decimal('0')
-        
-        contratos_activos = contratos.filter(estado='activo').count()
-        contratos_completados = contratos.filter(estado='completado').count()
+        # Una sola consulta con agregación condicional
+        totales = contratos.aggregate(
+            total_contratos=Count('id'),
+            total_monto=Sum('monto_total', default=Decimal('0')),
+            total_adelantos=Sum('adelanto', default=Decimal('0')),
+            total_saldo_pendiente=Sum('saldo_pendiente', default=Decimal('0')),
+            contratos_activos=Count('id', filter=Q(estado='activo')),
+            contratos_completados=Count('id', filter=Q(estado='completado')),
+        )
         
         return {
-            'total_contratos': total_contratos,
-            'total_monto': float(total_monto),
-            'total_adelantos': float(total_adelantos),
-            'total_saldo_pendiente': float(total_saldo_pendiente),
-            'contratos_activos': contratos_activos,
-            'contratos_completados': contratos_completados,
+            'total_contratos': totales['total_contratos'],
+            'total_monto': float(totales['total_monto']),
+            'total_adelantos': float(totales['total_adelantos']),
+            'total_saldo_pendiente': float(totales['total_saldo_pendiente']),
+            'contratos_activos': totales['contratos_activos'],
+            'contratos_completados': totales['contratos_completados'],
         }
     
-    def get_detalle(self):
-        """Obtener tabla detallada de contratos"""
-        contratos = Contrato.objects.filter(
+    def get_detalle_queryset(self):
+        return Contrato.objects.filter(
             tenant=self.tenant,
             fecha_inicio__gte=self.fecha_inicio,
             fecha_inicio__lte=self.fecha_fin
-        ).select_related('cliente').order_by('-fecha_inicio')
-        
-        detalle = []
-        for contrato in contratos:
-            detalle.append({
-                'id': contrato.id,
-                'numero_contrato': contrato.numero_contrato,
-                'titulo': contrato.titulo,
-                'cliente': contrato.cliente.obtener_nombre_completo(),
-                'tipo_servicio': contrato.get_tipo_servicio_display(),
-                'fecha_inicio': contrato.fecha_inicio.isoformat(),
-                'fecha_fin': contrato.fecha_fin.isoformat(),
-                'monto_total': float(contrato.monto_total),
-                'adelanto': float(contrato.adelanto),
-                'saldo_pendiente': float(contrato.saldo_pendiente),
-                'estado': contrato.get_estado_display(),
-                'porcentaje_adelanto': round(contrato.porcentaje_adelanto, 2),
-            })
+        ).order_by('-fecha_inicio', '-id').values(
+            'id', 'numero_contrato', 'titulo', 'cliente__nombres', 'cliente__apellidos',
+            'tipo_servicio', 'fecha_inicio', 'fecha_fin', 'monto_total', 'adelanto',
+            'saldo_pendiente', 'estado'
+        )
+    
+    def formatear_fila(self, fila):
+        """Fila del detalle de contratos"""
+        # Misma regla que Contrato.porcentaje_adelanto
+        if fila['monto_total'] and fila['adelanto']:
+            porcentaje_adelanto = (fila['adelanto'] / fila['monto_total']) * 100
+        else:
+            porcentaje_adelanto = 0
         
-        return detalle
+        return {
+            'id': fila['id'],
+            'numero_contrato': fila['numero_contrato'],
+            'titulo': fila['titulo'],
+            'cliente': nombre_completo(fila['cliente__nombres'], fila['cliente__apellidos']),
+            'tipo_servicio': etiqueta(Contrato, 'tipo_servicio', fila['tipo_servicio']),
+            'fecha_inicio': fila['fecha_inicio'].isoformat(),
+            'fecha_fin': fila['fecha_fin'].isoformat(),
+            'monto_total': float(fila['monto_total']),
+            'adelanto': float(fila['adelanto']),
+            'saldo_pendiente': float(fila['saldo_pendiente']),
+            'estado': etiqueta(Contrato, 'estado', fila['estado']),
+            'porcentaje_adelanto': round(porcentaje_adelanto, 2),
+        }
+
+
+# Mapeo de categorías a servicios (usado por las vistas y las exportaciones en segundo plano)
+CATEGORIAS_REPORTE = {
+    'ventas': {
+        'service': VentasReportService,
+        'titulo': 'Reporte de Ventas',
+        'nombre_archivo': 'Reporte_Ventas'
+    },
+    'inventario': {
+        'service': InventarioReportService,
+        'titulo': 'Reporte de Inventario',
+        'nombre_archivo': 'Reporte_Inventario'
+    },
+    'produccion': {
+        'service': ProduccionReportService,
+        'titulo': 'Reporte de Producción',
+        'nombre_archivo': 'Reporte_Produccion'
+    },
+    'clientes': {
+        'service': ClientesReportService,
+        'titulo': 'Reporte de Clientes',
+        'nombre_archivo': 'Reporte_Clientes'
+    },
+    'financiero': {
+        'service': FinancieroReportService,
+        'titulo': 'Reporte Financiero',
+        'nombre_archivo': 'Reporte_Financiero'
+    },
+    'contratos': {
+        'service': ContratosReportService,
+        'titulo': 'Reporte de Contratos',
+        'nombre_archivo': 'Reporte_Contratos'
+    },
+}
+
+
+class ResumenReportesService:
+    """
+    Resumen de todas las categorías de reportes (ReportViewSet.todos)
+
+    Las categorías son independientes, así que se calculan en paralelo en un
+    pool de hilos; cada hilo usa su propia conexión a la base de datos y la
+    cierra al terminar. La latencia queda acotada por la categoría más lenta.
+    Con REPORTES_RESUMEN_WORKERS <= 1 se calculan en serie en el hilo actual.
+    """
+
+    def __init__(self, tenant, fecha_inicio, fecha_fin, limite=RESUMEN_LIMITE, categorias=None):
+        self.tenant = tenant
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.limite = limite
+        self.categorias = categorias or CATEGORIAS_REPORTE
+
+    def get_max_workers(self):
+        return getattr(settings, 'REPORTES_RESUMEN_WORKERS', len(self.categorias))
+
+    def get_resumen_categoria(self, categoria):
+        """Resumen de una categoría con el formato de `todos`"""
+        info = self.categorias[categoria]
+        service = info['service'](self.tenant, self.fecha_inicio, self.fecha_fin)
+        return {
+            'titulo': info['titulo'],
+            'periodo_inicio': self.fecha_inicio.isoformat(),
+            'periodo_fin': self.fecha_fin.isoformat(),
+            **service.get_resumen(self.limite),
+        }
+
+    def _resumen_en_hilo(self, categoria):
+        try:
+            return self.get_resumen_categoria(categoria)
+        finally:
+            # Conexiones abiertas por el hilo del pool: no deben quedar colgadas
+            connections.close_all()
+
+    def generar(self):
+        """Diccionario {categoria: resumen} en el orden de las categorías"""
+        max_workers = min(self.get_max_workers(), len(self.categorias))
+        if max_workers <= 1:
+            return {categoria: self.get_resumen_categoria(categoria) for categoria in self.categorias}
 
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reportes') as pool:
+            futuros = {categoria: pool.submit(self._resumen_en_hilo, categoria) for categoria in self.categorias}
+            return {categoria: futuro.result() for categoria, futuro in futuros.items()}
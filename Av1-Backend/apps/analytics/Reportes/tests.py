@@ -1,6 +1,585 @@
 """
 Analytics Tests - Arte Ideas
 """
-from django.test import TestCase
+import os
+import shutil
+import tempfile
 
-# Tests para analytics se agregarán aquí según necesidades
\ No newline at end of file
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from apps.core.models import Tenant
+from apps.crm.models import Cliente
+from apps.commerce.models import Order
+from apps.commerce.pedidos.models import OrderPayment
+from apps.commerce.inventario.models import MolduraListon
+from apps.crm.contratos.models import Contrato
+from apps.operations.produccion.models import OrdenProduccion
+from apps.analytics.models import ExportJob
+from apps.core.perfilado import PerfilConsultasTestMixin
+from .services import (
+    VentasReportService, ClientesReportService, ProduccionReportService,
+    ResumenReportesService, CATEGORIAS_REPORTE
+)
+from .exportaciones import reclamar_exportaciones, limpiar_exportaciones_expiradas
+from .exporters import ExcelExporter
+
+User = get_user_model()
+
+
+class ReportesDetalleTest(TestCase):
+    """Tests para el detalle perezoso de reportes"""
+
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+
+        self.cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+
+        self.hoy = timezone.now().date()
+        for i in range(5):
+            Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-{i:03d}',
+                cliente=self.cliente,
+                document_type='proforma',
+                client_type='particular',
+                order_date=self.hoy - timedelta(days=i),
+                start_date=self.hoy,
+                delivery_date=self.hoy + timedelta(days=7),
+                status='pendiente'
+            )
+        Order.objects.filter(tenant=self.tenant).update(total=Decimal('100.00'), balance=Decimal('100.00'))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_detalle_perezoso(self):
+        """Test el detalle no consulta hasta iterarse y pagina con LIMIT/OFFSET"""
+        service = VentasReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        with self.assertNumQueries(0):
+            detalle = service.get_detalle()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(detalle), 5)
+
+        with self.assertNumQueries(1):
+            pagina = detalle[1:3]
+
+        self.assertEqual([fila['numero_pedido'] for fila in pagina], ['ORD-001', 'ORD-002'])
+        self.assertEqual(pagina[0]['cliente'], 'Juan Pérez')
+        self.assertEqual(pagina[0]['tipo_documento'], 'Proforma')
+        self.assertEqual(pagina[0]['saldo'], 100.0)
+
+    def test_iter_detalle(self):
+        """Test el generador de detalle produce las mismas filas"""
+        service = VentasReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        filas = service.iter_detalle(chunk_size=2)
+
+        self.assertEqual(list(filas), service.get_detalle()[:5])
+
+    def test_detalle_clientes_agregado(self):
+        """Test pedidos y ventas por cliente en una sola consulta"""
+        service = ClientesReportService(self.tenant)
+
+        with self.assertNumQueries(1):
+            filas = list(service.iter_detalle())
+
+        self.assertEqual(filas[0]['total_pedidos'], 5)
+        self.assertEqual(filas[0]['total_ventas'], 500.0)
+
+    def test_obtener_reporte_paginado(self):
+        """Test el endpoint de reporte devuelve una página del detalle"""
+        response = self.client.get('/api/analytics/reportes/ventas/', {'page_size': 2, 'page': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['detalle']), 2)
+        self.assertEqual(response.data['detalle'][0]['numero_pedido'], 'ORD-002')
+        self.assertEqual(response.data['paginacion']['total_registros'], 5)
+        self.assertEqual(response.data['paginacion']['total_paginas'], 3)
+        self.assertEqual(response.data['metricas']['total_pedidos'], 5)
+
+    def test_exportar_desde_generador(self):
+        """Test el exportador de Excel consume un generador"""
+        service = VentasReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        contenido = ExcelExporter().export_report(
+            titulo='Reporte de Ventas',
+            metricas=service.get_metrics(),
+            detalle=service.iter_detalle(),
+            fecha_inicio=service.fecha_inicio,
+            fecha_fin=service.fecha_fin,
+            categoria='ventas'
+        )
+
+        self.assertTrue(contenido.startswith(b'PK'))
+
+    def test_exportar_excel_streaming(self):
+        """Test la exportación streaming genera un xlsx válido por bloques"""
+        from openpyxl import load_workbook
+
+        service = VentasReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+        bloques = list(ExcelExporter().export_report_stream(
+            titulo='Reporte de Ventas',
+            metricas=service.get_metrics(),
+            detalle=service.iter_detalle(),
+            fecha_inicio=service.fecha_inicio,
+            fecha_fin=service.fecha_fin,
+            categoria='ventas',
+            chunk_size=1024
+        ))
+
+        self.assertGreater(len(bloques), 1)
+        ws = load_workbook(BytesIO(b''.join(bloques)), read_only=True)['Reporte']
+        filas = [fila for fila in ws.iter_rows(values_only=True) if fila]
+        self.assertEqual(filas[0][0], 'Reporte de Ventas')
+
+        encabezado = next(i for i, fila in enumerate(filas) if fila[0] == 'Id')
+        self.assertEqual(filas[encabezado][1], 'Numero Pedido')
+        self.assertEqual(
+            [fila[1] for fila in filas[encabezado + 1:]],
+            ['ORD-000', 'ORD-001', 'ORD-002', 'ORD-003', 'ORD-004']
+        )
+
+    def test_endpoint_exportar_excel_streaming(self):
+        """Test el endpoint de Excel responde con StreamingHttpResponse"""
+        response = self.client.get('/api/analytics/reportes/ventas/exportar/excel/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+
+class ExportacionesTest(TestCase):
+    """Tests para las exportaciones en segundo plano"""
+
+    def setUp(self):
+        """Configuración inicial"""
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media_root)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='ventas'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def encolar(self, formato='excel'):
+        response = self.client.post(f'/api/analytics/reportes/ventas/exportar/{formato}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.data['id']
+
+    def test_flujo_completo(self):
+        """Test encolar, procesar con el worker, consultar estado y descargar"""
+        job_id = self.encolar()
+
+        response = self.client.get(f'/api/analytics/exportaciones/{job_id}/')
+        self.assertEqual(response.data['estado'], 'pendiente')
+        self.assertIsNone(response.data['url_descarga'])
+
+        response = self.client.get(f'/api/analytics/exportaciones/{job_id}/descargar/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        call_command('procesar_exportaciones', workers=0, once=True, stdout=StringIO())
+
+        response = self.client.get(f'/api/analytics/exportaciones/{job_id}/')
+        self.assertEqual(response.data['estado'], 'completado')
+        self.assertTrue(response.data['url_descarga'].endswith(f'/exportaciones/{job_id}/descargar/'))
+
+        response = self.client.get(f'/api/analytics/exportaciones/{job_id}/descargar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+        self.assertIn('Reporte_Ventas_', response['Content-Disposition'])
+
+    def test_reclamar_una_sola_vez(self):
+        """Test un trabajo pendiente solo lo reclama un worker"""
+        job_id = self.encolar('pdf')
+
+        self.assertEqual(reclamar_exportaciones(5), [job_id])
+        self.assertEqual(reclamar_exportaciones(5), [])
+        self.assertEqual(ExportJob.objects.get(pk=job_id).estado, 'en_proceso')
+
+    def test_limpieza_por_ttl(self):
+        """Test los archivos y trabajos vencidos se eliminan"""
+        job_id = self.encolar('pdf')
+        call_command('procesar_exportaciones', workers=0, once=True, stdout=StringIO())
+
+        job = ExportJob.objects.get(pk=job_id)
+        self.assertEqual(job.estado, 'completado')
+        ruta = job.archivo.path
+
+        self.assertEqual(limpiar_exportaciones_expiradas(), 0)
+        self.assertEqual(limpiar_exportaciones_expiradas(ahora=job.expira_en + timedelta(seconds=1)), 1)
+        self.assertFalse(ExportJob.objects.filter(pk=job_id).exists())
+        self.assertFalse(os.path.exists(ruta))
+
+    def test_exportaciones_de_otro_usuario(self):
+        """Test un usuario no ve las exportaciones de otro usuario del tenant"""
+        job_id = self.encolar()
+        otro = User.objects.create_user(
+            username='otro',
+            email='otro@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='ventas'
+        )
+        self.client.force_authenticate(user=otro)
+
+        response = self.client.get(f'/api/analytics/exportaciones/{job_id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ResumenReportesTest(PerfilConsultasTestMixin, TransactionTestCase):
+    """Tests para el resumen de todas las categorías (reportes/todos)"""
+
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+        cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+        self.hoy = timezone.now().date()
+        for i in range(15):
+            Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-{i:03d}',
+                cliente=cliente,
+                document_type='proforma',
+                client_type='particular',
+                order_date=self.hoy,
+                start_date=self.hoy,
+                delivery_date=self.hoy + timedelta(days=7),
+                status='pendiente'
+            )
+
+    def test_resumen_con_limit_y_count(self):
+        """Test el resumen de una categoría usa LIMIT/COUNT y no el detalle completo"""
+        service = VentasReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        resumen = service.get_resumen(limite=3)
+
+        self.assertEqual(len(resumen['detalle']), 3)
+        self.assertEqual(resumen['total_registros'], 15)
+        self.assertEqual(resumen['metricas']['total_pedidos'], 15)
+
+    def test_resumen_paralelo_igual_a_serie(self):
+        """Test el cálculo en hilos devuelve lo mismo que el cálculo en serie"""
+        resumen = ResumenReportesService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        with override_settings(REPORTES_RESUMEN_WORKERS=1):
+            en_serie = resumen.generar()
+        with override_settings(REPORTES_RESUMEN_WORKERS=6):
+            en_paralelo = resumen.generar()
+
+        self.assertEqual(list(en_paralelo), ['ventas', 'inventario', 'produccion', 'clientes', 'financiero', 'contratos'])
+        self.assertEqual(en_paralelo, en_serie)
+        self.assertEqual(en_paralelo['ventas']['total_registros'], 15)
+        self.assertEqual(len(en_paralelo['ventas']['detalle']), 10)
+
+    def test_resumen_sin_consultas_repetidas(self):
+        """Test ninguna categoría del resumen consulta por fila del detalle"""
+        resumen = ResumenReportesService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        with override_settings(REPORTES_RESUMEN_WORKERS=1):
+            with self.assertSinConsultasRepetidas():
+                resumen.generar()
+
+    def test_endpoint_todos(self):
+        """Test el endpoint respeta el parámetro limite"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get('/api/analytics/reportes/todos/', {'limite': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['ventas']['detalle']), 5)
+        self.assertEqual(response.data['ventas']['total_registros'], 15)
+        self.assertEqual(response.data['clientes']['total_registros'], 1)
+
+
+class PresupuestoConsultasReportesTest(TestCase):
+    """Presupuesto de consultas de las métricas de cada servicio de reportes"""
+
+    # Consultas máximas de get_metrics() por categoría (no dependen del volumen de datos)
+    PRESUPUESTO_METRICAS = {
+        'ventas': 1,
+        'inventario': 1,
+        'produccion': 1,
+        'clientes': 1,
+        'financiero': 2,  # pedidos + pagos
+        'contratos': 1,
+    }
+
+    def setUp(self):
+        """Datos en todas las categorías"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        operario = User.objects.create_user(
+            username='operario',
+            email='operario@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='operario'
+        )
+        cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+        self.hoy = timezone.now().date()
+
+        for i, estado in enumerate(['pendiente', 'en_proceso', 'terminado']):
+            pedido = Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-{i:03d}',
+                cliente=cliente,
+                document_type='proforma',
+                client_type='particular',
+                order_date=self.hoy,
+                start_date=self.hoy,
+                delivery_date=self.hoy + timedelta(days=7),
+                status='completado' if estado == 'terminado' else 'pendiente'
+            )
+            OrderPayment.objects.create(
+                order=pedido,
+                payment_date=self.hoy,
+                amount=Decimal('10.00'),
+                payment_method='efectivo',
+                registered_by=operario
+            )
+            OrdenProduccion.objects.create(
+                tenant=self.tenant,
+                numero_op=f'OP-{i:03d}',
+                pedido=pedido,
+                descripcion='Enmarcado',
+                tipo='enmarcado',
+                estado=estado,
+                operario=operario,
+                fecha_estimada=date.today() - timedelta(days=1),  # Mismo criterio que is_vencida
+                tiempo_real_horas=Decimal('2.00') if estado == 'terminado' else None
+            )
+
+        Contrato.objects.create(
+            tenant=self.tenant,
+            cliente=cliente,
+            numero_contrato='CT-001',
+            titulo='Sesión',
+            descripcion='Sesión',
+            tipo_servicio='fotografia',
+            fecha_inicio=self.hoy,
+            fecha_fin=self.hoy + timedelta(days=30),
+            monto_total=Decimal('500.00'),
+            adelanto=Decimal('200.00')
+        )
+        MolduraListon.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Moldura Clásica',
+            stock_disponible=5,
+            stock_minimo=10,
+            costo_unitario=Decimal('10.00'),
+            precio_venta=Decimal('20.00'),
+            nombre_moldura='clasica',
+            ancho='1',
+            color='dorado',
+            material='madera'
+        )
+
+    def test_presupuesto_metricas(self):
+        """Test ningún servicio supera su presupuesto de consultas en get_metrics()"""
+        for categoria, info in CATEGORIAS_REPORTE.items():
+            service = info['service'](self.tenant, self.hoy - timedelta(days=30), self.hoy)
+            with self.subTest(categoria=categoria):
+                with CaptureQueriesContext(connection) as consultas:
+                    service.get_metrics()
+                self.assertLessEqual(
+                    len(consultas), self.PRESUPUESTO_METRICAS[categoria],
+                    '\n'.join(q['sql'] for q in consultas.captured_queries)
+                )
+
+    def test_presupuesto_resumen(self):
+        """Test el resumen de cada categoría cuesta métricas + LIMIT + COUNT"""
+        for categoria, info in CATEGORIAS_REPORTE.items():
+            service = info['service'](self.tenant, self.hoy - timedelta(days=30), self.hoy)
+            with self.subTest(categoria=categoria):
+                with CaptureQueriesContext(connection) as consultas:
+                    service.get_resumen()
+                self.assertLessEqual(len(consultas), self.PRESUPUESTO_METRICAS[categoria] + 2)
+
+    def test_metricas_produccion(self):
+        """Test las métricas agregadas en una consulta mantienen los valores"""
+        service = ProduccionReportService(self.tenant, self.hoy - timedelta(days=30), self.hoy)
+
+        metricas = service.get_metrics()
+
+        self.assertEqual(metricas['total_ordenes'], 3)
+        self.assertEqual(metricas['ordenes_completadas'], 1)
+        self.assertEqual(metricas['ordenes_en_proceso'], 1)
+        self.assertEqual(metricas['ordenes_pendientes'], 1)
+        self.assertEqual(metricas['ordenes_vencidas'], 2)
+        self.assertEqual(metricas['tiempo_promedio_horas'], 2.0)
+        self.assertEqual(metricas['tasa_completitud'], 33.33)
+
+
+class BenchmarkEndpointsTest(TestCase):
+    """Sembrado del tenant de benchmark y medición de endpoints (volumen mínimo)"""
+
+    def setUp(self):
+        salida = StringIO()
+        call_command(
+            'sembrar_tenant_benchmark', slug='bench', clientes=40, pedidos=120, skus=30,
+            contratos=5, ordenes_produccion=15, permitir_sin_debug=True, stdout=salida
+        )
+        self.tenant = Tenant.objects.get(slug='bench')
+
+    def test_sembrado(self):
+        """Conteos pedidos, pedidos coherentes y las diez categorías de inventario"""
+        from apps.commerce.inventario.models import INVENTORY_MODELS, InventarioCatalogo
+        from apps.analytics.benchmark import conteos_tenant
+
+        conteos = conteos_tenant(self.tenant)
+        self.assertEqual(conteos['clientes'], 40)
+        self.assertEqual(conteos['pedidos'], 120)
+        self.assertEqual(conteos['contratos'], 5)
+        self.assertEqual(conteos['ordenes_produccion'], 15)
+        self.assertEqual(conteos['skus'], 30)
+        self.assertGreaterEqual(conteos['items'], 120)
+        self.assertEqual(
+            set(InventarioCatalogo.objects.filter(tenant=self.tenant).values_list('categoria', flat=True)),
+            {modelo._meta.model_name for modelo in INVENTORY_MODELS}
+        )
+
+        # Clientes, pedidos y contratos en el índice de búsqueda
+        from apps.core.busqueda.models import DocumentoBusqueda
+        self.assertEqual(DocumentoBusqueda.objects.filter(tenant=self.tenant).count(), 40 + 120 + 5)
+
+        for pedido in Order.objects.filter(tenant=self.tenant).prefetch_related('payments'):
+            self.assertEqual(pedido.balance, pedido.total - pedido.paid_amount)
+            self.assertEqual(sum(pago.amount for pago in pedido.payments.all()), pedido.paid_amount)
+
+    def test_tenant_existente(self):
+        salida = StringIO()
+        call_command(
+            'sembrar_tenant_benchmark', slug='bench', clientes=1, pedidos=1, permitir_sin_debug=True, stdout=salida
+        )
+        self.assertIn('ya existe', salida.getvalue())
+        self.assertEqual(Cliente.objects.filter(tenant=self.tenant).count(), 40)
+
+    def test_sin_debug_no_siembra(self):
+        """Con DEBUG desactivado el comando exige --permitir-sin-debug"""
+        salida = StringIO()
+        call_command('sembrar_tenant_benchmark', slug='bench-2', clientes=1, pedidos=1, stdout=salida)
+        self.assertIn('--permitir-sin-debug', salida.getvalue())
+        self.assertFalse(Tenant.objects.filter(slug='bench-2').exists())
+
+    def test_usuarios_sin_contrasena(self):
+        """Los usuarios sembrados no pueden iniciar sesión con contraseña"""
+        usuarios = User.objects.filter(tenant=self.tenant)
+        self.assertEqual(usuarios.count(), 3)
+        for usuario in usuarios:
+            self.assertFalse(usuario.has_usable_password())
+
+    def test_benchmark_y_comparacion(self):
+        """El baseline mide cada endpoint del grupo y la comparación detecta más consultas"""
+        from apps.analytics.benchmark import BenchmarkEndpoints, comparar_baselines
+
+        baseline = BenchmarkEndpoints(self.tenant, repeticiones=1, grupos=['dashboard']).ejecutar()
+
+        self.assertEqual(baseline['tenant'], 'bench')
+        self.assertEqual(baseline['datos']['pedidos'], 120)
+        self.assertEqual(len(baseline['endpoints']), 9)
+        for resultado in baseline['endpoints']:
+            self.assertEqual(resultado['status'], 200, resultado['endpoint'])
+            self.assertGreater(resultado['consultas_frio'], 0)
+            self.assertIn('p95', resultado['latencia_ms'])
+
+        self.assertEqual(comparar_baselines(baseline, baseline), [])
+        anterior = {'endpoints': [dict(baseline['endpoints'][0], consultas=-1)]}
+        regresiones = comparar_baselines(anterior, baseline)
+        self.assertEqual(len(regresiones), 1)
+        self.assertIn('consultas', regresiones[0]['motivos'][0])
@@ -6,12 +6,13 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.request import Request
-from .views import ReportViewSet
+from .views import ReportViewSet, ExportJobViewSet
 
 app_name = 'analytics'
 
 # Router para ViewSets (para compatibilidad con otras rutas si las hay)
 router = DefaultRouter()
+router.register(r'exportaciones', ExportJobViewSet, basename='exportaciones')
 
 # Vistas basadas en clase que usan el ViewSet
 class CategoriasView(APIView):
@@ -47,7 +48,7 @@ class ObtenerReporteView(APIView):
         return viewset.obtener_reporte(request, categoria=categoria)
 
 class ExportarExcelView(APIView):
-    """Vista para exportar reporte a Excel"""
+    """Vista para exportar reporte a Excel (GET inmediato, POST en segundo plano)"""
     permission_classes = ReportViewSet.permission_classes
     
     def get(self, request, categoria):
@@ -55,9 +56,16 @@ class ExportarExcelView(APIView):
         viewset.request = request
         viewset.format_kwarg = getattr(request, 'format', None)
         return viewset.exportar_excel(request, categoria=categoria)
+    
+    def post(self, request, categoria):
+        """Encolar la exportación en segundo plano"""
+        viewset = ReportViewSet()
+        viewset.request = request
+        viewset.format_kwarg = getattr(request, 'format', None)
+        return viewset.encolar_exportacion(request, categoria=categoria, formato='excel')
 
 class ExportarPdfView(APIView):
-    """Vista para exportar reporte a PDF"""
+    """Vista para exportar reporte a PDF (GET inmediato, POST en segundo plano)"""
     permission_classes = ReportViewSet.permission_classes
     
     def get(self, request, categoria):
@@ -65,6 +73,13 @@ class ExportarPdfView(APIView):
         viewset.request = request
         viewset.format_kwarg = getattr(request, 'format', None)
         return viewset.exportar_pdf(request, categoria=categoria)
+    
+    def post(self, request, categoria):
+        """Encolar la exportación en segundo plano"""
+        viewset = ReportViewSet()
+        viewset.request = request
+        viewset.format_kwarg = getattr(request, 'format', None)
+        return viewset.encolar_exportacion(request, categoria=categoria, formato='pdf')
 
 urlpatterns = [
     # Rutas de reportes - definidas manualmente para soportar parámetros dinámicos
@@ -73,4 +88,7 @@ urlpatterns = [
     path('reportes/<str:categoria>/', ObtenerReporteView.as_view(), name='reportes-obtener'),
     path('reportes/<str:categoria>/exportar/excel/', ExportarExcelView.as_view(), name='reportes-exportar-excel'),
     path('reportes/<str:categoria>/exportar/pdf/', ExportarPdfView.as_view(), name='reportes-exportar-pdf'),
-]
\ No newline at end of file
+]
+
+# Trabajos de exportación: /exportaciones/, /exportaciones/{id}/, /exportaciones/{id}/descargar/
+urlpatterns += router.urls
\ No newline at end of file
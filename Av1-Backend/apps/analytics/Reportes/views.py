@@ -7,19 +7,27 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from django.http import HttpResponse, JsonResponse
+from rest_framework.pagination import PageNumberPagination
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, FileResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
+from itertools import chain
 import json
 import io
 from decimal import Decimal
 
-from .services import (
-    VentasReportService, InventarioReportService, ProduccionReportService,
-    ClientesReportService, FinancieroReportService, ContratosReportService
-)
-from .serializers import ReportSerializer
+from .services import CATEGORIAS_REPORTE, RESUMEN_LIMITE, ResumenReportesService
+from apps.analytics.models import ExportJob
+from .serializers import ReportSerializer, ExportJobSerializer
 from .exporters import ExcelExporter, PDFExporter
+from .exportaciones import encolar_exportacion
+
+
+class ReportePagination(PageNumberPagination):
+    """Paginación del detalle de reportes (?page=N&page_size=M)"""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
 
 
 class ReportViewSet(viewsets.ViewSet):
@@ -29,38 +37,7 @@ class ReportViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
     # Mapeo de categorías a servicios
-    CATEGORIAS = {
-        'ventas': {
-            'service': VentasReportService,
-            'titulo': 'Reporte de Ventas',
-            'nombre_archivo': 'Reporte_Ventas'
-        },
-        'inventario': {
-            'service': InventarioReportService,
-            'titulo': 'Reporte de Inventario',
-            'nombre_archivo': 'Reporte_Inventario'
-        },
-        'produccion': {
-            'service': ProduccionReportService,
-            'titulo': 'Reporte de Producción',
-            'nombre_archivo': 'Reporte_Produccion'
-        },
-        'clientes': {
-            'service': ClientesReportService,
-            'titulo': 'Reporte de Clientes',
-            'nombre_archivo': 'Reporte_Clientes'
-        },
-        'financiero': {
-            'service': FinancieroReportService,
-            'titulo': 'Reporte Financiero',
-            'nombre_archivo': 'Reporte_Financiero'
-        },
-        'contratos': {
-            'service': ContratosReportService,
-            'titulo': 'Reporte de Contratos',
-            'nombre_archivo': 'Reporte_Contratos'
-        },
-    }
+    CATEGORIAS = CATEGORIAS_REPORTE
     
     def get_tenant(self):
         """Obtener tenant del usuario autenticado"""
@@ -80,10 +57,27 @@ class ReportViewSet(viewsets.ViewSet):
         # Si no hay tenant disponible, devolver None
         return None
     
-    def parse_dates(self, request):
+    def respuesta_sin_tenant(self):
+        """Respuesta 403 con ayuda para asignar un tenant al usuario"""
+        return Response(
+            {
+                'error': 'Usuario no tiene tenant asignado',
+                'mensaje': 'Por favor, asigna un tenant a tu usuario. Puedes usar: python manage.py setup_tenant --username tu_usuario --create-tenant',
+                'ayuda': {
+                    'listar_tenants': 'python manage.py setup_tenant --list-tenants',
+                    'listar_usuarios': 'python manage.py setup_tenant --list-users',
+                    'crear_tenant': 'python manage.py setup_tenant --username tu_usuario --create-tenant',
+                    'asignar_tenant': 'python manage.py setup_tenant --username tu_usuario --tenant-id 1'
+                }
+            },
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    def parse_dates(self, request, params=None):
         """Parsear fechas desde los parámetros de la request"""
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
+        params = request.query_params if params is None else params
+        fecha_inicio = params.get('fecha_inicio')
+        fecha_fin = params.get('fecha_fin')
         
         if fecha_inicio:
             try:
@@ -131,19 +125,7 @@ class ReportViewSet(viewsets.ViewSet):
         
         tenant = self.get_tenant()
         if not tenant:
-            return Response(
-                {
-                    'error': 'Usuario no tiene tenant asignado',
-                    'mensaje': 'Por favor, asigna un tenant a tu usuario. Puedes usar: python manage.py setup_tenant --username tu_usuario --create-tenant',
-                    'ayuda': {
-                        'listar_tenants': 'python manage.py setup_tenant --list-tenants',
-                        'listar_usuarios': 'python manage.py setup_tenant --list-users',
-                        'crear_tenant': 'python manage.py setup_tenant --username tu_usuario --create-tenant',
-                        'asignar_tenant': 'python manage.py setup_tenant --username tu_usuario --tenant-id 1'
-                    }
-                },
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return self.respuesta_sin_tenant()
         
         fecha_inicio, fecha_fin = self.parse_dates(request)
         
@@ -151,9 +133,11 @@ class ReportViewSet(viewsets.ViewSet):
         service_class = self.CATEGORIAS[categoria]['service']
         service = service_class(tenant, fecha_inicio, fecha_fin)
         
-        # Generar métricas y detalle
+        # Generar métricas y la página solicitada del detalle (LIMIT/OFFSET)
         metricas = service.get_metrics()
-        detalle = service.get_detalle()
+        paginator = ReportePagination()
+        detalle = paginator.paginate_queryset(service.get_detalle(), request, view=self)
+        pagina = paginator.page
         
         # Formatear respuesta
         reporte = {
@@ -163,6 +147,14 @@ class ReportViewSet(viewsets.ViewSet):
             'periodo_fin': fecha_fin.isoformat(),
             'metricas': metricas,
             'detalle': detalle,
+            'paginacion': {
+                'pagina': pagina.number,
+                'tamano_pagina': paginator.get_page_size(request),
+                'total_paginas': pagina.paginator.num_pages,
+                'total_registros': pagina.paginator.count,
+                'siguiente': paginator.get_next_link(),
+                'anterior': paginator.get_previous_link(),
+            },
             'fecha_generacion': timezone.now().isoformat(),
         }
         
@@ -184,19 +176,7 @@ class ReportViewSet(viewsets.ViewSet):
         
         tenant = self.get_tenant()
         if not tenant:
-            return Response(
-                {
-                    'error': 'Usuario no tiene tenant asignado',
-                    'mensaje': 'Por favor, asigna un tenant a tu usuario. Puedes usar: python manage.py setup_tenant --username tu_usuario --create-tenant',
-                    'ayuda': {
-                        'listar_tenants': 'python manage.py setup_tenant --list-tenants',
-                        'listar_usuarios': 'python manage.py setup_tenant --list-users',
-                        'crear_tenant': 'python manage.py setup_tenant --username tu_usuario --create-tenant',
-                        'asignar_tenant': 'python manage.py setup_tenant --username tu_usuario --tenant-id 1'
-                    }
-                },
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return self.respuesta_sin_tenant()
         
         fecha_inicio, fecha_fin = self.parse_dates(request)
         rango = request.query_params.get('rango', 'visible').lower()
@@ -206,7 +186,7 @@ class ReportViewSet(viewsets.ViewSet):
         service = service_class(tenant, fecha_inicio, fecha_fin)
         
         metricas = service.get_metrics()
-        detalle = service.get_detalle()
+        detalle = service.iter_detalle()  # Generador: el exportador consume las filas por bloques
         
         # Generar Excel
         exporter = ExcelExporter()
@@ -214,7 +194,7 @@ class ReportViewSet(viewsets.ViewSet):
         titulo = self.CATEGORIAS[categoria]['titulo']
         
         try:
-            excel_file = exporter.export_report(
+            stream = exporter.export_report_stream(
                 titulo=titulo,
                 metricas=metricas,
                 detalle=detalle,
@@ -222,13 +202,15 @@ class ReportViewSet(viewsets.ViewSet):
                 fecha_fin=fecha_fin,
                 categoria=categoria
             )
+            # Generar el primer bloque aquí para que los errores se reporten como 500
+            primer_bloque = next(stream, b'')
             
             # Generar nombre de archivo con fecha
             fecha_str = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"{nombre_archivo}_{fecha_str}.xlsx"
             
-            response = HttpResponse(
-                excel_file,
+            response = StreamingHttpResponse(
+                chain([primer_bloque], stream),
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             )
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
@@ -255,19 +237,7 @@ class ReportViewSet(viewsets.ViewSet):
         
         tenant = self.get_tenant()
         if not tenant:
-            return Response(
-                {
-                    'error': 'Usuario no tiene tenant asignado',
-                    'mensaje': 'Por favor, asigna un tenant a tu usuario. Puedes usar: python manage.py setup_tenant --username tu_usuario --create-tenant',
-                    'ayuda': {
-                        'listar_tenants': 'python manage.py setup_tenant --list-tenants',
-                        'listar_usuarios': 'python manage.py setup_tenant --list-users',
-                        'crear_tenant': 'python manage.py setup_tenant --username tu_usuario --create-tenant',
-                        'asignar_tenant': 'python manage.py setup_tenant --username tu_usuario --tenant-id 1'
-                    }
-                },
-                status=status.HTTP_403_FORBIDDEN
-            )
+            return self.respuesta_sin_tenant()
         
         fecha_inicio, fecha_fin = self.parse_dates(request)
         rango = request.query_params.get('rango', 'visible').lower()
@@ -277,7 +247,7 @@ class ReportViewSet(viewsets.ViewSet):
         service = service_class(tenant, fecha_inicio, fecha_fin)
         
         metricas = service.get_metrics()
-        detalle = service.get_detalle()
+        detalle = service.iter_detalle()  # Generador: el exportador consume las filas por bloques
         
         # Generar PDF
         exporter = PDFExporter()
@@ -308,46 +278,114 @@ class ReportViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=False, methods=['get'])
-    def todos(self, request):
+    def encolar_exportacion(self, request, categoria=None, formato='excel'):
         """
-        Obtener todos los reportes de todas las categorías
-        Útil para dashboard general
+        Encolar la exportación del reporte para generarla en segundo plano
+        Parámetros: categoria, fecha_inicio, fecha_fin (en el cuerpo o la query)
+        Responde 202 con el trabajo; su estado se consulta en /exportaciones/{id}/
         """
+        categoria = categoria.lower()
+        
+        if categoria not in self.CATEGORIAS:
+            return Response(
+                {'error': f'Categoría "{categoria}" no válida'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         tenant = self.get_tenant()
         if not tenant:
+            return self.respuesta_sin_tenant()
+        
+        fecha_inicio, fecha_fin = self.parse_dates(request, request.data or request.query_params)
+        
+        try:
+            job = encolar_exportacion(tenant, request.user, f'reporte_{formato}', {
+                'categoria': categoria,
+                'fecha_inicio': fecha_inicio.isoformat(),
+                'fecha_fin': fecha_fin.isoformat(),
+            })
+        except Exception as e:
             return Response(
-                {
-                    'error': 'Usuario no tiene tenant asignado',
-                    'mensaje': 'Por favor, asigna un tenant a tu usuario. Puedes usar: python manage.py setup_tenant --username tu_usuario --create-tenant',
-                    'ayuda': {
-                        'listar_tenants': 'python manage.py setup_tenant --list-tenants',
-                        'listar_usuarios': 'python manage.py setup_tenant --list-users',
-                        'crear_tenant': 'python manage.py setup_tenant --username tu_usuario --create-tenant',
-                        'asignar_tenant': 'python manage.py setup_tenant --username tu_usuario --tenant-id 1'
-                    }
-                },
-                status=status.HTTP_403_FORBIDDEN
+                {'error': f'Error al encolar la exportación: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+        serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def todos(self, request):
+        """
+        Obtener el resumen de todas las categorías de reportes
+        Útil para dashboard general. Parámetros: fecha_inicio, fecha_fin,
+        limite (filas de detalle por categoría, default 10, máximo 100)
+        """
+        tenant = self.get_tenant()
+        if not tenant:
+            return self.respuesta_sin_tenant()
+        
         fecha_inicio, fecha_fin = self.parse_dates(request)
         
-        reportes = {}
+        try:
+            limite = min(max(int(request.query_params.get('limite', RESUMEN_LIMITE)), 0), 100)
+        except ValueError:
+            limite = RESUMEN_LIMITE
         
-        for categoria, info in self.CATEGORIAS.items():
-            service_class = info['service']
-            service = service_class(tenant, fecha_inicio, fecha_fin)
-            
-            metricas = service.get_metrics()
-            detalle = service.get_detalle()
-            
-            reportes[categoria] = {
-                'titulo': info['titulo'],
-                'periodo_inicio': fecha_inicio.isoformat(),
-                'periodo_fin': fecha_fin.isoformat(),
-                'metricas': metricas,
-                'detalle': detalle[:10],  # Limitar detalle para no sobrecargar
-                'total_registros': len(detalle),
-            }
+        try:
+            reportes = ResumenReportesService(
+                tenant, fecha_inicio, fecha_fin, limite=limite, categorias=self.CATEGORIAS
+            ).generar()
+        except Exception as e:
+            return Response(
+                {'error': f'Error al generar el resumen de reportes: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
         return Response(reportes)
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Consulta de los trabajos de exportación en segundo plano
+    Cada usuario ve sus propias exportaciones; el administrador ve las del tenant
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExportJobSerializer
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ExportJob.objects.all()
+        if user.is_superuser:
+            return queryset
+        queryset = queryset.filter(tenant=user.tenant)
+        if getattr(user, 'role', None) not in ('admin', 'super_admin'):
+            queryset = queryset.filter(usuario=user)
+        return queryset
+    
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descargar el archivo generado por el trabajo"""
+        job = self.get_object()
+        
+        if not job.disponible:
+            return Response(
+                {
+                    'error': 'El archivo no está disponible',
+                    'estado': job.estado,
+                    'detalle': job.error,
+                },
+                status=status.HTTP_409_CONFLICT if job.estado in ('pendiente', 'en_proceso') else status.HTTP_410_GONE
+            )
+        
+        try:
+            return FileResponse(
+                job.archivo.open('rb'),
+                as_attachment=True,
+                filename=job.nombre_archivo,
+                content_type=job.content_type
+            )
+        except FileNotFoundError:
+            return Response(
+                {'error': 'El archivo de la exportación ya no existe'},
+                status=status.HTTP_410_GONE
+            )
@@ -2,7 +2,7 @@
 Analytics Admin - Arte Ideas
 """
 from django.contrib import admin
-from .models import ReportConfiguration
+from .models import ReportConfiguration, ExportJob
 
 
 @admin.register(ReportConfiguration)
@@ -28,6 +28,20 @@ class ReportConfigurationAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """
+    Admin para trabajos de exportación en segundo plano
+    """
+    list_display = ['id', 'tipo', 'estado', 'tenant', 'usuario', 'created_at', 'finalizado_en', 'expira_en']
+    list_filter = ['tipo', 'estado', 'created_at']
+    search_fields = ['nombre_archivo', 'usuario__username']
+    readonly_fields = [
+        'tenant', 'usuario', 'tipo', 'parametros', 'archivo', 'nombre_archivo', 'content_type',
+        'error', 'iniciado_en', 'finalizado_en', 'expira_en', 'created_at', 'updated_at'
+    ]
+
 # Importar admin de Reportes si existe
 try:
     from .Reportes import admin as reportes_admin
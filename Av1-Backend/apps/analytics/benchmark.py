@@ -0,0 +1,664 @@
+"""
+Benchmark de Endpoints - Arte Ideas Analytics
+
+Dos piezas para medir el rendimiento con volúmenes de un estudio grande en
+una sola máquina (SQLite o un MySQL local):
+
+- `SembradorTenant`: crea un tenant con datos realistas (clientes, pedidos
+  con items y pagos, SKUs en las diez categorías de inventario, contratos y
+  órdenes de producción) usando bulk_create por lotes, sin save() ni señales.
+- `BenchmarkEndpoints`: recorre los endpoints de dashboard, reportes, listados
+  y exportaciones con un token JWT real, mide latencia (frío, p50, p95, máx.)
+  y consultas con `PerfilConsultas`, y devuelve un baseline JSON que
+  `comparar_baselines` contrasta con uno anterior.
+
+Los comandos `sembrar_tenant_benchmark` y `benchmark_endpoints` son la
+interfaz de línea de comandos de este módulo.
+"""
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from apps.core.multitenancy.models import Tenant
+from apps.core.perfilado import PerfilConsultas
+from apps.core.secuencias import reservar_codigos
+
+User = get_user_model()
+
+NOMBRES = [
+    'María', 'José', 'Luis', 'Ana', 'Carlos', 'Rosa', 'Jorge', 'Carmen', 'Miguel', 'Lucía',
+    'Pedro', 'Elena', 'Juan', 'Sofía', 'Diego', 'Valeria', 'Andrés', 'Camila', 'Raúl', 'Gabriela',
+]
+APELLIDOS = [
+    'Quispe', 'Flores', 'Sánchez', 'Rodríguez', 'García', 'Rojas', 'Mendoza', 'Huamán', 'Torres',
+    'Vargas', 'Castillo', 'Chávez', 'Ramírez', 'Ramos', 'Díaz', 'Mamani', 'Gutiérrez', 'Espinoza',
+]
+COLEGIOS = ['San Martín', 'Santa Rosa', 'Los Andes', 'María Auxiliadora', 'San Agustín', 'Miraflores']
+
+GRUPOS = ['dashboard', 'reportes', 'listados', 'exportaciones']
+
+
+def _dinero(rng, minimo, maximo):
+    """Monto aleatorio con dos decimales entre minimo y maximo (soles)"""
+    return Decimal(rng.randint(int(minimo * 100), int(maximo * 100))) / 100
+
+
+class SembradorTenant:
+    """
+    Tenant sintético de gran volumen para benchmarks
+
+        SembradorTenant('benchmark', clientes=50000, pedidos=200000).sembrar()
+
+    Los datos son deterministas para una misma `semilla`. Los pedidos se
+    reparten en `dias_historia` días hacia atrás, con estados y pagos
+    coherentes con su fecha de entrega; los campos derivados (totales, saldo,
+    estado de pago, atraso) se calculan con los mismos métodos de Order que
+    usa la creación masiva de pedidos.
+    """
+
+    def __init__(self, slug, clientes=50000, pedidos=200000, skus=5000, contratos=2000,
+                 ordenes_produccion=20000, dias_historia=730, semilla=42, lote=2000, salida=None):
+        self.slug = slug
+        self.total_clientes = clientes
+        self.total_pedidos = pedidos
+        self.total_skus = skus
+        self.total_contratos = contratos
+        self.total_ordenes = ordenes_produccion
+        self.dias_historia = dias_historia
+        self.lote = lote
+        self.rng = random.Random(semilla)
+        self.salida = salida or (lambda mensaje: None)
+        self.hoy = timezone.localdate()
+        self.tenant = None
+        self.usuarios = {}
+
+    def sembrar(self):
+        """Crear el tenant completo y devolver los conteos por modelo"""
+        if Tenant.objects.filter(slug=self.slug).exists():
+            raise ValueError(f'Ya existe un tenant con slug "{self.slug}"')
+
+        inicio = time.perf_counter()
+        self.crear_tenant()
+        clientes = self.crear_clientes()
+        skus = self.crear_inventario()
+        contratos = self.crear_contratos(clientes)
+        pedidos = self.crear_pedidos(clientes, contratos, skus)
+        self.crear_ordenes_produccion(pedidos)
+        self.indexar_busqueda()
+        self.salida(f'Datos sembrados en {time.perf_counter() - inicio:.1f} s')
+        return conteos_tenant(self.tenant)
+
+    def _log(self, etapa, cantidad, inicio):
+        self.salida(f'  {etapa}: {cantidad} en {time.perf_counter() - inicio:.1f} s')
+
+    def indexar_busqueda(self):
+        """bulk_create no dispara las señales del índice de búsqueda: indexar al final"""
+        from apps.core.busqueda.services import ENTIDADES, BusquedaService
+
+        inicio = time.perf_counter()
+        total = sum(
+            BusquedaService.reindexar(entidad, entidad.queryset().filter(tenant=self.tenant))
+            for entidad in ENTIDADES.values()
+        )
+        self._log('Documentos de búsqueda', total, inicio)
+
+    def crear_tenant(self):
+        self.tenant = Tenant.objects.create(
+            name=f'Benchmark {self.slug}',
+            slug=self.slug,
+            business_name=f'Estudio {self.slug}',
+            business_address='Av. Arequipa 1234, Lima',
+            business_phone='014567890',
+            business_email=f'contacto@{self.slug}.pe',
+            business_ruc='20123456789',
+        )
+        # Sin contraseña utilizable: BenchmarkEndpoints se autentica con un JWT
+        # emitido por ArteIdeasRefreshToken.for_user, nadie inicia sesión con ellos
+        for role in ('admin', 'ventas', 'operario'):
+            self.usuarios[role] = User.objects.create_user(
+                username=f'{self.slug}-{role}',
+                email=f'{role}@{self.slug}.pe',
+                password=None,
+                role=role,
+                tenant=self.tenant,
+            )
+        return self.tenant
+
+    def crear_clientes(self):
+        """Clientes particulares, colegios y empresas. Devuelve [(id, tipo, nivel, grado, sección)]"""
+        from apps.crm.models import Cliente
+
+        inicio = time.perf_counter()
+        rng = self.rng
+        with transaction.atomic():
+            for desde in range(0, self.total_clientes, self.lote):
+                nuevos = []
+                for i in range(desde, min(desde + self.lote, self.total_clientes)):
+                    tipo = rng.choices(['particular', 'colegio', 'empresa'], weights=[80, 12, 8])[0]
+                    cliente = Cliente(
+                        tenant=self.tenant,
+                        tipo_cliente=tipo,
+                        nombres=rng.choice(NOMBRES),
+                        apellidos=f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+                        email=f'cliente{i}@{self.slug}.pe',
+                        telefono=f'9{rng.randint(10000000, 99999999)}',
+                        dni=f'{self.tenant.id:04d}{i:08d}',
+                        direccion=f'Jr. {rng.choice(APELLIDOS)} {rng.randint(100, 2999)}, Lima',
+                        activo=rng.random() > 0.05,
+                    )
+                    if tipo == 'colegio':
+                        cliente.razon_social = f'I.E. {rng.choice(COLEGIOS)}'
+                        cliente.nivel_educativo = rng.choice(['inicial', 'primaria', 'secundaria'])
+                        cliente.grado = f'{rng.randint(1, 6)}°'
+                        cliente.seccion = rng.choice('ABCD')
+                    elif tipo == 'empresa':
+                        cliente.razon_social = f'{rng.choice(APELLIDOS)} S.A.C.'
+                    nuevos.append(cliente)
+                Cliente.objects.bulk_create(nuevos)
+
+        clientes = list(
+            Cliente.objects.filter(tenant=self.tenant).order_by('id')
+            .values_list('id', 'tipo_cliente', 'nivel_educativo', 'grado', 'seccion')
+        )
+        self._log('Clientes', len(clientes), inicio)
+        return clientes
+
+    def valores_sku(self, modelo, indice):
+        """Campos propios de la categoría: opciones al azar y textos/fechas genéricos"""
+        from apps.commerce.inventario.models import BaseInventarioModel
+
+        base = {field.name for field in BaseInventarioModel._meta.fields}
+        valores = {}
+        for field in modelo._meta.concrete_fields:
+            if field.name in base or field.primary_key:
+                continue
+            if field.choices:
+                valores[field.name] = self.rng.choice(field.choices)[0]
+            elif isinstance(field, models.DateField):
+                valores[field.name] = self.hoy - timedelta(days=self.rng.randint(0, 365))
+            elif isinstance(field, models.CharField):
+                valores[field.name] = f'{field.verbose_name} {indice}'[:field.max_length]
+        return valores
+
+    def crear_inventario(self):
+        """SKUs repartidos en las diez categorías. Devuelve [(nombre, código, precio)]"""
+        from apps.commerce.inventario.models import INVENTORY_MODELS, InventarioCatalogo
+
+        inicio = time.perf_counter()
+        rng = self.rng
+        por_categoria = max(1, self.total_skus // len(INVENTORY_MODELS))
+        skus = []
+        with transaction.atomic():
+            for modelo in INVENTORY_MODELS:
+                nuevos = []
+                for i in range(por_categoria):
+                    costo = _dinero(rng, 1, 300)
+                    stock_minimo = rng.randint(0, 20)
+                    # ~10% sin stock y ~15% bajo el mínimo, para que haya alertas
+                    azar = rng.random()
+                    if azar < 0.10:
+                        stock = 0
+                    elif azar < 0.25:
+                        stock = rng.randint(0, stock_minimo)
+                    else:
+                        stock = rng.randint(stock_minimo + 1, 500)
+                    nombre = f'{modelo._meta.verbose_name} {i + 1}'
+                    codigo = f'{modelo._meta.model_name[:4].upper()}-{i + 1:05d}'
+                    precio = (costo * Decimal('1.6')).quantize(Decimal('0.01'))
+                    nuevos.append(modelo(
+                        tenant=self.tenant,
+                        nombre_producto=nombre,
+                        codigo_producto=codigo,
+                        stock_disponible=stock,
+                        stock_minimo=stock_minimo,
+                        costo_unitario=costo,
+                        precio_venta=precio,
+                        ubicacion=f'Estante {rng.randint(1, 40)}',
+                        proveedor=f'Proveedor {rng.randint(1, 25)}',
+                        fecha_ultima_compra=self.hoy - timedelta(days=rng.randint(0, 180)),
+                        is_active=rng.random() > 0.03,
+                        **self.valores_sku(modelo, i + 1)
+                    ))
+                    skus.append((nombre, codigo, precio))
+                modelo.objects.bulk_create(nuevos, batch_size=self.lote)
+            InventarioCatalogo.reconstruir(tenant=self.tenant)
+
+        self._log('SKUs de inventario', len(skus), inicio)
+        return skus
+
+    def crear_contratos(self, clientes):
+        """Contratos de colegios y empresas. Devuelve [(id, cliente_id)]"""
+        from apps.crm.models import Contrato
+
+        inicio = time.perf_counter()
+        rng = self.rng
+        institucionales = [cliente for cliente in clientes if cliente[1] != 'particular'] or clientes
+        with transaction.atomic():
+            numeros = reservar_codigos(
+                self.tenant, 'CT', Contrato.objects.filter(tenant=self.tenant), 'numero_contrato',
+                cantidad=self.total_contratos
+            )
+            nuevos = []
+            for numero in numeros:
+                cliente_id = rng.choice(institucionales)[0]
+                fecha_inicio = self.hoy - timedelta(days=rng.randint(0, self.dias_historia))
+                fecha_fin = fecha_inicio + timedelta(days=rng.randint(30, 365))
+                monto = _dinero(rng, 1500, 60000)
+                adelanto = (monto * Decimal(rng.choice([0, 20, 30, 50]))) / 100
+                if fecha_fin < self.hoy:
+                    estado = rng.choices(['completado', 'cancelado'], weights=[90, 10])[0]
+                else:
+                    estado = rng.choices(['borrador', 'activo'], weights=[20, 80])[0]
+                nuevos.append(Contrato(
+                    tenant=self.tenant,
+                    cliente_id=cliente_id,
+                    numero_contrato=numero,
+                    titulo=f'Contrato {numero}',
+                    descripcion='Servicio fotográfico de promoción',
+                    tipo_servicio=rng.choice(['fotografia', 'graduaciones', 'evento', 'enmarcado']),
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    monto_total=monto,
+                    adelanto=adelanto.quantize(Decimal('0.01')),
+                    saldo_pendiente=(monto - adelanto).quantize(Decimal('0.01')),
+                    estado=estado,
+                ))
+            Contrato.objects.bulk_create(nuevos, batch_size=self.lote)
+
+        contratos = list(Contrato.objects.filter(tenant=self.tenant).values_list('id', 'cliente_id'))
+        self._log('Contratos', len(contratos), inicio)
+        return contratos
+
+    def estado_pedido(self, delivery_date):
+        """Estado según la fecha de entrega (apply_derived_fields marca los atrasados)"""
+        if delivery_date < self.hoy:
+            return self.rng.choices(['completado', 'cancelado', 'en_proceso'], weights=[88, 5, 7])[0]
+        return self.rng.choices(['pendiente', 'confirmado', 'en_proceso'], weights=[35, 35, 30])[0]
+
+    def pagado(self, order):
+        """Monto pagado coherente con el estado del pedido"""
+        if order.status == 'completado':
+            return order.total
+        if order.status == 'cancelado':
+            return Decimal('0')
+        return self.rng.choice([Decimal('0'), (order.total / 2).quantize(Decimal('0.01')), order.total])
+
+    def crear_pedidos(self, clientes, contratos, skus):
+        """
+        Pedidos con 1 a 4 items y sus pagos, en orden de fecha
+
+        Los números PED-AAAA-NNNN se reservan por año. Devuelve
+        [(id, cliente_id, status, delivery_date)].
+        """
+        from apps.commerce.pedidos.models import Order, OrderItem, OrderPayment
+        from apps.commerce.pedidos.services import OrderNumberService
+
+        inicio = time.perf_counter()
+        rng = self.rng
+        clientes_por_id = {cliente[0]: cliente for cliente in clientes}
+        fechas = sorted(
+            self.hoy - timedelta(days=rng.randint(0, self.dias_historia))
+            for _ in range(self.total_pedidos)
+        )
+        por_anio = defaultdict(int)
+        for fecha in fechas:
+            por_anio[fecha.year] += 1
+
+        pedidos = []
+        with transaction.atomic():
+            numeros = {
+                anio: iter(OrderNumberService.reserve_block(self.tenant, cantidad, year=anio))
+                for anio, cantidad in por_anio.items()
+            }
+            for desde in range(0, len(fechas), self.lote):
+                lote_pedidos, lote_items = [], []
+                for order_date in fechas[desde:desde + self.lote]:
+                    document_type = rng.choices(['nota_venta', 'proforma', 'contrato'], weights=[60, 30, 10])[0]
+                    contrato_id = None
+                    if document_type == 'contrato' and contratos:
+                        contrato_id, cliente_id = rng.choice(contratos)
+                    else:
+                        document_type = 'nota_venta' if document_type == 'contrato' else document_type
+                        cliente_id = rng.choice(clientes)[0]
+                    _, tipo, nivel, grado, seccion = clientes_por_id[cliente_id]
+                    delivery_date = order_date + timedelta(days=rng.randint(3, 30))
+
+                    order = Order(
+                        tenant=self.tenant,
+                        order_number=next(numeros[order_date.year]),
+                        cliente_id=cliente_id,
+                        contrato_id=contrato_id,
+                        document_type=document_type,
+                        client_type=tipo,
+                        school_level=nivel,
+                        grade=grado,
+                        section=seccion,
+                        order_date=order_date,
+                        start_date=order_date,
+                        delivery_date=delivery_date,
+                        status=self.estado_pedido(delivery_date),
+                        created_by=self.usuarios['ventas'],
+                    )
+                    items = []
+                    for nombre, codigo, precio in rng.sample(skus, min(len(skus), rng.randint(1, 4))):
+                        items.append(OrderItem(
+                            tenant=self.tenant,
+                            product_name=nombre,
+                            product_code=codigo,
+                            quantity=rng.randint(1, 10),
+                            unit_price=precio,
+                            discount_percentage=rng.choice([0, 0, 0, 5, 10]),
+                        ))
+                    order.set_totals_from_items(items)
+                    order.paid_amount = self.pagado(order)
+                    order.apply_derived_fields()
+                    lote_pedidos.append(order)
+                    lote_items.append(items)
+
+                Order.objects.bulk_create(lote_pedidos)
+                # Los backends sin RETURNING (MySQL) no devuelven los ids insertados
+                if any(order.pk is None for order in lote_pedidos):
+                    ids = dict(Order.objects.filter(
+                        tenant=self.tenant, order_number__in=[order.order_number for order in lote_pedidos]
+                    ).values_list('order_number', 'id'))
+                    for order in lote_pedidos:
+                        order.pk = ids[order.order_number]
+
+                items, pagos = [], []
+                for order, items_order in zip(lote_pedidos, lote_items):
+                    for item in items_order:
+                        item.order = order
+                        item.affects_inventory = order.affects_inventory
+                        item.subtotal = item.calculate_subtotal()
+                        items.append(item)
+                    pagos.extend(self.pagos_de(order))
+                    pedidos.append((order.pk, order.cliente_id, order.status, order.delivery_date))
+                OrderItem.objects.bulk_create(items, batch_size=self.lote)
+                OrderPayment.objects.bulk_create(pagos, batch_size=self.lote)
+
+        self._log('Pedidos', len(pedidos), inicio)
+        return pedidos
+
+    def pagos_de(self, order):
+        """Uno o dos pagos que suman paid_amount, entre la fecha del pedido y hoy"""
+        from apps.commerce.pedidos.models import OrderPayment
+
+        if not order.paid_amount:
+            return []
+        montos = [order.paid_amount]
+        if order.paid_amount > 100 and self.rng.random() < 0.4:
+            adelanto = (order.paid_amount * Decimal('0.5')).quantize(Decimal('0.01'))
+            montos = [adelanto, order.paid_amount - adelanto]
+        ultimo_dia = min(self.hoy, order.delivery_date)
+        pagos = []
+        for indice, monto in enumerate(montos):
+            dias = (ultimo_dia - order.order_date).days
+            pagos.append(OrderPayment(
+                order=order,
+                payment_date=order.order_date if indice == 0 else order.order_date + timedelta(
+                    days=self.rng.randint(0, max(dias, 0))
+                ),
+                amount=monto,
+                payment_method=self.rng.choice(['efectivo', 'transferencia', 'tarjeta', 'yape', 'plin']),
+                registered_by=self.usuarios['ventas'],
+            ))
+        return pagos
+
+    def crear_ordenes_produccion(self, pedidos):
+        """Órdenes de producción para una muestra de pedidos no cancelados"""
+        from apps.operations.produccion.models import OrdenProduccion
+
+        inicio = time.perf_counter()
+        rng = self.rng
+        candidatos = [pedido for pedido in pedidos if pedido[2] != 'cancelado']
+        muestra = sorted(rng.sample(candidatos, min(self.total_ordenes, len(candidatos))))
+        estados = {
+            'completado': 'entregado', 'en_proceso': 'en_proceso', 'confirmado': 'pendiente',
+            'pendiente': 'pendiente', 'atrasado': 'en_proceso',
+        }
+        with transaction.atomic():
+            numeros = reservar_codigos(
+                self.tenant, 'OP', OrdenProduccion.objects.filter(tenant=self.tenant), 'numero_op',
+                cantidad=len(muestra)
+            )
+            nuevas = []
+            for (pedido_id, cliente_id, status, delivery_date), numero in zip(muestra, numeros):
+                nuevas.append(OrdenProduccion(
+                    tenant=self.tenant,
+                    numero_op=numero,
+                    pedido_id=pedido_id,
+                    cliente_id=cliente_id,
+                    operario=self.usuarios['operario'],
+                    descripcion=f'Producción del pedido {pedido_id}',
+                    tipo=rng.choice(['enmarcado', 'minilab', 'graduacion', 'corte_laser', 'edicion_digital']),
+                    estado=estados.get(status, 'pendiente'),
+                    prioridad=rng.choices(['baja', 'normal', 'media', 'alta', 'urgente'], weights=[10, 50, 20, 15, 5])[0],
+                    fecha_estimada=delivery_date,
+                    creado_por=self.usuarios['admin'],
+                ))
+            OrdenProduccion.objects.bulk_create(nuevas, batch_size=self.lote)
+
+        self._log('Órdenes de producción', len(nuevas), inicio)
+        return len(nuevas)
+
+
+def conteos_tenant(tenant):
+    """Filas por modelo del tenant (metadatos del baseline)"""
+    from apps.commerce.inventario.models import InventarioCatalogo
+    from apps.commerce.pedidos.models import Order, OrderItem, OrderPayment
+    from apps.crm.models import Cliente, Contrato
+    from apps.operations.produccion.models import OrdenProduccion
+
+    return {
+        'clientes': Cliente.objects.filter(tenant=tenant).count(),
+        'pedidos': Order.objects.filter(tenant=tenant).count(),
+        'items': OrderItem.objects.filter(tenant=tenant).count(),
+        'pagos': OrderPayment.objects.filter(order__tenant=tenant).count(),
+        'skus': InventarioCatalogo.objects.filter(tenant=tenant).count(),
+        'contratos': Contrato.objects.filter(tenant=tenant).count(),
+        'ordenes_produccion': OrdenProduccion.objects.filter(tenant=tenant).count(),
+    }
+
+
+def endpoints_benchmark(hace_un_anio):
+    """
+    Endpoints medidos: (grupo, método, ruta, parámetros)
+
+    Los reportes se piden con el último año para que recorran un volumen
+    representativo (por defecto cubren solo 30 días).
+    """
+    from apps.analytics.Reportes.services import CATEGORIAS_REPORTE
+    from apps.commerce.inventario.urls import router as inventario_router
+
+    periodo = {'fecha_inicio': hace_un_anio.isoformat()}
+    endpoints = [
+        ('dashboard', 'GET', f'/api/analytics/dashboard/{widget}/', {})
+        for widget in (
+            'resumen', 'alertas', 'alertas-rapidas', 'estado-produccion', 'clientes-estadisticas',
+            'contratos-estadisticas', 'productos-mas-vendidos', 'pedidos-recientes',
+            'entregas-programadas-hoy',
+        )
+    ]
+    endpoints += [
+        ('reportes', 'GET', '/api/analytics/reportes/categorias/', {}),
+        ('reportes', 'GET', '/api/analytics/reportes/todos/', periodo),
+    ]
+    endpoints += [
+        ('reportes', 'GET', f'/api/analytics/reportes/{categoria}/', periodo)
+        for categoria in CATEGORIAS_REPORTE
+    ]
+    endpoints += [
+        ('listados', 'GET', ruta, {})
+        for ruta in (
+            '/api/commerce/pedidos/api/orders/',
+            '/api/commerce/pedidos/api/orders/atrasados/',
+            '/api/commerce/pedidos/api/orders/estadisticas/',
+            '/api/commerce/pedidos/api/orders/resumen/',
+            '/api/commerce/pedidos/api/payments/',
+            '/api/commerce/pedidos/api/status-history/',
+            '/api/crm/clientes/clientes/',
+            '/api/crm/clientes/clientes/estadisticas/',
+            '/api/crm/clientes/historial/',
+            '/api/crm/contratos/contratos/',
+            '/api/crm/contratos/contratos/estadisticas/',
+            '/api/operations/produccion/api/ordenes/',
+            '/api/operations/produccion/api/ordenes/dashboard/',
+            '/api/commerce/inventario/api/dashboard/',
+            '/api/commerce/inventario/api/metricas/',
+        )
+    ]
+    endpoints.append(('listados', 'GET', '/api/core/busqueda/', {'q': 'garcia mar'}))
+    endpoints += [
+        ('listados', 'GET', f'/api/commerce/inventario/api/{prefijo}/', {})
+        for prefijo, _, _ in inventario_router.registry
+    ]
+    endpoints += [
+        ('exportaciones', 'GET', f'/api/analytics/reportes/{categoria}/exportar/{formato}/', periodo)
+        for categoria in CATEGORIAS_REPORTE
+        for formato in ('excel', 'pdf')
+    ]
+    endpoints += [
+        ('exportaciones', 'POST', '/api/crm/contratos/contratos/exportar_excel/', {}),
+        ('exportaciones', 'POST', '/api/crm/contratos/contratos/exportar_pagos_excel/', {}),
+        ('exportaciones', 'GET', '/api/analytics/exportaciones/', {}),
+    ]
+    return endpoints
+
+
+def percentil(valores, porcentaje):
+    """Percentil por rango más cercano de una lista no vacía"""
+    ordenados = sorted(valores)
+    indice = max(0, -(-len(ordenados) * porcentaje // 100) - 1)
+    return ordenados[int(indice)]
+
+
+class BenchmarkEndpoints:
+    """
+    Latencia y consultas de los endpoints para el tenant indicado
+
+    Cada endpoint se pide una vez en frío (snapshots del dashboard
+    invalidados) y `repeticiones` veces más; las respuestas en streaming se
+    consumen completas dentro de la medición. Las consultas de hilos
+    auxiliares (resumen de reportes en paralelo) no se cuentan.
+    """
+
+    def __init__(self, tenant, usuario=None, repeticiones=5, grupos=None, salida=None):
+        self.tenant = tenant
+        self.usuario = usuario or User.objects.filter(
+            tenant=tenant, role='admin', is_active=True
+        ).order_by('id').first()
+        if self.usuario is None:
+            raise ValueError(f'El tenant "{tenant.slug}" no tiene un usuario admin activo')
+        self.repeticiones = max(1, repeticiones)
+        self.grupos = set(grupos) if grupos else None
+        self.salida = salida or (lambda mensaje: None)
+
+    def get_endpoints(self):
+        hace_un_anio = timezone.localdate() - timedelta(days=365)
+        return [
+            endpoint for endpoint in endpoints_benchmark(hace_un_anio)
+            if self.grupos is None or endpoint[0] in self.grupos
+        ]
+
+    def get_client(self):
+        from rest_framework.test import APIClient
+        from apps.core.autenticacion.tokens import ArteIdeasRefreshToken
+
+        hosts = settings.ALLOWED_HOSTS
+        host = 'localhost' if 'localhost' in hosts or '*' in hosts or not hosts else hosts[0].lstrip('.')
+        client = APIClient(SERVER_NAME=host, HTTP_X_TENANT=self.tenant.slug)
+        # Un endpoint con error queda en el baseline con status 500 en lugar de cortar la medición
+        client.raise_request_exception = False
+        token = ArteIdeasRefreshToken.for_user(self.usuario).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def pedir(self, client, metodo, ruta, params):
+        """Una request medida: (perfil, status, bytes)"""
+        with PerfilConsultas() as perfil:
+            if metodo == 'GET':
+                response = client.get(ruta, params)
+            else:
+                response = client.generic(metodo, ruta, format='json')
+            if response.streaming:
+                contenido = b''.join(response.streaming_content)
+            else:
+                contenido = response.content
+        return perfil, response.status_code, len(contenido)
+
+    def medir(self, client, grupo, metodo, ruta, params):
+        from apps.analytics.dashboard.cache import WIDGET_DEPENDENCIAS, invalidar_widgets
+
+        invalidar_widgets(self.tenant.id, WIDGET_DEPENDENCIAS)
+        frio, status, tamanio = self.pedir(client, metodo, ruta, params)
+
+        perfiles = [self.pedir(client, metodo, ruta, params)[0] for _ in range(self.repeticiones)]
+        latencias = [perfil.tiempo_total_ms for perfil in perfiles]
+        return {
+            'grupo': grupo,
+            'endpoint': f'{metodo} {ruta}',
+            'status': status,
+            'bytes': tamanio,
+            'consultas_frio': frio.total,
+            'consultas': max(perfil.total for perfil in perfiles),
+            'consultas_repetidas': len(frio.duplicadas()),
+            'latencia_ms': {
+                'frio': round(frio.tiempo_total_ms, 2),
+                'p50': round(percentil(latencias, 50), 2),
+                'p95': round(percentil(latencias, 95), 2),
+                'max': round(max(latencias), 2),
+            },
+            'tiempo_db_ms_p50': round(percentil([perfil.tiempo_db_ms for perfil in perfiles], 50), 2),
+        }
+
+    def ejecutar(self):
+        """Baseline completo (diccionario serializable a JSON)"""
+        client = self.get_client()
+        resultados = []
+        for grupo, metodo, ruta, params in self.get_endpoints():
+            resultado = self.medir(client, grupo, metodo, ruta, params)
+            resultados.append(resultado)
+            self.salida(
+                f"  {resultado['endpoint']} [{resultado['status']}] "
+                f"p50 {resultado['latencia_ms']['p50']} ms, {resultado['consultas']} consultas"
+            )
+
+        return {
+            'generado_en': timezone.now().isoformat(),
+            'base_datos': {'vendor': connection.vendor, 'nombre': str(connection.settings_dict['NAME'])},
+            'tenant': self.tenant.slug,
+            'datos': conteos_tenant(self.tenant),
+            'repeticiones': self.repeticiones,
+            'endpoints': resultados,
+        }
+
+
+def comparar_baselines(anterior, actual, tolerancia=0.25, margen_ms=5):
+    """
+    Endpoints que empeoraron respecto de un baseline anterior
+
+    Cuenta como regresión cualquier aumento de consultas, o un p50 más de
+    `tolerancia` (proporción) y `margen_ms` por encima del anterior.
+    """
+    previos = {resultado['endpoint']: resultado for resultado in anterior.get('endpoints', [])}
+    regresiones = []
+    for resultado in actual.get('endpoints', []):
+        previo = previos.get(resultado['endpoint'])
+        if previo is None:
+            continue
+        motivos = []
+        if resultado['consultas'] > previo['consultas']:
+            motivos.append(f"consultas {previo['consultas']} -> {resultado['consultas']}")
+        p50_previo, p50 = previo['latencia_ms']['p50'], resultado['latencia_ms']['p50']
+        if p50 > p50_previo * (1 + tolerancia) and p50 - p50_previo > margen_ms:
+            motivos.append(f'p50 {p50_previo} -> {p50} ms')
+        if motivos:
+            regresiones.append({'endpoint': resultado['endpoint'], 'motivos': motivos})
+    return regresiones
@@ -8,3 +8,11 @@ class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.analytics.dashboard'
     verbose_name = 'Dashboard'
+    
+    def ready(self):
+        """Configuración cuando la app está lista"""
+        # Importar señales de invalidación de caché
+        try:
+            from . import signals
+        except ImportError:
+            pass
@@ -0,0 +1,119 @@
+"""
+Dashboard Cache - Analytics App
+Snapshots por tenant de los widgets del dashboard
+
+Cada widget se guarda bajo una clave (tenant, widget, fecha, parámetros) que
+incluye una versión. Invalidar un widget solo cambia su versión, por lo que las
+entradas anteriores quedan huérfanas y expiran por TTL. Las señales de
+`signals.py` invalidan únicamente los widgets afectados por cada modelo.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+
+# Widgets cacheables y los modelos de los que dependen (app_label.ModelName)
+INVENTARIO = [
+    'inventario.MolduraListon', 'inventario.MolduraPrearmada', 'inventario.VidrioTapaMDF',
+    'inventario.Paspartu', 'inventario.Minilab', 'inventario.Cuadro', 'inventario.Anuario',
+    'inventario.CorteLaser', 'inventario.MarcoAccesorio', 'inventario.HerramientaGeneral',
+]
+
+WIDGET_DEPENDENCIAS = {
+    'panel_alertas_rapidas': ['pedidos.Order', 'pedidos.OrderPayment', 'produccion.OrdenProduccion'] + INVENTARIO,
+    'estado_produccion': ['produccion.OrdenProduccion'],
+    'clientes_estadisticas': ['clientes.Cliente', 'pedidos.Order'],
+    'contratos_estadisticas': ['contratos.Contrato'],
+    'crm_clientes_estadisticas': ['clientes.Cliente'],  # ClienteViewSet.estadisticas?cache=true
+    'productos_mas_vendidos': ['pedidos.Order', 'pedidos.OrderItem'],
+    'pedidos_recientes': ['pedidos.Order', 'pedidos.OrderPayment', 'clientes.Cliente'],
+    'entregas_programadas_hoy': ['produccion.OrdenProduccion', 'clientes.Cliente'],
+    'alertas': [
+        'produccion.OrdenProduccion', 'pedidos.Order', 'pedidos.OrderItem',
+        'clientes.Cliente', 'activos.Mantenimiento', 'activos.Activo',
+    ] + INVENTARIO,
+}
+
+TODOS_LOS_TENANTS = 'all'
+
+
+def get_cache():
+    """Backend de caché configurado para el dashboard"""
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """TTL de los snapshots en segundos"""
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def widgets_por_modelo(model):
+    """Widgets que dependen de un modelo"""
+    return [widget for widget, modelos in WIDGET_DEPENDENCIAS.items() if model._meta.label in modelos]
+
+
+def _clave_version(tenant_id, widget):
+    return f'dashboard:{tenant_id}:{widget}:version'
+
+
+def _obtener_versiones(cache, tenant_id, widget):
+    """Versión del widget para el tenant y versión global del widget"""
+    claves = [_clave_version(tenant_id, widget), _clave_version(TODOS_LOS_TENANTS, widget)]
+    versiones = cache.get_many(claves)
+    resultado = []
+    for clave in claves:
+        version = versiones.get(clave)
+        if version is None:
+            version = uuid.uuid4().hex
+            # add() evita pisar una versión creada en paralelo por otro proceso
+            if not cache.add(clave, version, None):
+                version = cache.get(clave, version)
+        resultado.append(version)
+    return resultado
+
+
+def obtener_snapshot(tenant_id, widget, calcular, params=None):
+    """
+    Devolver el snapshot del widget para el tenant, calculándolo si no existe
+
+    Sin tenant (super admin) no se cachea: siempre se calcula.
+    """
+    if tenant_id is None:
+        return calcular()
+
+    cache = get_cache()
+    version_tenant, version_global = _obtener_versiones(cache, tenant_id, widget)
+    sufijo = ':'.join(f'{k}={v}' for k, v in sorted((params or {}).items()))
+    clave = (
+        f'dashboard:{tenant_id}:{widget}:{timezone.now().date().isoformat()}:'
+        f'{version_tenant}:{version_global}:{sufijo}'
+    )
+
+    data = cache.get(clave)
+    if data is None:
+        data = calcular()
+        cache.set(clave, data, get_timeout())
+    return data
+
+
+def invalidar_widgets(tenant_id, widgets):
+    """
+    Invalidar widgets de un tenant (o de todos si tenant_id es None)
+    """
+    if tenant_id is None:
+        tenant_id = TODOS_LOS_TENANTS
+    cache = get_cache()
+    cache.set_many({_clave_version(tenant_id, widget): uuid.uuid4().hex for widget in widgets}, None)
+
+
+def invalidar_modelos_al_confirmar(tenant_id, *modelos):
+    """
+    Invalidar, al confirmar la transacción, los widgets que dependen de los modelos
+
+    Para escrituras que no envían post_save (bulk_create, bulk_update, update()).
+    """
+    widgets = sorted({widget for modelo in modelos for widget in widgets_por_modelo(modelo)})
+    transaction.on_commit(lambda: invalidar_widgets(tenant_id, widgets))
@@ -0,0 +1,148 @@
+"""
+Dashboard Services - Analytics App
+Motor de métricas del dashboard basado en agregación condicional
+"""
+from django.db.models import Sum, Count, Q, F, DecimalField
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.commerce.models import Order
+from apps.commerce.inventario.models import InventarioCatalogo
+from apps.operations.produccion.models import OrdenProduccion
+
+
+ESTADOS_INGRESO = ['completado', 'entregado']
+ESTADOS_PEDIDO_ACTIVO = ['pendiente', 'en_proceso', 'confirmado']
+ESTADOS_PRODUCCION_ACTIVA = ['pendiente', 'en_proceso']
+
+
+def calcular_cambio_porcentual(actual, anterior):
+    """Porcentaje de cambio entre dos valores (0 si no hay datos previos)"""
+    if anterior > 0:
+        return ((actual - anterior) / anterior) * 100
+    return 0
+
+
+class DashboardMetricsService:
+    """
+    Calcula las métricas del dashboard con una consulta por tabla
+    usando agregación condicional (Count/Sum con filter=Q(...))
+    """
+
+    def __init__(self, tenant, hoy=None):
+        self.tenant = tenant
+        self.hoy = hoy or timezone.now().date()
+
+    @property
+    def inicio_mes(self):
+        return self.hoy.replace(day=1)
+
+    @property
+    def inicio_mes_anterior(self):
+        inicio_mes = self.inicio_mes
+        if inicio_mes.month == 1:
+            return inicio_mes.replace(year=inicio_mes.year - 1, month=12)
+        return inicio_mes.replace(month=inicio_mes.month - 1)
+
+    def get_metricas_pedidos(self):
+        """Ingresos y contadores de pedidos en una sola consulta"""
+        ayer = self.hoy - timedelta(days=1)
+        activos = Q(status__in=ESTADOS_PEDIDO_ACTIVO)
+
+        # Acotar el recorrido a las filas que aportan a alguna métrica
+        pedidos = Order.objects.filter(tenant=self.tenant).filter(
+            Q(order_date__gte=min(ayer, self.inicio_mes_anterior)) | activos
+        )
+
+        return pedidos.aggregate(
+            ingresos_hoy=Sum('total', filter=Q(order_date=self.hoy, status__in=ESTADOS_INGRESO)),
+            ingresos_ayer=Sum('total', filter=Q(order_date=ayer, status__in=ESTADOS_INGRESO)),
+            pedidos_activos=Count('id', filter=activos),
+            pedidos_productos=Count('id', filter=activos & Q(document_type__in=['nota_venta', 'proforma'])),
+            pedidos_proyectos=Count('id', filter=activos & Q(document_type='contrato')),
+            pedidos_mes_actual=Count('id', filter=Q(order_date__gte=self.inicio_mes)),
+            pedidos_mes_anterior=Count('id', filter=Q(
+                order_date__gte=self.inicio_mes_anterior,
+                order_date__lt=self.inicio_mes
+            )),
+        )
+
+    def get_metricas_produccion(self):
+        """Contadores de órdenes de producción en una sola consulta"""
+        hace_7_dias = self.hoy - timedelta(days=7)
+        hace_14_dias = self.hoy - timedelta(days=14)
+
+        return OrdenProduccion.objects.filter(tenant=self.tenant).aggregate(
+            entregas_ordenes=Count('id', filter=Q(estado__in=ESTADOS_PRODUCCION_ACTIVA)),
+            entregas_trabajadas=Count('id', filter=Q(estado='en_proceso')),
+            trabajados_esta_semana=Count('id', filter=Q(fecha_inicio_real__date__gte=hace_7_dias)),
+            trabajados_semana_pasada=Count('id', filter=Q(
+                fecha_inicio_real__date__gte=hace_14_dias,
+                fecha_inicio_real__date__lt=hace_7_dias
+            )),
+        )
+
+    def get_metricas_inventario(self):
+        """
+        Valor de inventario (a precio de venta) y productos con stock bajo
+        en una sola consulta sobre el catálogo unificado de inventario
+        """
+        metricas = InventarioCatalogo.objects.filter(
+            tenant=self.tenant,
+            is_active=True
+        ).aggregate(
+            valor=Sum(
+                F('precio_venta') * F('stock_disponible'),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ),
+            stock_bajo=Count('id', filter=Q(stock_disponible__lte=F('stock_minimo'))),
+        )
+
+        return {
+            'valor_inventario': metricas['valor'] or Decimal('0.00'),
+            'productos_stock_bajo': metricas['stock_bajo'],
+        }
+
+    def get_panel_alertas_rapidas(self):
+        """Construir el panel de alertas rápidas completo"""
+        pedidos = self.get_metricas_pedidos()
+        produccion = self.get_metricas_produccion()
+        inventario = self.get_metricas_inventario()
+
+        ingresos_hoy = pedidos['ingresos_hoy'] or Decimal('0.00')
+        ingresos_ayer = pedidos['ingresos_ayer'] or Decimal('0.00')
+
+        cambio_ingresos = calcular_cambio_porcentual(ingresos_hoy, ingresos_ayer)
+        cambio_pedidos = calcular_cambio_porcentual(
+            pedidos['pedidos_mes_actual'], pedidos['pedidos_mes_anterior']
+        )
+        cambio_entregas = calcular_cambio_porcentual(
+            produccion['trabajados_esta_semana'], produccion['trabajados_semana_pasada']
+        )
+
+        entregas_trabajadas = produccion['entregas_trabajadas']
+
+        return {
+            "ingresos_hoy": {
+                "valor": float(ingresos_hoy),
+                "cambio_porcentaje": round(float(cambio_ingresos), 1),
+                "periodo": "Hoy"
+            },
+            "pedidos_activos": {
+                "cantidad": pedidos['pedidos_activos'],
+                "cambio_porcentaje": round(float(cambio_pedidos), 1),
+                "detalle": f"{pedidos['pedidos_productos']} pendientes, {pedidos['pedidos_proyectos']} en proceso"
+            },
+            "entregas_a_tiempo": {
+                "cantidad": produccion['entregas_ordenes'],
+                "atrasadas": entregas_trabajadas,
+                "cambio_porcentaje": round(float(cambio_entregas), 1),
+                "promedio": f"{entregas_trabajadas}h promedio"
+            },
+            "valor_inventario": {
+                "valor": float(inventario['valor_inventario']),
+                "cambio_porcentaje": -1.2,  # Ejemplo de cambio negativo
+                "stock_bajo": inventario['productos_stock_bajo']
+            }
+        }
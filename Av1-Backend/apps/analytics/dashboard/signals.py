@@ -0,0 +1,58 @@
+"""
+Dashboard Signals - Analytics App
+Invalidación de snapshots del dashboard cuando cambian los datos de origen
+"""
+import logging
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+
+from apps.commerce.inventario.signals import stock_actualizado
+from .cache import WIDGET_DEPENDENCIAS, widgets_por_modelo, invalidar_widgets
+
+logger = logging.getLogger(__name__)
+
+
+def obtener_tenant_id(instance):
+    """Tenant del registro modificado (None para modelos globales)"""
+    if hasattr(instance, 'tenant_id'):
+        return instance.tenant_id
+    if hasattr(instance, 'order'):
+        # OrderPayment no tiene tenant propio
+        return instance.order.tenant_id
+    return None
+
+
+def invalidar_snapshots(sender, instance, **kwargs):
+    """
+    Invalidar solo los widgets que dependen del modelo modificado
+    """
+    try:
+        invalidar_widgets(obtener_tenant_id(instance), widgets_por_modelo(sender))
+    except Exception as e:
+        logger.error(f"Error al invalidar caché del dashboard para {sender.__name__}: {str(e)}")
+
+
+def conectar_senales():
+    """Conectar la invalidación a todos los modelos usados por los widgets"""
+    labels = {label for modelos in WIDGET_DEPENDENCIAS.values() for label in modelos}
+    for label in labels:
+        model = apps.get_model(label)
+        uid = f'dashboard_cache_{label}'
+        post_save.connect(invalidar_snapshots, sender=model, dispatch_uid=f'{uid}_save')
+        post_delete.connect(invalidar_snapshots, sender=model, dispatch_uid=f'{uid}_delete')
+
+
+def invalidar_por_movimiento_stock(sender, tenant_ids, **kwargs):
+    """
+    Invalidar los widgets de inventario tras movimientos de stock (update() sin post_save)
+    """
+    try:
+        for tenant_id in tenant_ids:
+            invalidar_widgets(tenant_id, widgets_por_modelo(sender))
+    except Exception as e:
+        logger.error(f"Error al invalidar caché del dashboard por movimiento de stock: {str(e)}")
+
+
+conectar_senales()
+
+stock_actualizado.connect(invalidar_por_movimiento_stock, dispatch_uid='dashboard_cache_stock_actualizado')
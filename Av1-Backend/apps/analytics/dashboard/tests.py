@@ -0,0 +1,285 @@
+"""
+Tests del Dashboard - Analytics App
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.core.models import Tenant
+from apps.crm.models import Cliente
+from apps.commerce.models import Order
+from apps.commerce.inventario.models import MolduraListon, HerramientaGeneral
+from apps.core.perfilado import PerfilConsultasTestMixin
+from apps.operations.produccion.models import OrdenProduccion
+from rest_framework.test import APIClient
+from .cache import get_cache, obtener_snapshot, invalidar_widgets
+from .services import DashboardMetricsService
+
+User = get_user_model()
+
+
+class DashboardMetricsServiceTest(TestCase):
+    """Tests para el motor de métricas del dashboard"""
+
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+
+        self.cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+
+        self.hoy = timezone.now().date()
+
+    def crear_pedido(self, numero, status, total, document_type='proforma', order_date=None):
+        order = Order.objects.create(
+            tenant=self.tenant,
+            order_number=numero,
+            cliente=self.cliente,
+            document_type=document_type,
+            client_type='particular',
+            order_date=order_date or self.hoy,
+            start_date=self.hoy,
+            delivery_date=self.hoy + timedelta(days=7),
+            status=status
+        )
+        # save() recalcula totales a partir de los items; fijar el total directamente
+        Order.objects.filter(pk=order.pk).update(total=total)
+        return order
+
+    def test_panel_alertas_rapidas(self):
+        """Test métricas del panel calculadas con agregación condicional"""
+        self.crear_pedido('ORD-001', 'completado', Decimal('300.00'))
+        self.crear_pedido('ORD-002', 'completado', Decimal('150.00'), order_date=self.hoy - timedelta(days=1))
+        self.crear_pedido('ORD-003', 'pendiente', Decimal('80.00'))
+        self.crear_pedido('ORD-004', 'confirmado', Decimal('80.00'), document_type='nota_venta')
+
+        MolduraListon.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Moldura Clásica',
+            stock_disponible=5,
+            stock_minimo=10,
+            costo_unitario=Decimal('10.00'),
+            precio_venta=Decimal('20.00'),
+            nombre_moldura='clasica',
+            ancho='1',
+            color='dorado',
+            material='madera'
+        )
+        HerramientaGeneral.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Cortador',
+            stock_disponible=3,
+            stock_minimo=1,
+            costo_unitario=Decimal('5.00'),
+            precio_venta=Decimal('12.50'),
+            nombre_herramienta='Cortador',
+            marca='stanley',
+            tipo_material='cortador'
+        )
+
+        service = DashboardMetricsService(self.tenant, hoy=self.hoy)
+        with self.assertNumQueries(3):
+            data = service.get_panel_alertas_rapidas()
+
+        self.assertEqual(data['ingresos_hoy']['valor'], 300.0)
+        self.assertEqual(data['ingresos_hoy']['cambio_porcentaje'], 100.0)
+        self.assertEqual(data['pedidos_activos']['cantidad'], 2)
+        self.assertEqual(data['pedidos_activos']['detalle'], '2 pendientes, 0 en proceso')
+        self.assertEqual(data['valor_inventario']['valor'], 137.5)  # 5*20 + 3*12.5
+        self.assertEqual(data['valor_inventario']['stock_bajo'], 1)
+
+    def test_panel_sin_datos(self):
+        """Test panel vacío para un tenant sin movimientos"""
+        data = DashboardMetricsService(self.tenant).get_panel_alertas_rapidas()
+
+        self.assertEqual(data['ingresos_hoy']['valor'], 0.0)
+        self.assertEqual(data['ingresos_hoy']['cambio_porcentaje'], 0)
+        self.assertEqual(data['pedidos_activos']['cantidad'], 0)
+        self.assertEqual(data['entregas_a_tiempo']['cantidad'], 0)
+        self.assertEqual(data['valor_inventario']['valor'], 0.0)
+        self.assertEqual(data['valor_inventario']['stock_bajo'], 0)
+
+
+class DashboardSnapshotCacheTest(TestCase):
+    """Tests para los snapshots cacheados del dashboard"""
+
+    def setUp(self):
+        """Configuración inicial"""
+        get_cache().clear()
+        self.tenant = Tenant.objects.create(
+            name='Cache Tenant',
+            slug='cache',
+            business_name='Cache Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='cache@test.com',
+            business_ruc='12345678902'
+        )
+        self.calculos = 0
+
+    def calcular(self):
+        self.calculos += 1
+        return {'total': Cliente.objects.filter(tenant=self.tenant).count()}
+
+    def crear_cliente(self, dni):
+        return Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Ana',
+            apellidos='García',
+            email='ana@test.com',
+            telefono='987654321',
+            dni=dni,
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+
+    def test_snapshot_reutilizado(self):
+        """Test segunda lectura servida desde caché sin consultas"""
+        obtener_snapshot(self.tenant.id, 'clientes_estadisticas', self.calcular)
+        with self.assertNumQueries(0):
+            data = obtener_snapshot(self.tenant.id, 'clientes_estadisticas', self.calcular)
+
+        self.assertEqual(data, {'total': 0})
+        self.assertEqual(self.calculos, 1)
+
+    def test_invalidacion_por_senal(self):
+        """Test guardar un cliente invalida los widgets que dependen de él"""
+        obtener_snapshot(self.tenant.id, 'clientes_estadisticas', self.calcular)
+        obtener_snapshot(self.tenant.id, 'contratos_estadisticas', self.calcular)
+
+        self.crear_cliente('87654321')
+
+        data = obtener_snapshot(self.tenant.id, 'clientes_estadisticas', self.calcular)
+        self.assertEqual(data, {'total': 1})
+        self.assertEqual(self.calculos, 3)
+
+        # Contratos no depende de Cliente: se mantiene el snapshot anterior
+        data = obtener_snapshot(self.tenant.id, 'contratos_estadisticas', self.calcular)
+        self.assertEqual(data, {'total': 0})
+        self.assertEqual(self.calculos, 3)
+
+    def test_parametros_en_clave(self):
+        """Test snapshots distintos según los parámetros del widget"""
+        obtener_snapshot(self.tenant.id, 'alertas', self.calcular, params={'filtro': 'hoy'})
+        obtener_snapshot(self.tenant.id, 'alertas', self.calcular, params={'filtro': 'mes'})
+        obtener_snapshot(self.tenant.id, 'alertas', self.calcular, params={'filtro': 'hoy'})
+
+        self.assertEqual(self.calculos, 2)
+
+    def test_invalidacion_global(self):
+        """Test modelos sin tenant invalidan el widget para todos los tenants"""
+        obtener_snapshot(self.tenant.id, 'alertas', self.calcular)
+        invalidar_widgets(None, ['alertas'])
+        obtener_snapshot(self.tenant.id, 'alertas', self.calcular)
+
+        self.assertEqual(self.calculos, 2)
+
+
+
+class DashboardConsultasTest(PerfilConsultasTestMixin, TestCase):
+    """Consultas por request de los widgets del dashboard (sin N+1)"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.tenant = Tenant.objects.create(
+            name='Consultas Tenant',
+            slug='consultas',
+            business_name='Consultas Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='consultas@test.com',
+            business_ruc='12345678903'
+        )
+        self.user = User.objects.create_user(
+            username='admin-dashboard',
+            email='admin-dashboard@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+        operario = User.objects.create_user(
+            username='operario-dashboard',
+            email='operario-dashboard@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='operario'
+        )
+        hoy = timezone.now().date()
+        for i in range(4):
+            cliente = Cliente.objects.create(
+                tenant=self.tenant,
+                nombres=f'Cliente {i}',
+                apellidos='Pérez',
+                email=f'cliente{i}@test.com',
+                telefono='987654321',
+                dni=f'1234567{i}',
+                direccion='Test Address',
+                tipo_cliente='particular'
+            )
+            pedido = Order.objects.create(
+                tenant=self.tenant,
+                cliente=cliente,
+                document_type='proforma',
+                client_type='particular',
+                order_date=hoy,
+                start_date=hoy,
+                delivery_date=hoy + timedelta(days=7),
+                status='pendiente'
+            )
+            OrdenProduccion.objects.create(
+                tenant=self.tenant,
+                pedido=pedido,
+                descripcion='Enmarcado',
+                tipo='enmarcado',
+                operario=operario,
+                fecha_estimada=hoy
+            )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_entregas_programadas_hoy_sin_n1(self):
+        """Las entregas del día traen el cliente en la misma consulta"""
+        with self.assertSinConsultasRepetidas(umbral=2):
+            response = self.client.get('/api/analytics/dashboard/entregas-programadas-hoy/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_entregas'], 4)
+        self.assertEqual(len(response.data['entregas']), 4)
+
+    def test_pedidos_recientes_sin_n1(self):
+        """Los pedidos recientes no consultan el cliente por fila"""
+        with self.assertSinConsultasRepetidas(umbral=2):
+            response = self.client.get('/api/analytics/dashboard/pedidos-recientes/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 4)
+
+    def test_alertas_filtro_desconocido_usa_semana(self):
+        """Un filtro desconocido comparte el snapshot de 'semana' en lugar de crear otro"""
+        response = self.client.get('/api/analytics/dashboard/alertas/', {'filtro': 'semana'})
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/analytics/dashboard/alertas/', {'filtro': 'x' * 50})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['filtro_aplicado'], 'semana')
@@ -0,0 +1,86 @@
+"""
+Comando de Django para medir latencia y consultas de los endpoints principales
+Uso: python manage.py benchmark_endpoints --slug benchmark --salida baseline.json
+     python manage.py benchmark_endpoints --slug benchmark --comparar baseline.json --estricto
+     python manage.py benchmark_endpoints --slug benchmark --grupo dashboard --grupo reportes
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.benchmark import GRUPOS, BenchmarkEndpoints, comparar_baselines
+from apps.core.multitenancy.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Medir latencia y consultas de dashboard, reportes, listados y exportaciones y generar un baseline JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', type=str, default='benchmark', help='Slug del tenant a medir')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Requests en caliente por endpoint')
+        parser.add_argument(
+            '--grupo',
+            action='append',
+            choices=GRUPOS,
+            help='Medir solo este grupo de endpoints (se puede repetir)',
+        )
+        parser.add_argument('--salida', type=str, help='Archivo donde guardar el baseline JSON')
+        parser.add_argument('--comparar', type=str, help='Baseline JSON anterior para comparar')
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.25,
+            help='Aumento de p50 tolerado al comparar (proporción, 0.25 = 25%%)',
+        )
+        parser.add_argument(
+            '--estricto',
+            action='store_true',
+            help='Terminar con error si la comparación encuentra regresiones',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(slug=options['slug'])
+        except Tenant.DoesNotExist:
+            raise CommandError(
+                f'No existe el tenant "{options["slug"]}". Créalo con: python manage.py sembrar_tenant_benchmark'
+            )
+
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+
+        try:
+            benchmark = BenchmarkEndpoints(
+                tenant,
+                repeticiones=options['repeticiones'],
+                grupos=options['grupo'],
+                salida=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'Midiendo endpoints del tenant "{tenant.slug}"...')
+        baseline = benchmark.ejecutar()
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(baseline, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\n[OK] Baseline guardado en {options["salida"]}'))
+        else:
+            self.stdout.write(json.dumps(baseline, ensure_ascii=False, indent=2))
+
+        if anterior is None:
+            return
+
+        regresiones = comparar_baselines(anterior, baseline, tolerancia=options['tolerancia'])
+        if not regresiones:
+            self.stdout.write(self.style.SUCCESS('[OK] Sin regresiones respecto del baseline anterior'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'\nRegresiones ({len(regresiones)}):'))
+        for regresion in regresiones:
+            self.stdout.write(f"  {regresion['endpoint']}: {'; '.join(regresion['motivos'])}")
+        if options['estricto']:
+            raise CommandError(f'{len(regresiones)} endpoints empeoraron respecto del baseline')
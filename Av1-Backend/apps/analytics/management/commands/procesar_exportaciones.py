@@ -0,0 +1,112 @@
+"""
+Comando de Django para procesar las exportaciones en segundo plano
+Uso: python manage.py procesar_exportaciones --workers 2
+     python manage.py procesar_exportaciones --once
+     python manage.py procesar_exportaciones --limpiar
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.analytics.Reportes.exportaciones import (
+    reclamar_exportaciones, reencolar_exportaciones_abandonadas,
+    ejecutar_exportacion, ejecutar_exportacion_en_worker, limpiar_exportaciones_expiradas
+)
+
+
+def inicializar_worker():
+    """Preparar Django en cada proceso del pool (necesario con el método spawn)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Procesar los trabajos de exportación pendientes (Excel/PDF) en un pool de procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'EXPORTACIONES_WORKERS', 2),
+            help='Procesos del pool. Con 0 los trabajos se ejecutan en este mismo proceso',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar los trabajos pendientes y terminar',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5,
+            help='Segundos de espera entre consultas cuando no hay trabajos',
+        )
+        parser.add_argument(
+            '--limpiar',
+            action='store_true',
+            help='Solo eliminar los archivos y trabajos expirados',
+        )
+
+    def handle(self, *args, **options):
+        eliminados = limpiar_exportaciones_expiradas()
+        if eliminados:
+            self.stdout.write(f'Exportaciones expiradas eliminadas: {eliminados}')
+        if options['limpiar']:
+            return
+
+        workers = options['workers']
+        if workers <= 0:
+            self._procesar_en_linea(options)
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Procesando exportaciones con {workers} procesos'))
+        en_curso = {}
+        ultima_limpieza = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker) as pool:
+            while True:
+                reencolar_exportaciones_abandonadas()
+                for job_id in reclamar_exportaciones(workers - len(en_curso)):
+                    # Los procesos hijos no deben heredar la conexión abierta del padre
+                    connections.close_all()
+                    en_curso[pool.submit(ejecutar_exportacion_en_worker, job_id)] = job_id
+
+                if not en_curso:
+                    if options['once']:
+                        break
+                    time.sleep(options['intervalo'])
+                else:
+                    terminados, _ = wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                    for future in terminados:
+                        self._informar(en_curso.pop(future), future)
+
+                if time.monotonic() - ultima_limpieza > options['intervalo'] * 60:
+                    limpiar_exportaciones_expiradas()
+                    ultima_limpieza = time.monotonic()
+
+    def _procesar_en_linea(self, options):
+        """Ejecutar los trabajos uno a uno sin pool (útil para depurar y en tests)"""
+        while True:
+            reencolar_exportaciones_abandonadas()
+            reclamados = reclamar_exportaciones(1)
+            if not reclamados:
+                if options['once']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+            estado = ejecutar_exportacion(reclamados[0])
+            self.stdout.write(f'  Exportación #{reclamados[0]}: {estado}')
+
+    def _informar(self, job_id, future):
+        try:
+            estado = future.result()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'  Exportación #{job_id}: fallo del worker ({e})'))
+            return
+        self.stdout.write(f'  Exportación #{job_id}: {estado}')
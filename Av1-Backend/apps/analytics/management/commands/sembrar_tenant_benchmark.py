@@ -0,0 +1,76 @@
+"""
+Comando de Django para sembrar un tenant de gran volumen para benchmarks
+Uso: python manage.py sembrar_tenant_benchmark
+     python manage.py sembrar_tenant_benchmark --slug benchmark --clientes 5000 --pedidos 20000
+     python manage.py sembrar_tenant_benchmark --slug benchmark --reemplazar
+
+Solo corre con DEBUG activo, salvo que se pase --permitir-sin-debug.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.analytics.benchmark import SembradorTenant
+from apps.core.multitenancy.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Crear un tenant con datos sintéticos de gran volumen (clientes, pedidos, inventario, producción)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', type=str, default='benchmark', help='Slug del tenant a crear')
+        parser.add_argument('--clientes', type=int, default=50000, help='Cantidad de clientes')
+        parser.add_argument('--pedidos', type=int, default=200000, help='Cantidad de pedidos (con items y pagos)')
+        parser.add_argument('--skus', type=int, default=5000, help='SKUs de inventario, repartidos en las diez categorías')
+        parser.add_argument('--contratos', type=int, default=2000, help='Cantidad de contratos')
+        parser.add_argument('--ordenes-produccion', type=int, default=20000, help='Cantidad de órdenes de producción')
+        parser.add_argument('--dias-historia', type=int, default=730, help='Días hacia atrás en los que se reparten los pedidos')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla aleatoria (mismos datos con la misma semilla)')
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por bulk_create')
+        parser.add_argument(
+            '--reemplazar',
+            action='store_true',
+            help='Eliminar antes el tenant con el mismo slug y todos sus datos',
+        )
+        parser.add_argument(
+            '--permitir-sin-debug',
+            action='store_true',
+            help='Sembrar aunque DEBUG esté desactivado (solo en una base de datos de pruebas)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['permitir_sin_debug']:
+            self.stdout.write(self.style.ERROR(
+                'Error: DEBUG está desactivado. Usa --permitir-sin-debug si esta base de datos es de pruebas'
+            ))
+            return
+
+        existente = Tenant.objects.filter(slug=options['slug']).first()
+        if existente:
+            if not options['reemplazar']:
+                self.stdout.write(self.style.ERROR(
+                    f'Error: ya existe el tenant "{options["slug"]}". Usa --reemplazar para recrearlo'
+                ))
+                return
+            self.stdout.write(f'Eliminando el tenant "{existente.slug}" y sus datos...')
+            existente.delete()
+
+        sembrador = SembradorTenant(
+            options['slug'],
+            clientes=options['clientes'],
+            pedidos=options['pedidos'],
+            skus=options['skus'],
+            contratos=options['contratos'],
+            ordenes_produccion=options['ordenes_produccion'],
+            dias_historia=options['dias_historia'],
+            semilla=options['semilla'],
+            lote=options['lote'],
+            salida=self.stdout.write,
+        )
+        conteos = sembrador.sembrar()
+
+        self.stdout.write(self.style.SUCCESS(f'\n[OK] Tenant "{sembrador.tenant.slug}" (ID {sembrador.tenant.id}) sembrado:'))
+        for modelo, cantidad in conteos.items():
+            self.stdout.write(f'  {modelo}: {cantidad}')
+        self.stdout.write(
+            f'  Usuarios (sin contraseña): {", ".join(usuario.username for usuario in sembrador.usuarios.values())}'
+        )
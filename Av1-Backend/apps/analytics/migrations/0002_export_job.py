@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('multitenancy', '0001_initial'),
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('tipo', models.CharField(choices=[('reporte_excel', 'Reporte Excel'), ('reporte_pdf', 'Reporte PDF'), ('contratos_excel', 'Contratos Excel'), ('pagos_contratos_excel', 'Pagos de Contratos Excel'), ('contrato_pdf', 'Contrato PDF')], max_length=30, verbose_name='Tipo')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En Proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('archivo', models.FileField(blank=True, upload_to='exportaciones/%Y/%m/%d/', verbose_name='Archivo')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=255, verbose_name='Nombre de Archivo')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo de Contenido')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado en')),
+                ('finalizado_en', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado en')),
+                ('expira_en', models.DateTimeField(blank=True, null=True, verbose_name='Expira en')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportaciones', to='multitenancy.tenant', verbose_name='Estudio Fotográfico')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exportaciones', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Exportación',
+                'verbose_name_plural': 'Trabajos de Exportación',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='analytics_e_estado_364ae1_idx'), models.Index(fields=['tenant', 'usuario', '-created_at'], name='analytics_e_tenant__637f2a_idx'), models.Index(fields=['expira_en'], name='analytics_e_expira__658c1c_idx')],
+            },
+        ),
+    ]
@@ -1,8 +1,10 @@
 """
 Analytics Models - Arte Ideas
 """
+from django.conf import settings
 from django.db import models
-from apps.core.models import BaseModel
+from django.utils import timezone
+from apps.core.models import BaseModel, Tenant
 
 
 class ReportConfiguration(BaseModel):
@@ -52,3 +54,83 @@ class ReportConfiguration(BaseModel):
     def __str__(self):
         return f"{self.nombre} ({self.get_categoria_display()})"
 
+
+
+class ExportJob(BaseModel):
+    """
+    Trabajo de exportación en segundo plano (Excel/PDF)
+
+    Las vistas encolan el trabajo y responden de inmediato; el comando
+    `procesar_exportaciones` lo ejecuta en un pool de procesos y guarda el
+    archivo resultante en MEDIA_ROOT hasta `expira_en`.
+    """
+    TIPO_CHOICES = [
+        ('reporte_excel', 'Reporte Excel'),
+        ('reporte_pdf', 'Reporte PDF'),
+        ('contratos_excel', 'Contratos Excel'),
+        ('pagos_contratos_excel', 'Pagos de Contratos Excel'),
+        ('contrato_pdf', 'Contrato PDF'),
+    ]
+
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En Proceso'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+    ]
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='exportaciones',
+        verbose_name='Estudio Fotográfico'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exportaciones',
+        verbose_name='Solicitado por'
+    )
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES, verbose_name='Tipo')
+    parametros = models.JSONField(default=dict, blank=True, verbose_name='Parámetros')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendiente',
+        verbose_name='Estado'
+    )
+    archivo = models.FileField(
+        upload_to='exportaciones/%Y/%m/%d/',
+        blank=True,
+        verbose_name='Archivo'
+    )
+    nombre_archivo = models.CharField(max_length=255, blank=True, verbose_name='Nombre de Archivo')
+    content_type = models.CharField(max_length=100, blank=True, verbose_name='Tipo de Contenido')
+    error = models.TextField(blank=True, verbose_name='Error')
+    iniciado_en = models.DateTimeField(null=True, blank=True, verbose_name='Iniciado en')
+    finalizado_en = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado en')
+    expira_en = models.DateTimeField(null=True, blank=True, verbose_name='Expira en')
+
+    class Meta:
+        verbose_name = 'Trabajo de Exportación'
+        verbose_name_plural = 'Trabajos de Exportación'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['estado', 'created_at']),
+            models.Index(fields=['tenant', 'usuario', '-created_at']),
+            models.Index(fields=['expira_en']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def disponible(self):
+        """El archivo está listo y no ha expirado"""
+        return (
+            self.estado == 'completado'
+            and bool(self.archivo)
+            and (self.expira_en is None or self.expira_en > timezone.now())
+        )
@@ -7,7 +7,8 @@ from django.db.models import Sum
 
 from .models import (
     MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral,
+    InventarioCatalogo, MovimientoStock
 )
 
 
@@ -385,4 +386,41 @@ class HerramientaGeneralAdmin(BaseInventarioAdmin):
                 )
             })
         )
-        return tuple(fieldsets)
\ No newline at end of file
+        return tuple(fieldsets)
+
+
+@admin.register(InventarioCatalogo)
+class InventarioCatalogoAdmin(admin.ModelAdmin):
+    """Catálogo unificado (solo lectura, se mantiene por señales)"""
+    list_display = [
+        'nombre_producto', 'categoria', 'codigo_producto', 'stock_disponible',
+        'stock_minimo', 'costo_unitario', 'precio_venta', 'is_active', 'tenant'
+    ]
+    list_filter = ['categoria', 'is_active', 'tenant']
+    search_fields = ['nombre_producto', 'codigo_producto']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MovimientoStock)
+class MovimientoStockAdmin(admin.ModelAdmin):
+    """Libro de movimientos de stock (solo lectura, se registra con StockService)"""
+    list_display = [
+        'creado_en', 'categoria', 'producto_id', 'tipo', 'cantidad',
+        'stock_resultante', 'motivo', 'referencia', 'usuario', 'tenant'
+    ]
+    list_filter = ['tipo', 'categoria', 'tenant']
+    search_fields = ['motivo', 'referencia']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,33 @@
+"""
+Comando de Django para reconstruir el catálogo unificado de inventario
+Uso: python manage.py reconstruir_catalogo_inventario
+     python manage.py reconstruir_catalogo_inventario --tenant-id 1
+"""
+from django.core.management.base import BaseCommand
+from apps.core.multitenancy.models import Tenant
+from apps.commerce.inventario.models import InventarioCatalogo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir el catálogo unificado de inventario desde las tablas de cada categoría'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Reconstruir solo el catálogo de este tenant',
+        )
+
+    def handle(self, *args, **options):
+        tenant = None
+        if options['tenant_id']:
+            try:
+                tenant = Tenant.objects.get(id=options['tenant_id'])
+            except Tenant.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f'Error: Tenant con ID {options["tenant_id"]} no existe'))
+                return
+
+        total = InventarioCatalogo.reconstruir(tenant=tenant)
+
+        alcance = f'tenant {tenant.name}' if tenant else 'todos los tenants'
+        self.stdout.write(self.style.SUCCESS(f'\n[OK] Catálogo reconstruido ({alcance}): {total} productos'))
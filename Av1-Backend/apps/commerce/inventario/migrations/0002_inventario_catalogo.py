@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+MODELOS_INVENTARIO = [
+    'MolduraListon', 'MolduraPrearmada', 'VidrioTapaMDF', 'Paspartu', 'Minilab',
+    'Cuadro', 'Anuario', 'CorteLaser', 'MarcoAccesorio', 'HerramientaGeneral',
+]
+
+
+def poblar_catalogo(apps, schema_editor):
+    InventarioCatalogo = apps.get_model('inventario', 'InventarioCatalogo')
+    for nombre in MODELOS_INVENTARIO:
+        modelo = apps.get_model('inventario', nombre)
+        InventarioCatalogo.objects.bulk_create([
+            InventarioCatalogo(
+                tenant_id=producto.tenant_id,
+                categoria=modelo._meta.model_name,
+                producto_id=producto.pk,
+                nombre_producto=producto.nombre_producto,
+                codigo_producto=producto.codigo_producto,
+                stock_disponible=producto.stock_disponible,
+                stock_minimo=producto.stock_minimo,
+                costo_unitario=producto.costo_unitario,
+                precio_venta=producto.precio_venta,
+                is_active=producto.is_active,
+            )
+            for producto in modelo.objects.iterator(chunk_size=2000)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multitenancy', '0001_initial'),
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventarioCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(choices=[('molduraliston', 'Moldura (Listón)'), ('molduraprearmada', 'Moldura Prearmada'), ('vidriotapamdf', 'Vidrio o Tapa MDF'), ('paspartu', 'Paspartú'), ('minilab', 'Minilab'), ('cuadro', 'Cuadro'), ('anuario', 'Anuario'), ('cortelaser', 'Corte Láser'), ('marcoaccesorio', 'Marco y Accesorio'), ('herramientageneral', 'Herramienta General')], max_length=50, verbose_name='Categoría')),
+                ('producto_id', models.PositiveBigIntegerField(verbose_name='ID del Producto')),
+                ('nombre_producto', models.CharField(max_length=200, verbose_name='Nombre del Producto')),
+                ('codigo_producto', models.CharField(blank=True, max_length=50, verbose_name='Código del Producto')),
+                ('stock_disponible', models.PositiveIntegerField(verbose_name='Stock Disponible')),
+                ('stock_minimo', models.PositiveIntegerField(default=0, verbose_name='Stock Mínimo')),
+                ('costo_unitario', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Costo Unitario (S/)')),
+                ('precio_venta', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Precio de Venta (S/)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='multitenancy.tenant', verbose_name='Estudio Fotográfico')),
+            ],
+            options={
+                'verbose_name': 'Catálogo de Inventario',
+                'verbose_name_plural': 'Catálogo de Inventario',
+                'indexes': [models.Index(fields=['tenant', 'is_active', 'categoria'], name='inventario__tenant__a50f81_idx'), models.Index(fields=['tenant', 'codigo_producto'], name='inventario__tenant__ec6824_idx')],
+                'unique_together': {('categoria', 'producto_id')},
+            },
+        ),
+        migrations.RunPython(poblar_catalogo, migrations.RunPython.noop),
+    ]
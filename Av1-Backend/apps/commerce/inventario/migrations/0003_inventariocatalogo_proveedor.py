@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:23
+
+from django.db import migrations, models
+
+
+MODELOS_INVENTARIO = [
+    'MolduraListon', 'MolduraPrearmada', 'VidrioTapaMDF', 'Paspartu', 'Minilab',
+    'Cuadro', 'Anuario', 'CorteLaser', 'MarcoAccesorio', 'HerramientaGeneral',
+]
+
+
+def copiar_proveedor(apps, schema_editor):
+    InventarioCatalogo = apps.get_model('inventario', 'InventarioCatalogo')
+    for nombre in MODELOS_INVENTARIO:
+        modelo = apps.get_model('inventario', nombre)
+        productos = modelo.objects.exclude(proveedor='').exclude(proveedor__isnull=True).values_list('pk', 'proveedor')
+        for producto_id, proveedor in productos.iterator(chunk_size=2000):
+            InventarioCatalogo.objects.filter(
+                categoria=modelo._meta.model_name, producto_id=producto_id
+            ).update(proveedor=proveedor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_inventario_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventariocatalogo',
+            name='proveedor',
+            field=models.CharField(blank=True, max_length=200, verbose_name='Proveedor'),
+        ),
+        migrations.RunPython(copiar_proveedor, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multitenancy', '0002_document_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventario', '0003_inventariocatalogo_proveedor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(max_length=50, verbose_name='Categoría')),
+                ('producto_id', models.PositiveBigIntegerField(verbose_name='ID del Producto')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=10, verbose_name='Tipo')),
+                ('cantidad', models.PositiveIntegerField(verbose_name='Cantidad')),
+                ('stock_resultante', models.PositiveIntegerField(verbose_name='Stock Resultante')),
+                ('motivo', models.CharField(blank=True, max_length=255, verbose_name='Motivo')),
+                ('referencia', models.CharField(blank=True, max_length=100, verbose_name='Referencia')),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='multitenancy.tenant', verbose_name='Estudio Fotográfico')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Registrado Por')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'ordering': ['-creado_en', '-id'],
+                'indexes': [models.Index(fields=['categoria', 'producto_id', 'creado_en'], name='inventario__categor_204524_idx'), models.Index(fields=['tenant', 'creado_en'], name='inventario__tenant__7eba6d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# OrderInventoryService.MOTIVO_RESERVA / MOTIVO_LIBERACION
+MOTIVOS_NOTA_VENTA = ['Reserva de nota de venta', 'Liberación de nota de venta']
+
+
+def vincular_pedidos(apps, schema_editor):
+    """Vincular los movimientos de reservas ya registrados por número de pedido"""
+    MovimientoStock = apps.get_model('inventario', 'MovimientoStock')
+    Order = apps.get_model('pedidos', 'Order')
+    movimientos = MovimientoStock.objects.filter(motivo__in=MOTIVOS_NOTA_VENTA, pedido__isnull=True)
+    pedidos = Order.objects.filter(
+        order_number__in=movimientos.values('referencia')
+    ).values_list('pk', 'tenant_id', 'order_number')
+    for pedido_id, tenant_id, numero in pedidos.iterator(chunk_size=2000):
+        movimientos.filter(tenant_id=tenant_id, referencia=numero).update(pedido_id=pedido_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0003_indices_paginacion_keyset'),
+        ('inventario', '0004_movimiento_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientostock',
+            name='pedido',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_stock', to='pedidos.order', verbose_name='Pedido'),
+        ),
+        migrations.RunPython(vincular_pedidos, migrations.RunPython.noop),
+    ]
@@ -2,13 +2,50 @@
 Modelos de Inventario - Arte Ideas Commerce
 Gestión completa de inventario y stock de productos
 """
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from apps.core.models import Tenant
 
 
+class InventarioQuerySet(models.QuerySet):
+    """
+    Consultas de valorización de inventario resueltas en la base de datos
+    (sin instanciar productos en Python)
+    """
+
+    def alertas(self):
+        """Productos con stock en nivel de alerta"""
+        return self.filter(stock_disponible__lte=models.F('stock_minimo'))
+
+    def metricas_valorizacion(self):
+        """Expresiones de agregación comunes (usables en aggregate/annotate)"""
+        return {
+            'total_productos': models.Count('id'),
+            'stock_total': Coalesce(models.Sum('stock_disponible'), 0),
+            'valor_total': Coalesce(
+                models.Sum(
+                    models.F('costo_unitario') * models.F('stock_disponible'),
+                    output_field=models.DecimalField(max_digits=20, decimal_places=2)
+                ),
+                Decimal('0.00'),
+                output_field=models.DecimalField(max_digits=20, decimal_places=2)
+            ),
+            'alertas_stock': models.Count('id', filter=models.Q(stock_disponible__lte=models.F('stock_minimo'))),
+            'sin_stock': models.Count('id', filter=models.Q(stock_disponible=0)),
+        }
+
+    def valorizacion(self):
+        """
+        Totales del queryset en una sola consulta:
+        total_productos, stock_total, valor_total (costo * stock), alertas_stock, sin_stock
+        """
+        return self.aggregate(**self.metricas_valorizacion())
+
+
 class BaseInventarioModel(models.Model):
     """Modelo base para todos los productos del inventario"""
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, verbose_name='Estudio Fotográfico')
@@ -35,6 +72,8 @@ class BaseInventarioModel(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = InventarioQuerySet.as_manager()
+    
     class Meta:
         abstract = True
     
@@ -362,4 +401,228 @@ class HerramientaGeneral(BaseInventarioModel):
     
     class Meta:
         verbose_name = "Herramienta General"
-        verbose_name_plural = "Herramientas Generales"
\ No newline at end of file
+        verbose_name_plural = "Herramientas Generales"
+
+# Modelos concretos del inventario (para métricas que recorren todas las categorías)
+INVENTORY_MODELS = [
+    MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+]
+
+
+class InventarioCatalogoQuerySet(InventarioQuerySet):
+    """Valorización del catálogo unificado con desglose por categoría"""
+
+    def valorizacion_por_categoria(self):
+        """
+        Totales generales y por categoría en una sola consulta agrupada
+
+        Todas las categorías aparecen en el desglose (en cero si no tienen productos),
+        identificadas por el modelo de inventario correspondiente.
+        """
+        metricas = self.metricas_valorizacion()
+        filas = {
+            fila['categoria']: fila
+            for fila in self.order_by().values('categoria').annotate(**metricas)
+        }
+
+        totales = {campo: 0 for campo in metricas}
+        totales['valor_total'] = Decimal('0.00')
+        categorias = []
+        for modelo in INVENTORY_MODELS:
+            fila = filas.get(modelo._meta.model_name) or {campo: 0 for campo in metricas}
+            for campo in metricas:
+                totales[campo] += fila[campo]
+            categorias.append((modelo, {campo: fila[campo] for campo in metricas}))
+
+        return {'totales': totales, 'categorias': categorias}
+
+    def referencias_faltantes(self, referencias):
+        """
+        Referencias (categoría, id del producto) que no están en el catálogo
+
+        Una sola consulta para todo el lote; filtrar antes por tenant para
+        rechazar productos de otro estudio.
+        """
+        referencias = set(referencias)
+        if not referencias:
+            return []
+        existentes = set(self.filter(
+            categoria__in={categoria for categoria, _ in referencias},
+            producto_id__in={producto_id for _, producto_id in referencias},
+        ).values_list('categoria', 'producto_id'))
+        return sorted(referencias - existentes)
+
+
+class InventarioCatalogo(models.Model):
+    """
+    Índice desnormalizado de todos los productos del inventario
+
+    Una fila por producto de cualquier categoría, mantenida por señales en
+    save/delete. Permite responder preguntas sobre "todos los productos"
+    (valorización, alertas, búsquedas) con una sola consulta indexada.
+    """
+    CATEGORIAS = [(modelo._meta.model_name, modelo._meta.verbose_name) for modelo in INVENTORY_MODELS]
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, verbose_name='Estudio Fotográfico')
+    categoria = models.CharField(max_length=50, choices=CATEGORIAS, verbose_name="Categoría")
+    producto_id = models.PositiveBigIntegerField(verbose_name="ID del Producto")
+    nombre_producto = models.CharField(max_length=200, verbose_name="Nombre del Producto")
+    codigo_producto = models.CharField(max_length=50, blank=True, verbose_name="Código del Producto")
+    proveedor = models.CharField(max_length=200, blank=True, verbose_name="Proveedor")
+    stock_disponible = models.PositiveIntegerField(verbose_name="Stock Disponible")
+    stock_minimo = models.PositiveIntegerField(default=0, verbose_name="Stock Mínimo")
+    costo_unitario = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Costo Unitario (S/)")
+    precio_venta = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Precio de Venta (S/)")
+    is_active = models.BooleanField(default=True, verbose_name="Activo")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    objects = InventarioCatalogoQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Catálogo de Inventario"
+        verbose_name_plural = "Catálogo de Inventario"
+        unique_together = ['categoria', 'producto_id']
+        indexes = [
+            models.Index(fields=['tenant', 'is_active', 'categoria']),
+            models.Index(fields=['tenant', 'codigo_producto']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_categoria_display()} - {self.nombre_producto}"
+
+    @property
+    def alerta_stock(self):
+        return self.stock_disponible <= self.stock_minimo
+
+    @classmethod
+    def modelo_de_categoria(cls, categoria):
+        """Modelo concreto de inventario para una categoría del catálogo"""
+        for modelo in INVENTORY_MODELS:
+            if modelo._meta.model_name == categoria:
+                return modelo
+        return None
+
+    @classmethod
+    def valores_desde_producto(cls, producto):
+        """Campos del catálogo a partir de un producto de inventario"""
+        return {
+            'tenant_id': producto.tenant_id,
+            'nombre_producto': producto.nombre_producto,
+            'codigo_producto': producto.codigo_producto,
+            'proveedor': producto.proveedor or '',
+            'stock_disponible': producto.stock_disponible,
+            'stock_minimo': producto.stock_minimo,
+            'costo_unitario': producto.costo_unitario,
+            'precio_venta': producto.precio_venta,
+            'is_active': producto.is_active,
+        }
+
+    @classmethod
+    def sincronizar(cls, producto):
+        """Crear o actualizar la fila del catálogo de un producto"""
+        cls.objects.update_or_create(
+            categoria=producto._meta.model_name,
+            producto_id=producto.pk,
+            defaults=cls.valores_desde_producto(producto)
+        )
+
+    @classmethod
+    def eliminar(cls, producto):
+        """Quitar un producto del catálogo"""
+        cls.objects.filter(categoria=producto._meta.model_name, producto_id=producto.pk).delete()
+
+    @classmethod
+    def reconstruir(cls, tenant=None):
+        """
+        Reconstruir el catálogo completo (o de un tenant) desde las tablas de inventario
+        """
+        with transaction.atomic():
+            filas = cls.objects.all()
+            if tenant is not None:
+                filas = filas.filter(tenant=tenant)
+            filas.delete()
+
+            total = 0
+            for modelo in INVENTORY_MODELS:
+                productos = modelo.objects.all()
+                if tenant is not None:
+                    productos = productos.filter(tenant=tenant)
+                nuevas = [
+                    cls(categoria=modelo._meta.model_name, producto_id=producto.pk, **cls.valores_desde_producto(producto))
+                    for producto in productos.iterator(chunk_size=2000)
+                ]
+                cls.objects.bulk_create(nuevas, batch_size=1000)
+                total += len(nuevas)
+        return total
+
+
+class MovimientoStock(models.Model):
+    """
+    Libro de movimientos de stock (solo inserción)
+
+    Una fila por entrada o salida de un producto con stock: las categorías
+    de inventario (categoria = model_name, igual que en el catálogo) y los
+    repuestos de activos (categoria = 'repuesto'). `stock_resultante` es el
+    stock del producto justo después del movimiento. Los movimientos se
+    registran con services.StockService junto con el cambio de stock.
+    """
+    TIPOS = [
+        ('entrada', 'Entrada'),
+        ('salida', 'Salida'),
+    ]
+
+    # Los repuestos no pertenecen a un tenant
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Estudio Fotográfico'
+    )
+    categoria = models.CharField(max_length=50, verbose_name="Categoría")
+    producto_id = models.PositiveBigIntegerField(verbose_name="ID del Producto")
+    tipo = models.CharField(max_length=10, choices=TIPOS, verbose_name="Tipo")
+    cantidad = models.PositiveIntegerField(verbose_name="Cantidad")
+    stock_resultante = models.PositiveIntegerField(verbose_name="Stock Resultante")
+    motivo = models.CharField(max_length=255, blank=True, verbose_name="Motivo")
+    referencia = models.CharField(max_length=100, blank=True, verbose_name="Referencia")
+    # Reservas y liberaciones de notas de venta: el pedido dueño del movimiento
+    pedido = models.ForeignKey(
+        'pedidos.Order',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_stock',
+        verbose_name='Pedido'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Registrado Por'
+    )
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Movimiento de Stock"
+        verbose_name_plural = "Movimientos de Stock"
+        ordering = ['-creado_en', '-id']
+        indexes = [
+            models.Index(fields=['categoria', 'producto_id', 'creado_en']),
+            models.Index(fields=['tenant', 'creado_en']),
+        ]
+
+    def __str__(self):
+        signo = '+' if self.tipo == 'entrada' else '-'
+        return f"{self.categoria} #{self.producto_id}: {signo}{self.cantidad} ({self.motivo})"
+
+    @property
+    def delta(self):
+        """Cambio de stock con signo"""
+        return self.cantidad if self.tipo == 'entrada' else -self.cantidad
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError('Los movimientos de stock no se pueden modificar')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError('Los movimientos de stock no se pueden eliminar')
@@ -15,7 +15,7 @@ class InventarioPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de inventario
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return 'access:inventario' in user_permissions
     
     def has_object_permission(self, request, view, obj):
@@ -28,6 +28,10 @@ class InventarioPermission(permissions.BasePermission):
             if request.user.tenant is None or obj.tenant != request.user.tenant:
                 return False
         
+        return self.puede_escribir(request, view)
+    
+    def puede_escribir(self, request, view):
+        """Lectura para todos los roles con acceso y escritura según rol"""
         user_role = request.user.role
         
         # Lectura permitida para todos los roles con acceso
@@ -46,6 +50,13 @@ class InventarioPermission(permissions.BasePermission):
         return False
 
 
+class MovimientoStockPermission(InventarioPermission):
+    """Libro de movimientos: lectura con acceso al inventario, lotes según el rol de escritura"""
+    
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and self.puede_escribir(request, view)
+
+
 class ProductPermission(InventarioPermission):
     """Alias para compatibilidad"""
     pass
\ No newline at end of file
@@ -4,7 +4,8 @@ Serializers del Módulo de Inventario - Arte Ideas Commerce
 from rest_framework import serializers
 from .models import (
     MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral,
+    MovimientoStock
 )
 
 
@@ -187,4 +188,18 @@ class HerramientaGeneralSerializer(BaseInventarioSerializer):
             'nombre_herramienta',
             'marca', 'marca_display',
             'tipo_material', 'tipo_material_display'
-        ]
\ No newline at end of file
+        ]
+
+
+class MovimientoStockSerializer(serializers.ModelSerializer):
+    """Serializer de solo lectura para el libro de movimientos de stock"""
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    usuario_nombre = serializers.CharField(source='usuario.username', read_only=True, default=None)
+    
+    class Meta:
+        model = MovimientoStock
+        fields = [
+            'id', 'categoria', 'producto_id', 'tipo', 'tipo_display', 'cantidad',
+            'stock_resultante', 'motivo', 'referencia', 'pedido', 'usuario', 'usuario_nombre', 'creado_en'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,252 @@
+"""
+Servicios del Módulo de Inventario - Arte Ideas Commerce
+
+Movimientos de stock atómicos para los productos de inventario y los
+repuestos de activos.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from .models import INVENTORY_MODELS, BaseInventarioModel, InventarioCatalogo, MovimientoStock
+
+
+class StockInsuficiente(ValueError):
+    """Una salida dejaría el stock del producto en negativo"""
+
+    def __init__(self, categoria, producto_id, stock_actual, cantidad):
+        self.categoria = categoria
+        self.producto_id = producto_id
+        self.stock_actual = stock_actual
+        self.cantidad = cantidad
+        super().__init__(f'Stock insuficiente. Stock actual: {stock_actual}')
+
+
+class StockService:
+    """
+    Entradas y salidas de stock con registro en el libro de movimientos
+
+    El stock nunca se lee y reescribe en Python: cada producto se actualiza
+    con un UPDATE `stock = stock + delta` condicionado a `stock >= -delta`
+    en las salidas. Dos ajustes simultáneos no pierden actualizaciones y una
+    salida sin stock suficiente no actualiza ninguna fila. Un lote se aplica
+    completo o no se aplica:
+
+    - Una consulta UPDATE por categoría (con el cambio neto de cada producto).
+    - Lectura del stock resultante, que la fila bloqueada garantiza hasta el commit.
+    - Catálogo unificado actualizado con los mismos valores (update() no
+      dispara sus señales) y movimientos insertados con bulk_create.
+    - Señal `stock_actualizado` al confirmar la transacción.
+    """
+    MAX_MOVIMIENTOS = 500
+    OPERACIONES = {
+        'entrada': 'entrada', 'agregar': 'entrada',
+        'salida': 'salida', 'quitar': 'salida',
+    }
+    CATEGORIA_REPUESTO = 'repuesto'
+
+    @classmethod
+    def modelos(cls):
+        """{categoria: (modelo, campo de stock)} de todos los productos con stock"""
+        from apps.operations.activos.models import Repuesto
+
+        modelos = {modelo._meta.model_name: (modelo, 'stock_disponible') for modelo in INVENTORY_MODELS}
+        modelos[cls.CATEGORIA_REPUESTO] = (Repuesto, 'stock_actual')
+        return modelos
+
+    @classmethod
+    def normalizar(cls, movimiento):
+        """
+        Validar un movimiento {categoria, producto_id, tipo|operacion, cantidad, motivo, referencia}
+
+        Devuelve el diccionario normalizado o lanza ValueError.
+        """
+        categoria = str(movimiento.get('categoria', '')).lower()
+        if categoria not in cls.modelos():
+            raise ValueError(f'Categoría "{categoria}" no válida')
+
+        tipo = cls.OPERACIONES.get(str(movimiento.get('tipo') or movimiento.get('operacion') or '').lower())
+        if tipo is None:
+            raise ValueError('Operación inválida. Use entrada/agregar o salida/quitar')
+
+        try:
+            producto_id = int(movimiento.get('producto_id'))
+        except (TypeError, ValueError):
+            raise ValueError('Producto inválido')
+        try:
+            cantidad = int(movimiento.get('cantidad'))
+        except (TypeError, ValueError):
+            raise ValueError('Cantidad inválida')
+        if cantidad < 1:
+            raise ValueError('Cantidad inválida')
+
+        return {
+            'categoria': categoria,
+            'producto_id': producto_id,
+            'tipo': tipo,
+            'cantidad': cantidad,
+            'motivo': str(movimiento.get('motivo') or '')[:255],
+            'referencia': str(movimiento.get('referencia') or '')[:100],
+        }
+
+    @classmethod
+    def mover(cls, producto, operacion, cantidad, motivo='', referencia='', usuario=None):
+        """Registrar un movimiento de un producto ya cargado. Devuelve el MovimientoStock"""
+        return cls.aplicar([{
+            'categoria': producto._meta.model_name,
+            'producto_id': producto.pk,
+            'operacion': operacion,
+            'cantidad': cantidad,
+            'motivo': motivo,
+            'referencia': referencia,
+        }], usuario=usuario)[0]
+
+    @classmethod
+    def aplicar(cls, movimientos, usuario=None, tenant=None, pedido=None):
+        """
+        Aplicar un lote de movimientos de forma atómica
+
+        tenant: si se indica, los productos de inventario deben pertenecer a él.
+        pedido: pedido al que se vinculan los movimientos (reservas de notas de venta).
+        Lanza ValueError (producto inexistente, datos inválidos) o
+        StockInsuficiente sin aplicar ningún movimiento. Devuelve los
+        MovimientoStock creados, en el orden recibido.
+        """
+        if not isinstance(movimientos, list) or not movimientos:
+            raise ValueError('Debe enviar una lista de movimientos')
+        if len(movimientos) > cls.MAX_MOVIMIENTOS:
+            raise ValueError(f'Máximo {cls.MAX_MOVIMIENTOS} movimientos por lote')
+
+        movimientos = [cls.normalizar(movimiento) for movimiento in movimientos]
+        netos = defaultdict(lambda: defaultdict(int))
+        for movimiento in movimientos:
+            delta = movimiento['cantidad'] if movimiento['tipo'] == 'entrada' else -movimiento['cantidad']
+            netos[movimiento['categoria']][movimiento['producto_id']] += delta
+
+        modelos = cls.modelos()
+        with transaction.atomic():
+            finales, tenants = {}, {}
+            # Orden fijo de categorías y productos: los bloqueos se toman siempre en el mismo orden
+            for categoria in sorted(netos):
+                modelo, campo = modelos[categoria]
+                resultado = cls._actualizar_categoria(modelo, campo, netos[categoria], tenant)
+                for producto_id, (stock, tenant_id) in resultado.items():
+                    finales[categoria, producto_id] = stock
+                    tenants[categoria, producto_id] = tenant_id
+
+                if categoria != cls.CATEGORIA_REPUESTO:
+                    InventarioCatalogo.objects.filter(
+                        categoria=categoria, producto_id__in=resultado
+                    ).update(stock_disponible=Case(
+                        *[When(producto_id=producto_id, then=Value(stock)) for producto_id, (stock, _) in resultado.items()],
+                        default=F('stock_disponible'),
+                        output_field=IntegerField()
+                    ))
+
+            # Stock después de cada movimiento, partiendo del stock previo al lote
+            stock_actual = {
+                clave: finales[clave] - netos[clave[0]][clave[1]] for clave in finales
+            }
+            registros = []
+            for movimiento in movimientos:
+                clave = (movimiento['categoria'], movimiento['producto_id'])
+                delta = movimiento['cantidad'] if movimiento['tipo'] == 'entrada' else -movimiento['cantidad']
+                if stock_actual[clave] + delta < 0:
+                    # El neto alcanza, pero esta salida llega antes que la entrada que la cubre
+                    raise StockInsuficiente(*clave, stock_actual[clave], movimiento['cantidad'])
+                stock_actual[clave] += delta
+                registros.append(MovimientoStock(
+                    tenant_id=tenants[clave],
+                    stock_resultante=stock_actual[clave],
+                    usuario=usuario,
+                    pedido=pedido,
+                    **movimiento
+                ))
+            # Los backends sin RETURNING (MySQL) no devuelven los ids insertados
+            ultimo_id = None
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ultimo_id = MovimientoStock.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+            MovimientoStock.objects.bulk_create(registros)
+            if any(registro.pk is None for registro in registros):
+                cls._asignar_ids(registros, ultimo_id or 0)
+
+            afectados = defaultdict(set)
+            for categoria, producto_id in finales:
+                afectados[modelos[categoria][0]].add(tenants[categoria, producto_id])
+            transaction.on_commit(lambda: cls._notificar(afectados))
+
+        return registros
+
+    @staticmethod
+    def _asignar_ids(registros, ultimo_id):
+        """
+        Completar los ids de los movimientos recién insertados
+
+        Los productos del lote siguen bloqueados por el UPDATE condicionado:
+        ningún otro lote puede registrar movimientos suyos hasta el commit, así
+        que los últimos movimientos de cada producto son los de este lote, en
+        el orden en que se insertaron.
+        """
+        por_producto = defaultdict(list)
+        for registro in registros:
+            por_producto[registro.categoria, registro.producto_id].append(registro)
+
+        condicion = Q()
+        for categoria, producto_id in por_producto:
+            condicion |= Q(categoria=categoria, producto_id=producto_id)
+        ids = defaultdict(list)
+        for categoria, producto_id, pk in MovimientoStock.objects.filter(
+            condicion, id__gt=ultimo_id
+        ).order_by('id').values_list('categoria', 'producto_id', 'id'):
+            ids[categoria, producto_id].append(pk)
+
+        for clave, lote in por_producto.items():
+            for registro, pk in zip(lote, ids[clave][-len(lote):]):
+                registro.pk = pk
+
+    @staticmethod
+    def _actualizar_categoria(modelo, campo, netos, tenant):
+        """
+        UPDATE condicionado de los productos de una categoría
+
+        Devuelve {producto_id: (stock resultante, tenant_id)}.
+        """
+        productos = modelo.objects.filter(pk__in=netos)
+        con_tenant = issubclass(modelo, BaseInventarioModel)
+        if tenant is not None and con_tenant:
+            productos = productos.filter(tenant=tenant)
+
+        condicion = Q()
+        for producto_id, neto in sorted(netos.items()):
+            condicion |= Q(pk=producto_id, **({f'{campo}__gte': -neto} if neto < 0 else {}))
+        cambios = [When(pk=producto_id, then=F(campo) + Value(neto)) for producto_id, neto in netos.items() if neto]
+
+        if cambios:
+            actualizados = productos.filter(condicion).update(
+                **{campo: Case(*cambios, default=F(campo), output_field=IntegerField())}
+            )
+        else:
+            # Lote con neto cero: bloquear igual los productos (ver _asignar_ids)
+            actualizados = len(productos.select_for_update().values_list('pk', flat=True))
+
+        columnas = ['pk', campo] + (['tenant_id'] if con_tenant else [])
+        filas = {fila[0]: fila for fila in productos.values_list(*columnas)}
+        if actualizados != len(netos):
+            for producto_id, neto in sorted(netos.items()):
+                if producto_id not in filas:
+                    raise ValueError(f'El producto {modelo._meta.model_name} #{producto_id} no existe')
+                if filas[producto_id][1] < -neto:
+                    raise StockInsuficiente(modelo._meta.model_name, producto_id, filas[producto_id][1], -neto)
+
+        return {
+            producto_id: (fila[1], fila[2] if con_tenant else None)
+            for producto_id, fila in filas.items()
+        }
+
+    @staticmethod
+    def _notificar(afectados):
+        from .signals import stock_actualizado
+
+        for modelo, tenant_ids in afectados.items():
+            stock_actualizado.send(sender=modelo, tenant_ids=tenant_ids)
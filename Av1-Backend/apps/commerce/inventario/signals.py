@@ -2,24 +2,19 @@
 Señales del Módulo de Inventario - Arte Ideas Commerce
 """
 import logging
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import Signal, receiver
 from django.core.mail import send_mail
 from django.conf import settings
-from django.db.models import F
+from django.db.models import F, Count
 
-from .models import (
-    MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
-)
+from .models import MolduraListon, Minilab, CorteLaser, INVENTORY_MODELS, InventarioCatalogo
 
 logger = logging.getLogger(__name__)
 
-# Lista de todos los modelos de inventario
-INVENTORY_MODELS = [
-    MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
-]
+# Enviada por services.StockService al confirmar movimientos de stock, que se
+# aplican con update() y no disparan post_save (kwargs: tenant_ids)
+stock_actualizado = Signal()
 
 
 def create_inventory_signals():
@@ -68,6 +63,31 @@ def create_inventory_signals():
 create_inventory_signals()
 
 
+def sincronizar_catalogo(sender, instance, **kwargs):
+    """
+    Mantener la fila del producto en el catálogo unificado
+    """
+    try:
+        InventarioCatalogo.sincronizar(instance)
+    except Exception as e:
+        logger.error(f"Error al sincronizar catálogo para {instance.nombre_producto}: {str(e)}")
+
+
+def eliminar_de_catalogo(sender, instance, **kwargs):
+    """
+    Quitar el producto eliminado del catálogo unificado
+    """
+    try:
+        InventarioCatalogo.eliminar(instance)
+    except Exception as e:
+        logger.error(f"Error al eliminar del catálogo {instance.nombre_producto}: {str(e)}")
+
+
+for model in INVENTORY_MODELS:
+    post_save.connect(sincronizar_catalogo, sender=model, dispatch_uid=f'catalogo_save_{model._meta.model_name}')
+    post_delete.connect(eliminar_de_catalogo, sender=model, dispatch_uid=f'catalogo_delete_{model._meta.model_name}')
+
+
 @receiver(pre_save, sender=MolduraListon)
 def validate_moldura_liston_specific(sender, instance, **kwargs):
     """
@@ -102,17 +122,17 @@ def check_inventory_alerts():
     try:
         total_alerts = 0
         
-        for model in INVENTORY_MODELS:
-            alerts = model.objects.filter(
-                stock_disponible__lte=F('stock_minimo'),
-                is_active=True
-            )
-            
-            count = alerts.count()
+        # Una sola consulta agrupada sobre el catálogo unificado
+        alertas = InventarioCatalogo.objects.filter(
+            stock_disponible__lte=F('stock_minimo'),
+            is_active=True
+        ).values('categoria').annotate(total=Count('id')).order_by('categoria')
+        
+        for fila in alertas:
+            count = fila['total']
             total_alerts += count
-            
-            if count > 0:
-                logger.info(f"{model._meta.verbose_name}: {count} productos con stock bajo")
+            modelo = InventarioCatalogo.modelo_de_categoria(fila['categoria'])
+            logger.info(f"{modelo._meta.verbose_name}: {count} productos con stock bajo")
         
         logger.info(f"Total de alertas de inventario: {total_alerts}")
         return total_alerts
@@ -127,29 +147,21 @@ def generate_inventory_report():
     Generar reporte de inventario
     """
     try:
+        valorizacion = InventarioCatalogo.objects.filter(is_active=True).valorizacion_por_categoria()
+        totales = valorizacion['totales']
+        
         report = {
-            'total_productos': 0,
-            'valor_total': 0,
-            'alertas_stock': 0,
+            'total_productos': totales['total_productos'],
+            'valor_total': float(totales['valor_total']),
+            'alertas_stock': totales['alertas_stock'],
             'categorias': {}
         }
         
-        for model in INVENTORY_MODELS:
-            productos = model.objects.filter(is_active=True)
-            categoria = model._meta.verbose_name_plural
-            
-            count = productos.count()
-            valor = sum(p.costo_total for p in productos)
-            alertas = productos.filter(stock_disponible__lte=F('stock_minimo')).count()
-            
-            report['total_productos'] += count
-            report['valor_total'] += float(valor)
-            report['alertas_stock'] += alertas
-            
-            report['categorias'][categoria] = {
-                'productos': count,
-                'valor': float(valor),
-                'alertas': alertas
+        for model, fila in valorizacion['categorias']:
+            report['categorias'][model._meta.verbose_name_plural] = {
+                'productos': fila['total_productos'],
+                'valor': float(fila['valor_total']),
+                'alertas': fila['alertas_stock']
             }
         
         logger.info(f"Reporte de inventario generado: {report['total_productos']} productos, S/ {report['valor_total']:.2f}")
@@ -157,4 +169,4 @@ def generate_inventory_report():
         
     except Exception as e:
         logger.error(f"Error al generar reporte de inventario: {str(e)}")
-        return None
\ No newline at end of file
+        return None
@@ -2,6 +2,7 @@
 Tests del Módulo de Inventario - Arte Ideas Commerce
 """
 from django.test import TestCase
+from django.db import connection
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -10,8 +11,10 @@ from decimal import Decimal
 from apps.core.models import Tenant
 from .models import (
     MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral,
+    InventarioCatalogo, MovimientoStock
 )
+from .services import StockService, StockInsuficiente
 
 User = get_user_model()
 
@@ -182,6 +185,48 @@ class InventarioAPITest(BaseInventarioTest):
         self.assertIn('valor_total_inventario', response.data)
         self.assertIn('categorias', response.data)
     
+    def test_metricas_valorizacion_en_base_de_datos(self):
+        """Test valorización total y por categoría calculada con agregaciones"""
+        with self.assertNumQueries(1):
+            valorizacion = InventarioCatalogo.objects.filter(
+                tenant=self.tenant, is_active=True
+            ).valorizacion_por_categoria()
+        
+        totales = valorizacion['totales']
+        self.assertEqual(totales['total_productos'], 2)
+        self.assertEqual(totales['stock_total'], 33)
+        self.assertEqual(totales['valor_total'], Decimal('602.25'))  # 30*20 + 3*0.75
+        self.assertEqual(totales['alertas_stock'], 1)
+        
+        categorias = dict(valorizacion['categorias'])
+        self.assertEqual(len(categorias), 10)
+        self.assertEqual(categorias[Minilab]['valor_total'], Decimal('2.25'))
+        self.assertEqual(categorias[Cuadro]['total_productos'], 0)
+        
+        response = self.client.get('/api/commerce/inventario/api/metricas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['valor_total_inventario'], 602.25)
+        self.assertEqual(response.data['categorias']['Minilab']['alertas'], 1)
+        
+        response = self.client.get('/api/commerce/inventario/api/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_total'], 33)
+        self.assertEqual(response.data['productos_alerta'], [{
+            'categoria': 'Minilab',
+            'nombre': 'Papel Test',
+            'stock_actual': 3,
+            'stock_minimo': 10,
+            'costo_total': 2.25,
+        }])
+    
+    def test_valorizacion_por_modelo(self):
+        """Test valorización sobre el queryset de una categoría"""
+        totales = MolduraListon.objects.filter(tenant=self.tenant).valorizacion()
+        
+        self.assertEqual(totales['valor_total'], Decimal('600.00'))
+        self.assertEqual(totales['alertas_stock'], 0)
+        self.assertEqual(totales['sin_stock'], 0)
+    
     def test_list_moldura_liston(self):
         """Test listar molduras listón"""
         response = self.client.get('/commerce/inventario/api/moldura-liston/')
@@ -208,6 +253,77 @@ class InventarioAPITest(BaseInventarioTest):
         self.assertEqual(response.data[0]['nombre_producto'], 'Papel Test')
 
 
+class InventarioCatalogoTest(BaseInventarioTest):
+    """Tests para el catálogo unificado de inventario"""
+    
+    def crear_moldura(self, **kwargs):
+        datos = {
+            'tenant': self.tenant,
+            'nombre_producto': 'Moldura Clásica',
+            'codigo_producto': 'MOL-001',
+            'stock_disponible': 5,
+            'stock_minimo': 10,
+            'costo_unitario': Decimal('15.00'),
+            'precio_venta': Decimal('25.00'),
+            'nombre_moldura': 'clasica',
+            'ancho': '1',
+            'color': 'dorado',
+            'material': 'madera'
+        }
+        datos.update(kwargs)
+        return MolduraListon.objects.create(**datos)
+    
+    def test_catalogo_sincronizado_al_guardar(self):
+        """Test crear y actualizar un producto mantiene su fila en el catálogo"""
+        moldura = self.crear_moldura()
+        
+        fila = InventarioCatalogo.objects.get(categoria='molduraliston', producto_id=moldura.pk)
+        self.assertEqual(fila.tenant, self.tenant)
+        self.assertEqual(fila.codigo_producto, 'MOL-001')
+        self.assertTrue(fila.alerta_stock)
+        
+        moldura.stock_disponible = 40
+        moldura.is_active = False
+        moldura.save()
+        
+        fila.refresh_from_db()
+        self.assertEqual(fila.stock_disponible, 40)
+        self.assertFalse(fila.is_active)
+        self.assertEqual(InventarioCatalogo.objects.count(), 1)
+    
+    def test_catalogo_eliminado_con_producto(self):
+        """Test eliminar un producto lo quita del catálogo"""
+        moldura = self.crear_moldura()
+        moldura.delete()
+        
+        self.assertFalse(InventarioCatalogo.objects.exists())
+    
+    def test_reconstruir_catalogo(self):
+        """Test reconstruir el catálogo desde las tablas de inventario"""
+        self.crear_moldura()
+        Minilab.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Papel Lustre',
+            stock_disponible=100,
+            stock_minimo=20,
+            costo_unitario=Decimal('0.50'),
+            tipo_insumo='papel',
+            nombre_tipo='papel_lustre',
+            tamaño_presentacion='10x15',
+            fecha_compra='2024-01-15'
+        )
+        InventarioCatalogo.objects.all().delete()
+        
+        total = InventarioCatalogo.reconstruir(tenant=self.tenant)
+        
+        self.assertEqual(total, 2)
+        self.assertEqual(
+            set(InventarioCatalogo.objects.values_list('categoria', flat=True)),
+            {'molduraliston', 'minilab'}
+        )
+        self.assertIs(InventarioCatalogo.modelo_de_categoria('minilab'), Minilab)
+
+
 class InventarioValidationTest(BaseInventarioTest):
     """Tests para validaciones de inventario"""
     
@@ -241,4 +357,183 @@ class InventarioValidationTest(BaseInventarioTest):
                 ancho='1',
                 color='dorado',
                 material='madera'
-            )
\ No newline at end of file
+            )
+
+
+class MovimientoStockTest(BaseInventarioTest):
+    """Tests para los movimientos de stock atómicos y su libro"""
+    
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.moldura = MolduraListon.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Moldura Test',
+            stock_disponible=10,
+            stock_minimo=2,
+            costo_unitario=Decimal('20.00'),
+            nombre_moldura='clasica',
+            ancho='1',
+            color='dorado',
+            material='madera'
+        )
+        self.papel = Minilab.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Papel Test',
+            stock_disponible=5,
+            stock_minimo=1,
+            costo_unitario=Decimal('0.75'),
+            tipo_insumo='papel',
+            nombre_tipo='papel_lustre',
+            tamaño_presentacion='20x30',
+            fecha_compra='2024-01-15'
+        )
+    
+    def stock_catalogo(self, producto):
+        return InventarioCatalogo.objects.get(
+            categoria=producto._meta.model_name, producto_id=producto.pk
+        ).stock_disponible
+    
+    def test_actualizar_stock_registra_movimiento(self):
+        """La salida actualiza producto y catálogo y deja el motivo en el libro"""
+        response = self.client.post(
+            f'/api/commerce/inventario/api/moldura-liston/{self.moldura.id}/actualizar_stock/',
+            {'cantidad': 4, 'operacion': 'quitar', 'motivo': 'Venta mostrador'}
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_anterior'], 10)
+        self.assertEqual(response.data['stock_actual'], 6)
+        self.moldura.refresh_from_db()
+        self.assertEqual(self.moldura.stock_disponible, 6)
+        self.assertEqual(self.stock_catalogo(self.moldura), 6)
+        
+        movimiento = MovimientoStock.objects.get()
+        self.assertEqual(movimiento.id, response.data['movimiento_id'])
+        self.assertEqual((movimiento.tipo, movimiento.cantidad, movimiento.stock_resultante), ('salida', 4, 6))
+        self.assertEqual(movimiento.motivo, 'Venta mostrador')
+        self.assertEqual(movimiento.usuario, self.user)
+        self.assertEqual(movimiento.tenant, self.tenant)
+    
+    def test_salida_sin_stock_suficiente(self):
+        response = self.client.post(
+            f'/api/commerce/inventario/api/moldura-liston/{self.moldura.id}/actualizar_stock/',
+            {'cantidad': 11, 'operacion': 'quitar'}
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Stock insuficiente', response.data['error'])
+        self.moldura.refresh_from_db()
+        self.assertEqual(self.moldura.stock_disponible, 10)
+        self.assertFalse(MovimientoStock.objects.exists())
+    
+    def test_cantidad_invalida(self):
+        for cantidad in ['abc', 0, -3]:
+            response = self.client.post(
+                f'/api/commerce/inventario/api/moldura-liston/{self.moldura.id}/actualizar_stock/',
+                {'cantidad': cantidad, 'operacion': 'agregar'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MovimientoStock.objects.exists())
+    
+    def test_instancia_desactualizada_no_pierde_actualizaciones(self):
+        """El cambio se aplica sobre el stock de la base de datos, no sobre el leído en Python"""
+        desactualizada = MolduraListon.objects.get(pk=self.moldura.pk)
+        StockService.mover(self.moldura, 'quitar', 3)
+        
+        movimiento = StockService.mover(desactualizada, 'quitar', 3)
+        
+        self.assertEqual(movimiento.stock_resultante, 4)
+        self.moldura.refresh_from_db()
+        self.assertEqual(self.moldura.stock_disponible, 4)
+        with self.assertRaises(StockInsuficiente):
+            StockService.mover(desactualizada, 'quitar', 5)
+    
+    def test_lote_atomico(self):
+        """Un movimiento sin stock anula todo el lote"""
+        response = self.client.post('/api/commerce/inventario/api/movimientos/lote/', {'movimientos': [
+            {'categoria': 'molduraliston', 'producto_id': self.moldura.id, 'operacion': 'quitar', 'cantidad': 2},
+            {'categoria': 'minilab', 'producto_id': self.papel.id, 'operacion': 'quitar', 'cantidad': 6},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['producto_id'], self.papel.id)
+        self.moldura.refresh_from_db()
+        self.assertEqual(self.moldura.stock_disponible, 10)
+        self.assertFalse(MovimientoStock.objects.exists())
+    
+    def test_lote(self):
+        """Movimientos de varias categorías con el stock resultante de cada uno"""
+        self.client.get('/api/commerce/inventario/api/movimientos/')  # Permisos en caché
+        with self.assertNumQueries(9):
+            # savepoint, UPDATE + SELECT + catálogo por categoría, INSERT de movimientos, release
+            response = self.client.post('/api/commerce/inventario/api/movimientos/lote/', {'movimientos': [
+                {'categoria': 'molduraliston', 'producto_id': self.moldura.id, 'tipo': 'salida', 'cantidad': 2,
+                 'referencia': 'PED-2024-0001'},
+                {'categoria': 'minilab', 'producto_id': self.papel.id, 'tipo': 'entrada', 'cantidad': 20},
+                {'categoria': 'molduraliston', 'producto_id': self.moldura.id, 'tipo': 'salida', 'cantidad': 3},
+            ]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([m['stock_resultante'] for m in response.data['movimientos']], [8, 25, 5])
+        self.assertEqual(response.data['movimientos'][0]['referencia'], 'PED-2024-0001')
+        self.assertEqual(self.stock_catalogo(self.moldura), 5)
+        self.assertEqual(self.stock_catalogo(self.papel), 25)
+        
+        response = self.client.get(f'/api/commerce/inventario/api/movimientos/?categoria=molduraliston&producto_id={self.moldura.id}')
+        self.assertEqual(response.data['count'], 2)
+    
+    def test_lote_salida_antes_de_la_entrada(self):
+        """El neto del lote alcanza, pero la salida no puede preceder a la entrada que la cubre"""
+        with self.assertRaises(StockInsuficiente):
+            StockService.aplicar([
+                {'categoria': 'minilab', 'producto_id': self.papel.id, 'tipo': 'salida', 'cantidad': 8},
+                {'categoria': 'minilab', 'producto_id': self.papel.id, 'tipo': 'entrada', 'cantidad': 10},
+            ])
+        self.papel.refresh_from_db()
+        self.assertEqual(self.papel.stock_disponible, 5)
+    
+    def test_lote_otro_tenant(self):
+        otro = Tenant.objects.create(
+            name='Otro', slug='otro', business_name='Otro', business_address='x',
+            business_phone='1', business_email='otro@test.com', business_ruc='1'
+        )
+        ajeno = MolduraListon.objects.create(
+            tenant=otro, nombre_producto='Ajena', stock_disponible=5, costo_unitario=Decimal('1.00'),
+            nombre_moldura='clasica', ancho='1', color='dorado', material='madera'
+        )
+        response = self.client.post('/api/commerce/inventario/api/movimientos/lote/', {'movimientos': [
+            {'categoria': 'molduraliston', 'producto_id': ajeno.id, 'tipo': 'salida', 'cantidad': 1},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        ajeno.refresh_from_db()
+        self.assertEqual(ajeno.stock_disponible, 5)
+    
+    def test_lote_sin_returning_devuelve_ids(self):
+        """En backends sin RETURNING (MySQL) los movimientos devueltos traen su id"""
+        from unittest import mock
+        
+        StockService.mover(self.moldura, 'quitar', 1)
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            registros = StockService.aplicar([
+                {'categoria': 'molduraliston', 'producto_id': self.moldura.id, 'tipo': 'salida', 'cantidad': 2},
+                {'categoria': 'minilab', 'producto_id': self.papel.id, 'tipo': 'entrada', 'cantidad': 4},
+                {'categoria': 'molduraliston', 'producto_id': self.moldura.id, 'tipo': 'salida', 'cantidad': 3},
+            ])
+        
+        self.assertTrue(all(registro.pk for registro in registros))
+        guardados = MovimientoStock.objects.in_bulk([registro.pk for registro in registros])
+        self.assertEqual(
+            [(guardados[registro.pk].producto_id, guardados[registro.pk].stock_resultante) for registro in registros],
+            [(self.moldura.id, 7), (self.papel.id, 9), (self.moldura.id, 4)]
+        )
+    
+    def test_movimientos_inmutables(self):
+        movimiento = StockService.mover(self.moldura, 'agregar', 1)
+        from django.core.exceptions import ValidationError
+        with self.assertRaises(ValidationError):
+            movimiento.save()
+        with self.assertRaises(ValidationError):
+            movimiento.delete()
@@ -8,7 +8,8 @@ from .views import (
     dashboard_inventario, metricas_api,
     MolduraListonViewSet, MolduraPrearmadaViewSet, VidrioTapaMDFViewSet,
     PaspartuViewSet, MinilabViewSet, CuadroViewSet, AnuarioViewSet,
-    CorteLaserViewSet, MarcoAccesorioViewSet, HerramientaGeneralViewSet
+    CorteLaserViewSet, MarcoAccesorioViewSet, HerramientaGeneralViewSet,
+    MovimientoStockViewSet
 )
 
 app_name = 'inventario'
@@ -36,6 +37,9 @@ router.register(r'corte-laser', CorteLaserViewSet, basename='corte-laser')
 router.register(r'marco-accesorio', MarcoAccesorioViewSet, basename='marco-accesorio')
 router.register(r'herramienta-general', HerramientaGeneralViewSet, basename='herramienta-general')
 
+# Libro de movimientos de stock (incluye lote/ para movimientos en bloque)
+router.register(r'movimientos', MovimientoStockViewSet, basename='movimiento-stock')
+
 urlpatterns = [
     # Dashboard y métricas
     path('api/dashboard/', dashboard_inventario, name='dashboard-inventario'),
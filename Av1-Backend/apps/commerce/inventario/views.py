@@ -1,4 +1,4 @@
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Sum, Count, Q, F, DecimalField, ExpressionWrapper
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
@@ -7,14 +7,17 @@ from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import (
     MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
+    Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral,
+    InventarioCatalogo, MovimientoStock
 )
 from .serializers import (
     MolduraListonSerializer, MolduraPrearmadaSerializer, VidrioTapaMDFSerializer,
     PaspartuSerializer, MinilabSerializer, CuadroSerializer, AnuarioSerializer,
-    CorteLaserSerializer, MarcoAccesorioSerializer, HerramientaGeneralSerializer
+    CorteLaserSerializer, MarcoAccesorioSerializer, HerramientaGeneralSerializer,
+    MovimientoStockSerializer
 )
-from .permissions import InventarioPermission
+from .permissions import InventarioPermission, MovimientoStockPermission
+from .services import StockService, StockInsuficiente
 
 
 @api_view(['GET'])
@@ -33,51 +36,34 @@ def dashboard_inventario(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Obtener todos los modelos de inventario
-    modelos_inventario = [
-        MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-        Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
-    ]
-    
-    # Calcular métricas principales
-    total_productos = 0
-    stock_total = 0
-    alertas_stock = 0
-    valor_total_inventario = 0
-    
-    for modelo in modelos_inventario:
-        # Filtrar por tenant
-        productos = modelo.objects.filter(tenant=tenant, is_active=True)
-        total_productos += productos.count()
-        stock_total += productos.aggregate(Sum('stock_disponible'))['stock_disponible__sum'] or 0
-        alertas_stock += productos.filter(stock_disponible__lte=F('stock_minimo')).count()
-        
-        # Calcular valor total del inventario
-        for producto in productos:
-            valor_total_inventario += float(producto.costo_total)
+    # Métricas principales en una sola consulta sobre el catálogo unificado
+    catalogo = InventarioCatalogo.objects.filter(tenant=tenant, is_active=True)
+    totales = catalogo.valorizacion()
     
     # Productos con alertas de stock
-    productos_alerta = []
-    for modelo in modelos_inventario:
-        alertas = modelo.objects.filter(
-            tenant=tenant,
-            is_active=True,
-            stock_disponible__lte=F('stock_minimo')
-        )
-        for producto in alertas:
-            productos_alerta.append({
-                'categoria': modelo._meta.verbose_name,
-                'nombre': producto.nombre_producto,
-                'stock_actual': producto.stock_disponible,
-                'stock_minimo': producto.stock_minimo,
-                'costo_total': float(producto.costo_total),
-            })
+    productos_alerta = [
+        {
+            'categoria': InventarioCatalogo.modelo_de_categoria(producto['categoria'])._meta.verbose_name,
+            'nombre': producto['nombre_producto'],
+            'stock_actual': producto['stock_disponible'],
+            'stock_minimo': producto['stock_minimo'],
+            'costo_total': float(producto['costo_total']),
+        }
+        for producto in catalogo.alertas().annotate(
+            costo_total=ExpressionWrapper(
+                F('costo_unitario') * F('stock_disponible'),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            )
+        ).values(
+            'categoria', 'nombre_producto', 'stock_disponible', 'stock_minimo', 'costo_total'
+        ).order_by('categoria', 'id')
+    ]
     
     data = {
-        'total_productos': total_productos,
-        'stock_total': stock_total,
-        'alertas_stock': alertas_stock,
-        'valor_total_inventario': valor_total_inventario,
+        'total_productos': totales['total_productos'],
+        'stock_total': totales['stock_total'],
+        'alertas_stock': totales['alertas_stock'],
+        'valor_total_inventario': float(totales['valor_total']),
         'productos_alerta': productos_alerta,
     }
     
@@ -100,41 +86,26 @@ def metricas_api(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    modelos_inventario = [
-        MolduraListon, MolduraPrearmada, VidrioTapaMDF, Paspartu,
-        Minilab, Cuadro, Anuario, CorteLaser, MarcoAccesorio, HerramientaGeneral
-    ]
+    # Totales y desglose por categoría en una sola consulta agrupada
+    valorizacion = InventarioCatalogo.objects.filter(
+        tenant=tenant, is_active=True
+    ).valorizacion_por_categoria()
+    totales = valorizacion['totales']
     
     metricas = {
-        'total_productos': 0,
-        'stock_total': 0,
-        'alertas_stock': 0,
-        'valor_total_inventario': 0,
+        'total_productos': totales['total_productos'],
+        'stock_total': totales['stock_total'],
+        'alertas_stock': totales['alertas_stock'],
+        'valor_total_inventario': float(totales['valor_total']),
         'categorias': {}
     }
     
-    for modelo in modelos_inventario:
-        # Filtrar por tenant
-        productos = modelo.objects.filter(tenant=tenant, is_active=True)
-        categoria = modelo._meta.verbose_name_plural
-        
-        count = productos.count()
-        stock = productos.aggregate(Sum('stock_disponible'))['stock_disponible__sum'] or 0
-        alertas = productos.filter(stock_disponible__lte=F('stock_minimo')).count()
-        
-        metricas['total_productos'] += count
-        metricas['stock_total'] += stock
-        metricas['alertas_stock'] += alertas
-        
-        # Calcular valor por categoría
-        valor_categoria = sum(p.costo_total for p in productos)
-        metricas['valor_total_inventario'] += valor_categoria
-        
-        metricas['categorias'][categoria] = {
-            'productos': count,
-            'stock': stock,
-            'alertas': alertas,
-            'valor': float(valor_categoria)
+    for modelo, fila in valorizacion['categorias']:
+        metricas['categorias'][modelo._meta.verbose_name_plural] = {
+            'productos': fila['total_productos'],
+            'stock': fila['stock_total'],
+            'alertas': fila['alertas_stock'],
+            'valor': float(fila['valor_total'])
         }
     
     return Response(metricas)
@@ -233,57 +204,64 @@ class BaseInventarioViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def actualizar_stock(self, request, pk=None):
-        """Actualizar stock de un producto"""
+        """
+        Registrar una entrada o salida de stock del producto
+        Parámetros: cantidad, operacion (agregar/quitar), motivo, referencia
+        """
         producto = self.get_object()
-        cantidad = request.data.get('cantidad', 0)
-        operacion = request.data.get('operacion', 'agregar')  # agregar o quitar
         motivo = request.data.get('motivo', 'Ajuste manual')
         
         try:
-            cantidad = int(cantidad)
-            
-            if operacion == 'quitar':
-                if producto.stock_disponible < cantidad:
-                    return Response(
-                        {'error': f'Stock insuficiente. Stock actual: {producto.stock_disponible}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                producto.stock_disponible -= cantidad
-            else:  # agregar
-                producto.stock_disponible += cantidad
-            
-            producto.save()
-            
-            return Response({
-                'message': f'Stock actualizado. Nuevo stock: {producto.stock_disponible}',
-                'stock_anterior': producto.stock_disponible - (cantidad if operacion == 'agregar' else -cantidad),
-                'stock_actual': producto.stock_disponible,
-                'operacion': operacion,
-                'cantidad': cantidad,
-                'motivo': motivo
-            })
-        
-        except (ValueError, TypeError):
-            return Response(
-                {'error': 'Cantidad inválida'},
-                status=status.HTTP_400_BAD_REQUEST
+            movimiento = StockService.mover(
+                producto,
+                request.data.get('operacion', 'agregar'),
+                request.data.get('cantidad', 0),
+                motivo=motivo,
+                referencia=request.data.get('referencia', ''),
+                usuario=request.user
             )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': f'Stock actualizado. Nuevo stock: {movimiento.stock_resultante}',
+            'stock_anterior': movimiento.stock_resultante - movimiento.delta,
+            'stock_actual': movimiento.stock_resultante,
+            'operacion': 'agregar' if movimiento.tipo == 'entrada' else 'quitar',
+            'cantidad': movimiento.cantidad,
+            'motivo': motivo,
+            'movimiento_id': movimiento.id,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def movimientos(self, request, pk=None):
+        """Historial de movimientos de stock del producto"""
+        producto = self.get_object()
+        movimientos = MovimientoStock.objects.filter(
+            categoria=producto._meta.model_name, producto_id=producto.pk
+        ).select_related('usuario')
+        
+        page = self.paginate_queryset(movimientos)
+        if page is not None:
+            serializer = MovimientoStockSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = MovimientoStockSerializer(movimientos, many=True)
+        return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def resumen_categoria(self, request):
         """Obtener resumen de la categoría actual"""
         queryset = self.get_queryset()
+        activos = queryset.filter(is_active=True).valorizacion()
         
         resumen = {
             'total_productos': queryset.count(),
-            'productos_activos': queryset.filter(is_active=True).count(),
+            'productos_activos': activos['total_productos'],
             'stock_total': queryset.aggregate(Sum('stock_disponible'))['stock_disponible__sum'] or 0,
-            'valor_total': sum(float(p.costo_total) for p in queryset.filter(is_active=True)),
-            'alertas_stock': queryset.filter(
-                stock_disponible__lte=F('stock_minimo'),
-                is_active=True
-            ).count(),
-            'sin_stock': queryset.filter(stock_disponible=0, is_active=True).count(),
+            'valor_total': float(activos['valor_total']),
+            'alertas_stock': activos['alertas_stock'],
+            'sin_stock': activos['sin_stock'],
         }
         
         return Response(resumen)
@@ -418,4 +396,67 @@ class HerramientaGeneralViewSet(BaseInventarioViewSet):
     serializer_class = HerramientaGeneralSerializer
     filterset_fields = BaseInventarioViewSet.filterset_fields + [
         'marca', 'tipo_material'
-    ]
\ No newline at end of file
+    ]
+
+
+class MovimientoStockViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Libro de movimientos de stock del inventario
+
+    GET lista los movimientos del tenant (filtros: categoria, producto_id, tipo).
+    POST lote/ aplica varios movimientos de forma atómica (todos o ninguno).
+    """
+    serializer_class = MovimientoStockSerializer
+    permission_classes = [IsAuthenticated, MovimientoStockPermission]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['categoria', 'producto_id', 'tipo', 'usuario']
+    ordering_fields = ['creado_en', 'cantidad']
+    ordering = ['-creado_en', '-id']
+    
+    def get_queryset(self):
+        """Movimientos del tenant actual"""
+        queryset = MovimientoStock.objects.select_related('usuario')
+        user = self.request.user
+        if user.tenant is None:
+            # Super admin puede ver los movimientos de todos los tenants
+            return queryset
+        return queryset.filter(tenant=user.tenant)
+    
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Aplicar un lote de movimientos
+        Body: {"movimientos": [{"categoria", "producto_id", "operacion", "cantidad", "motivo", "referencia"}]}
+        """
+        tenant = request.user.tenant
+        if tenant is None:
+            return Response(
+                {'error': 'Usuario sin tenant asignado. Se requiere un tenant para mover stock.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        movimientos = request.data.get('movimientos')
+        if isinstance(movimientos, list) and any(
+            isinstance(movimiento, dict) and str(movimiento.get('categoria', '')).lower() == StockService.CATEGORIA_REPUESTO
+            for movimiento in movimientos
+        ):
+            return Response(
+                {'error': 'Los repuestos se mueven desde el módulo de activos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            registros = StockService.aplicar(movimientos, usuario=request.user, tenant=tenant)
+        except StockInsuficiente as e:
+            return Response({
+                'error': str(e),
+                'categoria': e.categoria,
+                'producto_id': e.producto_id,
+                'stock_actual': e.stock_actual,
+                'cantidad': e.cantidad,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = self.get_serializer(registros, many=True)
+        return Response({'movimientos': serializer.data}, status=status.HTTP_201_CREATED)
@@ -49,7 +49,7 @@ class OrderAdmin(admin.ModelAdmin):
         'cliente__razon_social', 'cliente__email', 'cliente__dni'
     ]
     readonly_fields = [
-        'balance', 'payment_status', 'affects_inventory',
+        'balance', 'payment_status', 'affects_inventory', 'inventory_reserved',
         'is_overdue', 'days_until_delivery', 'created_at', 'updated_at'
     ]
     
@@ -88,7 +88,7 @@ class OrderAdmin(admin.ModelAdmin):
         }),
         ('Estado', {
             'fields': (
-                'status', 'payment_status', 'affects_inventory'
+                'status', 'payment_status', 'affects_inventory', 'inventory_reserved'
             )
         }),
         ('Información Adicional', {
@@ -199,7 +199,7 @@ class OrderItemAdmin(admin.ModelAdmin):
         'affects_inventory'
     ]
     list_filter = [
-        'affects_inventory', 'order__status', 'order__document_type'
+        'affects_inventory', 'inventory_category', 'order__status', 'order__document_type'
     ]
     search_fields = [
         'product_name', 'product_code', 'order__order_number'
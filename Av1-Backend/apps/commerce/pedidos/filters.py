@@ -2,10 +2,10 @@
 Filtros del Módulo de Pedidos - Arte Ideas Commerce
 """
 import django_filters
-from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 
+from apps.core.busqueda.services import PESO_TITULO, BusquedaService, ClienteBusqueda
 from .models import Order, OrderItem, OrderPayment
 
 
@@ -89,12 +89,15 @@ class OrderFilter(django_filters.FilterSet):
         ]
     
     def filter_cliente_nombre(self, queryset, name, value):
-        """Filtrar por nombre completo del cliente"""
-        return queryset.filter(
-            Q(cliente__nombres__icontains=value) |
-            Q(cliente__apellidos__icontains=value) |
-            Q(cliente__razon_social__icontains=value)
+        """Filtrar por nombre completo del cliente (índice de búsqueda, sin distinguir tildes)"""
+        ids = BusquedaService.ids_coincidentes(
+            value, ClienteBusqueda,
+            tenant=getattr(getattr(self.request, 'user', None), 'tenant', None),
+            peso_minimo=PESO_TITULO
         )
+        if ids is None:
+            return queryset
+        return queryset.filter(cliente_id__in=ids)
     
     def filter_overdue(self, queryset, name, value):
         """Filtrar pedidos atrasados"""
@@ -158,7 +161,7 @@ class OrderItemFilter(django_filters.FilterSet):
     
     class Meta:
         model = OrderItem
-        fields = ['order', 'affects_inventory', 'inventory_item_id']
+        fields = ['order', 'affects_inventory', 'inventory_category', 'inventory_item_id']
     
     def filter_has_discount(self, queryset, name, value):
         """Filtrar items con descuento"""
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='inventory_reserved',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Stock Reservado'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='inventory_category',
+            field=models.CharField(blank=True, choices=[('molduraliston', 'Moldura (Listón)'), ('molduraprearmada', 'Moldura Prearmada'), ('vidriotapamdf', 'Vidrio o Tapa MDF'), ('paspartu', 'Paspartú'), ('minilab', 'Minilab'), ('cuadro', 'Cuadro'), ('anuario', 'Anuario'), ('cortelaser', 'Corte Láser'), ('marcoaccesorio', 'Marco y Accesorio'), ('herramientageneral', 'Herramienta General')], max_length=50, verbose_name='Categoría de Inventario'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['inventory_category', 'inventory_item_id'], name='pedidos_ord_invento_9f95d7_idx'),
+        ),
+    ]
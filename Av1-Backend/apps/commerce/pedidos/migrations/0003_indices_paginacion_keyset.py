@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedidos', '0002_referencia_inventario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='pedidos_ord_tenant__81ade7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderpayment',
+            index=models.Index(fields=['payment_date', 'id'], name='pedidos_ord_payment_6bad7f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatushistory',
+            index=models.Index(fields=['changed_at', 'id'], name='pedidos_ord_changed_b951e1_idx'),
+        ),
+    ]
@@ -2,12 +2,74 @@
 Modelos de Pedidos - Arte Ideas Commerce
 Gestión de pedidos, órdenes y operaciones comerciales
 """
-from django.db import models
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import models, transaction
+from django.db.models import F, Q, Value, Case, When, Count, BooleanField, DateField, DurationField, ExpressionWrapper
+from django.db.models.functions import Greatest, Round
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
 from apps.core.models import Tenant
 from apps.crm.models import Cliente, Contrato
+from apps.commerce.inventario.models import InventarioCatalogo
+
+
+_recalculo_suspendido = ContextVar('pedidos_recalculo_suspendido', default=False)
+
+
+@contextmanager
+def suspend_totals_recalculation():
+    """
+    Suspender el recálculo de totales que disparan OrderItem.save y sus señales
+
+    Lo usa la escritura de items en lote, que aplica un único delta al pedido
+    al final en lugar de recalcular una vez por cada item.
+    """
+    token = _recalculo_suspendido.set(True)
+    try:
+        yield
+    finally:
+        _recalculo_suspendido.reset(token)
+
+
+def totals_recalculation_suspended():
+    """Indica si se está dentro de `suspend_totals_recalculation()`"""
+    return _recalculo_suspendido.get()
+
+
+class OrderQuerySet(models.QuerySet):
+    """QuerySet de pedidos con los campos del listado calculados en la base de datos"""
+
+    # Columnas que lee OrderListSerializer
+    LIST_FIELDS = [
+        'id', 'order_number', 'cliente', 'cliente__nombres', 'cliente__apellidos',
+        'document_type', 'order_date', 'delivery_date', 'total', 'paid_amount', 'balance',
+        'status', 'payment_status', 'created_at',
+    ]
+
+    def for_listing(self, today=None):
+        """
+        Pedidos para el listado en una sola consulta, sin cargar items ni pagos
+
+        Anota items_count (COUNT agrupado), overdue y delivery_delta (entrega
+        menos hoy, como duración); equivalen a is_overdue y days_until_delivery
+        del modelo.
+        """
+        today = today or timezone.now().date()
+        hoy = Value(today, output_field=DateField())
+        return self.select_related('cliente').only(*self.LIST_FIELDS).annotate(
+            items_count=Count('items'),
+            overdue=Case(
+                When(status__in=['completado', 'cancelado'], then=Value(False)),
+                When(delivery_date__lt=hoy, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+            delivery_delta=ExpressionWrapper(F('delivery_date') - hoy, output_field=DurationField()),
+        )
 
 
 class Order(models.Model):
@@ -42,12 +104,20 @@ class Order(models.Model):
         ('secundaria', 'Secundaria'),
     ]
     
+    # Estados en los que una nota de venta tiene su stock reservado
+    INVENTORY_RESERVED_STATUSES = ['confirmado', 'en_proceso', 'completado']
+    
     PAYMENT_STATUS_CHOICES = [
         ('pendiente', 'Pendiente'),
         ('parcial', 'Pago Parcial'),
         ('completo', 'Pagado Completo'),
     ]
     
+    # IGV (18% en Perú)
+    TAX_RATE = Decimal('0.18')
+    
+    objects = OrderQuerySet.as_manager()
+    
     id = models.AutoField(primary_key=True)
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, verbose_name='Estudio Fotográfico')
     
@@ -139,6 +209,7 @@ class Order(models.Model):
     
     # Control de inventario
     affects_inventory = models.BooleanField(default=False, verbose_name='Afecta Inventario')
+    inventory_reserved = models.BooleanField(default=False, editable=False, verbose_name='Stock Reservado')
     
     # Usuario que crea el pedido
     created_by = models.ForeignKey(
@@ -158,14 +229,47 @@ class Order(models.Model):
         verbose_name_plural = 'Pedidos'
         ordering = ['-created_at']
         unique_together = ['tenant', 'order_number']
+        indexes = [
+            # Listado por tenant en el orden por defecto (paginación keyset)
+            models.Index(fields=['tenant', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.order_number} - {self.cliente.obtener_nombre_completo()} - {self.get_document_type_display()}"
     
     def save(self, *args, **kwargs):
         """Guardar con cálculos automáticos"""
-        # Calcular balance automáticamente
-        self.balance = self.total - self.paid_amount
+        self.apply_derived_fields()
+        
+        with transaction.atomic():
+            # Asignar el siguiente número de la serie si no se indicó uno
+            if not self.order_number and self.tenant_id:
+                from .services import OrderNumberService
+                self.order_number = OrderNumberService.next_number(self.tenant)
+            super().save(*args, **kwargs)
+        
+        # Recalcular totales basado en items
+        self.recalculate_totals()
+    
+    def pending_inventory_action(self):
+        """
+        'reservar', 'liberar' o None según el estado y el stock ya reservado
+
+        Las notas de venta reservan stock al confirmarse (o al pasar directo a
+        en proceso/completado) y lo liberan al cancelarse o dejar de ser nota
+        de venta.
+        """
+        if self.inventory_reserved:
+            if self.status == 'cancelado' or self.document_type != 'nota_venta':
+                return 'liberar'
+        elif self.document_type == 'nota_venta' and self.status in self.INVENTORY_RESERVED_STATUSES:
+            return 'reservar'
+        return None
+    
+    def apply_derived_fields(self):
+        """Calcular saldo, estado de pago, afectación de inventario y atraso antes de guardar"""
+        # Calcular balance automáticamente (un pedido pagado de más no queda con saldo negativo)
+        self.balance = max(self.total - self.paid_amount, Decimal('0'))
         
         # Actualizar estado de pago
         if self.paid_amount == 0:
@@ -182,11 +286,6 @@ class Order(models.Model):
         if self.status not in ['completado', 'cancelado'] and self.delivery_date:
             if timezone.now().date() > self.delivery_date:
                 self.status = 'atrasado'
-        
-        super().save(*args, **kwargs)
-        
-        # Recalcular totales basado en items
-        self.recalculate_totals()
     
     def clean(self):
         """Validaciones personalizadas"""
@@ -220,11 +319,10 @@ class Order(models.Model):
     def recalculate_totals(self):
         """Recalcular totales basado en los items del pedido"""
         items = self.items.all()
-        subtotal = sum(item.subtotal for item in items)
+        subtotal = sum((item.subtotal for item in items), Decimal('0'))
         
         # Calcular IGV (18% en Perú)
-        tax_rate = 0.18
-        tax = subtotal * tax_rate
+        tax = subtotal * self.TAX_RATE
         total = subtotal + tax
         
         # Actualizar solo si hay cambios significativos
@@ -233,9 +331,108 @@ class Order(models.Model):
                 subtotal=subtotal,
                 tax=tax,
                 total=total,
-                balance=total - self.paid_amount
+                balance=max(total - self.paid_amount, Decimal('0'))
             )
     
+    def set_totals_from_items(self, items):
+        """Asignar subtotal, IGV y total a partir de items aún no guardados (sin consultas)"""
+        self.subtotal = sum((item.calculate_subtotal() for item in items), Decimal('0'))
+        self.tax = (self.subtotal * self.TAX_RATE).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        self.total = self.subtotal + self.tax
+    
+    def apply_subtotal_delta(self, delta, refresh=True):
+        """
+        Sumar `delta` al subtotal y derivar IGV, total, saldo y estado de pago
+        
+        Todo se resuelve en un único UPDATE con expresiones F() a partir del
+        subtotal guardado, sin releer los items ni disparar señales de Order.
+        Devuelve el número de filas actualizadas (0 si el delta es cero).
+        """
+        delta = Decimal(delta)
+        if not delta:
+            return 0
+        
+        subtotal = F('subtotal') + Value(delta)
+        total = Round(subtotal * Value(1 + self.TAX_RATE), 2)
+        updated = Order.objects.filter(pk=self.pk).update(
+            subtotal=subtotal,
+            tax=Round(subtotal * Value(self.TAX_RATE), 2),
+            total=total,
+            balance=Greatest(total - F('paid_amount'), Value(Decimal('0'))),
+            payment_status=Case(
+                When(paid_amount=0, then=Value('pendiente')),
+                When(Q(paid_amount__gte=total), then=Value('completo')),
+                default=Value('parcial'),
+            ),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            self.invalidate_dashboard()
+        if refresh:
+            self.refresh_from_db(fields=['subtotal', 'tax', 'total', 'balance', 'payment_status', 'updated_at'])
+        return updated
+    
+    def invalidate_dashboard(self):
+        """
+        Invalidar al confirmar los widgets del dashboard que dependen de pedidos e items
+        
+        Las escrituras en lote (bulk_create, bulk_update, update()) no envían
+        post_save, así que no pasan por las señales de invalidación.
+        """
+        from apps.analytics.dashboard.cache import invalidar_modelos_al_confirmar
+        
+        invalidar_modelos_al_confirmar(self.tenant_id, Order, OrderItem)
+    
+    def bulk_write_items(self, create=(), update=(), delete=()):
+        """
+        Crear, actualizar y eliminar items del pedido en lote
+        
+        create: items nuevos (sin guardar), update: items existentes ya
+        modificados, delete: ids de items a eliminar. Usa bulk_create /
+        bulk_update sin el recálculo por item ni la cascada de señales y
+        ajusta los totales del pedido con un solo `apply_subtotal_delta`.
+        Si la nota de venta ya tiene stock reservado lo ajusta a los items;
+        con stock insuficiente lanza StockInsuficiente y no se escribe nada.
+        """
+        create, update, delete = list(create), list(update), list(delete)
+        ids = [item.pk for item in update] + delete
+        
+        with transaction.atomic(), suspend_totals_recalculation():
+            stored = dict(self.items.filter(pk__in=ids).values_list('pk', 'subtotal')) if ids else {}
+            missing = set(ids) - set(stored)
+            if missing:
+                raise ValidationError({
+                    'items': f"Items que no pertenecen al pedido: {', '.join(map(str, sorted(missing)))}"
+                })
+            
+            now = timezone.now()
+            delta = -sum((stored[pk] for pk in delete), Decimal('0'))
+            for item in create + update:
+                item.order = self
+                item.tenant_id = self.tenant_id
+                item.affects_inventory = self.affects_inventory
+                item.subtotal = item.calculate_subtotal()
+                item.updated_at = now
+            delta += sum((item.subtotal for item in create), Decimal('0'))
+            for item in update:
+                delta += item.subtotal - stored[item.pk]
+            
+            if delete:
+                self.items.filter(pk__in=delete).delete()
+            if create:
+                OrderItem.objects.bulk_create(create)
+            if update:
+                OrderItem.objects.bulk_update(update, OrderItem.BULK_UPDATE_FIELDS)
+            if not self.apply_subtotal_delta(delta) and (create or update):
+                # Sin cambio de totales apply_subtotal_delta no invalida
+                self.invalidate_dashboard()
+            
+            # Nota ya reservada: reservar o liberar la diferencia de sus items
+            from .services import OrderInventoryService
+            OrderInventoryService.reconciliar(self, usuario=getattr(self, '_changed_by', None))
+        
+        return delta
+    
     def get_scheduled_sessions(self):
         """Obtener lista de sesiones fotográficas programadas"""
         return self.scheduled_dates.get('sesiones_fotograficas', [])
@@ -331,6 +528,13 @@ class OrderItem(models.Model):
     
     # Control de inventario
     affects_inventory = models.BooleanField(default=False, verbose_name='Afecta Inventario')
+    # Referencia al producto del catálogo unificado: (categoría, id del producto)
+    inventory_category = models.CharField(
+        max_length=50,
+        blank=True,
+        choices=InventarioCatalogo.CATEGORIAS,
+        verbose_name='Categoría de Inventario'
+    )
     inventory_item_id = models.IntegerField(null=True, blank=True, verbose_name='ID de Item de Inventario')
     
     # Fechas
@@ -341,27 +545,48 @@ class OrderItem(models.Model):
         verbose_name = 'Item de Pedido'
         verbose_name_plural = 'Items de Pedido'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['inventory_category', 'inventory_item_id']),
+        ]
+    
+    # Campos que se escriben al actualizar items en lote (Order.bulk_write_items)
+    BULK_UPDATE_FIELDS = [
+        'product_name', 'product_description', 'product_code', 'quantity',
+        'unit_price', 'discount_percentage', 'subtotal', 'affects_inventory',
+        'inventory_category', 'inventory_item_id', 'updated_at',
+    ]
     
     def __str__(self):
         return f"{self.product_name} x{self.quantity} - {self.order.order_number}"
     
+    def calculate_subtotal(self):
+        """Subtotal con descuento, redondeado a céntimos como se guarda en la base de datos"""
+        base_subtotal = self.quantity * Decimal(self.unit_price)
+        discount_amount = base_subtotal * (Decimal(self.discount_percentage) / 100)
+        return (base_subtotal - discount_amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
     def save(self, *args, **kwargs):
         """Guardar con cálculos automáticos"""
         # Calcular subtotal con descuento
-        base_subtotal = self.quantity * self.unit_price
-        discount_amount = base_subtotal * (self.discount_percentage / 100)
-        self.subtotal = base_subtotal - discount_amount
+        self.subtotal = self.calculate_subtotal()
         
         # Heredar afectación de inventario del pedido
         if self.order:
             self.affects_inventory = self.order.affects_inventory
             self.tenant = self.order.tenant
         
-        super().save(*args, **kwargs)
-        
-        # Actualizar totales del pedido después de guardar el item
-        if self.order:
-            self.order.recalculate_totals()
+        # Atómico: si la señal no puede reservar el stock del item no se guarda
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Actualizar totales del pedido después de guardar el item
+            if self.order and not totals_recalculation_suspended():
+                self.order.recalculate_totals()
+    
+    def delete(self, *args, **kwargs):
+        """Eliminar junto con la liberación del stock reservado (señal post_delete)"""
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
     
     def clean(self):
         """Validaciones personalizadas"""
@@ -371,6 +596,17 @@ class OrderItem(models.Model):
             raise ValidationError({'unit_price': 'El precio unitario no puede ser negativo'})
         if self.discount_percentage < 0 or self.discount_percentage > 100:
             raise ValidationError({'discount_percentage': 'El descuento debe estar entre 0 y 100%'})
+        if bool(self.inventory_category) != (self.inventory_item_id is not None):
+            raise ValidationError({
+                'inventory_item_id': 'La categoría y el ID del producto de inventario se indican juntos'
+            })
+    
+    @property
+    def inventory_reference(self):
+        """(categoría, id del producto) en el inventario, o None si no está vinculado"""
+        if self.inventory_category and self.inventory_item_id is not None:
+            return self.inventory_category, self.inventory_item_id
+        return None
     
     @property
     def discount_amount(self):
@@ -378,8 +614,8 @@ class OrderItem(models.Model):
         quantity = self.quantity or 0
         unit_price = self.unit_price or 0
         discount_percentage = self.discount_percentage or 0
-        base_subtotal = quantity * unit_price
-        return base_subtotal * (discount_percentage / 100)
+        base_subtotal = quantity * Decimal(unit_price)
+        return base_subtotal * (Decimal(discount_percentage) / 100)
 
 
 
@@ -417,6 +653,9 @@ class OrderPayment(models.Model):
         verbose_name = 'Pago de Pedido'
         verbose_name_plural = 'Pagos de Pedido'
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['payment_date', 'id']),
+        ]
     
     def __str__(self):
         return f"Pago {self.order.order_number} - S/ {self.amount}"
@@ -456,6 +695,9 @@ class OrderStatusHistory(models.Model):
         verbose_name = 'Historial de Estado'
         verbose_name_plural = 'Historial de Estados'
         ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['changed_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.order.order_number}: {self.previous_status} → {self.new_status}"
\ No newline at end of file
@@ -15,7 +15,7 @@ class OrderPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de pedidos
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return 'access:pedidos' in user_permissions
     
     def has_object_permission(self, request, view, obj):
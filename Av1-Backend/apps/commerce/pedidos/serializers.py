@@ -3,9 +3,11 @@ Serializers del Módulo de Pedidos - Arte Ideas Commerce
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 from .models import Order, OrderItem, OrderPayment, OrderStatusHistory
 from apps.crm.models import Cliente, Contrato
+from apps.commerce.inventario.models import InventarioCatalogo
 
 User = get_user_model()
 
@@ -19,10 +21,128 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'product_name', 'product_description', 'product_code',
             'quantity', 'unit_price', 'discount_percentage', 'subtotal',
-            'discount_amount', 'affects_inventory', 'inventory_item_id',
+            'discount_amount', 'affects_inventory', 'inventory_category', 'inventory_item_id',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'subtotal', 'affects_inventory', 'created_at', 'updated_at']
+    
+    def validate(self, data):
+        """La referencia al inventario lleva categoría e ID del producto juntos"""
+        item = OrderItem(
+            quantity=data.get('quantity', getattr(self.instance, 'quantity', 1)),
+            unit_price=data.get('unit_price', getattr(self.instance, 'unit_price', 0)),
+            discount_percentage=data.get('discount_percentage', getattr(self.instance, 'discount_percentage', 0)),
+            inventory_category=data.get('inventory_category', getattr(self.instance, 'inventory_category', '')),
+            inventory_item_id=data.get('inventory_item_id', getattr(self.instance, 'inventory_item_id', None)),
+        )
+        try:
+            item.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        
+        # Anidado en un lote, el serializer del lote revisa todas las referencias juntas
+        referencia = item.inventory_reference
+        if referencia and self.parent is None:
+            if catalogo_del_tenant(self.get_tenant_id()).referencias_faltantes([referencia]):
+                raise serializers.ValidationError({
+                    'inventory_item_id': 'El producto no existe en el inventario de este estudio'
+                })
+        return data
+    
+    def get_tenant_id(self):
+        """Tenant del pedido del item, o el del usuario al crear"""
+        if self.instance is not None:
+            return self.instance.order.tenant_id
+        if self.context.get('order') is not None:
+            return self.context['order'].tenant_id
+        request = self.context.get('request')
+        return getattr(getattr(request, 'user', None), 'tenant_id', None)
+
+
+def catalogo_del_tenant(tenant_id):
+    """Catálogo de inventario del tenant (todo el catálogo para el super admin)"""
+    if tenant_id is None:
+        return InventarioCatalogo.objects.all()
+    return InventarioCatalogo.objects.filter(tenant_id=tenant_id)
+
+
+def referencias_inventario(items):
+    """(categoría, id del producto) de los items vinculados al inventario"""
+    return [
+        (item['inventory_category'], item['inventory_item_id'])
+        for item in items
+        if item.get('inventory_category') and item.get('inventory_item_id') is not None
+    ]
+
+
+def error_referencias_faltantes(faltantes):
+    return 'Productos que no existen en el inventario de este estudio: ' + ', '.join(
+        f'{categoria} #{producto_id}' for categoria, producto_id in faltantes
+    )
+
+
+class OrderItemBulkItemSerializer(OrderItemSerializer):
+    """
+    Item dentro de una escritura en lote: con `id` se actualiza (solo los
+    campos enviados), sin `id` se crea
+    """
+    id = serializers.IntegerField(required=False)
+    
+    class Meta(OrderItemSerializer.Meta):
+        extra_kwargs = {
+            'product_name': {'required': False},
+            'unit_price': {'required': False},
+        }
+    
+    def validate(self, data):
+        if 'id' not in data:
+            faltantes = [campo for campo in ('product_name', 'unit_price') if campo not in data]
+            if faltantes:
+                raise serializers.ValidationError({campo: 'Este campo es requerido.' for campo in faltantes})
+        
+        # Mismas reglas que OrderItem.clean para los valores enviados
+        item = OrderItem(
+            quantity=data.get('quantity', 1),
+            unit_price=data.get('unit_price', 0),
+            discount_percentage=data.get('discount_percentage', 0),
+        )
+        if 'id' not in data or 'inventory_category' in data or 'inventory_item_id' in data:
+            item.inventory_category = data.get('inventory_category', '')
+            item.inventory_item_id = data.get('inventory_item_id')
+        try:
+            item.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        return data
+
+
+class OrderItemBulkSerializer(serializers.Serializer):
+    """Escritura de items en lote: {"items": [...], "eliminar": [ids]}"""
+    MAX_ITEMS = 1000
+    
+    items = OrderItemBulkItemSerializer(many=True, required=False)
+    eliminar = serializers.ListField(child=serializers.IntegerField(), required=False)
+    
+    def validate(self, data):
+        items = data.get('items', [])
+        eliminar = data.get('eliminar', [])
+        if not items and not eliminar:
+            raise serializers.ValidationError('Debe enviar items o ids a eliminar')
+        if len(items) + len(eliminar) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f'Máximo {self.MAX_ITEMS} items por lote')
+        
+        ids = [item['id'] for item in items if 'id' in item]
+        if len(ids) != len(set(ids)) or set(ids) & set(eliminar):
+            raise serializers.ValidationError('Cada item solo puede aparecer una vez en el lote')
+        
+        # Una consulta al catálogo del tenant del pedido para todo el lote
+        order = self.context.get('order')
+        referencias = referencias_inventario(items)
+        if order is not None and referencias:
+            faltantes = catalogo_del_tenant(order.tenant_id).referencias_faltantes(referencias)
+            if faltantes:
+                raise serializers.ValidationError({'items': error_referencias_faltantes(faltantes)})
+        return data
 
 
 class OrderPaymentSerializer(serializers.ModelSerializer):
@@ -88,15 +208,19 @@ class OrderSerializer(serializers.ModelSerializer):
             'payment_status', 'payment_status_display',
             'extra_services', 'status', 'status_display',
             'contrato', 'contrato_numero', 'notes', 'description',
-            'affects_inventory', 'created_by', 'created_by_name',
+            'affects_inventory', 'inventory_reserved', 'created_by', 'created_by_name',
             'is_overdue', 'days_until_delivery',
             'items', 'payments',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'balance', 'payment_status', 'affects_inventory',
+            'id', 'balance', 'payment_status', 'affects_inventory', 'inventory_reserved',
             'is_overdue', 'days_until_delivery', 'created_at', 'updated_at'
         ]
+        extra_kwargs = {
+            # Si no se envía se asigna el siguiente PED-YYYY-NNNN del tenant
+            'order_number': {'required': False, 'allow_blank': True},
+        }
     
     def validate(self, data):
         """Validaciones personalizadas"""
@@ -145,15 +269,47 @@ class OrderSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class OrderBulkRowSerializer(OrderSerializer):
+    """
+    Fila de la creación masiva de pedidos
+
+    El número de pedido se asigna en bloque y cliente/contrato llegan como
+    ids que OrderBulkCreateService resuelve para todo el lote a la vez.
+    """
+    cliente = serializers.IntegerField()
+    contrato = serializers.IntegerField(required=False, allow_null=True)
+    items = OrderItemSerializer(many=True, required=False)
+    
+    class Meta(OrderSerializer.Meta):
+        read_only_fields = OrderSerializer.Meta.read_only_fields + ['order_number']
+    
+    def validate_items(self, items):
+        for item in items:
+            try:
+                OrderItem(
+                    quantity=item.get('quantity', 1),
+                    unit_price=item['unit_price'],
+                    discount_percentage=item.get('discount_percentage', 0),
+                ).clean()
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+        return items
+
+
 class OrderListSerializer(serializers.ModelSerializer):
-    """Serializer simplificado para listado de pedidos"""
+    """
+    Serializer simplificado para listado de pedidos
+
+    Espera el queryset de `Order.objects.for_listing()`, que trae items_count,
+    overdue y delivery_delta ya calculados.
+    """
     cliente_nombre = serializers.CharField(source='cliente.obtener_nombre_completo', read_only=True)
     document_type_display = serializers.CharField(source='get_document_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     payment_status_display = serializers.CharField(source='get_payment_status_display', read_only=True)
-    is_overdue = serializers.ReadOnlyField()
-    days_until_delivery = serializers.ReadOnlyField()
-    items_count = serializers.IntegerField(source='items.count', read_only=True)
+    is_overdue = serializers.BooleanField(source='overdue', read_only=True)
+    days_until_delivery = serializers.SerializerMethodField()
+    items_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Order
@@ -165,6 +321,9 @@ class OrderListSerializer(serializers.ModelSerializer):
             'is_overdue', 'days_until_delivery', 'items_count',
             'created_at'
         ]
+    
+    def get_days_until_delivery(self, obj):
+        return obj.delivery_delta.days if obj.delivery_delta is not None else None
 
 
 class OrderSummarySerializer(serializers.Serializer):
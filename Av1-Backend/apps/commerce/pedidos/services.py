@@ -0,0 +1,339 @@
+"""
+Servicios del Módulo de Pedidos - Arte Ideas Commerce
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+
+from apps.analytics.dashboard.cache import invalidar_modelos_al_confirmar
+from apps.core.busqueda.services import BusquedaService, PedidoBusqueda
+from apps.core.secuencias import reservar_codigos
+from apps.crm.models import Cliente, Contrato
+from apps.commerce.inventario.models import InventarioCatalogo, MovimientoStock
+from apps.commerce.inventario.services import StockService
+from .models import Order, OrderItem
+
+
+class OrderNumberService:
+    """
+    Numeración de pedidos con formato PED-YYYY-NNNN por tenant
+    """
+    PREFIX = 'PED'
+
+    @classmethod
+    def reserve_block(cls, tenant, cantidad, year=None):
+        """
+        Reservar `cantidad` números consecutivos para el tenant
+
+        Usa el contador de apps.core.secuencias; debe llamarse dentro de la
+        transacción que crea los pedidos para que no queden huecos.
+        """
+        return reservar_codigos(
+            tenant, cls.PREFIX, Order.objects.filter(tenant=tenant), 'order_number',
+            cantidad=cantidad, anio=year
+        )
+
+    @classmethod
+    def next_number(cls, tenant):
+        """Siguiente número de pedido del tenant"""
+        return cls.reserve_block(tenant, 1)[0]
+
+
+class OrderBulkCreateService:
+    """
+    Creación masiva de pedidos con sus items (campañas escolares)
+
+    `validar` revisa todo el lote antes de escribir nada y deja un resultado
+    por fila; `crear` inserta pedidos e items con bulk_create en una sola
+    transacción, con los números de pedido reservados en bloque y los
+    totales calculados en memoria. No se disparan save() ni las señales de
+    Order/OrderItem por cada fila.
+    """
+    MAX_ORDERS = 500
+
+    def __init__(self, tenant, user=None):
+        self.tenant = tenant
+        self.user = user
+        self.validas = []
+        self.resultados = []
+
+    @property
+    def tiene_errores(self):
+        return any(resultado['result'] == 'invalid' for resultado in self.resultados)
+
+    def validar(self, filas, defaults=None):
+        """
+        Validar cada fila (combinada con `defaults`) con OrderBulkRowSerializer
+
+        Clientes, contratos y productos de inventario de todo el lote se
+        resuelven con una consulta por modelo, restringida al tenant.
+        """
+        from .serializers import OrderBulkRowSerializer, error_referencias_faltantes, referencias_inventario
+
+        if not isinstance(filas, list) or not filas:
+            raise ValueError('Debe enviar una lista de pedidos en "orders"')
+        if len(filas) > self.MAX_ORDERS:
+            raise ValueError(f'Máximo {self.MAX_ORDERS} pedidos por lote')
+
+        defaults = defaults or {}
+        serializers = []
+        for fila in filas:
+            datos = {**defaults, **fila} if isinstance(fila, dict) else fila
+            serializer = OrderBulkRowSerializer(data=datos)
+            serializer.is_valid()
+            serializers.append(serializer)
+
+        validos = [s.validated_data for s in serializers if not s.errors]
+        clientes = Cliente.objects.filter(tenant=self.tenant).in_bulk(
+            {datos['cliente'] for datos in validos}
+        )
+        contrato_ids = {datos['contrato'] for datos in validos if datos.get('contrato')}
+        contratos = Contrato.objects.filter(tenant=self.tenant).in_bulk(contrato_ids) if contrato_ids else {}
+        referencias = [referencia for datos in validos for referencia in referencias_inventario(datos.get('items', []))]
+        faltantes = set(InventarioCatalogo.objects.filter(tenant=self.tenant).referencias_faltantes(referencias))
+
+        self.validas, self.resultados = [], []
+        for index, serializer in enumerate(serializers):
+            errores = dict(serializer.errors)
+            datos = dict(serializer.validated_data) if not errores else {}
+
+            if not errores:
+                datos['cliente'] = clientes.get(datos['cliente'])
+                if datos['cliente'] is None:
+                    errores['cliente'] = ['El cliente no existe en este estudio']
+                if datos.get('contrato'):
+                    datos['contrato'] = contratos.get(datos['contrato'])
+                    if datos['contrato'] is None:
+                        errores['contrato'] = ['El contrato no existe en este estudio']
+                else:
+                    datos['contrato'] = None
+                if datos.get('document_type') == 'contrato' and not datos.get('contrato') and 'contrato' not in errores:
+                    errores['contrato'] = ['Debe seleccionar un contrato para pedidos de tipo contrato']
+                faltantes_fila = sorted(set(referencias_inventario(datos.get('items', []))) & faltantes)
+                if faltantes_fila:
+                    errores['items'] = [error_referencias_faltantes(faltantes_fila)]
+
+            if errores:
+                self.resultados.append({'index': index, 'result': 'invalid', 'errors': errores})
+            else:
+                self.validas.append((index, datos))
+                self.resultados.append({'index': index, 'result': 'valid'})
+
+        return self.resultados
+
+    def crear(self):
+        """
+        Insertar las filas validadas. Devuelve los resultados por fila
+
+        Lanza ValueError/StockInsuficiente sin crear nada si una nota de venta
+        confirmada no tiene stock para sus items.
+        """
+        if self.tiene_errores:
+            raise ValueError('El lote tiene filas inválidas')
+
+        with transaction.atomic():
+            numeros = OrderNumberService.reserve_block(self.tenant, len(self.validas))
+
+            pedidos, items_por_pedido = [], []
+            for (index, datos), numero in zip(self.validas, numeros):
+                items_data = datos.pop('items', [])
+                order = Order(tenant=self.tenant, created_by=self.user, order_number=numero, **datos)
+                items = [OrderItem(tenant=self.tenant, **item) for item in items_data]
+                if items:
+                    order.set_totals_from_items(items)
+                order.apply_derived_fields()
+                pedidos.append(order)
+                items_por_pedido.append(items)
+
+            Order.objects.bulk_create(pedidos)
+
+            # Los backends sin RETURNING (MySQL) no devuelven los ids insertados
+            if any(order.pk is None for order in pedidos):
+                ids = dict(Order.objects.filter(
+                    tenant=self.tenant, order_number__in=numeros
+                ).values_list('order_number', 'id'))
+                for order in pedidos:
+                    order.pk = ids[order.order_number]
+
+            items = []
+            for order, items_order in zip(pedidos, items_por_pedido):
+                for item in items_order:
+                    item.order = order
+                    item.affects_inventory = order.affects_inventory
+                    item.subtotal = item.calculate_subtotal()
+                    items.append(item)
+            OrderItem.objects.bulk_create(items, batch_size=500)
+
+            # Sin señales tampoco hay reserva de stock: las notas de venta que llegan confirmadas
+            # reservan aquí, y si falta stock no se crea ningún pedido
+            for order in pedidos:
+                if order.pending_inventory_action() == 'reservar':
+                    OrderInventoryService.sincronizar(order, usuario=self.user)
+
+            # bulk_create no dispara post_save: indexar el lote para la búsqueda
+            # e invalidar los widgets del dashboard al confirmar
+            BusquedaService.indexar(PedidoBusqueda, pedidos)
+            invalidar_modelos_al_confirmar(self.tenant.id, Order, OrderItem)
+
+        self.resultados = [
+            {
+                'index': index,
+                'result': 'created',
+                'id': order.pk,
+                'order_number': order.order_number,
+                'items_count': len(items_order),
+                'total': order.total,
+            }
+            for (index, _), order, items_order in zip(self.validas, pedidos, items_por_pedido)
+        ]
+        return self.resultados
+
+
+class OrderInventoryService:
+    """
+    Reserva y liberación del stock de las notas de venta
+
+    Cada item vinculado a un producto del catálogo (inventory_category +
+    inventory_item_id) genera un movimiento y StockService los aplica con un
+    UPDATE condicionado por tabla de categoría, dentro de la transacción en
+    la que se guarda el pedido. Si algún producto no tiene stock suficiente
+    no se reserva nada y el cambio de estado se revierte.
+
+    Mientras la nota está reservada, `reconciliar` ajusta el stock a los
+    items que se agregan, modifican o eliminan. La liberación devuelve lo
+    que registró el libro de movimientos para el pedido, no lo que dicen los
+    items en ese momento, así el stock no se descuadra al cancelarla. Los
+    movimientos se vinculan al pedido por FK (`MovimientoStock.pedido`):
+    renombrar el pedido o registrar a mano movimientos con su número como
+    referencia no cambia lo reservado.
+    """
+    MOTIVO_RESERVA = 'Reserva de nota de venta'
+    MOTIVO_LIBERACION = 'Liberación de nota de venta'
+
+    @classmethod
+    def sincronizar(cls, order, usuario=None):
+        """
+        Reservar o liberar según Order.pending_inventory_action()
+
+        Devuelve los MovimientoStock creados. Lanza ValueError/StockInsuficiente
+        sin modificar el stock.
+        """
+        accion = order.pending_inventory_action()
+        if accion is None:
+            return []
+
+        with transaction.atomic():
+            # Bloquear el pedido: dos confirmaciones simultáneas no reservan dos veces
+            reservado = Order.objects.select_for_update().filter(pk=order.pk).values_list(
+                'inventory_reserved', flat=True
+            ).get()
+            if reservado != order.inventory_reserved:
+                order.inventory_reserved = reservado
+                accion = order.pending_inventory_action()
+                if accion is None:
+                    return []
+
+            if accion == 'reservar':
+                movimientos = cls.movimientos_reserva(order)
+            else:
+                movimientos = cls.movimientos_liberacion(order)
+            registros = StockService.aplicar(
+                movimientos, usuario=usuario, tenant=order.tenant_id, pedido=order
+            ) if movimientos else []
+
+            order.inventory_reserved = accion == 'reservar'
+            Order.objects.filter(pk=order.pk).update(inventory_reserved=order.inventory_reserved)
+
+        return registros
+
+    @classmethod
+    def reconciliar(cls, order, usuario=None):
+        """
+        Ajustar la reserva de una nota ya reservada a sus items actuales
+
+        Compara la cantidad de cada producto en los items con el neto del libro
+        de movimientos y reserva o libera la diferencia. No hace nada si el
+        pedido no tiene stock reservado. Devuelve los MovimientoStock creados;
+        lanza ValueError/StockInsuficiente sin modificar el stock.
+        """
+        if order.document_type != 'nota_venta':
+            return []
+
+        with transaction.atomic():
+            # Mismo bloqueo que sincronizar: la reserva no cambia mientras se ajusta
+            reservado = Order.objects.select_for_update().filter(pk=order.pk).values_list(
+                'inventory_reserved', flat=True
+            ).first()
+            if not reservado:
+                return []
+
+            deseado = {
+                (fila['inventory_category'], fila['inventory_item_id']): fila['total']
+                for fila in order.items.exclude(inventory_category='').filter(
+                    inventory_item_id__isnull=False, quantity__gt=0
+                ).values('inventory_category', 'inventory_item_id').annotate(
+                    total=Sum('quantity')
+                ).order_by()
+            }
+            actual = cls.reservado_por_producto(order)
+
+            movimientos = []
+            for categoria, producto_id in sorted(set(deseado) | set(actual)):
+                clave = (categoria, producto_id)
+                diferencia = deseado.get(clave, 0) - actual.get(clave, 0)
+                if diferencia:
+                    movimientos.append({
+                        'categoria': categoria,
+                        'producto_id': producto_id,
+                        'tipo': 'salida' if diferencia > 0 else 'entrada',
+                        'cantidad': abs(diferencia),
+                        'motivo': cls.MOTIVO_RESERVA if diferencia > 0 else cls.MOTIVO_LIBERACION,
+                        'referencia': order.order_number,
+                    })
+            if not movimientos:
+                return []
+            return StockService.aplicar(movimientos, usuario=usuario, tenant=order.tenant_id, pedido=order)
+
+    @classmethod
+    def movimientos_reserva(cls, order):
+        """Una salida por item vinculado al inventario"""
+        items = order.items.exclude(inventory_category='').filter(
+            inventory_item_id__isnull=False, quantity__gt=0
+        ).values_list('inventory_category', 'inventory_item_id', 'quantity')
+        return [
+            {
+                'categoria': categoria,
+                'producto_id': producto_id,
+                'tipo': 'salida',
+                'cantidad': cantidad,
+                'motivo': cls.MOTIVO_RESERVA,
+                'referencia': order.order_number,
+            }
+            for categoria, producto_id, cantidad in items
+        ]
+
+    @classmethod
+    def reservado_por_producto(cls, order):
+        """{(categoría, id del producto): neto reservado} según el libro de movimientos"""
+        filas = MovimientoStock.objects.filter(pedido=order).values('categoria', 'producto_id').annotate(
+            neto=Sum(Case(
+                When(tipo='salida', then=F('cantidad')),
+                default=F('cantidad') * -1,
+                output_field=IntegerField()
+            ))
+        ).order_by('categoria', 'producto_id')
+        return {(fila['categoria'], fila['producto_id']): fila['neto'] for fila in filas if fila['neto']}
+
+    @classmethod
+    def movimientos_liberacion(cls, order):
+        """Una entrada por producto con el neto reservado según el libro de movimientos"""
+        return [
+            {
+                'categoria': categoria,
+                'producto_id': producto_id,
+                'tipo': 'entrada',
+                'cantidad': neto,
+                'motivo': cls.MOTIVO_LIBERACION,
+                'referencia': order.order_number,
+            }
+            for (categoria, producto_id), neto in cls.reservado_por_producto(order).items() if neto > 0
+        ]
@@ -7,7 +7,7 @@ from django.dispatch import receiver
 from django.utils import timezone
 from django.db.models import Sum
 
-from .models import Order, OrderItem, OrderPayment, OrderStatusHistory
+from .models import Order, OrderItem, OrderPayment, OrderStatusHistory, totals_recalculation_suspended
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +81,9 @@ def recalculate_order_totals_on_item_change(sender, instance, **kwargs):
     """
     Recalcular totales del pedido cuando cambia un item
     """
+    if totals_recalculation_suspended():
+        return
+    
     try:
         order = instance.order
         order.recalculate_totals()
@@ -94,6 +97,9 @@ def recalculate_order_totals_on_item_delete(sender, instance, **kwargs):
     """
     Recalcular totales del pedido cuando se elimina un item
     """
+    if totals_recalculation_suspended():
+        return
+    
     try:
         order = instance.order
         order.recalculate_totals()
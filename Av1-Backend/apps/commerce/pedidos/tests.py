@@ -1,7 +1,11 @@
 """
 Tests del Módulo de Pedidos - Arte Ideas Commerce
 """
+from decimal import Decimal
+
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -10,7 +14,10 @@ from datetime import timedelta
 
 from apps.core.models import Tenant
 from apps.crm.models import Cliente
+from apps.commerce.inventario.models import MolduraListon, Minilab, MovimientoStock
+from apps.commerce.inventario.services import StockService
 from .models import Order, OrderItem, OrderPayment, OrderStatusHistory
+from .services import OrderInventoryService
 
 User = get_user_model()
 
@@ -67,6 +74,23 @@ class OrderModelTest(TestCase):
         self.assertEqual(order.status, 'pendiente')
         self.assertEqual(order.balance, 150.00)
     
+    def test_order_number_automatico(self):
+        """Test sin número de pedido se asigna el siguiente de la serie del tenant"""
+        datos = dict(
+            tenant=self.tenant,
+            cliente=self.cliente,
+            document_type='proforma',
+            client_type='particular',
+            start_date=timezone.now().date(),
+            delivery_date=timezone.now().date() + timedelta(days=7),
+        )
+        primero = Order.objects.create(**datos)
+        segundo = Order.objects.create(**datos)
+        
+        year = timezone.localdate().year
+        self.assertEqual(primero.order_number, f'PED-{year}-0001')
+        self.assertEqual(segundo.order_number, f'PED-{year}-0002')
+    
     def test_order_balance_calculation(self):
         """Test cálculo automático del balance"""
         order = Order.objects.create(
@@ -84,6 +108,34 @@ class OrderModelTest(TestCase):
         
         self.assertEqual(order.balance, 150.00)
     
+    def test_saldo_de_pedido_pagado_de_mas(self):
+        """save(), recalculate_totals y apply_subtotal_delta dejan el mismo saldo (nunca negativo)"""
+        order = Order.objects.create(
+            tenant=self.tenant,
+            order_number='ORD-004',
+            cliente=self.cliente,
+            document_type='proforma',
+            client_type='particular',
+            start_date=timezone.now().date(),
+            delivery_date=timezone.now().date() + timedelta(days=7),
+            status='pendiente'
+        )
+        order.bulk_write_items(create=[OrderItem(product_name='Foto', quantity=1, unit_price=Decimal('100.00'))])
+        Order.objects.filter(pk=order.pk).update(paid_amount=Decimal('118.00'))
+        order.refresh_from_db()
+        
+        order.apply_subtotal_delta(Decimal('-50.00'))
+        self.assertEqual(order.balance, Decimal('0'))
+        
+        Order.objects.filter(pk=order.pk).update(subtotal=0)
+        order.refresh_from_db()
+        order.recalculate_totals()
+        order.refresh_from_db()
+        self.assertEqual(order.balance, Decimal('0'))
+        
+        order.apply_derived_fields()
+        self.assertEqual(order.balance, Decimal('0'))
+    
     def test_order_status_history(self):
         """Test historial de estados"""
         order = Order.objects.create(
@@ -235,6 +287,65 @@ class OrderAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
     
+    def test_list_orders_campos_calculados_en_sql(self):
+        """Test el listado anota items, atraso y días sin cargar items ni pagos"""
+        hoy = timezone.now().date()
+        for i in range(3):
+            order = Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-LIST-{i}',
+                cliente=self.cliente,
+                document_type='proforma',
+                client_type='particular',
+                start_date=hoy,
+                delivery_date=hoy + timedelta(days=5),
+                status='pendiente'
+            )
+            order.bulk_write_items(create=[
+                OrderItem(product_name=f'Foto {j}', quantity=1, unit_price=Decimal('10.00')) for j in range(i + 1)
+            ])
+        Order.objects.filter(order_number='ORD-LIST-0').update(delivery_date=hoy - timedelta(days=2))
+        
+        # count + página
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/commerce/pedidos/api/orders/?ordering=order_number')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultados = response.data['results']
+        self.assertEqual([r['items_count'] for r in resultados], [1, 2, 3])
+        self.assertEqual([r['is_overdue'] for r in resultados], [True, False, False])
+        self.assertEqual([r['days_until_delivery'] for r in resultados], [-2, 5, 5])
+        self.assertEqual(resultados[0]['cliente_nombre'], self.cliente.obtener_nombre_completo())
+    
+    def test_list_orders_paginacion_keyset(self):
+        """Test el modo cursor sobre -created_at con pedidos de la misma fecha de creación"""
+        hoy = timezone.now().date()
+        for i in range(7):
+            Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-CUR-{i}',
+                cliente=self.cliente,
+                document_type='proforma',
+                client_type='particular',
+                start_date=hoy,
+                delivery_date=hoy + timedelta(days=5),
+                status='pendiente'
+            )
+        creado = timezone.now().replace(microsecond=123456)
+        Order.objects.filter(order_number__in=['ORD-CUR-2', 'ORD-CUR-3', 'ORD-CUR-4']).update(created_at=creado)
+        esperados = list(Order.objects.order_by('-created_at', '-id').values_list('order_number', flat=True))
+        
+        vistos = []
+        response = self.client.get('/api/commerce/pedidos/api/orders/', {'paginacion': 'cursor', 'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            vistos += [order['order_number'] for order in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(vistos, esperados)
+    
     def test_order_statistics(self):
         """Test estadísticas de pedidos"""
         Order.objects.create(
@@ -255,4 +366,655 @@ class OrderAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('totals', response.data)
         self.assertEqual(response.data['totals']['total_orders'], 1)
-        self.assertEqual(float(response.data['totals']['total_amount']), 300.00)
\ No newline at end of file
+        self.assertEqual(float(response.data['totals']['total_amount']), 300.00)
+    
+    def test_estadisticas_consultas_agrupadas(self):
+        """Test estadísticas con histogramas agrupados y sin un count() por opción"""
+        hoy = timezone.now().date()
+        for i, (status_code, doc_type) in enumerate([
+            ('pendiente', 'proforma'), ('pendiente', 'nota_venta'), ('completado', 'nota_venta')
+        ]):
+            Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-HIST-{i}',
+                cliente=self.cliente,
+                document_type=doc_type,
+                client_type='particular',
+                order_date=hoy,
+                start_date=hoy,
+                delivery_date=hoy + timedelta(days=3),
+                status=status_code
+            )
+        # save() marca como atrasados los pedidos vencidos; fijar la fecha directamente
+        Order.objects.filter(tenant=self.tenant).update(total=100, delivery_date=hoy - timedelta(days=1))
+        
+        # totales + estados + tipos de documento + meses
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/commerce/pedidos/api/orders/estadisticas/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status_counts']['pendiente']['count'], 2)
+        self.assertEqual(response.data['status_counts']['cancelado']['count'], 0)
+        self.assertEqual(response.data['document_type_counts']['nota_venta']['count'], 2)
+        self.assertEqual(response.data['document_type_counts']['contrato']['count'], 0)
+        self.assertEqual(response.data['overdue_orders'], 2)
+        self.assertEqual(response.data['totals']['pending_orders'], 2)
+        self.assertEqual(response.data['monthly_stats'][0]['orders'], 3)
+        self.assertEqual(float(response.data['monthly_stats'][0]['total_amount']), 300.0)
+        self.assertEqual(len(response.data['monthly_stats']), 6)
+        
+        response = self.client.get('/api/commerce/pedidos/api/orders/por_estado/')
+        resumen = {item['status']: item for item in response.data['status_summary']}
+        self.assertEqual(resumen['pendiente']['total_amount'], 200.0)
+        self.assertEqual(resumen['atrasado']['count'], 0)
+
+
+class OrderItemBulkTest(TestCase):
+    """Tests para la escritura de items en lote con totales incrementales"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+        
+        self.cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='colegio'
+        )
+        
+        self.order = self.crear_pedido('ORD-LOTE-001')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def crear_pedido(self, order_number):
+        return Order.objects.create(
+            tenant=self.tenant,
+            order_number=order_number,
+            cliente=self.cliente,
+            document_type='proforma',
+            client_type='particular',
+            start_date=timezone.now().date(),
+            delivery_date=timezone.now().date() + timedelta(days=7),
+            status='pendiente'
+        )
+    
+    def url(self, order):
+        return f'/api/commerce/pedidos/api/orders/{order.pk}/items-lote/'
+    
+    def test_items_lote_crea_y_ajusta_totales(self):
+        """Test crear items en lote y totales derivados del subtotal"""
+        response = self.client.post(self.url(self.order), {
+            'items': [
+                {'product_name': 'Foto carnet', 'quantity': 10, 'unit_price': '5.00'},
+                {'product_name': 'Anuario', 'quantity': 2, 'unit_price': '80.00', 'discount_percentage': '10'},
+            ]
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.subtotal, Decimal('194.00'))
+        self.assertEqual(self.order.tax, Decimal('34.92'))
+        self.assertEqual(self.order.total, Decimal('228.92'))
+        self.assertEqual(self.order.balance, Decimal('228.92'))
+        self.assertEqual(self.order.payment_status, 'pendiente')
+        self.assertTrue(all(item.tenant_id == self.tenant.id for item in self.order.items.all()))
+    
+    def test_items_lote_consultas_constantes(self):
+        """Test el número de consultas no crece con la cantidad de items"""
+        def consultas(order, cantidad):
+            items = [
+                {'product_name': f'Foto {i}', 'quantity': 1, 'unit_price': '3.50'}
+                for i in range(cantidad)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url(order), {'items': items}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+        
+        # 60 items caben en un solo INSERT incluso con el límite de variables de SQLite
+        pocos = consultas(self.order, 5)
+        muchos = consultas(self.crear_pedido('ORD-LOTE-002'), 60)
+        
+        self.assertEqual(pocos, muchos)
+        self.assertEqual(Order.objects.get(order_number='ORD-LOTE-002').subtotal, Decimal('210.00'))
+    
+    def test_items_lote_actualiza_y_elimina(self):
+        """Test actualizar y eliminar items aplica el delta sobre los totales"""
+        self.client.post(self.url(self.order), {
+            'items': [
+                {'product_name': 'Foto', 'quantity': 4, 'unit_price': '25.00'},
+                {'product_name': 'Marco', 'quantity': 1, 'unit_price': '50.00'},
+            ]
+        }, format='json')
+        foto = self.order.items.get(product_name='Foto')
+        marco = self.order.items.get(product_name='Marco')
+        Order.objects.filter(pk=self.order.pk).update(paid_amount=Decimal('59.00'))
+        
+        response = self.client.post(self.url(self.order), {
+            'items': [{'id': foto.id, 'quantity': 2}],
+            'eliminar': [marco.id],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.items.count(), 1)
+        self.assertEqual(self.order.subtotal, Decimal('50.00'))
+        self.assertEqual(self.order.total, Decimal('59.00'))
+        self.assertEqual(self.order.balance, Decimal('0.00'))
+        self.assertEqual(self.order.payment_status, 'completo')
+        
+        # El resultado coincide con el recálculo completo
+        self.order.recalculate_totals()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total, Decimal('59.00'))
+    
+    def test_items_lote_rechaza_items_de_otro_pedido(self):
+        """Test los ids deben pertenecer al pedido"""
+        otro = self.crear_pedido('ORD-LOTE-003')
+        item = OrderItem.objects.create(order=otro, tenant=self.tenant, product_name='Foto', unit_price=10)
+        
+        response = self.client.post(self.url(self.order), {
+            'items': [{'id': item.id, 'quantity': 3}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(self.url(self.order), {
+            'items': [{'product_name': 'Foto', 'quantity': 0, 'unit_price': '10.00'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.order.items.count(), 0)
+    
+    def test_items_lote_invalida_dashboard(self):
+        """Test escribir items en lote actualiza los widgets del dashboard al confirmar"""
+        from apps.analytics.dashboard.cache import get_cache
+        
+        get_cache().clear()
+        url = '/api/analytics/dashboard/productos-mas-vendidos/'
+        Order.objects.filter(pk=self.order.pk).update(status='completado')
+        self.assertEqual(self.client.get(url).data, [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.bulk_write_items(create=[
+                OrderItem(product_name='Anuario', quantity=2, unit_price=Decimal('80.00')),
+            ])
+        
+        self.assertEqual(self.client.get(url).data, [
+            {'nombre': 'Anuario', 'cantidad_vendida': 2, 'ingresos': 160.0}
+        ])
+    
+    def test_item_save_recalcula_totales(self):
+        """Test guardar un item suelto sigue recalculando el pedido"""
+        OrderItem.objects.create(
+            order=self.order, tenant=self.tenant, product_name='Foto', quantity=3, unit_price=Decimal('10.00')
+        )
+        
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.subtotal, Decimal('30.00'))
+        self.assertEqual(self.order.total, Decimal('35.40'))
+
+
+class OrderInventoryTest(TestCase):
+    """Tests para la reserva y liberación de stock de las notas de venta"""
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+        
+        self.cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@test.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Test Address',
+            tipo_cliente='particular'
+        )
+        
+        self.moldura = MolduraListon.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Moldura Test',
+            stock_disponible=10,
+            stock_minimo=2,
+            costo_unitario=Decimal('20.00'),
+            nombre_moldura='clasica',
+            ancho='1',
+            color='dorado',
+            material='madera'
+        )
+        self.papel = Minilab.objects.create(
+            tenant=self.tenant,
+            nombre_producto='Papel Test',
+            stock_disponible=5,
+            stock_minimo=1,
+            costo_unitario=Decimal('0.75'),
+            tipo_insumo='papel',
+            nombre_tipo='papel_lustre',
+            tamaño_presentacion='20x30',
+            fecha_compra='2024-01-15'
+        )
+        
+        self.order = Order.objects.create(
+            tenant=self.tenant,
+            order_number='NV-001',
+            cliente=self.cliente,
+            document_type='nota_venta',
+            client_type='particular',
+            start_date=timezone.now().date(),
+            delivery_date=timezone.now().date() + timedelta(days=7),
+            status='pendiente'
+        )
+        self.order.bulk_write_items(create=[
+            OrderItem(product_name='Moldura', quantity=3, unit_price=Decimal('35.00'),
+                      inventory_category='molduraliston', inventory_item_id=self.moldura.id),
+            OrderItem(product_name='Moldura', quantity=2, unit_price=Decimal('35.00'),
+                      inventory_category='molduraliston', inventory_item_id=self.moldura.id),
+            OrderItem(product_name='Papel', quantity=4, unit_price=Decimal('2.00'),
+                      inventory_category='minilab', inventory_item_id=self.papel.id),
+            OrderItem(product_name='Diseño', quantity=1, unit_price=Decimal('50.00')),
+        ])
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def cambiar_estado(self, estado):
+        return self.client.post(
+            f'/api/commerce/pedidos/api/orders/{self.order.pk}/cambiar_estado/', {'status': estado}
+        )
+    
+    def stocks(self):
+        self.moldura.refresh_from_db()
+        self.papel.refresh_from_db()
+        return self.moldura.stock_disponible, self.papel.stock_disponible
+    
+    def test_confirmar_reserva_y_cancelar_libera(self):
+        """Confirmar descuenta el stock de los items vinculados y cancelar lo devuelve"""
+        self.assertEqual(self.stocks(), (10, 5))
+        
+        response = self.cambiar_estado('confirmado')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stocks(), (5, 1))
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.inventory_reserved)
+        self.assertEqual(MovimientoStock.objects.filter(referencia='NV-001', tipo='salida').count(), 3)
+        
+        # Pasar a en proceso no vuelve a reservar
+        self.cambiar_estado('en_proceso')
+        self.assertEqual(self.stocks(), (5, 1))
+        
+        response = self.cambiar_estado('cancelado')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stocks(), (10, 5))
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.inventory_reserved)
+    
+    def test_reserva_una_consulta_por_categoria(self):
+        """Las consultas no dependen de la cantidad de items vinculados"""
+        self.order.status = 'confirmado'
+        with CaptureQueriesContext(connection) as ctx:
+            self.order.save()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE') and 'inventario_' in q['sql']]
+        # Producto + catálogo por cada una de las dos categorías
+        self.assertEqual(len(updates), 4)
+    
+    def test_stock_insuficiente_no_confirma(self):
+        """Si un producto no alcanza no se reserva nada y el pedido sigue pendiente"""
+        Minilab.objects.filter(pk=self.papel.pk).update(stock_disponible=3)
+        
+        response = self.cambiar_estado('confirmado')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Stock insuficiente', response.data['error'])
+        self.assertEqual(self.stocks(), (10, 3))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pendiente')
+        self.assertFalse(self.order.inventory_reserved)
+        self.assertFalse(OrderStatusHistory.objects.filter(order=self.order, new_status='confirmado').exists())
+    
+    def test_cancelar_libera_lo_reservado(self):
+        """La liberación usa el libro de movimientos aunque los items cambien después"""
+        self.cambiar_estado('confirmado')
+        self.order.items.filter(product_name='Papel').update(quantity=1)
+        
+        self.cambiar_estado('cancelado')
+        
+        self.assertEqual(self.stocks(), (10, 5))
+    
+    def test_reserva_vinculada_al_pedido(self):
+        """Renombrar el pedido o un movimiento manual con su número no cambia lo reservado"""
+        self.cambiar_estado('confirmado')
+        self.assertEqual(self.stocks(), (5, 1))
+        
+        response = self.client.patch(
+            f'/api/commerce/pedidos/api/orders/{self.order.pk}/', {'order_number': 'NV-001-B'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        StockService.mover(
+            self.moldura, 'agregar', 2, motivo=OrderInventoryService.MOTIVO_LIBERACION, referencia='NV-001-B'
+        )
+        self.assertEqual(self.stocks(), (7, 1))
+        
+        self.order.refresh_from_db()
+        self.cambiar_estado('cancelado')
+        self.assertEqual(self.stocks(), (12, 5))
+        self.assertEqual(MovimientoStock.objects.filter(pedido=self.order).count(), 5)
+    
+    def test_proforma_no_afecta_inventario(self):
+        Order.objects.filter(pk=self.order.pk).update(document_type='proforma')
+        self.order.refresh_from_db()
+        
+        self.cambiar_estado('confirmado')
+        
+        self.assertEqual(self.stocks(), (10, 5))
+        self.assertFalse(MovimientoStock.objects.exists())
+    
+    def test_nota_confirmada_reserva_items_agregados_despues(self):
+        """Una nota creada ya confirmada reserva los items que se le agregan, cambian o quitan"""
+        order = Order.objects.create(
+            tenant=self.tenant,
+            order_number='NV-002',
+            cliente=self.cliente,
+            document_type='nota_venta',
+            client_type='particular',
+            start_date=timezone.now().date(),
+            delivery_date=timezone.now().date() + timedelta(days=7),
+            status='confirmado'
+        )
+        self.assertTrue(order.inventory_reserved)
+        url = f'/api/commerce/pedidos/api/orders/{order.pk}/items-lote/'
+        
+        response = self.client.post(url, {'items': [
+            {'product_name': 'Moldura', 'quantity': 4, 'unit_price': '35.00',
+             'inventory_category': 'molduraliston', 'inventory_item_id': self.moldura.id},
+            {'product_name': 'Papel', 'quantity': 2, 'unit_price': '2.00',
+             'inventory_category': 'minilab', 'inventory_item_id': self.papel.id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stocks(), (6, 3))
+        
+        moldura = order.items.get(product_name='Moldura')
+        papel = order.items.get(product_name='Papel')
+        response = self.client.post(url, {
+            'items': [{'id': moldura.id, 'quantity': 1}], 'eliminar': [papel.id]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stocks(), (9, 5))
+        
+        self.client.post(f'/api/commerce/pedidos/api/orders/{order.pk}/cambiar_estado/', {'status': 'cancelado'})
+        self.assertEqual(self.stocks(), (10, 5))
+    
+    def test_editar_y_eliminar_item_de_nota_reservada(self):
+        """Editar o eliminar un item de una nota reservada ajusta el stock"""
+        self.cambiar_estado('confirmado')
+        self.assertEqual(self.stocks(), (5, 1))
+        papel = self.order.items.get(product_name='Papel')
+        moldura = self.order.items.filter(product_name='Moldura', quantity=3).get()
+        
+        response = self.client.patch(
+            f'/api/commerce/pedidos/api/order-items/{papel.id}/', {'quantity': 2}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stocks(), (5, 3))
+        
+        response = self.client.delete(f'/api/commerce/pedidos/api/order-items/{moldura.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.stocks(), (8, 3))
+        
+        self.cambiar_estado('cancelado')
+        self.assertEqual(self.stocks(), (10, 5))
+    
+    def test_item_sin_stock_en_nota_reservada(self):
+        """Si el item agregado no tiene stock no se guarda ni se mueve el inventario"""
+        self.cambiar_estado('confirmado')
+        
+        response = self.client.post(
+            f'/api/commerce/pedidos/api/orders/{self.order.pk}/items-lote/',
+            {'items': [{'product_name': 'Papel extra', 'quantity': 2, 'unit_price': '2.00',
+                        'inventory_category': 'minilab', 'inventory_item_id': self.papel.id}]},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Stock insuficiente', response.data['stock'])
+        self.assertEqual(self.stocks(), (5, 1))
+        self.assertFalse(self.order.items.filter(product_name='Papel extra').exists())
+    
+    def test_producto_de_otro_tenant_rechazado(self):
+        """La referencia al inventario debe existir en el catálogo del tenant"""
+        otro = Tenant.objects.create(
+            name='Otro', slug='otro', business_name='Otro', business_address='x',
+            business_phone='1', business_email='otro@test.com', business_ruc='10987654321'
+        )
+        ajena = MolduraListon.objects.create(
+            tenant=otro, nombre_producto='Moldura ajena', stock_disponible=10, stock_minimo=0,
+            costo_unitario=Decimal('20.00'), nombre_moldura='clasica', ancho='1', color='negro', material='madera'
+        )
+        referencia = {'inventory_category': 'molduraliston', 'inventory_item_id': ajena.id}
+        
+        response = self.client.post(
+            f'/api/commerce/pedidos/api/orders/{self.order.pk}/items-lote/',
+            {'items': [{'product_name': 'Moldura', 'quantity': 1, 'unit_price': '35.00', **referencia}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'molduraliston #{ajena.id}', str(response.data['items']))
+        
+        papel = self.order.items.get(product_name='Papel')
+        response = self.client.patch(
+            f'/api/commerce/pedidos/api/order-items/{papel.id}/', referencia, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('inventory_item_id', response.data)
+        
+        response = self.client.post('/api/commerce/pedidos/api/orders/crear-lote/', {
+            'defaults': {
+                'cliente': self.cliente.id, 'document_type': 'nota_venta', 'client_type': 'particular',
+                'start_date': timezone.now().date().isoformat(),
+                'delivery_date': (timezone.now().date() + timedelta(days=7)).isoformat(),
+            },
+            'orders': [{'items': [{'product_name': 'Moldura', 'quantity': 1, 'unit_price': '35.00', **referencia}]}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('items', response.data['results'][0]['errors'])
+        self.assertEqual(ajena.stock_disponible, 10)
+    
+    def test_crear_lote_reserva_notas_confirmadas(self):
+        """Las notas de venta creadas en lote ya confirmadas reservan su stock"""
+        response = self.client.post('/api/commerce/pedidos/api/orders/crear-lote/', {
+            'defaults': {
+                'cliente': self.cliente.id, 'document_type': 'nota_venta', 'client_type': 'particular',
+                'status': 'confirmado', 'start_date': timezone.now().date().isoformat(),
+                'delivery_date': (timezone.now().date() + timedelta(days=7)).isoformat(),
+            },
+            'orders': [{'items': [{'product_name': 'Moldura', 'quantity': 2, 'unit_price': '35.00',
+                                   'inventory_category': 'molduraliston', 'inventory_item_id': self.moldura.id}]}] * 2,
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stocks(), (6, 5))
+        self.assertEqual(Order.objects.filter(inventory_reserved=True).count(), 2)
+
+
+class OrderBulkCreateTest(TestCase):
+    """Tests para la creación masiva de pedidos"""
+    
+    url = '/api/commerce/pedidos/api/orders/crear-lote/'
+    
+    def setUp(self):
+        """Configuración inicial"""
+        self.tenant = Tenant.objects.create(
+            name='Test Tenant',
+            slug='test',
+            business_name='Test Business',
+            business_address='Test Address',
+            business_phone='123456789',
+            business_email='test@test.com',
+            business_ruc='12345678901'
+        )
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123',
+            tenant=self.tenant,
+            role='admin'
+        )
+        
+        self.colegio = Cliente.objects.create(
+            tenant=self.tenant,
+            tipo_cliente='colegio',
+            nombres='Colegio',
+            apellidos='San Martín',
+            dni='87654321',
+            nivel_educativo='primaria',
+            grado='1ro',
+            seccion='A',
+            email='colegio@test.com',
+            telefono='987654321',
+            direccion='Av. Principal 123'
+        )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+        hoy = timezone.now().date()
+        self.defaults = {
+            'cliente': self.colegio.id,
+            'document_type': 'proforma',
+            'client_type': 'colegio',
+            'school_level': 'primaria',
+            'start_date': hoy.isoformat(),
+            'delivery_date': (hoy + timedelta(days=30)).isoformat(),
+        }
+    
+    def filas(self, cantidad):
+        return [
+            {
+                'grade': f'{i % 6 + 1}ro',
+                'section': 'A',
+                'items': [
+                    {'product_name': 'Foto de promoción', 'quantity': 2, 'unit_price': '15.00'},
+                    {'product_name': 'Anuario', 'quantity': 1, 'unit_price': '70.00', 'discount_percentage': '10'},
+                ]
+            }
+            for i in range(cantidad)
+        ]
+    
+    def test_crear_lote(self):
+        """Test crear pedidos con items, números en bloque y totales calculados"""
+        response = self.client.post(self.url, {
+            'defaults': self.defaults,
+            'orders': self.filas(3),
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        numeros = [fila['order_number'] for fila in response.data['results']]
+        year = timezone.localdate().year
+        self.assertEqual(numeros, [f'PED-{year}-0001', f'PED-{year}-0002', f'PED-{year}-0003'])
+        
+        order = Order.objects.get(order_number=numeros[0])
+        self.assertEqual(order.created_by, self.user)
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.subtotal, Decimal('93.00'))
+        self.assertEqual(order.tax, Decimal('16.74'))
+        self.assertEqual(order.total, Decimal('109.74'))
+        self.assertEqual(order.balance, Decimal('109.74'))
+        self.assertEqual(order.payment_status, 'pendiente')
+        
+        # Coincide con el recálculo completo y el siguiente lote continúa la numeración
+        order.recalculate_totals()
+        order.refresh_from_db()
+        self.assertEqual(order.total, Decimal('109.74'))
+        response = self.client.post(self.url, {'defaults': self.defaults, 'orders': self.filas(1)}, format='json')
+        self.assertEqual(response.data['results'][0]['order_number'], f'PED-{year}-0004')
+    
+    def test_crear_lote_consultas_constantes(self):
+        """Test el número de consultas no depende del tamaño del lote"""
+        def consultas(cantidad):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url, {
+                    'defaults': self.defaults, 'orders': self.filas(cantidad)
+                }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+        
+        # El primer lote crea la serie de numeración del tenant
+        consultas(1)
+        # 10 filas: con más, SQLite (999 parámetros por consulta) parte el INSERT de términos de búsqueda
+        self.assertEqual(consultas(2), consultas(10))
+    
+    def test_crear_lote_invalida_dashboard(self):
+        """Test los pedidos creados en lote aparecen en el dashboard sin esperar el TTL"""
+        from apps.analytics.dashboard.cache import get_cache
+        
+        get_cache().clear()
+        url = '/api/analytics/dashboard/pedidos-recientes/'
+        self.assertEqual(self.client.get(url).data, [])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'defaults': self.defaults, 'orders': self.filas(2)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        self.assertEqual(len(self.client.get(url).data), 2)
+    
+    def test_crear_lote_valida_todo_antes_de_escribir(self):
+        """Test una fila inválida impide crear el lote y se informa por fila"""
+        otro_tenant = Tenant.objects.create(
+            name='Otro', slug='otro', business_name='Otro', business_address='Dir',
+            business_phone='1', business_email='otro@test.com', business_ruc='10987654321'
+        )
+        ajeno = Cliente.objects.create(
+            tenant=otro_tenant, nombres='Ana', apellidos='Ruiz', dni='11223344', email='ana@test.com',
+            telefono='1', direccion='Dir', tipo_cliente='particular'
+        )
+        filas = self.filas(3)
+        filas[1]['cliente'] = ajeno.id
+        filas[2]['school_level'] = ''
+        
+        response = self.client.post(self.url, {'defaults': self.defaults, 'orders': filas}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        resultados = response.data['results']
+        self.assertEqual([fila['result'] for fila in resultados], ['valid', 'invalid', 'invalid'])
+        self.assertIn('cliente', resultados[1]['errors'])
+        self.assertIn('school_level', resultados[2]['errors'])
+        self.assertFalse(Order.objects.exists())
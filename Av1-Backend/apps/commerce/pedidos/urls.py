@@ -27,6 +27,7 @@ urlpatterns = [
     path('api/orders/resumen/', OrderViewSet.as_view({'get': 'resumen'}), name='order-resumen'),
     path('api/orders/atrasados/', OrderViewSet.as_view({'get': 'atrasados'}), name='order-atrasados'),
     path('api/orders/proximas-entregas/', OrderViewSet.as_view({'get': 'proximas_entregas'}), name='order-proximas-entregas'),
+    path('api/orders/crear-lote/', OrderViewSet.as_view({'post': 'crear_lote'}), name='order-crear-lote'),
     path('api/orders/por-estado/', OrderViewSet.as_view({'get': 'por_estado'}), name='order-por-estado'),
     
     # Acciones específicas de pedidos
@@ -35,6 +36,7 @@ urlpatterns = [
     path('api/orders/<int:pk>/marcar-cancelado/', OrderViewSet.as_view({'post': 'marcar_cancelado'}), name='order-marcar-cancelado'),
     path('api/orders/<int:pk>/pagos/', OrderViewSet.as_view({'get': 'pagos'}), name='order-pagos'),
     path('api/orders/<int:pk>/registrar-pago/', OrderViewSet.as_view({'post': 'registrar_pago'}), name='order-registrar-pago'),
+    path('api/orders/<int:pk>/items-lote/', OrderViewSet.as_view({'post': 'items_lote'}), name='order-items-lote'),
     path('api/orders/<int:pk>/historial-estados/', OrderViewSet.as_view({'get': 'historial_estados'}), name='order-historial-estados'),
     
     # Rutas de compatibilidad (sin api/)
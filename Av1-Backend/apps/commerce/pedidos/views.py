@@ -6,17 +6,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Sum, Q, F, Count
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from apps.core.agregaciones import histograma_choices, histograma_por_valor
+from apps.core.busqueda.filters import BusquedaIndexadaFilter
+from apps.core.paginacion import PaginacionKeyset
+from apps.core.models import Tenant
 from .models import Order, OrderItem, OrderPayment, OrderStatusHistory
 from .serializers import (
-    OrderSerializer, OrderListSerializer, OrderItemSerializer, 
+    OrderSerializer, OrderListSerializer, OrderItemSerializer, OrderItemBulkSerializer,
     OrderPaymentSerializer, OrderStatusHistorySerializer,
     OrderSummarySerializer, OrderStatisticsSerializer
 )
 from .filters import OrderFilter
+from .services import OrderBulkCreateService
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -30,17 +38,16 @@ class OrderViewSet(viewsets.ModelViewSet):
     - Gestión de estados y pagos
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter, filters.OrderingFilter]
     filterset_class = OrderFilter
-    search_fields = [
-        'order_number', 'cliente__nombres', 'cliente__apellidos',
-        'cliente__email', 'cliente__telefono', 'cliente__dni', 'cliente__razon_social'
-    ]
+    # ?search= sobre el índice: número de pedido y datos del cliente
+    busqueda_entidad = 'pedido'
     ordering_fields = [
         'order_number', 'order_date', 'start_date', 'delivery_date', 'total',
         'status', 'cliente__nombres', 'cliente__apellidos'
     ]
     ordering = ['-created_at']
+    pagination_class = PaginacionKeyset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -50,9 +57,13 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Obtener pedidos del tenant actual"""
         user = self.request.user
-        queryset = Order.objects.select_related(
-            'cliente', 'contrato', 'created_by'
-        ).prefetch_related('items', 'payments')
+        if self.action == 'list':
+            # Conteo de items anotado y solo las columnas del listado
+            queryset = Order.objects.for_listing()
+        else:
+            queryset = Order.objects.select_related(
+                'cliente', 'contrato', 'created_by'
+            ).prefetch_related('items', 'payments')
         
         if user.tenant is None:
             # Super admin puede ver todos los pedidos
@@ -68,19 +79,52 @@ class OrderViewSet(viewsets.ModelViewSet):
             if not tenant:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({'tenant': 'El tenant es requerido'})
-            serializer.save(tenant=tenant, created_by=user)
+            self.save_with_inventory(serializer, tenant=tenant, created_by=user)
         else:
-            serializer.save(tenant=user.tenant, created_by=user)
+            self.save_with_inventory(serializer, tenant=user.tenant, created_by=user)
     
     def perform_update(self, serializer):
         """Actualizar pedido manteniendo tenant"""
         user = self.request.user
         if user.tenant is not None:
             # Para usuarios normales, mantener el tenant
-            serializer.save(tenant=user.tenant)
+            self.save_with_inventory(serializer, tenant=user.tenant)
         else:
             # Super admin puede cambiar el tenant si lo especifica
-            serializer.save()
+            self.save_with_inventory(serializer)
+    
+    def save_with_inventory(self, serializer, **kwargs):
+        """Guardar el pedido; si no se puede reservar su stock responder 400"""
+        if serializer.instance is not None:
+            serializer.instance._changed_by = self.request.user
+        try:
+            serializer.save(**kwargs)
+        except ValueError as e:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'stock': str(e)})
+    
+    def change_status(self, order, new_status, reason):
+        """
+        Registrar el cambio en el historial y guardar el nuevo estado
+        
+        Todo en una transacción: si la reserva o liberación de stock falla no
+        queda ni el historial ni el estado. Devuelve la respuesta de error o None.
+        """
+        try:
+            with transaction.atomic():
+                OrderStatusHistory.objects.create(
+                    order=order,
+                    previous_status=order.status,
+                    new_status=new_status,
+                    reason=reason,
+                    changed_by=self.request.user
+                )
+                order.status = new_status
+                order._changed_by = self.request.user
+                order.save()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return None
     
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
@@ -88,62 +132,54 @@ class OrderViewSet(viewsets.ModelViewSet):
         Obtener estadísticas completas de pedidos
         """
         queryset = self.get_queryset()
+        today = timezone.now().date()
+        next_week = today + timedelta(days=7)
+        active = Q(status__in=['pendiente', 'confirmado', 'en_proceso'])
         
-        # Totales generales
+        # Totales generales, atrasados y próximas entregas (7 días) en una sola consulta
         totals = queryset.aggregate(
             total_orders=Count('id'),
             total_amount=Sum('total'),
             total_paid=Sum('paid_amount'),
-            total_balance=Sum('balance')
+            total_balance=Sum('balance'),
+            overdue_orders=Count('id', filter=active & Q(delivery_date__lt=today)),
+            upcoming_deliveries=Count('id', filter=active & Q(delivery_date__range=[today, next_week])),
         )
+        overdue_count = totals['overdue_orders']
         
-        # Contadores por estado
-        status_counts = {}
-        for status_code, status_name in Order.ORDER_STATUS_CHOICES:
-            count = queryset.filter(status=status_code).count()
-            status_counts[status_code] = {
-                'name': status_name,
-                'count': count
-            }
-        
-        # Contadores por tipo de documento
-        doc_type_counts = {}
-        for doc_type_code, doc_type_name in Order.DOCUMENT_TYPE_CHOICES:
-            count = queryset.filter(document_type=doc_type_code).count()
-            doc_type_counts[doc_type_code] = {
-                'name': doc_type_name,
-                'count': count
-            }
-        
-        # Pedidos atrasados
-        today = timezone.now().date()
-        overdue_count = queryset.filter(
-            delivery_date__lt=today,
-            status__in=['pendiente', 'confirmado', 'en_proceso']
-        ).count()
+        # Contadores por estado y por tipo de documento (una consulta agrupada cada uno)
+        status_counts = {
+            item['valor']: {'name': item['nombre'], 'count': item['count']}
+            for item in histograma_choices(queryset, 'status')
+        }
+        doc_type_counts = {
+            item['valor']: {'name': item['nombre'], 'count': item['count']}
+            for item in histograma_choices(queryset, 'document_type')
+        }
         
-        # Próximas entregas (7 días)
-        next_week = today + timedelta(days=7)
-        upcoming_deliveries = queryset.filter(
-            delivery_date__range=[today, next_week],
-            status__in=['pendiente', 'confirmado', 'en_proceso']
-        ).count()
+        # Estadísticas por mes (últimos 6 meses) agrupadas con TruncMonth
+        month_starts = [today.replace(day=1)]
+        for _ in range(5):
+            month_starts.append((month_starts[-1] - timedelta(days=1)).replace(day=1))
+        
+        by_month = {
+            row['month']: row
+            for row in queryset.order_by().prefetch_related(None).filter(
+                order_date__gte=month_starts[-1]
+            ).annotate(month=TruncMonth('order_date')).values('month').annotate(
+                orders=Count('id'),
+                total_amount=Sum('total')
+            )
+        }
         
-        # Estadísticas por mes (últimos 6 meses)
         monthly_stats = []
-        for i in range(6):
-            month_start = (timezone.now().replace(day=1) - timedelta(days=30*i)).replace(day=1)
-            month_end = (month_start.replace(month=month_start.month % 12 + 1) - timedelta(days=1))
-            
-            month_orders = queryset.filter(
-                order_date__range=[month_start.date(), month_end.date()]
-            )
-            
+        for month_start in month_starts:
+            row = by_month.get(month_start, {})
             monthly_stats.append({
                 'month': month_start.strftime('%Y-%m'),
                 'month_name': month_start.strftime('%B %Y'),
-                'orders': month_orders.count(),
-                'total_amount': month_orders.aggregate(Sum('total'))['total__sum'] or 0
+                'orders': row.get('orders', 0),
+                'total_amount': row.get('total_amount') or 0
             })
         
         data = {
@@ -152,15 +188,15 @@ class OrderViewSet(viewsets.ModelViewSet):
                 'total_amount': float(totals['total_amount'] or 0),
                 'total_paid': float(totals['total_paid'] or 0),
                 'total_balance': float(totals['total_balance'] or 0),
-                'pending_orders': queryset.filter(status='pendiente').count(),
-                'in_process_orders': queryset.filter(status='en_proceso').count(),
-                'completed_orders': queryset.filter(status='completado').count(),
+                'pending_orders': status_counts['pendiente']['count'],
+                'in_process_orders': status_counts['en_proceso']['count'],
+                'completed_orders': status_counts['completado']['count'],
                 'overdue_orders': overdue_count,
             },
             'status_counts': status_counts,
             'document_type_counts': doc_type_counts,
             'overdue_orders': overdue_count,
-            'upcoming_deliveries': upcoming_deliveries,
+            'upcoming_deliveries': totals['upcoming_deliveries'],
             'monthly_stats': monthly_stats
         }
         
@@ -182,11 +218,12 @@ class OrderViewSet(viewsets.ModelViewSet):
             total_balance=Sum('balance')
         )
         
-        # Contadores por estado principales
-        pending_orders = queryset.filter(status='pendiente').count()
-        in_process_orders = queryset.filter(status='en_proceso').count()
-        completed_orders = queryset.filter(status='completado').count()
-        overdue_orders = queryset.filter(status='atrasado').count()
+        # Contadores por estado principales (una consulta agrupada)
+        status_counts = histograma_por_valor(queryset, 'status')
+        pending_orders = status_counts['pendiente']['count']
+        in_process_orders = status_counts['en_proceso']['count']
+        completed_orders = status_counts['completado']['count']
+        overdue_orders = status_counts['atrasado']['count']
         
         summary_data = {
             'total_orders': totals['total_orders'] or 0,
@@ -202,6 +239,42 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = OrderSummarySerializer(summary_data)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], url_path='crear-lote')
+    def crear_lote(self, request):
+        """
+        Crear pedidos en lote (campañas escolares)
+        
+        Body: {"defaults": {...campos comunes...}, "orders": [{"cliente": 1,
+        "grade": "5to", "items": [...]}, ...]}. Se valida todo el lote antes
+        de escribir: si alguna fila es inválida no se crea ningún pedido y se
+        responde 400 con el resultado de cada fila.
+        """
+        user = request.user
+        tenant = user.tenant
+        if tenant is None:
+            # Super admin debe especificar el tenant
+            tenant = Tenant.objects.filter(pk=request.data.get('tenant')).first()
+            if tenant is None:
+                return Response({'tenant': 'El tenant es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        service = OrderBulkCreateService(tenant, user)
+        try:
+            service.validar(request.data.get('orders'), request.data.get('defaults'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if service.tiene_errores:
+            return Response(
+                {'created': 0, 'results': service.resultados},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            resultados = service.crear()
+        except ValueError as e:
+            return Response({'stock': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': len(resultados), 'results': resultados}, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def atrasados(self, request):
         """Obtener pedidos atrasados"""
@@ -255,20 +328,16 @@ class OrderViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(queryset, many=True)
             return Response(serializer.data)
         else:
-            # Retornar resumen por estado
-            status_summary = []
-            for status_code, status_name in Order.ORDER_STATUS_CHOICES:
-                count = self.get_queryset().filter(status=status_code).count()
-                total = self.get_queryset().filter(status=status_code).aggregate(
-                    Sum('total')
-                )['total__sum'] or 0
-                
-                status_summary.append({
-                    'status': status_code,
-                    'status_name': status_name,
-                    'count': count,
-                    'total_amount': float(total)
-                })
+            # Retornar resumen por estado (conteo y monto en una consulta agrupada)
+            status_summary = [
+                {
+                    'status': item['valor'],
+                    'status_name': item['nombre'],
+                    'count': item['count'],
+                    'total_amount': float(item['total_amount'])
+                }
+                for item in histograma_choices(self.get_queryset(), 'status', {'total_amount': 'total'})
+            ]
             
             return Response({'status_summary': status_summary})
     
@@ -285,17 +354,9 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Registrar cambio en historial
-        OrderStatusHistory.objects.create(
-            order=order,
-            previous_status=order.status,
-            new_status=new_status,
-            reason=reason,
-            changed_by=request.user
-        )
-        
-        order.status = new_status
-        order.save()
+        error = self.change_status(order, new_status, reason)
+        if error is not None:
+            return error
         
         return Response({'message': f'Estado cambiado a {new_status}'})
     
@@ -310,17 +371,9 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Registrar cambio en historial
-        OrderStatusHistory.objects.create(
-            order=order,
-            previous_status=order.status,
-            new_status='completado',
-            reason='Marcado como completado',
-            changed_by=request.user
-        )
-        
-        order.status = 'completado'
-        order.save()
+        error = self.change_status(order, 'completado', 'Marcado como completado')
+        if error is not None:
+            return error
         
         return Response({'message': 'Pedido marcado como completado'})
     
@@ -342,17 +395,9 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Registrar cambio en historial
-        OrderStatusHistory.objects.create(
-            order=order,
-            previous_status=order.status,
-            new_status='cancelado',
-            reason=reason,
-            changed_by=request.user
-        )
-        
-        order.status = 'cancelado'
-        order.save()
+        error = self.change_status(order, 'cancelado', reason)
+        if error is not None:
+            return error
         
         return Response({'message': 'Pedido marcado como cancelado'})
     
@@ -378,6 +423,65 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'], url_path='items-lote')
+    def items_lote(self, request, pk=None):
+        """
+        Crear, actualizar y eliminar items del pedido en una sola operación
+        
+        Body: {"items": [{...}, {"id": 5, "quantity": 3}], "eliminar": [7, 8]}
+        Los items con `id` se actualizan y los demás se crean. Los totales del
+        pedido se ajustan con un único UPDATE, sin recalcular por cada item.
+        """
+        order = self.get_object()
+        serializer = OrderItemBulkSerializer(data=request.data, context={'order': order})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        items_data = serializer.validated_data.get('items', [])
+        ids = [data['id'] for data in items_data if 'id' in data]
+        existentes = order.items.in_bulk(ids) if ids else {}
+        faltantes = sorted(set(ids) - set(existentes))
+        if faltantes:
+            return Response(
+                {'items': f"Items que no pertenecen al pedido: {', '.join(map(str, faltantes))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        nuevos, modificados = [], []
+        for data in items_data:
+            data = dict(data)
+            item_id = data.pop('id', None)
+            if item_id is None:
+                nuevos.append(OrderItem(**data))
+                continue
+            item = existentes[item_id]
+            for campo, valor in data.items():
+                setattr(item, campo, valor)
+            modificados.append(item)
+        
+        order._changed_by = request.user
+        try:
+            order.bulk_write_items(
+                create=nuevos,
+                update=modificados,
+                delete=serializer.validated_data.get('eliminar', [])
+            )
+        except DjangoValidationError as e:
+            return Response(e.message_dict, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            # Nota de venta reservada sin stock para los items nuevos
+            return Response({'stock': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'subtotal': order.subtotal,
+            'tax': order.tax,
+            'total': order.total,
+            'paid_amount': order.paid_amount,
+            'balance': order.balance,
+            'payment_status': order.payment_status,
+            'items': OrderItemSerializer(OrderItem.objects.filter(order=order), many=True).data,
+        })
+    
     @action(detail=True, methods=['get'])
     def historial_estados(self, request, pk=None):
         """Obtener historial de cambios de estado"""
@@ -413,12 +517,27 @@ class OrderItemViewSet(viewsets.ModelViewSet):
             # Super admin debe obtener el tenant del order
             order = serializer.validated_data.get('order')
             if order and order.tenant:
-                serializer.save(tenant=order.tenant)
+                self.save_with_inventory(serializer, tenant=order.tenant)
             else:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({'order': 'El pedido debe tener un tenant válido'})
         else:
-            serializer.save(tenant=user.tenant)
+            self.save_with_inventory(serializer, tenant=user.tenant)
+
+    def perform_update(self, serializer):
+        self.save_with_inventory(serializer)
+
+    def perform_destroy(self, instance):
+        """Eliminar el item; si su pedido tiene stock reservado se libera"""
+        instance._changed_by = self.request.user
+        try:
+            instance.delete()
+        except ValueError as e:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'stock': str(e)})
+
+    # Misma conversión de errores de stock a 400 que en los pedidos
+    save_with_inventory = OrderViewSet.save_with_inventory
 
 
 class OrderPaymentViewSet(viewsets.ModelViewSet):
@@ -429,6 +548,7 @@ class OrderPaymentViewSet(viewsets.ModelViewSet):
     search_fields = ['reference_number', 'notes']
     filterset_fields = ['order', 'payment_method', 'payment_date']
     ordering = ['-payment_date']
+    pagination_class = PaginacionKeyset
 
     def get_queryset(self):
         """Obtener pagos del tenant actual"""
@@ -452,6 +572,7 @@ class OrderStatusHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['order', 'new_status']
     ordering = ['-changed_at']
+    pagination_class = PaginacionKeyset
 
     def get_queryset(self):
         """Obtener historial del tenant actual"""
@@ -32,6 +32,34 @@ class CommercePermission(permissions.BasePermission):
     Permisos específicos para el módulo Commerce (Pedidos)
     Basado en roles y permisos del sistema
     """
+    SIN_PERMISOS = frozenset()
+    PEDIDOS = frozenset(['access:pedidos'])
+    
+    # Mapeo de métodos HTTP a permisos necesarios
+    METHOD_PERMISSIONS = {
+        'GET': PEDIDOS,
+        'POST': PEDIDOS,
+        'PUT': PEDIDOS,
+        'PATCH': PEDIDOS,
+        'DELETE': PEDIDOS,
+    }
+    
+    # Permisos según la acción de la vista
+    ACTION_PERMISSIONS = {
+        'list': PEDIDOS,
+        'retrieve': PEDIDOS,
+        'create': PEDIDOS,
+        'update': PEDIDOS,
+        'partial_update': PEDIDOS,
+        'destroy': PEDIDOS,
+        'summary': PEDIDOS,
+        'autocomplete': PEDIDOS,
+        'mark_completed': PEDIDOS,
+        'mark_cancelled': PEDIDOS,
+        'overdue': PEDIDOS,
+        'by_status': PEDIDOS,
+        'upcoming_deliveries': PEDIDOS,
+    }
     
     def has_permission(self, request, view):
         # Usuarios no autenticados no tienen acceso
@@ -50,8 +78,7 @@ class CommercePermission(permissions.BasePermission):
             return False
         
         # Verificar si el usuario tiene alguno de los permisos requeridos
-        user_permissions = request.user.get_permissions_list()
-        return any(permission in user_permissions for permission in required_permissions)
+        return not request.user.get_permissions().isdisjoint(required_permissions)
     
     def has_object_permission(self, request, view, obj):
         # Primero verificar permisos generales
@@ -74,38 +101,12 @@ class CommercePermission(permissions.BasePermission):
         """
         Obtener los permisos requeridos según el método HTTP y la vista
         """
-        # Mapeo de métodos HTTP a permisos necesarios
-        permission_map = {
-            'GET': ['access:pedidos'],
-            'POST': ['access:pedidos'],
-            'PUT': ['access:pedidos'],
-            'PATCH': ['access:pedidos'],
-            'DELETE': ['access:pedidos'],
-        }
-        
         # Permisos adicionales según la acción de la vista
-        if hasattr(view, 'action'):
-            action_permissions = {
-                'list': ['access:pedidos'],
-                'retrieve': ['access:pedidos'],
-                'create': ['access:pedidos'],
-                'update': ['access:pedidos'],
-                'partial_update': ['access:pedidos'],
-                'destroy': ['access:pedidos'],
-                'summary': ['access:pedidos'],
-                'autocomplete': ['access:pedidos'],
-                'mark_completed': ['access:pedidos'],
-                'mark_cancelled': ['access:pedidos'],
-                'overdue': ['access:pedidos'],
-                'by_status': ['access:pedidos'],
-                'upcoming_deliveries': ['access:pedidos'],
-            }
-            
-            action = view.action
-            if action in action_permissions:
-                return action_permissions[action]
-        
-        return permission_map.get(method, [])
+        action = getattr(view, 'action', None)
+        if action in self.ACTION_PERMISSIONS:
+            return self.ACTION_PERMISSIONS[action]
+        
+        return self.METHOD_PERMISSIONS.get(method, self.SIN_PERMISOS)
     
     def has_read_permission(self, request, view, obj):
         """
@@ -165,7 +166,7 @@ class ProductPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de inventario
-        return 'access:inventario' in request.user.get_permissions_list()
+        return request.user.has_permission('access:inventario')
     
     def has_object_permission(self, request, view, obj):
         if not self.has_permission(request, view):
@@ -11,8 +11,8 @@ from django.core.mail import send_mail
 from django.conf import settings
 
 # Importar desde módulos específicos
-from .pedidos.models import Order, OrderItem, OrderPayment
-from .inventario.models import BaseInventarioModel
+from .pedidos.models import Order, OrderItem, OrderPayment, totals_recalculation_suspended
+from .pedidos.services import OrderInventoryService
 from .models import Product  # Mantener Product para compatibilidad
 
 logger = logging.getLogger(__name__)
@@ -196,6 +196,10 @@ def update_order_totals_on_item_save(sender, instance, created, **kwargs):
     - Recalcular subtotal, impuestos y total
     - Actualizar saldo
     """
+    if totals_recalculation_suspended():
+        # Escritura en lote: los totales se ajustan una sola vez al final
+        return
+    
     try:
         order = instance.order
         order.save()  # Esto disparará el método save del modelo que recalcula totales
@@ -212,6 +216,10 @@ def update_order_totals_on_item_delete(sender, instance, **kwargs):
     - Recalcular subtotal, impuestos y total
     - Actualizar saldo
     """
+    if totals_recalculation_suspended():
+        # Escritura en lote: los totales se ajustan una sola vez al final
+        return
+    
     try:
         order = instance.order
         order.save()  # Esto disparará el método save del modelo que recalcula totales
@@ -220,52 +228,59 @@ def update_order_totals_on_item_delete(sender, instance, **kwargs):
         logger.error(f"Error al actualizar totales después de eliminar item: {str(e)}")
 
 
+@receiver(post_save, sender=OrderItem)
+def reconcile_inventory_on_item_save(sender, instance, raw=False, **kwargs):
+    """
+    Ajustar el stock reservado de una nota de venta cuando cambian sus items
+    
+    Corre después de recalcular los totales y dentro de la transacción de
+    OrderItem.save/delete: si no hay stock suficiente el error se propaga y
+    el item no se guarda. Las escrituras en lote reconcilian una sola vez.
+    """
+    if raw or totals_recalculation_suspended():
+        return
+    reconcile_order_inventory(instance)
+
+
+@receiver(post_delete, sender=OrderItem)
+def reconcile_inventory_on_item_delete(sender, instance, origin=None, **kwargs):
+    """
+    Liberar el stock reservado de un item eliminado de una nota de venta
+    
+    Solo cuando se elimina el item (o un queryset de items): al eliminar el
+    pedido o el tenant en cascada no se toca el inventario.
+    """
+    if totals_recalculation_suspended():
+        return
+    if not (isinstance(origin, OrderItem) or getattr(origin, 'model', None) is OrderItem):
+        return
+    reconcile_order_inventory(instance)
+
+
+def reconcile_order_inventory(item):
+    movimientos = OrderInventoryService.reconciliar(
+        item.order, usuario=getattr(item, '_changed_by', None)
+    )
+    if movimientos:
+        logger.info(f"{len(movimientos)} movimientos de stock registrados para pedido {item.order.order_number}")
+
+
 @receiver(post_save, sender=Order)
 def manage_inventory_on_order_save(sender, instance, created, **kwargs):
     """
     Gestionar inventario cuando se guarda un pedido
     
-    - Para notas de venta: descontar del inventario
-    - Para cancelaciones: devolver al inventario
+    - Notas de venta confirmadas: reservar el stock de sus items
+    - Cancelaciones: devolver al inventario lo reservado
+    
+    Corre dentro de la transacción de Order.save: si un producto no tiene
+    stock suficiente el error se propaga y el pedido no se guarda.
     """
-    try:
-        if instance.document_type == 'nota_venta' and instance.affects_inventory:
-            if created:
-                # Descontar del inventario para pedidos nuevos
-                for item in instance.items.all():
-                    if item.affects_inventory and item.product_name:
-                        # Buscar producto por nombre (simplificado)
-                        try:
-                            product = Product.objects.get(
-                                name__iexact=item.product_name,
-                                tenant=instance.tenant
-                            )
-                            if product.stock_quantity >= item.quantity:
-                                product.stock_quantity -= item.quantity
-                                product.save()
-                                logger.info(f"Stock descontado para producto {product.name}")
-                            else:
-                                logger.warning(f"Stock insuficiente para producto {product.name}")
-                        except Product.DoesNotExist:
-                            logger.warning(f"Producto {item.product_name} no encontrado en inventario")
-            
-            elif instance.status == 'cancelado':  # Cambio: cancelled → cancelado
-                # Devolver al inventario si se cancela
-                for item in instance.items.all():
-                    if item.affects_inventory and item.product_name:
-                        try:
-                            product = Product.objects.get(
-                                name__iexact=item.product_name,
-                                tenant=instance.tenant
-                            )
-                            product.stock_quantity += item.quantity
-                            product.save()
-                            logger.info(f"Stock devuelto para producto {product.name}")
-                        except Product.DoesNotExist:
-                            logger.warning(f"Producto {item.product_name} no encontrado en inventario")
-                            
-    except Exception as e:
-        logger.error(f"Error al gestionar inventario para pedido {instance.order_number}: {str(e)}")
+    movimientos = OrderInventoryService.sincronizar(
+        instance, usuario=getattr(instance, '_changed_by', None)
+    )
+    if movimientos:
+        logger.info(f"{len(movimientos)} movimientos de stock registrados para pedido {instance.order_number}")
 
 
 @receiver(pre_save, sender=Product)
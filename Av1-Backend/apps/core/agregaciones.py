@@ -0,0 +1,44 @@
+"""
+Agregaciones reutilizables - Arte Ideas
+
+Histogramas por campo con choices resueltos en una sola consulta agrupada
+(`values(campo).annotate(...)`), en lugar de un `count()` por cada opción.
+"""
+from django.db.models import Count, Sum
+
+
+def histograma_choices(queryset, campo, sumas=None):
+    """
+    Conteo (y sumas opcionales) por cada valor de un campo con choices
+
+    Devuelve una lista en el orden de los choices del modelo con las claves
+    `valor`, `nombre`, `count` y una por cada suma. Las opciones sin filas
+    aparecen con ceros; valores guardados que no están en los choices se
+    agregan al final para que los totales cuadren.
+
+    sumas: {'alias': 'campo' | expresión} que se suman por grupo, p. ej.
+    {'total_amount': 'total'}.
+    """
+    sumas = sumas or {}
+    filas = queryset.order_by().prefetch_related(None).values(campo).annotate(
+        count=Count('pk'),
+        **{alias: Sum(expresion) for alias, expresion in sumas.items()}
+    )
+    por_valor = {fila[campo]: fila for fila in filas}
+
+    def item(valor, nombre):
+        fila = por_valor.pop(valor, {})
+        resultado = {'valor': valor, 'nombre': str(nombre), 'count': fila.get('count', 0)}
+        for alias in sumas:
+            resultado[alias] = fila.get(alias) or 0
+        return resultado
+
+    choices = queryset.model._meta.get_field(campo).flatchoices
+    histograma = [item(valor, nombre) for valor, nombre in choices]
+    histograma += [item(valor, valor) for valor in list(por_valor)]
+    return histograma
+
+
+def histograma_por_valor(queryset, campo, sumas=None):
+    """Igual que `histograma_choices` pero indexado por valor: {valor: item}"""
+    return {item['valor']: item for item in histograma_choices(queryset, campo, sumas)}
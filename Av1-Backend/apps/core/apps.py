@@ -25,4 +25,14 @@ class CoreConfig(AppConfig):
         try:
             from .usuarios import signals as user_signals
         except ImportError:
-            pass
\ No newline at end of file
+            pass
+        
+        try:
+            from .multitenancy import signals as tenant_signals
+        except ImportError:
+            pass
+        
+        try:
+            from .busqueda import signals as busqueda_signals
+        except ImportError:
+            pass
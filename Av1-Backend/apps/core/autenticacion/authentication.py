@@ -0,0 +1,111 @@
+"""
+Autenticación JWT - Arte Ideas
+
+ClaimsJWTAuthentication arma request.user a partir de los claims del access
+token (ver tokens.py) en lugar de consultar el usuario y luego su tenant en
+cada request:
+
+- El estado que puede revocar el token (activo y versión de tokens) se lee de
+  una caché compartida con TTL corto (AUTH_USER_CACHE_TIMEOUT), que se
+  invalida al guardar o eliminar el usuario (signals.py).
+- El tenant se toma del registro en caché de multitenancy, y los permisos del
+  registro compilado (permisos.py), así reflejan los cambios de RolePermission
+  sin esperar a que venza el token.
+- El resto de campos del usuario quedan diferidos: si una vista los usa se
+  cargan todos juntos en una consulta, y save() solo escribe los cargados.
+
+Los tokens emitidos antes de los claims (sin `ver`) siguen funcionando con la
+consulta estándar de simplejwt.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.core.multitenancy.cache import obtener_tenant_por_id
+from .tokens import CLAIMS_USUARIO
+
+# Marca para usuarios que no existen (None es "no está en caché")
+AUSENTE = 'ausente'
+
+
+def get_cache():
+    """Backend de caché para el estado de los usuarios"""
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """TTL del estado de los usuarios en segundos"""
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def _clave_usuario(user_id):
+    return f'auth:usuario:{user_id}'
+
+
+def obtener_estado_usuario(user_id):
+    """{'is_active', 'token_version'} del usuario o None si no existe"""
+    clave = _clave_usuario(user_id)
+    estado = get_cache().get(clave)
+    if estado is None:
+        estado = get_user_model().objects.filter(pk=user_id).values(
+            'is_active', 'token_version'
+        ).first() or AUSENTE
+        get_cache().set(clave, estado, get_timeout())
+    return None if estado == AUSENTE else estado
+
+
+def invalidar_estado_usuario(user_id):
+    """Eliminar de la caché el estado del usuario"""
+    get_cache().delete(_clave_usuario(user_id))
+
+
+def usuario_desde_claims(validated_token):
+    """
+    Instancia de User con los campos de los claims cargados y el resto diferidos
+
+    El tenant queda en la caché de la relación, así que `user.tenant` no consulta.
+    """
+    User = get_user_model()
+    valores = {claim: validated_token[claim] for claim in CLAIMS_USUARIO}
+    valores.update({
+        User._meta.pk.attname: validated_token[api_settings.USER_ID_CLAIM],
+        'is_active': True,
+        'token_version': validated_token['ver'],
+    })
+
+    # from_db espera los valores en el orden de los campos del modelo
+    campos = [f.attname for f in User._meta.concrete_fields if f.attname in valores]
+    user = User.from_db(DEFAULT_DB_ALIAS, campos, [valores[campo] for campo in campos])
+
+    tenant = obtener_tenant_por_id(user.tenant_id)
+    User._meta.get_field('tenant').set_cached_value(user, tenant)
+
+    user._desde_token = True
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Autenticación JWT que hidrata el usuario desde los claims del token"""
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('El token no identifica al usuario')
+
+        estado = obtener_estado_usuario(user_id)
+        if estado is None:
+            raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
+        if not estado['is_active']:
+            raise AuthenticationFailed('Usuario inactivo', code='user_inactive')
+        if estado['token_version'] != validated_token['ver']:
+            raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+
+        return usuario_desde_claims(validated_token)
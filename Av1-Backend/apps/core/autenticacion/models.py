@@ -5,6 +5,8 @@ Modelos relacionados con autenticación, permisos y roles
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from .permisos import obtener_permisos
+
 
 class User(AbstractUser):
     """
@@ -51,67 +53,59 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Versión de los tokens emitidos; al incrementarse se revocan los anteriores
+    token_version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión de Tokens')
+    
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
         
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})"
+    
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Usuarios hidratados desde el token (ver autenticacion/authentication.py):
+        el primer acceso a un campo diferido carga todos los diferidos en una
+        sola consulta, en lugar de una consulta por campo
+        """
+        if fields is not None and getattr(self, '_desde_token', False):
+            diferidos = self.get_deferred_fields()
+            if diferidos and set(fields) <= diferidos:
+                fields = list(diferidos)
+        super().refresh_from_db(using=using, fields=fields)
+    
+    def revoke_tokens(self):
+        """Invalidar todos los tokens emitidos para el usuario (cerrar todas las sesiones)"""
+        User.objects.filter(pk=self.pk).update(token_version=models.F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        
+        from .authentication import invalidar_estado_usuario
+        invalidar_estado_usuario(self.pk)
+        
+    def get_permissions(self):
+        """
+        Permisos efectivos del usuario (frozenset) según su rol y tenant
+        
+        Se resuelven en el registro compilado de `permisos.py` y se guardan en
+        la instancia mientras no cambien el rol ni el tenant.
+        """
+        memo = self.__dict__.get('_permisos')
+        if memo is None or memo[0] != self.role or memo[1] != self.tenant_id:
+            memo = (self.role, self.tenant_id, obtener_permisos(self.role, self.tenant_id))
+            self.__dict__['_permisos'] = memo
+        return memo[2]
         
     def get_permissions_list(self):
         """
         Obtener lista de permisos según el rol
         Basado en la imagen de roles y permisos
         """
-        permissions_map = {
-            'super_admin': [
-                # Acceso a módulos
-                'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
-                'access:inventario', 'access:activos', 'access:gastos', 'access:produccion',
-                'access:contratos', 'access:reportes', 'access:configuration',
-                # Acciones sensibles
-                'view:costos', 'view:precios', 'view:margenes', 'view:datos_clientes',
-                'view:datos_financieros', 'edit:precios', 'delete:registros',
-                # Gestión de usuarios y tenants
-                'manage:users', 'manage:tenants', 'manage:permissions'
-            ],
-            'admin': [
-                # Acceso a módulos (todos)
-                'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
-                'access:inventario', 'access:activos', 'access:gastos', 'access:produccion',
-                'access:contratos', 'access:reportes', 'access:configuration',
-                # Acciones sensibles (todas)
-                'view:costos', 'view:precios', 'view:margenes', 'view:datos_clientes',
-                'view:datos_financieros', 'edit:precios', 'delete:registros',
-                # Gestión dentro del tenant
-                'manage:users', 'manage:permissions'
-            ],
-            'ventas': [
-                # Acceso a módulos de ventas
-                'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
-                'access:contratos', 'access:reportes',
-                # Acciones específicas de ventas
-                'view:datos_clientes', 'view:precios'
-            ],
-            'produccion': [
-                # Acceso a módulos de producción
-                'access:dashboard', 'access:produccion', 'access:inventario', 'access:activos',
-                'access:pedidos', 'access:reportes',
-                # Acciones específicas de producción
-                'view:costos', 'view:inventario'
-            ],
-            'operario': [
-                # Acceso básico operacional
-                'access:dashboard', 'access:agenda', 'access:produccion',
-                # Solo acceso de visualización básica
-            ]
-        }
-        
-        return permissions_map.get(self.role, [])
+        return sorted(self.get_permissions())
         
     def has_permission(self, permission):
         """Verificar si el usuario tiene un permiso específico"""
-        return permission in self.get_permissions_list()
+        return permission in self.get_permissions()
 
 
 class RolePermission(models.Model):
@@ -0,0 +1,162 @@
+"""
+Registro de permisos compilados - Arte Ideas
+
+Los permisos de cada rol se definen una sola vez como frozensets. Para un
+tenant, el conjunto efectivo de (tenant, rol) es el del rol con los ajustes
+de su RolePermission aplicados, y se compila una vez y se guarda en caché:
+
+- Diccionario en memoria del proceso, con TTL corto (PERMISSION_CACHE_LOCAL_TTL).
+- Caché compartida de Django (PERMISSION_CACHE_ALIAS), con TTL largo.
+
+Al guardar o eliminar un RolePermission, `signals.py` borra los conjuntos
+del tenant en ambos niveles del proceso actual; los demás procesos dejan de
+ver la versión anterior cuando vence el TTL local.
+
+Solo cuentan como ajustes los campos de RolePermission que difieren de lo que
+se crea por defecto para el rol (`get_default_permissions` más los defaults
+del modelo): un registro sin editar no cambia los permisos del rol.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERMISOS_POR_ROL = {
+    'super_admin': frozenset([
+        # Acceso a módulos
+        'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
+        'access:inventario', 'access:activos', 'access:gastos', 'access:produccion',
+        'access:contratos', 'access:reportes', 'access:configuration',
+        # Acciones sensibles
+        'view:costos', 'view:precios', 'view:margenes', 'view:datos_clientes',
+        'view:datos_financieros', 'edit:precios', 'delete:registros',
+        # Gestión de usuarios y tenants
+        'manage:users', 'manage:tenants', 'manage:permissions'
+    ]),
+    'admin': frozenset([
+        # Acceso a módulos (todos)
+        'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
+        'access:inventario', 'access:activos', 'access:gastos', 'access:produccion',
+        'access:contratos', 'access:reportes', 'access:configuration',
+        # Acciones sensibles (todas)
+        'view:costos', 'view:precios', 'view:margenes', 'view:datos_clientes',
+        'view:datos_financieros', 'edit:precios', 'delete:registros',
+        # Gestión dentro del tenant
+        'manage:users', 'manage:permissions'
+    ]),
+    'ventas': frozenset([
+        # Acceso a módulos de ventas
+        'access:dashboard', 'access:agenda', 'access:pedidos', 'access:clientes',
+        'access:contratos', 'access:reportes',
+        # Acciones específicas de ventas
+        'view:datos_clientes', 'view:precios'
+    ]),
+    'produccion': frozenset([
+        # Acceso a módulos de producción
+        'access:dashboard', 'access:produccion', 'access:inventario', 'access:activos',
+        'access:pedidos', 'access:reportes',
+        # Acciones específicas de producción
+        'view:costos', 'view:inventario'
+    ]),
+    'operario': frozenset([
+        # Acceso básico operacional
+        'access:dashboard', 'access:agenda', 'access:produccion',
+        # Solo acceso de visualización básica
+    ]),
+}
+
+SIN_PERMISOS = frozenset()
+
+_lock = threading.Lock()
+_local = {}
+
+
+def get_cache():
+    """Backend de caché compartida para los permisos compilados"""
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """TTL de la caché compartida en segundos"""
+    return getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300)
+
+
+def get_local_ttl():
+    """TTL de los permisos en memoria del proceso en segundos"""
+    return getattr(settings, 'PERMISSION_CACHE_LOCAL_TTL', 30)
+
+
+def _clave(tenant_id, role):
+    return f'permisos:{tenant_id}:{role}'
+
+
+def campos_permiso():
+    """{campo booleano de RolePermission: permiso}, p. ej. access_dashboard -> access:dashboard"""
+    from .models import RolePermission
+
+    return {
+        field.name: field.name.replace('_', ':', 1)
+        for field in RolePermission._meta.concrete_fields
+        if field.get_internal_type() == 'BooleanField'
+    }
+
+
+def compilar_permisos(role, tenant_id=None):
+    """Conjunto de permisos del rol con los ajustes de RolePermission del tenant"""
+    from .models import RolePermission
+
+    base = PERMISOS_POR_ROL.get(role, SIN_PERMISOS)
+    if not tenant_id:
+        return base
+
+    campos = campos_permiso()
+    fila = RolePermission.objects.filter(tenant_id=tenant_id, role=role).values(*campos).first()
+    if fila is None:
+        return base
+
+    por_defecto = RolePermission.get_default_permissions(role)
+    agregar, quitar = set(), set()
+    for campo, permiso in campos.items():
+        inicial = por_defecto.get(campo, RolePermission._meta.get_field(campo).default)
+        if fila[campo] == inicial:
+            continue
+        (agregar if fila[campo] else quitar).add(permiso)
+
+    if not agregar and not quitar:
+        return base
+    return (base | agregar) - quitar
+
+
+def obtener_permisos(role, tenant_id=None):
+    """Permisos efectivos (frozenset) del rol en el tenant, desde la caché"""
+    if not tenant_id:
+        return PERMISOS_POR_ROL.get(role, SIN_PERMISOS)
+
+    clave = _clave(tenant_id, role)
+    entrada = _local.get(clave)
+    if entrada is not None and entrada[1] >= time.monotonic():
+        return entrada[0]
+
+    permisos = get_cache().get(clave)
+    if permisos is None:
+        permisos = compilar_permisos(role, tenant_id)
+        get_cache().set(clave, permisos, get_timeout())
+    with _lock:
+        _local[clave] = (permisos, time.monotonic() + get_local_ttl())
+    return permisos
+
+
+def invalidar_permisos(tenant_id):
+    """Eliminar de ambos niveles los permisos compilados de todos los roles del tenant"""
+    claves = [_clave(tenant_id, role) for role in PERMISOS_POR_ROL]
+    with _lock:
+        for clave in claves:
+            _local.pop(clave, None)
+    get_cache().delete_many(claves)
+
+
+def limpiar_cache_local():
+    """Vaciar los permisos en memoria del proceso (tests y recargas de configuración)"""
+    with _lock:
+        _local.clear()
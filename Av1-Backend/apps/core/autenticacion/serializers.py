@@ -3,10 +3,15 @@ Serializers del Módulo de Autenticación - Arte Ideas
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.conf import settings
 from django.contrib.auth.models import update_last_login
 
+from .tokens import ArteIdeasRefreshToken, agregar_claims
+
 class LogoutSerializer(serializers.Serializer):
     """Serializer para logout"""
     refresh_token = serializers.CharField(required=True)
@@ -38,7 +43,7 @@ class EmailTokenObtainPairSerializer(serializers.Serializer):
         if not user.check_password(password):
             raise serializers.ValidationError({'password': 'Contraseña incorrecta'})
         
-        refresh = RefreshToken.for_user(user)
+        refresh = ArteIdeasRefreshToken.for_user(user)
         
         if settings.SIMPLE_JWT.get('UPDATE_LAST_LOGIN', False):
             update_last_login(None, user)
@@ -48,3 +53,29 @@ class EmailTokenObtainPairSerializer(serializers.Serializer):
             'refresh': str(refresh)
         }
 
+
+
+class TokenRefreshConVersionSerializer(TokenRefreshSerializer):
+    """
+    Refresh de tokens que respeta la revocación por versión
+
+    Rechaza refresh tokens de usuarios inactivos o con una versión de tokens
+    anterior, y emite los nuevos tokens con los claims actuales del usuario
+    (rol, tenant y permisos pueden haber cambiado desde el login).
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        User = get_user_model()
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+
+        if user is None or not user.is_active:
+            raise InvalidToken('Usuario no encontrado o inactivo')
+        if refresh.get('ver', user.token_version) != user.token_version:
+            raise InvalidToken('El token fue revocado')
+
+        data = super().validate(attrs)
+        data['access'] = str(agregar_claims(AccessToken(data['access'], verify=False), user))
+        if 'refresh' in data:
+            data['refresh'] = str(agregar_claims(RefreshToken(data['refresh'], verify=False), user))
+        return data
@@ -1,13 +1,62 @@
 """
 Signals del Módulo de Autenticación - Arte Ideas
 """
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from .authentication import invalidar_estado_usuario
 from .models import RolePermission
+from .permisos import invalidar_permisos
 
 User = get_user_model()
 
+# Cambios que invalidan los tokens emitidos (los claims ya no son válidos)
+# is_staff/is_superuser viajan en los claims y habilitan accesos entre tenants
+CAMPOS_REVOCACION = ('password', 'role', 'tenant_id', 'is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def detectar_revocacion_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Marcar el usuario para revocar sus tokens si cambió la contraseña, el rol,
+    el tenant, el estado activo o sus privilegios de staff/superusuario
+    """
+    instance._revocar_tokens = False
+    if instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None:
+        campos = {User._meta.get_field(campo).attname for campo in update_fields}
+        if not campos.intersection(CAMPOS_REVOCACION):
+            return
+
+    anterior = User.objects.filter(pk=instance.pk).values(*CAMPOS_REVOCACION).first()
+    if anterior is None:
+        return
+    instance._revocar_tokens = any(
+        campo in instance.__dict__ and anterior[campo] != getattr(instance, campo)
+        for campo in CAMPOS_REVOCACION
+    )
+
+
+@receiver(post_save, sender=User)
+def revocar_tokens_usuario(sender, instance, created, **kwargs):
+    """
+    Incrementar la versión de tokens (con UPDATE, porque update_fields puede no
+    incluirla) e invalidar el estado del usuario en la caché de autenticación
+    """
+    if getattr(instance, '_revocar_tokens', False):
+        User.objects.filter(pk=instance.pk).update(token_version=F('token_version') + 1)
+        instance.refresh_from_db(fields=['token_version'])
+        instance._revocar_tokens = False
+    invalidar_estado_usuario(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidar_usuario_eliminado(sender, instance, **kwargs):
+    """Los tokens de un usuario eliminado dejan de autenticar"""
+    invalidar_estado_usuario(instance.pk)
+
 
 @receiver(post_save, sender=User)
 def create_default_role_permissions(sender, instance, created, **kwargs):
@@ -20,4 +69,10 @@ def create_default_role_permissions(sender, instance, created, **kwargs):
             tenant=instance.tenant,
             role=instance.role,
             defaults=RolePermission.get_default_permissions(instance.role)
-        )
\ No newline at end of file
+        )
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+def invalidar_permisos_compilados(sender, instance, **kwargs):
+    """Recompilar los permisos del tenant cuando cambian sus RolePermission"""
+    invalidar_permisos(instance.tenant_id)
@@ -3,9 +3,17 @@ Tests del Módulo de Autenticación - Arte Ideas
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.core.multitenancy.cache import limpiar_cache_local
 from apps.core.multitenancy.models import Tenant
+from .models import RolePermission
+from .permisos import limpiar_cache_local as limpiar_permisos_locales
+from .tokens import ArteIdeasRefreshToken
 
 User = get_user_model()
 
@@ -47,4 +55,209 @@ class AuthenticationTestCase(APITestCase):
         
         # Test has_permission method
         self.assertTrue(self.user.has_permission('access:dashboard'))
-        self.assertFalse(self.user.has_permission('invalid:permission'))
\ No newline at end of file
+        self.assertFalse(self.user.has_permission('invalid:permission'))
+
+
+class ClaimsJWTAuthenticationTestCase(APITestCase):
+    """Tests de la autenticación con claims y revocación por versión de tokens"""
+    
+    def setUp(self):
+        cache.clear()
+        limpiar_cache_local()
+        limpiar_permisos_locales()
+        self.tenant = Tenant.objects.create(
+            name="Estudio Claims",
+            slug="estudio-claims",
+            business_name="Estudio Claims SAC",
+            business_address="Dirección Test",
+            business_phone="123456789",
+            business_email="claims@estudio.com",
+            business_ruc="12345678902"
+        )
+        self.user = User.objects.create_user(
+            username="claims",
+            email="claims@example.com",
+            password="testpass123",
+            tenant=self.tenant,
+            role="ventas"
+        )
+        self.url = '/api/crm/clientes/clientes/'
+    
+    def autenticar(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def contar_consultas(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+    
+    def test_login_incluye_claims(self):
+        """El access token del login lleva tenant, rol y versión, no los permisos"""
+        response = self.client.post('/api/core/auth/login/', {
+            'email': 'claims@example.com', 'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        from rest_framework_simplejwt.tokens import AccessToken
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['tenant_id'], self.tenant.id)
+        self.assertEqual(access['role'], 'ventas')
+        self.assertNotIn('permisos', access)
+        self.assertEqual(access['ver'], 0)
+    
+    def test_request_sin_consultas_de_usuario_ni_tenant(self):
+        """Con la caché caliente, usuario y tenant no se consultan"""
+        self.autenticar(RefreshToken.for_user(self.user).access_token)
+        consultas_estandar = self.contar_consultas()
+        
+        self.autenticar(ArteIdeasRefreshToken.for_user(self.user).access_token)
+        self.contar_consultas()  # llena la caché de estado del usuario
+        consultas_claims = self.contar_consultas()
+        
+        self.assertLessEqual(consultas_claims, consultas_estandar - 2)
+    
+    def test_cambio_de_password_revoca_tokens(self):
+        """Cambiar la contraseña invalida los tokens emitidos"""
+        self.autenticar(ArteIdeasRefreshToken.for_user(self.user).access_token)
+        self.contar_consultas()
+        
+        self.user.set_password('nuevapass123')
+        self.user.save()
+        self.assertEqual(self.user.token_version, 1)
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_cambio_de_rol_revoca_y_otros_cambios_no(self):
+        """El rol revoca los tokens; los datos de perfil no"""
+        self.user.bio = 'Fotógrafo'
+        self.user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 0)
+        
+        self.user.role = 'admin'
+        self.user.save(update_fields=['role'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+    
+    def test_quitar_superusuario_revoca_tokens(self):
+        """Un superusuario degradado no conserva sus privilegios con el token anterior"""
+        self.user.is_superuser = True
+        self.user.is_staff = True
+        self.user.save()
+        self.autenticar(ArteIdeasRefreshToken.for_user(self.user).access_token)
+        self.contar_consultas()
+        
+        self.user.is_superuser = False
+        self.user.save(update_fields=['is_superuser'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 2)
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_rechaza_version_anterior(self):
+        """Un refresh token revocado no emite nuevos tokens"""
+        refresh = ArteIdeasRefreshToken.for_user(self.user)
+        self.user.revoke_tokens()
+        
+        response = self.client.post('/api/core/auth/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_actualiza_claims(self):
+        """El refresh emite tokens con el rol actual del usuario"""
+        refresh = ArteIdeasRefreshToken.for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(role='admin')
+        
+        response = self.client.post('/api/core/auth/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'admin')
+        self.assertEqual(RefreshToken(response.data['refresh'])['role'], 'admin')
+    
+    def test_usuario_hidratado_carga_y_guarda_campos_diferidos(self):
+        """Los campos diferidos se cargan juntos y save() no pisa los demás"""
+        from .authentication import usuario_desde_claims
+        
+        User.objects.filter(pk=self.user.pk).update(bio='Bio original')
+        self.user.get_permissions()  # compila los permisos del rol en la caché
+        user = usuario_desde_claims(ArteIdeasRefreshToken.for_user(self.user).access_token)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(user.tenant.slug, 'estudio-claims')
+            self.assertTrue(user.has_permission('access:clientes'))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'claims@example.com')
+            self.assertEqual(user.bio, 'Bio original')
+        
+        user.phone = '999888777'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.phone, '999888777')
+        self.assertEqual(self.user.bio, 'Bio original')
+        self.assertEqual(self.user.token_version, 0)
+
+
+
+class PermissionRegistryTestCase(TestCase):
+    """Tests del registro de permisos compilados por tenant y rol"""
+    
+    def setUp(self):
+        cache.clear()
+        limpiar_permisos_locales()
+        self.tenant = Tenant.objects.create(
+            name="Estudio Permisos",
+            slug="estudio-permisos",
+            business_name="Estudio Permisos SAC",
+            business_address="Dirección Test",
+            business_phone="123456789",
+            business_email="permisos@estudio.com",
+            business_ruc="12345678903"
+        )
+        # La señal crea el RolePermission por defecto de 'produccion'
+        self.user = User.objects.create_user(
+            username="permisos",
+            email="permisos@example.com",
+            password="testpass123",
+            tenant=self.tenant,
+            role="produccion"
+        )
+    
+    def permisos_actuales(self):
+        return User.objects.get(pk=self.user.pk).get_permissions()
+    
+    def test_registro_por_defecto_no_cambia_el_rol(self):
+        """El RolePermission sin editar conserva los permisos del rol"""
+        self.assertTrue(RolePermission.objects.filter(tenant=self.tenant, role='produccion').exists())
+        permisos = self.permisos_actuales()
+        self.assertIn('view:inventario', permisos)
+        self.assertNotIn('access:clientes', permisos)
+        self.assertNotIn('access:agenda', permisos)
+    
+    def test_ajustes_de_role_permission(self):
+        """Los cambios en RolePermission agregan y quitan permisos al guardar"""
+        self.assertNotIn('access:gastos', self.permisos_actuales())
+        
+        role_permission = RolePermission.objects.get(tenant=self.tenant, role='produccion')
+        role_permission.access_gastos = True
+        role_permission.view_costos = False
+        role_permission.save()
+        
+        permisos = self.permisos_actuales()
+        self.assertIn('access:gastos', permisos)
+        self.assertNotIn('view:costos', permisos)
+        self.assertIn('access:produccion', permisos)
+        
+        role_permission.delete()
+        self.assertIn('view:costos', self.permisos_actuales())
+    
+    def test_verificacion_sin_consultas(self):
+        """Los permisos compilados se reutilizan entre instancias"""
+        self.user.get_permissions()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_permission('access:produccion'))
+            self.assertFalse(user.has_permission('manage:users'))
+            self.assertIs(user.get_permissions(), self.user.get_permissions())
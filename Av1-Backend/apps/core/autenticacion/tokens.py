@@ -0,0 +1,33 @@
+"""
+Tokens JWT del Módulo de Autenticación - Arte Ideas
+
+El access token lleva los datos que cada request necesita del usuario
+(tenant, rol) para no consultarlos en la base de datos, y la versión de
+tokens del usuario (`ver`) para poder revocarlos. Los permisos no viajan en
+el token: se resuelven por rol y tenant con el registro de permisos, así un
+cambio en RolePermission aplica sin esperar a que el token expire.
+"""
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claims que se copian tal cual a los campos del usuario hidratado
+CLAIMS_USUARIO = ('username', 'role', 'tenant_id', 'is_staff', 'is_superuser')
+
+
+def agregar_claims(token, user):
+    """Agregar al token los claims del usuario y su versión de tokens"""
+    for claim in CLAIMS_USUARIO:
+        token[claim] = getattr(user, claim)
+    token['ver'] = user.token_version
+    return token
+
+
+class ArteIdeasRefreshToken(RefreshToken):
+    """
+    Refresh token con los claims del usuario
+
+    `access_token` copia los claims del refresh, así que ambos tokens los llevan.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return agregar_claims(super().for_user(user), user)
@@ -0,0 +1,4 @@
+"""
+Módulo de Búsqueda - Arte Ideas
+Índice de búsqueda de clientes, pedidos y contratos
+"""
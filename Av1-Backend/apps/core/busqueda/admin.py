@@ -0,0 +1,20 @@
+"""
+Admin del Módulo de Búsqueda - Arte Ideas
+"""
+from django.contrib import admin
+from .models import DocumentoBusqueda
+
+
+@admin.register(DocumentoBusqueda)
+class DocumentoBusquedaAdmin(admin.ModelAdmin):
+    """Documentos del índice (solo lectura, se mantienen por señales)"""
+    list_display = ['titulo', 'entidad', 'objeto_id', 'tenant', 'actualizado_en']
+    list_filter = ['entidad', 'tenant']
+    search_fields = ['titulo', 'contenido']
+    readonly_fields = ['tenant', 'entidad', 'objeto_id', 'titulo', 'subtitulo', 'contenido', 'actualizado_en']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,28 @@
+"""
+Filtros de Búsqueda - Arte Ideas
+"""
+from rest_framework.filters import SearchFilter
+
+from .services import ENTIDADES, BusquedaService
+
+
+class BusquedaIndexadaFilter(SearchFilter):
+    """
+    `?search=` resuelto sobre el índice de búsqueda en lugar de LIKE '%x%'
+
+    La vista indica su entidad con `busqueda_entidad` ('cliente', 'pedido',
+    'contrato'). Cada palabra debe ser prefijo de un término del documento,
+    sin distinguir tildes ni mayúsculas. Sin `busqueda_entidad` se comporta
+    como SearchFilter con `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        entidad = ENTIDADES.get(getattr(view, 'busqueda_entidad', None))
+        if entidad is None:
+            return super().filter_queryset(request, queryset, view)
+
+        texto = request.query_params.get(self.search_param, '')
+        ids = BusquedaService.ids_coincidentes(texto, entidad, tenant=getattr(request.user, 'tenant', None))
+        if ids is None:
+            return queryset
+        return queryset.filter(pk__in=ids)
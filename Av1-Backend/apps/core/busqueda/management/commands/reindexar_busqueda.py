@@ -0,0 +1,45 @@
+"""
+Comando de Django para reconstruir el índice de búsqueda
+Uso: python manage.py reindexar_busqueda
+     python manage.py reindexar_busqueda --tenant-id 1
+"""
+from django.core.management.base import BaseCommand
+from apps.core.multitenancy.models import Tenant
+from apps.core.busqueda.models import DocumentoBusqueda
+from apps.core.busqueda.services import ENTIDADES, BusquedaService
+
+
+class Command(BaseCommand):
+    help = 'Indexar clientes, pedidos y contratos existentes en el índice de búsqueda'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Reindexar solo los datos de este tenant',
+        )
+
+    def handle(self, *args, **options):
+        tenant = None
+        if options['tenant_id']:
+            try:
+                tenant = Tenant.objects.get(id=options['tenant_id'])
+            except Tenant.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f'Error: Tenant con ID {options["tenant_id"]} no existe'))
+                return
+
+        for nombre, entidad in ENTIDADES.items():
+            queryset = entidad.queryset()
+            documentos = DocumentoBusqueda.objects.filter(entidad=nombre)
+            if tenant:
+                queryset = queryset.filter(tenant=tenant)
+                documentos = documentos.filter(tenant=tenant)
+
+            actualizados = BusquedaService.reindexar(entidad, queryset)
+            # Documentos de objetos eliminados sin señales
+            _, por_modelo = documentos.exclude(objeto_id__in=queryset.values('pk')).delete()
+            eliminados = por_modelo.get(DocumentoBusqueda._meta.label, 0)
+            self.stdout.write(f'  {nombre}: {actualizados} indexados, {eliminados} eliminados')
+
+        alcance = f'tenant {tenant.name}' if tenant else 'todos los tenants'
+        self.stdout.write(self.style.SUCCESS(f'\n[OK] Índice de búsqueda reconstruido ({alcance})'))
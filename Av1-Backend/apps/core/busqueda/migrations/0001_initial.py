@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('multitenancy', '0002_document_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('cliente', 'Cliente'), ('pedido', 'Pedido'), ('contrato', 'Contrato')], max_length=20, verbose_name='Entidad')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID del Objeto')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('subtitulo', models.CharField(blank=True, max_length=255, verbose_name='Subtítulo')),
+                ('contenido', models.TextField(verbose_name='Contenido Normalizado')),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='multitenancy.tenant', verbose_name='Estudio Fotográfico')),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda',
+                'verbose_name_plural': 'Documentos de Búsqueda',
+            },
+        ),
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('cliente', 'Cliente'), ('pedido', 'Pedido'), ('contrato', 'Contrato')], max_length=20, verbose_name='Entidad')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID del Objeto')),
+                ('termino', models.CharField(max_length=64, verbose_name='Término')),
+                ('peso', models.PositiveSmallIntegerField(default=1, verbose_name='Peso')),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='busqueda.documentobusqueda', verbose_name='Documento')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='multitenancy.tenant', verbose_name='Estudio Fotográfico')),
+            ],
+            options={
+                'verbose_name': 'Término de Búsqueda',
+                'verbose_name_plural': 'Términos de Búsqueda',
+                'indexes': [models.Index(fields=['tenant', 'termino'], name='busqueda_te_tenant__dcbe50_idx'), models.Index(fields=['entidad', 'termino'], name='busqueda_te_entidad_20f671_idx')],
+                'unique_together': {('documento', 'termino')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='documentobusqueda',
+            index=models.Index(fields=['tenant', 'entidad'], name='busqueda_do_tenant__eee352_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='documentobusqueda',
+            unique_together={('entidad', 'objeto_id')},
+        ),
+    ]
@@ -0,0 +1,68 @@
+"""
+Modelos de Búsqueda - Arte Ideas
+"""
+from django.db import models
+
+
+class DocumentoBusqueda(models.Model):
+    """
+    Documento de búsqueda de un cliente, pedido o contrato
+
+    `contenido` es el texto normalizado (minúsculas, sin tildes ni signos) de
+    los campos buscables; título y subtítulo son los que se muestran en los
+    resultados. Se mantiene por señales al guardar o eliminar la entidad.
+    """
+    ENTIDAD_CHOICES = [
+        ('cliente', 'Cliente'),
+        ('pedido', 'Pedido'),
+        ('contrato', 'Contrato'),
+    ]
+
+    tenant = models.ForeignKey('multitenancy.Tenant', on_delete=models.CASCADE, verbose_name='Estudio Fotográfico')
+    entidad = models.CharField(max_length=20, choices=ENTIDAD_CHOICES, verbose_name='Entidad')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID del Objeto')
+    titulo = models.CharField(max_length=255, verbose_name='Título')
+    subtitulo = models.CharField(max_length=255, blank=True, verbose_name='Subtítulo')
+    contenido = models.TextField(verbose_name='Contenido Normalizado')
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Documento de Búsqueda'
+        verbose_name_plural = 'Documentos de Búsqueda'
+        unique_together = ['entidad', 'objeto_id']
+        indexes = [
+            models.Index(fields=['tenant', 'entidad']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entidad_display()} #{self.objeto_id} - {self.titulo}"
+
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice invertido: un término normalizado por documento
+
+    Las búsquedas resuelven cada palabra como prefijo (`LIKE 'term%'`) sobre
+    el índice (tenant, termino), sin recorrer las tablas de las entidades.
+    `entidad` y `objeto_id` se copian del documento para filtrar sin JOIN.
+    """
+    documento = models.ForeignKey(
+        DocumentoBusqueda, on_delete=models.CASCADE, related_name='terminos', verbose_name='Documento'
+    )
+    tenant = models.ForeignKey('multitenancy.Tenant', on_delete=models.CASCADE, verbose_name='Estudio Fotográfico')
+    entidad = models.CharField(max_length=20, choices=DocumentoBusqueda.ENTIDAD_CHOICES, verbose_name='Entidad')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID del Objeto')
+    termino = models.CharField(max_length=64, verbose_name='Término')
+    peso = models.PositiveSmallIntegerField(default=1, verbose_name='Peso')
+
+    class Meta:
+        verbose_name = 'Término de Búsqueda'
+        verbose_name_plural = 'Términos de Búsqueda'
+        unique_together = ['documento', 'termino']
+        indexes = [
+            models.Index(fields=['tenant', 'termino']),
+            models.Index(fields=['entidad', 'termino']),
+        ]
+
+    def __str__(self):
+        return f"{self.termino} ({self.entidad} #{self.objeto_id})"
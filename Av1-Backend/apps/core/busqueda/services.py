@@ -0,0 +1,345 @@
+"""
+Servicios de Búsqueda - Arte Ideas
+
+Cada cliente, pedido y contrato tiene un DocumentoBusqueda con su texto
+normalizado (minúsculas, sin tildes ni signos: "Pérez" y "perez" son el mismo
+término) y sus términos en TerminoBusqueda con un peso según el campo de
+origen. Una búsqueda exige que cada palabra escrita sea prefijo de algún
+término del documento y ordena por la suma de pesos de los términos
+encontrados (las coincidencias exactas valen el doble).
+"""
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import DocumentoBusqueda, TerminoBusqueda
+
+MAX_TERMINO = 64
+MAX_PALABRAS_CONSULTA = 8
+
+# Peso de los términos según el campo del que salen
+PESO_TITULO = 3          # nombres, razón social, números de pedido y contrato
+PESO_IDENTIFICADOR = 2   # DNI/RUC, email, teléfono
+PESO_RELACIONADO = 1     # datos del cliente en pedidos y contratos
+
+_RE_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con cualquier signo convertido en espacio"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+    return _RE_SEPARADORES.sub(' ', texto.lower()).strip()
+
+
+def terminos(texto):
+    """Términos normalizados del texto, en orden"""
+    return [termino[:MAX_TERMINO] for termino in normalizar(texto).split()]
+
+
+class EntidadBusqueda:
+    """
+    Cómo se arma el documento de búsqueda de un modelo
+
+    `campos(obj)` devuelve [(texto, peso)]; título y subtítulo son los que
+    se muestran en los resultados.
+    """
+    nombre = None
+    modelo = None
+    select_related = ()
+
+    @classmethod
+    def get_modelo(cls):
+        return apps.get_model(cls.modelo)
+
+    @classmethod
+    def queryset(cls):
+        return cls.get_modelo().objects.select_related(*cls.select_related)
+
+    @classmethod
+    def titulo(cls, obj):
+        return str(obj)
+
+    @classmethod
+    def subtitulo(cls, obj):
+        return ''
+
+    @classmethod
+    def campos(cls, obj):
+        raise NotImplementedError
+
+
+class ClienteBusqueda(EntidadBusqueda):
+    nombre = 'cliente'
+    modelo = 'clientes.Cliente'
+
+    @classmethod
+    def subtitulo(cls, cliente):
+        return ' · '.join(valor for valor in (cliente.dni, cliente.email, cliente.telefono) if valor)
+
+    @classmethod
+    def campos(cls, cliente):
+        return [
+            (cliente.nombres, PESO_TITULO),
+            (cliente.apellidos, PESO_TITULO),
+            (cliente.razon_social, PESO_TITULO),
+            (cliente.dni, PESO_IDENTIFICADOR),
+            (cliente.email, PESO_IDENTIFICADOR),
+            (cliente.telefono, PESO_IDENTIFICADOR),
+        ]
+
+
+class PedidoBusqueda(EntidadBusqueda):
+    nombre = 'pedido'
+    modelo = 'pedidos.Order'
+    select_related = ('cliente',)
+
+    @classmethod
+    def titulo(cls, order):
+        return order.order_number
+
+    @classmethod
+    def subtitulo(cls, order):
+        return f"{order.cliente.obtener_nombre_completo()} - {order.get_document_type_display()}"
+
+    @classmethod
+    def campos(cls, order):
+        return [(order.order_number, PESO_TITULO)] + _campos_cliente(order.cliente)
+
+
+class ContratoBusqueda(EntidadBusqueda):
+    nombre = 'contrato'
+    modelo = 'contratos.Contrato'
+    select_related = ('cliente',)
+
+    @classmethod
+    def titulo(cls, contrato):
+        return f"{contrato.numero_contrato} - {contrato.titulo}"
+
+    @classmethod
+    def subtitulo(cls, contrato):
+        return contrato.cliente.obtener_nombre_completo()
+
+    @classmethod
+    def campos(cls, contrato):
+        return [
+            (contrato.numero_contrato, PESO_TITULO),
+            (contrato.titulo, PESO_TITULO),
+        ] + _campos_cliente(contrato.cliente)
+
+
+def _campos_cliente(cliente):
+    """Datos del cliente que permiten encontrar sus pedidos y contratos"""
+    return [
+        (cliente.nombres, PESO_RELACIONADO),
+        (cliente.apellidos, PESO_RELACIONADO),
+        (cliente.razon_social, PESO_RELACIONADO),
+        (cliente.dni, PESO_RELACIONADO),
+        (cliente.email, PESO_RELACIONADO),
+        (cliente.telefono, PESO_RELACIONADO),
+    ]
+
+
+ENTIDADES = {entidad.nombre: entidad for entidad in (ClienteBusqueda, PedidoBusqueda, ContratoBusqueda)}
+
+
+def entidad_de_modelo(modelo):
+    """EntidadBusqueda de un modelo, o None si no se indexa"""
+    for entidad in ENTIDADES.values():
+        if entidad.get_modelo() is modelo:
+            return entidad
+    return None
+
+
+class BusquedaService:
+    """Mantenimiento del índice y consultas"""
+    LOTE = 1000
+
+    @classmethod
+    def indexar(cls, entidad, objetos):
+        """
+        Crear o actualizar los documentos de `objetos` (instancias de la entidad)
+
+        Los documentos sin cambios no se reescriben. Escribe con bulk_create /
+        bulk_update, así un lote cuesta las mismas consultas que un objeto.
+        Devuelve los ids de los objetos cuyo documento cambió.
+        """
+        armados = {}
+        for obj in objetos:
+            campos = entidad.campos(obj)
+            pesos = {}
+            for texto, peso in campos:
+                for termino in terminos(texto):
+                    pesos[termino] = max(peso, pesos.get(termino, 0))
+            armados[obj.pk] = {
+                'tenant_id': obj.tenant_id,
+                'titulo': entidad.titulo(obj)[:255],
+                'subtitulo': entidad.subtitulo(obj)[:255],
+                'contenido': ' '.join(normalizar(texto) for texto, _ in campos if texto),
+                'pesos': pesos,
+            }
+        if not armados:
+            return []
+
+        existentes = {
+            documento.objeto_id: documento
+            for documento in DocumentoBusqueda.objects.filter(entidad=entidad.nombre, objeto_id__in=armados)
+        }
+
+        nuevos, modificados = [], []
+        for objeto_id, datos in armados.items():
+            valores = {campo: datos[campo] for campo in ('tenant_id', 'titulo', 'subtitulo', 'contenido')}
+            documento = existentes.get(objeto_id)
+            if documento is None:
+                nuevos.append(DocumentoBusqueda(entidad=entidad.nombre, objeto_id=objeto_id, **valores))
+            elif any(getattr(documento, campo) != valor for campo, valor in valores.items()):
+                for campo, valor in valores.items():
+                    setattr(documento, campo, valor)
+                modificados.append(documento)
+        if not nuevos and not modificados:
+            return []
+
+        with transaction.atomic():
+            if modificados:
+                # bulk_update no aplica auto_now
+                ahora = timezone.now()
+                for documento in modificados:
+                    documento.actualizado_en = ahora
+                DocumentoBusqueda.objects.bulk_update(
+                    modificados, ['tenant', 'titulo', 'subtitulo', 'contenido', 'actualizado_en'], batch_size=cls.LOTE
+                )
+                TerminoBusqueda.objects.filter(documento__in=modificados).delete()
+            if nuevos:
+                DocumentoBusqueda.objects.bulk_create(nuevos, batch_size=cls.LOTE)
+                # Los backends sin RETURNING (MySQL) no devuelven los ids insertados
+                if any(documento.pk is None for documento in nuevos):
+                    ids = dict(DocumentoBusqueda.objects.filter(
+                        entidad=entidad.nombre, objeto_id__in=[documento.objeto_id for documento in nuevos]
+                    ).values_list('objeto_id', 'id'))
+                    for documento in nuevos:
+                        documento.pk = ids[documento.objeto_id]
+
+            TerminoBusqueda.objects.bulk_create([
+                TerminoBusqueda(
+                    documento_id=documento.pk,
+                    tenant_id=documento.tenant_id,
+                    entidad=entidad.nombre,
+                    objeto_id=documento.objeto_id,
+                    termino=termino,
+                    peso=peso,
+                )
+                for documento in nuevos + modificados
+                for termino, peso in armados[documento.objeto_id]['pesos'].items()
+            ], batch_size=cls.LOTE)
+
+        return [documento.objeto_id for documento in nuevos + modificados]
+
+    @classmethod
+    def eliminar(cls, entidad, objeto_ids):
+        """Quitar del índice los documentos de esos objetos"""
+        DocumentoBusqueda.objects.filter(entidad=entidad.nombre, objeto_id__in=objeto_ids).delete()
+
+    @classmethod
+    def reindexar(cls, entidad, queryset=None):
+        """
+        Indexar todos los objetos de la entidad (o los de `queryset`) por lotes
+
+        Para cargas sin señales (bulk_create, update()) o la primera vez.
+        Devuelve la cantidad de documentos creados o actualizados.
+        """
+        queryset = entidad.queryset() if queryset is None else queryset
+        total, lote = 0, []
+        for obj in queryset.iterator(chunk_size=cls.LOTE):
+            lote.append(obj)
+            if len(lote) == cls.LOTE:
+                total += len(cls.indexar(entidad, lote))
+                lote = []
+        total += len(cls.indexar(entidad, lote))
+        return total
+
+    @classmethod
+    def _coincidencias(cls, palabras, tenant=None, entidades=None, peso_minimo=None):
+        """
+        Términos agrupados por documento que contienen todas las palabras como prefijo
+
+        Una fila por documento con `puntaje` (suma de pesos; las coincidencias
+        exactas valen el doble). `tenant` puede ser el objeto o su id.
+        """
+        filas = TerminoBusqueda.objects.all()
+        if tenant is not None:
+            filas = filas.filter(tenant=tenant)
+        if entidades:
+            filas = filas.filter(entidad__in=entidades)
+        if peso_minimo:
+            filas = filas.filter(peso__gte=peso_minimo)
+
+        coincide = Q()
+        for palabra in palabras:
+            coincide |= Q(termino__istartswith=palabra)
+        por_palabra = {
+            f'palabra_{indice}': Max(Case(
+                When(termino__istartswith=palabra, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            ))
+            for indice, palabra in enumerate(palabras)
+        }
+        return filas.filter(coincide).values('documento_id', 'entidad', 'objeto_id').annotate(
+            puntaje=Sum(Case(
+                When(termino__in=palabras, then=F('peso') * 2),
+                default=F('peso'),
+                output_field=IntegerField()
+            )),
+            **por_palabra
+        ).filter(**{nombre: 1 for nombre in por_palabra})
+
+    @classmethod
+    def palabras(cls, texto):
+        """Palabras de la consulta, sin repetir y como máximo MAX_PALABRAS_CONSULTA"""
+        return list(dict.fromkeys(terminos(texto)))[:MAX_PALABRAS_CONSULTA]
+
+    @classmethod
+    def ids_coincidentes(cls, texto, entidad, tenant=None, peso_minimo=None):
+        """
+        Subconsulta con los ids de los objetos de la entidad que coinciden
+
+        Para filtrar un queryset: `queryset.filter(pk__in=ids)`. Devuelve None si
+        el texto no tiene palabras buscables.
+        """
+        palabras = cls.palabras(texto)
+        if not palabras:
+            return None
+        return cls._coincidencias(
+            palabras, tenant=tenant, entidades=[entidad.nombre], peso_minimo=peso_minimo
+        ).values('objeto_id')
+
+    @classmethod
+    def buscar(cls, texto, tenant=None, entidades=None, limite=20):
+        """
+        Resultados ordenados por relevancia entre clientes, pedidos y contratos
+
+        Cada resultado: {'entidad', 'id', 'titulo', 'subtitulo', 'puntaje'}.
+        Dos consultas: ranking agrupado sobre el índice y los documentos de la página.
+        """
+        palabras = cls.palabras(texto)
+        if not palabras:
+            return []
+
+        ranking = list(cls._coincidencias(palabras, tenant=tenant, entidades=entidades).order_by(
+            '-puntaje', '-documento_id'
+        )[:limite])
+        documentos = DocumentoBusqueda.objects.in_bulk([fila['documento_id'] for fila in ranking])
+        return [
+            {
+                'entidad': fila['entidad'],
+                'id': fila['objeto_id'],
+                'titulo': documentos[fila['documento_id']].titulo,
+                'subtitulo': documentos[fila['documento_id']].subtitulo,
+                'puntaje': fila['puntaje'],
+            }
+            for fila in ranking if fila['documento_id'] in documentos
+        ]
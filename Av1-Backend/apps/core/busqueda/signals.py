@@ -0,0 +1,50 @@
+"""
+Señales del Módulo de Búsqueda - Arte Ideas
+Mantenimiento del índice al guardar o eliminar clientes, pedidos y contratos
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .services import BusquedaService, ClienteBusqueda, ContratoBusqueda, PedidoBusqueda
+
+
+@receiver(post_save, sender='clientes.Cliente')
+def indexar_cliente(sender, instance, raw=False, **kwargs):
+    """
+    Indexar el cliente y, si su documento cambió, sus pedidos y contratos
+
+    Los documentos de pedidos y contratos incluyen el nombre y DNI del cliente.
+    """
+    if raw:
+        return
+    if not BusquedaService.indexar(ClienteBusqueda, [instance]):
+        return
+    for entidad in (PedidoBusqueda, ContratoBusqueda):
+        BusquedaService.reindexar(entidad, entidad.queryset().filter(cliente=instance))
+
+
+@receiver(post_save, sender='pedidos.Order')
+def indexar_pedido(sender, instance, raw=False, **kwargs):
+    if not raw:
+        BusquedaService.indexar(PedidoBusqueda, [instance])
+
+
+@receiver(post_save, sender='contratos.Contrato')
+def indexar_contrato(sender, instance, raw=False, **kwargs):
+    if not raw:
+        BusquedaService.indexar(ContratoBusqueda, [instance])
+
+
+@receiver(post_delete, sender='clientes.Cliente')
+def desindexar_cliente(sender, instance, **kwargs):
+    BusquedaService.eliminar(ClienteBusqueda, [instance.pk])
+
+
+@receiver(post_delete, sender='pedidos.Order')
+def desindexar_pedido(sender, instance, **kwargs):
+    BusquedaService.eliminar(PedidoBusqueda, [instance.pk])
+
+
+@receiver(post_delete, sender='contratos.Contrato')
+def desindexar_contrato(sender, instance, **kwargs):
+    BusquedaService.eliminar(ContratoBusqueda, [instance.pk])
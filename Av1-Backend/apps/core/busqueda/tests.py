@@ -0,0 +1,174 @@
+"""
+Tests del Módulo de Búsqueda - Arte Ideas
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.core.models import Tenant
+from apps.crm.models import Cliente, Contrato
+from apps.commerce.pedidos.models import Order
+from .models import DocumentoBusqueda, TerminoBusqueda
+from .services import BusquedaService, ClienteBusqueda, PedidoBusqueda, normalizar
+
+User = get_user_model()
+
+
+def crear_tenant(slug):
+    return Tenant.objects.create(name=f'Estudio {slug}', slug=slug, business_name=f'Estudio {slug}')
+
+
+def crear_cliente(tenant, nombres, apellidos, dni, **datos):
+    datos.setdefault('email', f'{dni}@example.com')
+    datos.setdefault('telefono', '987654321')
+    return Cliente.objects.create(
+        tenant=tenant, tipo_cliente='particular', nombres=nombres, apellidos=apellidos, dni=dni,
+        direccion='Av. Test 123', **datos
+    )
+
+
+def crear_pedido(tenant, cliente, **datos):
+    return Order.objects.create(
+        tenant=tenant,
+        cliente=cliente,
+        document_type='proforma',
+        client_type='particular',
+        start_date=timezone.now().date(),
+        delivery_date=timezone.now().date() + timedelta(days=7),
+        total=Decimal('100.00'),
+        **datos
+    )
+
+
+class BusquedaServiceTest(TestCase):
+    """Índice mantenido por señales y consultas sobre él"""
+
+    def setUp(self):
+        self.tenant = crear_tenant('busqueda')
+        self.cliente = crear_cliente(self.tenant, 'José', 'Pérez Núñez', '12345678', email='jose.perez@example.com')
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar('  Pérez-NÚÑEZ, José!  '), 'perez nunez jose')
+        self.assertEqual(normalizar(None), '')
+
+    def test_cliente_indexado_al_guardar(self):
+        documento = DocumentoBusqueda.objects.get(entidad='cliente', objeto_id=self.cliente.pk)
+        self.assertEqual(documento.titulo, 'José Pérez Núñez')
+        self.assertIn('perez nunez', documento.contenido)
+        terminos = dict(documento.terminos.values_list('termino', 'peso'))
+        self.assertEqual(terminos['perez'], 3)
+        self.assertEqual(terminos['12345678'], 2)
+
+    def test_busqueda_sin_tildes_y_por_prefijo(self):
+        for consulta in ['perez', 'PÉREZ', 'nun jos', '1234']:
+            resultados = BusquedaService.buscar(consulta, tenant=self.tenant, entidades=['cliente'])
+            self.assertEqual([r['id'] for r in resultados], [self.cliente.pk], consulta)
+        # Todas las palabras deben coincidir
+        self.assertEqual(BusquedaService.buscar('perez garcia', tenant=self.tenant), [])
+
+    def test_ranking_entre_entidades(self):
+        """El cliente (apellido con peso de título) va antes que su contrato y su pedido"""
+        pedido = crear_pedido(self.tenant, self.cliente)
+        contrato = Contrato.objects.create(
+            tenant=self.tenant, cliente=self.cliente, numero_contrato='CT-100', titulo='Boda familiar',
+            descripcion='Cobertura de boda',            tipo_servicio='fotografia', fecha_inicio=timezone.now().date(),
+            fecha_fin=timezone.now().date() + timedelta(days=30), monto_total=Decimal('500.00')
+        )
+
+        with self.assertNumQueries(2):
+            resultados = BusquedaService.buscar('perez', tenant=self.tenant)
+
+        self.assertEqual(
+            [(r['entidad'], r['id']) for r in resultados],
+            [('cliente', self.cliente.pk), ('contrato', contrato.pk), ('pedido', pedido.pk)]
+        )
+        self.assertEqual(resultados[2]['titulo'], pedido.order_number)
+
+    def test_cambios_del_cliente_reindexan_pedidos(self):
+        pedido = crear_pedido(self.tenant, self.cliente)
+        self.cliente.apellidos = 'Gómez'
+        self.cliente.save()
+
+        self.assertEqual(
+            [r['id'] for r in BusquedaService.buscar('gomez', tenant=self.tenant, entidades=['pedido'])],
+            [pedido.pk]
+        )
+        self.assertEqual(BusquedaService.buscar('nunez', tenant=self.tenant), [])
+
+    def test_eliminar_quita_documento_y_terminos(self):
+        crear_pedido(self.tenant, self.cliente)
+        self.cliente.delete()
+
+        self.assertFalse(DocumentoBusqueda.objects.exists())
+        self.assertFalse(TerminoBusqueda.objects.exists())
+
+    def test_aislado_por_tenant(self):
+        otro = crear_tenant('otro')
+        crear_cliente(otro, 'Ana', 'Pérez', '87654321')
+
+        resultados = BusquedaService.buscar('perez', tenant=self.tenant)
+        self.assertEqual([r['id'] for r in resultados], [self.cliente.pk])
+
+    def test_indexar_sin_cambios_no_escribe(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(BusquedaService.indexar(ClienteBusqueda, [self.cliente]), [])
+
+    def test_comando_reindexar(self):
+        pedido = crear_pedido(self.tenant, self.cliente)
+        DocumentoBusqueda.objects.all().delete()
+        DocumentoBusqueda.objects.create(
+            tenant=self.tenant, entidad='pedido', objeto_id=pedido.pk + 100, titulo='Eliminado', contenido=''
+        )
+
+        call_command('reindexar_busqueda', tenant_id=self.tenant.pk, stdout=open('/dev/null', 'w'))
+
+        self.assertEqual(
+            set(DocumentoBusqueda.objects.values_list('entidad', 'objeto_id')),
+            {('cliente', self.cliente.pk), ('pedido', pedido.pk)}
+        )
+        self.assertEqual(
+            [r['id'] for r in BusquedaService.buscar(pedido.order_number, tenant=self.tenant)], [pedido.pk]
+        )
+
+
+class BusquedaAPITest(APITestCase):
+    """Endpoint de búsqueda y ?search= de los listados"""
+
+    def setUp(self):
+        self.tenant = crear_tenant('busqueda-api')
+        self.user = User.objects.create_user(
+            username='buscador', password='testpass123', tenant=self.tenant, role='admin'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.perez = crear_cliente(self.tenant, 'Lucía', 'Pérez', '11111111')
+        self.garcia = crear_cliente(self.tenant, 'Mario', 'García', '22222222')
+        self.pedido = crear_pedido(self.tenant, self.perez)
+
+    def test_busqueda_global(self):
+        response = self.client.get('/api/core/busqueda/', {'q': 'lucia perez'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['entidad'], r['id']) for r in response.data['resultados']],
+            [('cliente', self.perez.pk), ('pedido', self.pedido.pk)]
+        )
+
+    def test_busqueda_entidades_invalidas(self):
+        response = self.client.get('/api/core/busqueda/', {'q': 'perez', 'entidades': 'cliente,factura'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_de_clientes_y_pedidos_usa_el_indice(self):
+        response = self.client.get('/api/crm/clientes/clientes/', {'search': 'garcia'})
+        self.assertEqual([c['id'] for c in response.data['results']], [self.garcia.pk])
+
+        response = self.client.get('/api/commerce/pedidos/api/orders/', {'search': 'perez'})
+        self.assertEqual([o['id'] for o in response.data['results']], [self.pedido.pk])
+
+        response = self.client.get('/api/commerce/pedidos/api/orders/', {'cliente_nombre': 'García'})
+        self.assertEqual(response.data['results'], [])
@@ -0,0 +1,11 @@
+"""
+URLs del Módulo de Búsqueda - Arte Ideas
+"""
+from django.urls import path
+from .views import BusquedaView
+
+app_name = 'busqueda'
+
+urlpatterns = [
+    path('', BusquedaView.as_view(), name='buscar'),
+]
@@ -0,0 +1,46 @@
+"""
+Views del Módulo de Búsqueda - Arte Ideas
+"""
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from .services import ENTIDADES, BusquedaService
+
+
+class BusquedaView(APIView):
+    """
+    Búsqueda de clientes, pedidos y contratos ordenada por relevancia
+
+    GET /api/core/busqueda/?q=perez&entidades=cliente,pedido&limite=20
+    """
+    permission_classes = [IsAuthenticated]
+    LIMITE_DEFECTO = 20
+    LIMITE_MAXIMO = 50
+
+    def get(self, request):
+        texto = request.query_params.get('q', '').strip()
+
+        entidades = [
+            entidad.strip() for entidad in request.query_params.get('entidades', '').split(',') if entidad.strip()
+        ]
+        invalidas = [entidad for entidad in entidades if entidad not in ENTIDADES]
+        if invalidas:
+            return Response(
+                {'error': f"Entidades no válidas: {', '.join(invalidas)}. Use {', '.join(ENTIDADES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limite = int(request.query_params.get('limite', self.LIMITE_DEFECTO))
+        except ValueError:
+            return Response({'error': 'El límite debe ser un número'}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+
+        return Response({
+            'q': texto,
+            'resultados': BusquedaService.buscar(
+                texto, tenant=request.user.tenant, entidades=entidades or None, limite=limite
+            ),
+        })
@@ -0,0 +1,54 @@
+"""
+Middleware del Core App - Arte Ideas
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .perfilado import PerfilConsultas, registrar_muestra
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilerMiddleware:
+    """
+    Perfilado de consultas por request (opcional, QUERY_PROFILER_ENABLED)
+
+    Agrega la cabecera Server-Timing (tiempo en base de datos, consultas,
+    consultas repetidas y tiempo total), suma la request al resumen por
+    endpoint que expone /api/core/profiler/ y deja un warning en el log
+    cuando detecta consultas repetidas (posible N+1).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with PerfilConsultas() as perfil:
+            response = self.get_response(request)
+
+        response['Server-Timing'] = perfil.server_timing()
+
+        endpoint = self.get_endpoint(request)
+        if endpoint is not None:
+            registrar_muestra(endpoint, perfil)
+
+        duplicadas = perfil.duplicadas()
+        if duplicadas:
+            peor = duplicadas[0]
+            logger.warning(
+                'Posible N+1 en %s: %s consultas, "%s" repetida %s veces desde %s',
+                endpoint or request.path, perfil.total, peor['sql'][:200], peor['veces'],
+                ', '.join(peor['origenes']) or '?'
+            )
+        return response
+
+    def get_endpoint(self, request):
+        """'MÉTODO ruta' con el patrón de la URL (sin ids), o None si no resolvió"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        return f'{request.method} /{match.route}'
@@ -26,10 +26,10 @@ class BaseModel(models.Model):
 from .autenticacion.models import User, RolePermission
 from .usuarios.models import UserProfile, UserActivity
 from .configuracion_sistema.models import SystemConfiguration
-from .multitenancy.models import Tenant, TenantConfiguration
+from .multitenancy.models import Tenant, TenantConfiguration, DocumentSequence
 
 # Mantener las clases disponibles en este namespace para compatibilidad
 __all__ = [
     'BaseModel', 'User', 'RolePermission', 'UserProfile', 'UserActivity',
-    'SystemConfiguration', 'Tenant', 'TenantConfiguration'
+    'SystemConfiguration', 'Tenant', 'TenantConfiguration', 'DocumentSequence'
 ]
\ No newline at end of file
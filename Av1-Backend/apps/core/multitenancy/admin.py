@@ -2,7 +2,7 @@
 Admin del Módulo de Multi-tenancy - Arte Ideas
 """
 from django.contrib import admin
-from .models import Tenant, TenantConfiguration
+from .models import Tenant, TenantConfiguration, DocumentSequence
 
 
 @admin.register(Tenant)
@@ -87,4 +87,16 @@ class TenantConfigurationAdmin(admin.ModelAdmin):
             return qs
         elif request.user.is_authenticated and hasattr(request.user, 'tenant') and request.user.tenant:
             return qs.filter(tenant=request.user.tenant)
-        return qs.none()
\ No newline at end of file
+        return qs.none()
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para las secuencias de numeración"""
+    list_display = ['tenant', 'series', 'last_value', 'updated_at']
+    list_filter = ['tenant']
+    search_fields = ['tenant__name', 'series']
+    readonly_fields = ['tenant', 'series', 'last_value', 'updated_at']
+    
+    def has_add_permission(self, request):
+        """Las series se crean al reservar el primer número"""
+        return False
@@ -0,0 +1,123 @@
+"""
+Caché de Tenants - Arte Ideas
+Registro de tenants por slug e id para resolverlos sin consultas en cada request
+
+Dos niveles:
+- LRU en memoria del proceso, con TTL corto (TENANT_CACHE_LOCAL_TTL).
+- Caché compartida de Django (TENANT_CACHE_ALIAS), con TTL largo.
+
+Al guardar o eliminar un Tenant, `signals.py` borra sus entradas en ambos
+niveles del proceso actual; los demás procesos dejan de ver la versión
+anterior cuando vence el TTL local. Los slugs inexistentes también se guardan
+(como ausentes) para que hosts o cabeceras desconocidas no consulten la base
+de datos en cada request.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Tenant
+
+# Marca para slugs/ids que no existen (None es "no está en caché")
+AUSENTE = 'ausente'
+
+_lock = threading.Lock()
+_local = OrderedDict()
+
+
+def get_cache():
+    """Backend de caché compartida para los tenants"""
+    return caches[getattr(settings, 'TENANT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    """TTL de la caché compartida en segundos"""
+    return getattr(settings, 'TENANT_CACHE_TIMEOUT', 300)
+
+
+def get_local_ttl():
+    """TTL de la LRU en memoria del proceso en segundos"""
+    return getattr(settings, 'TENANT_CACHE_LOCAL_TTL', 30)
+
+
+def get_local_size():
+    """Máximo de entradas en la LRU en memoria"""
+    return getattr(settings, 'TENANT_CACHE_LOCAL_SIZE', 256)
+
+
+def _clave_slug(slug):
+    return f'tenants:slug:{slug}'
+
+
+def _clave_id(tenant_id):
+    return f'tenants:id:{tenant_id}'
+
+
+def _leer_local(clave):
+    with _lock:
+        entrada = _local.get(clave)
+        if entrada is None:
+            return None
+        valor, expira = entrada
+        if expira < time.monotonic():
+            del _local[clave]
+            return None
+        _local.move_to_end(clave)
+        return valor
+
+
+def _guardar_local(clave, valor):
+    with _lock:
+        _local[clave] = (valor, time.monotonic() + get_local_ttl())
+        _local.move_to_end(clave)
+        while len(_local) > get_local_size():
+            _local.popitem(last=False)
+
+
+def _obtener(clave, cargar):
+    valor = _leer_local(clave)
+    if valor is None:
+        valor = get_cache().get(clave)
+        if valor is None:
+            valor = cargar() or AUSENTE
+            get_cache().set(clave, valor, get_timeout())
+        _guardar_local(clave, valor)
+    if valor == AUSENTE:
+        return None
+    # Copia para que una request no modifique la instancia compartida del proceso
+    return copy.copy(valor)
+
+
+def obtener_tenant_por_slug(slug):
+    """Tenant con ese slug (activo o no) o None si no existe"""
+    if not slug:
+        return None
+    return _obtener(_clave_slug(slug), lambda: Tenant.objects.filter(slug=slug).first())
+
+
+def obtener_tenant_por_id(tenant_id):
+    """Tenant con ese id (activo o no) o None si no existe"""
+    if not tenant_id:
+        return None
+    return _obtener(_clave_id(tenant_id), lambda: Tenant.objects.filter(pk=tenant_id).first())
+
+
+def invalidar_tenant(tenant_id=None, *slugs):
+    """Eliminar de ambos niveles las entradas del tenant (por id y por cada slug)"""
+    claves = [_clave_slug(slug) for slug in slugs if slug]
+    if tenant_id:
+        claves.append(_clave_id(tenant_id))
+    with _lock:
+        for clave in claves:
+            _local.pop(clave, None)
+    get_cache().delete_many(claves)
+
+
+def limpiar_cache_local():
+    """Vaciar la LRU del proceso (tests y recargas de configuración)"""
+    with _lock:
+        _local.clear()
@@ -4,7 +4,7 @@ Middleware para gestión de tenants en las requests
 """
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
-from .models import Tenant
+from .cache import obtener_tenant_por_slug
 
 
 class TenantMiddleware(MiddlewareMixin):
@@ -35,15 +35,9 @@ class TenantMiddleware(MiddlewareMixin):
         if not tenant_slug and 'tenant' in request.GET:
             tenant_slug = request.GET['tenant']
         
-        # Buscar tenant si se encontró slug
-        if tenant_slug:
-            try:
-                tenant = Tenant.objects.get(slug=tenant_slug, is_active=True)
-                request.tenant = tenant
-            except Tenant.DoesNotExist:
-                request.tenant = None
-        else:
-            request.tenant = None
+        # Buscar tenant si se encontró slug (registro en caché, sin consultas en régimen estable)
+        tenant = obtener_tenant_por_slug(tenant_slug) if tenant_slug else None
+        request.tenant = tenant if tenant and tenant.is_active else None
         
         return None
     
@@ -76,8 +70,9 @@ class TenantValidationMiddleware(MiddlewareMixin):
             return None
         
         # Validar que el usuario pertenezca al tenant
+        # Comparar ids evita cargar request.user.tenant desde la base de datos
         if hasattr(request, 'tenant') and request.tenant:
-            if request.user.tenant != request.tenant:
+            if request.user.tenant_id != request.tenant.id:
                 return JsonResponse({
                     'error': 'Usuario no autorizado para este tenant',
                     'code': 'TENANT_MISMATCH'
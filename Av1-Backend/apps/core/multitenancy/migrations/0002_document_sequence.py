@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multitenancy', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=50, verbose_name='Serie')),
+                ('last_value', models.PositiveBigIntegerField(default=0, verbose_name='Último número asignado')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sequences', to='multitenancy.tenant', verbose_name='Tenant')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Documentos',
+                'verbose_name_plural': 'Secuencias de Documentos',
+                'unique_together': {('tenant', 'series')},
+            },
+        ),
+    ]
@@ -126,4 +126,25 @@ class TenantConfiguration(models.Model):
         elif self.data_type == 'json':
             import json
             return json.loads(self.value)
-        return self.value
\ No newline at end of file
+        return self.value
+
+class DocumentSequence(models.Model):
+    """
+    Contador de numeración de documentos por tenant y serie
+
+    Cada serie (p. ej. 'PED-2025', 'CT-2025', 'OP-2025') guarda el último
+    número asignado. La reserva se hace con apps.core.secuencias, que
+    incrementa el contador con un UPDATE atómico.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, verbose_name='Tenant', related_name='sequences')
+    series = models.CharField(max_length=50, verbose_name='Serie')
+    last_value = models.PositiveBigIntegerField(default=0, verbose_name='Último número asignado')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Secuencia de Documentos'
+        verbose_name_plural = 'Secuencias de Documentos'
+        unique_together = ['tenant', 'series']
+    
+    def __str__(self):
+        return f"{self.tenant.name} - {self.series}: {self.last_value}"
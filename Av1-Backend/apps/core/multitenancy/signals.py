@@ -0,0 +1,27 @@
+"""
+Señales del Módulo de Multi-tenancy - Arte Ideas
+Invalidación de la caché de tenants (cache.py)
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Tenant
+from .cache import invalidar_tenant
+
+
+@receiver(pre_save, sender=Tenant)
+def recordar_slug_anterior(sender, instance, **kwargs):
+    """Guardar el slug previo para invalidar también su entrada si cambia"""
+    if instance.pk:
+        instance._slug_anterior = Tenant.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Tenant)
+def invalidar_tenant_guardado(sender, instance, **kwargs):
+    """Invalidar el tenant por id, slug actual y slug anterior"""
+    invalidar_tenant(instance.pk, instance.slug, getattr(instance, '_slug_anterior', None))
+
+
+@receiver(post_delete, sender=Tenant)
+def invalidar_tenant_eliminado(sender, instance, **kwargs):
+    invalidar_tenant(instance.pk, instance.slug)
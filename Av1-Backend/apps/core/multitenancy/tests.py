@@ -1,9 +1,14 @@
 """
 Tests del Módulo de Multi-tenancy - Arte Ideas
 """
-from django.test import TestCase
+from django.test import TestCase, RequestFactory
 from django.contrib.auth import get_user_model
-from .models import Tenant, TenantConfiguration
+from django.db import transaction
+from django.http import HttpResponse
+from apps.core.secuencias import reservar_numeros, reservar_codigos
+from .models import Tenant, TenantConfiguration, DocumentSequence
+from .cache import get_cache, limpiar_cache_local, obtener_tenant_por_id
+from .middleware import TenantMiddleware, TenantValidationMiddleware
 
 User = get_user_model()
 
@@ -100,4 +105,162 @@ class TenantConfigurationTestCase(TestCase):
             value='true',
             data_type='boolean'
         )
-        self.assertTrue(bool_config.get_typed_value())
\ No newline at end of file
+        self.assertTrue(bool_config.get_typed_value())
+
+
+class DocumentSequenceTestCase(TestCase):
+    """Tests para la numeración de documentos por tenant y serie"""
+    
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.tenant = Tenant.objects.create(
+            name="Estudio Test",
+            business_name="Estudio Fotográfico Test",
+            business_address="Dirección Test",
+            business_phone="123456789",
+            business_email="test@estudio.com",
+            business_ruc="12345678901"
+        )
+        self.otro = Tenant.objects.create(
+            name="Otro Estudio",
+            business_name="Otro",
+            business_address="Dirección",
+            business_phone="987654321",
+            business_email="otro@estudio.com",
+            business_ruc="10987654321"
+        )
+    
+    def test_numeros_consecutivos_y_bloques(self):
+        """Test reservas sucesivas y en bloque continúan la misma serie"""
+        self.assertEqual(list(reservar_numeros(self.tenant, 'PED-2025')), [1])
+        self.assertEqual(list(reservar_numeros(self.tenant, 'PED-2025', 3)), [2, 3, 4])
+        self.assertEqual(list(reservar_numeros(self.tenant, 'PED-2025')), [5])
+        
+        # Cada tenant y cada serie tienen su propio contador
+        self.assertEqual(list(reservar_numeros(self.otro, 'PED-2025')), [1])
+        self.assertEqual(list(reservar_numeros(self.tenant, 'CT-2025')), [1])
+        self.assertEqual(
+            DocumentSequence.objects.get(tenant=self.tenant, series='PED-2025').last_value, 5
+        )
+    
+    def test_reserva_en_una_consulta(self):
+        """Test con la serie creada, reservar un bloque es un UPDATE y una lectura"""
+        reservar_numeros(self.tenant, 'OP-2025')
+        # SAVEPOINT + UPDATE + SELECT + RELEASE, sin importar el tamaño del bloque
+        with self.assertNumQueries(4):
+            reservar_numeros(self.tenant, 'OP-2025', 100)
+    
+    def test_semilla_continua_numeracion_existente(self):
+        """Test la primera reserva parte del mayor número ya usado"""
+        TenantConfiguration.objects.create(tenant=self.tenant, module='general', key='CT-2025-0007', value='x')
+        TenantConfiguration.objects.create(tenant=self.tenant, module='general', key='CT-2025-0003', value='x')
+        TenantConfiguration.objects.create(tenant=self.tenant, module='general', key='CT-2025-manual', value='x')
+        
+        codigos = reservar_codigos(
+            self.tenant, 'CT', TenantConfiguration.objects.filter(tenant=self.tenant), 'key',
+            cantidad=2, anio=2025
+        )
+        
+        self.assertEqual(codigos, ['CT-2025-0008', 'CT-2025-0009'])
+    
+    def test_reversion_no_deja_huecos(self):
+        """Test si la transacción que usa el número se revierte, el número se reutiliza"""
+        reservar_numeros(self.tenant, 'PED-2025')
+        try:
+            with transaction.atomic():
+                self.assertEqual(list(reservar_numeros(self.tenant, 'PED-2025', 2)), [2, 3])
+                raise ValueError('falla al guardar el documento')
+        except ValueError:
+            pass
+        
+        self.assertEqual(list(reservar_numeros(self.tenant, 'PED-2025')), [2])
+
+
+class TenantCacheTestCase(TestCase):
+    """Tests para la resolución de tenants en caché del middleware"""
+    
+    def setUp(self):
+        """Configurar datos de prueba"""
+        get_cache().clear()
+        limpiar_cache_local()
+        self.tenant = Tenant.objects.create(
+            name="Estudio Test",
+            slug="estudio-test",
+            business_name="Estudio Fotográfico Test",
+            business_address="Dirección Test",
+            business_phone="123456789",
+            business_email="test@estudio.com",
+            business_ruc="12345678901"
+        )
+        self.factory = RequestFactory()
+        self.middleware = TenantMiddleware(lambda request: HttpResponse())
+    
+    def resolver(self, slug):
+        request = self.factory.get('/api/', HTTP_X_TENANT=slug)
+        self.middleware.process_request(request)
+        return request.tenant
+    
+    def test_resolucion_sin_consultas_en_regimen_estable(self):
+        """Test solo la primera resolución de un slug consulta la base de datos"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.resolver('estudio-test'), self.tenant)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver('estudio-test'), self.tenant)
+        
+        # Tras vaciar la LRU del proceso se sirve desde la caché compartida
+        limpiar_cache_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver('estudio-test'), self.tenant)
+        
+        # Por id funciona igual (lo usa la autenticación JWT)
+        with self.assertNumQueries(1):
+            obtener_tenant_por_id(self.tenant.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_tenant_por_id(self.tenant.id), self.tenant)
+    
+    def test_slug_inexistente_se_recuerda(self):
+        """Test los slugs desconocidos no consultan en cada request"""
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.resolver('no-existe'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.resolver('no-existe'))
+    
+    def test_guardar_tenant_invalida(self):
+        """Test guardar el tenant invalida sus entradas por slug e id"""
+        self.resolver('estudio-test')
+        obtener_tenant_por_id(self.tenant.id)
+        
+        self.tenant.name = 'Estudio Renombrado'
+        self.tenant.slug = 'renombrado'
+        self.tenant.save()
+        
+        self.assertIsNone(self.resolver('estudio-test'))
+        self.assertEqual(self.resolver('renombrado').name, 'Estudio Renombrado')
+        self.assertEqual(obtener_tenant_por_id(self.tenant.id).slug, 'renombrado')
+        
+        self.tenant.is_active = False
+        self.tenant.save()
+        self.assertIsNone(self.resolver('renombrado'))
+        self.assertFalse(obtener_tenant_por_id(self.tenant.id).is_active)
+    
+    def test_validacion_compara_ids_sin_consultas(self):
+        """Test TenantValidationMiddleware no carga el tenant del usuario"""
+        otro = Tenant.objects.create(
+            name="Otro", slug="otro", business_name="Otro", business_address="Dirección",
+            business_phone="1", business_email="otro@estudio.com", business_ruc="10987654321"
+        )
+        user = User.objects.create_user(
+            username='usuario', email='u@estudio.com', password='pass12345',
+            tenant=self.tenant, role='admin'
+        )
+        user = User.objects.get(pk=user.pk)
+        validacion = TenantValidationMiddleware(lambda request: HttpResponse())
+        
+        request = self.factory.get('/api/')
+        request.user, request.tenant = user, self.tenant
+        with self.assertNumQueries(0):
+            self.assertIsNone(validacion.process_request(request))
+        
+        request.tenant = otro
+        with self.assertNumQueries(0):
+            self.assertEqual(validacion.process_request(request).status_code, 403)
@@ -0,0 +1,144 @@
+"""
+Paginación - Arte Ideas
+
+`PaginacionKeyset` se comporta como la paginación por número de página de
+siempre (PAGE_SIZE, `count`, `?page=N`) y agrega un modo keyset opcional para
+listados de scroll infinito:
+
+    GET /api/commerce/pedidos/api/orders/?paginacion=cursor
+    GET /api/commerce/pedidos/api/orders/?cursor=<token de "next">
+
+En modo keyset la página se pide con `WHERE (orden) > (última fila)` en lugar
+de `OFFSET n` y no se cuenta el total, así el costo es el de la página sin
+importar la profundidad. El orden es el `keyset_ordering` de la vista (o su
+`ordering`) con la clave primaria como desempate; `?ordering` no aplica en
+este modo porque el cursor guarda los valores de esos campos.
+"""
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _valor_cursor(valor):
+    """Valor serializable a JSON sin perder precisión (fechas con microsegundos)"""
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, (int, float, str, bool)) or valor is None:
+        return valor
+    return str(valor)
+
+
+class PaginacionKeyset(PageNumberPagination):
+    """
+    Paginación por número de página con modo keyset (cursor) opcional
+
+    Los campos del orden deben ser columnas del modelo sin nulos.
+    """
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacion'
+    page_size_query_param_cursor = 'page_size'
+    max_page_size = 100
+
+    @classmethod
+    def solicita_keyset(cls, request):
+        """Indica si la request pide el modo keyset"""
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.modo_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.solicita_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.modo_query_param)
+        self.page_size_keyset = self.get_page_size_keyset(request)
+        self.orden = self.get_orden(queryset.model, view)
+
+        queryset = queryset.order_by(*[
+            f'-{campo.name}' if descendente else campo.name for campo, descendente in self.orden
+        ])
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.condicion(self.decodificar(cursor)))
+
+        filas = list(queryset[:self.page_size_keyset + 1])
+        self.siguiente = None
+        if len(filas) > self.page_size_keyset:
+            filas = filas[:self.page_size_keyset]
+            self.siguiente = self.codificar(filas[-1])
+        return filas
+
+    def get_page_size_keyset(self, request):
+        try:
+            tamanio = int(request.query_params[self.page_size_query_param_cursor])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(tamanio, self.max_page_size))
+
+    def get_orden(self, modelo, view):
+        """[(campo, descendente)] del orden de la vista, terminado en la clave primaria"""
+        ordering = getattr(view, 'keyset_ordering', None) or getattr(view, 'ordering', None) or modelo._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        orden = []
+        for nombre in ordering:
+            descendente = nombre.startswith('-')
+            nombre = nombre.lstrip('-')
+            campo = modelo._meta.pk if nombre == 'pk' else modelo._meta.get_field(nombre)
+            orden.append((campo, descendente))
+            if campo.primary_key:
+                return orden
+        # Desempate: la clave primaria en la dirección del último campo
+        orden.append((modelo._meta.pk, orden[-1][1] if orden else False))
+        return orden
+
+    def condicion(self, valores):
+        """(a, b, pk) después de (x, y, z) en el orden, expandido en OR de prefijos iguales"""
+        condicion = Q()
+        iguales = {}
+        for (campo, descendente), valor in zip(self.orden, valores):
+            lookup = 'lt' if descendente else 'gt'
+            condicion |= Q(**iguales, **{f'{campo.attname}__{lookup}': valor})
+            iguales[campo.attname] = valor
+        return condicion
+
+    def codificar(self, fila):
+        valores = [_valor_cursor(getattr(fila, campo.attname)) for campo, _ in self.orden]
+        datos = json.dumps(valores).encode()
+        return base64.urlsafe_b64encode(datos).decode()
+
+    def decodificar(self, cursor):
+        """Valores del cursor convertidos al tipo de cada campo del orden"""
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(valores, list) or len(valores) != len(self.orden):
+                raise ValueError
+            return [campo.to_python(valor) for (campo, _), valor in zip(self.orden, valores)]
+        except (binascii.Error, ValueError, TypeError, ValidationError, FieldDoesNotExist):
+            raise NotFound('Cursor inválido')
+
+    def get_next_link(self):
+        if not getattr(self, 'keyset', False):
+            return super().get_next_link()
+        if self.siguiente is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.siguiente)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'keyset', False):
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,248 @@
+"""
+Perfilado de consultas - Arte Ideas
+
+Registra las consultas SQL ejecutadas dentro de un bloque (una request, un
+test): cantidad, tiempo total en base de datos, consultas con la misma forma
+repetidas (firma típica de un N+1) y el punto del código del proyecto que
+las lanzó.
+
+- `PerfilConsultas`: context manager que instala un execute_wrapper en
+  todas las conexiones.
+- `registrar_muestra` / `resumen_endpoints`: resumen en memoria del proceso
+  con las últimas QUERY_PROFILER_WINDOW muestras por endpoint.
+- `PerfilConsultasTestMixin`: asserts para tests de Django.
+
+El middleware (apps/core/middleware.py) solo se activa con
+QUERY_PROFILER_ENABLED.
+"""
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+_APPS_DIR = str(Path(__file__).resolve().parent.parent)
+_BASE_DIR = str(Path(_APPS_DIR).parent)
+# Archivos del perfilador, que envuelven las consultas pero no las lanzan
+_ARCHIVOS_PERFILADOR = {
+    str(Path(__file__).resolve().with_name(nombre)) for nombre in ('perfilado.py', 'middleware.py')
+}
+
+_RE_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+_RE_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_RE_ESPACIOS = re.compile(r'\s+')
+
+
+def get_umbral_n1():
+    """Repeticiones de una misma forma de SQL a partir de las cuales se reporta"""
+    return getattr(settings, 'QUERY_PROFILER_N1_THRESHOLD', 3)
+
+
+def get_ventana():
+    """Muestras que se conservan por endpoint"""
+    return getattr(settings, 'QUERY_PROFILER_WINDOW', 100)
+
+
+def forma_sql(sql):
+    """SQL sin valores: listas IN y literales reemplazados, espacios normalizados"""
+    sql = _RE_LISTA_IN.sub('IN (...)', sql)
+    sql = _RE_LITERALES.sub('?', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+def origen_consulta():
+    """
+    'archivo.py:línea en función' del primer frame del proyecto fuera del perfilador
+
+    Los frames de tests solo se usan si no hay otro (la consulta la lanzó el test).
+    """
+    frame = sys._getframe(2)
+    desde_test = None
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(_APPS_DIR) and archivo not in _ARCHIVOS_PERFILADOR:
+            relativo = archivo[len(_BASE_DIR):].lstrip('/\\')
+            origen = f'{relativo}:{frame.f_lineno} en {frame.f_code.co_name}'
+            if not Path(archivo).name.startswith('test'):
+                return origen
+            desde_test = desde_test or origen
+        frame = frame.f_back
+    return desde_test
+
+
+class PerfilConsultas:
+    """
+    Consultas ejecutadas dentro del bloque `with`
+
+    Cada consulta se guarda como (forma, duración en segundos, origen).
+    """
+
+    def __init__(self, umbral_n1=None):
+        self.umbral_n1 = umbral_n1 or get_umbral_n1()
+        self.consultas = []
+        self.inicio = self.fin = None
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._registrar))
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fin = time.perf_counter()
+        self._stack.close()
+        return False
+
+    def _registrar(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((forma_sql(sql), time.perf_counter() - inicio, origen_consulta()))
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tiempo_db_ms(self):
+        return sum(duracion for _, duracion, _ in self.consultas) * 1000
+
+    @property
+    def tiempo_total_ms(self):
+        fin = self.fin or time.perf_counter()
+        return (fin - self.inicio) * 1000 if self.inicio else 0
+
+    def duplicadas(self, umbral=None):
+        """
+        Formas de SQL repetidas al menos `umbral` veces, de la más repetida a la menos
+
+        Cada elemento: {'sql', 'veces', 'tiempo_ms', 'origenes'}.
+        """
+        umbral = umbral or self.umbral_n1
+        conteo = Counter(forma for forma, _, _ in self.consultas)
+        resultado = []
+        for forma, veces in conteo.most_common():
+            if veces < umbral:
+                break
+            tiempos = [duracion for f, duracion, _ in self.consultas if f == forma]
+            origenes = Counter(origen for f, _, origen in self.consultas if f == forma and origen)
+            resultado.append({
+                'sql': forma,
+                'veces': veces,
+                'tiempo_ms': round(sum(tiempos) * 1000, 2),
+                'origenes': [origen for origen, _ in origenes.most_common(3)],
+            })
+        return resultado
+
+    def server_timing(self):
+        """Valor de la cabecera Server-Timing"""
+        return ', '.join([
+            f'db;dur={self.tiempo_db_ms:.2f};desc="{self.total} consultas"',
+            f'n1;desc="{len(self.duplicadas())} consultas repetidas"',
+            f'total;dur={self.tiempo_total_ms:.2f}',
+        ])
+
+    def resumen(self):
+        return {
+            'consultas': self.total,
+            'tiempo_db_ms': round(self.tiempo_db_ms, 2),
+            'tiempo_total_ms': round(self.tiempo_total_ms, 2),
+            'duplicadas': self.duplicadas(),
+        }
+
+
+# Resumen por endpoint ('GET api/crm/...') con las últimas muestras
+_lock = threading.Lock()
+_muestras = {}
+
+
+def registrar_muestra(endpoint, perfil):
+    """Agregar el perfil de una request al resumen del endpoint"""
+    muestra = perfil.resumen()
+    with _lock:
+        muestras = _muestras.get(endpoint)
+        if muestras is None or muestras.maxlen != get_ventana():
+            muestras = _muestras[endpoint] = deque(muestras or (), maxlen=get_ventana())
+        muestras.append(muestra)
+
+
+def resumen_endpoints():
+    """
+    Resumen por endpoint, ordenado por consultas promedio (mayor primero)
+
+    Incluye las consultas repetidas de la muestra con más consultas de la ventana.
+    """
+    with _lock:
+        copia = {endpoint: list(muestras) for endpoint, muestras in _muestras.items()}
+
+    resumen = []
+    for endpoint, muestras in copia.items():
+        peor = max(muestras, key=lambda muestra: muestra['consultas'])
+        cantidad = len(muestras)
+        resumen.append({
+            'endpoint': endpoint,
+            'muestras': cantidad,
+            'consultas_promedio': round(sum(m['consultas'] for m in muestras) / cantidad, 1),
+            'consultas_max': peor['consultas'],
+            'tiempo_db_ms_promedio': round(sum(m['tiempo_db_ms'] for m in muestras) / cantidad, 2),
+            'tiempo_db_ms_max': max(m['tiempo_db_ms'] for m in muestras),
+            'tiempo_total_ms_promedio': round(sum(m['tiempo_total_ms'] for m in muestras) / cantidad, 2),
+            'duplicadas': peor['duplicadas'],
+        })
+    resumen.sort(key=lambda fila: fila['consultas_promedio'], reverse=True)
+    return resumen
+
+
+def limpiar_resumen():
+    """Descartar todas las muestras"""
+    with _lock:
+        _muestras.clear()
+
+
+class PerfilConsultasTestMixin:
+    """
+    Asserts de consultas para TestCase/APITestCase
+
+        with self.assertSinConsultasRepetidas():
+            self.client.get(url)
+
+    Al fallar muestra cada forma de SQL repetida con sus veces y su origen.
+    """
+
+    def perfilar(self, umbral_n1=None):
+        return PerfilConsultas(umbral_n1=umbral_n1)
+
+    def assertSinConsultasRepetidas(self, umbral=None, max_consultas=None):
+        return _AssertPerfil(self, umbral, max_consultas)
+
+
+class _AssertPerfil(PerfilConsultas):
+
+    def __init__(self, test_case, umbral, max_consultas):
+        super().__init__(umbral_n1=umbral)
+        self.test_case = test_case
+        self.max_consultas = max_consultas
+
+    def __exit__(self, exc_type, *exc_info):
+        super().__exit__(exc_type, *exc_info)
+        if exc_type is not None:
+            return False
+
+        duplicadas = self.duplicadas()
+        if duplicadas:
+            detalle = '\n'.join(
+                f"  {d['veces']}x {d['sql'][:200]}\n     desde {', '.join(d['origenes']) or '?'}"
+                for d in duplicadas
+            )
+            self.test_case.fail(f'{len(duplicadas)} consultas repetidas (posible N+1):\n{detalle}')
+        if self.max_consultas is not None and self.total > self.max_consultas:
+            self.test_case.fail(f'{self.total} consultas ejecutadas, máximo {self.max_consultas}')
+        return False
@@ -0,0 +1,74 @@
+"""
+Numeración de documentos por tenant - Arte Ideas
+
+Asigna números consecutivos por (tenant, serie) con la tabla DocumentSequence.
+El contador se incrementa con un UPDATE atómico `last_value = last_value + n`,
+que bloquea la fila hasta el fin de la transacción: dos reservas simultáneas
+nunca reciben el mismo número y, si la transacción que usa los números se
+revierte, el contador vuelve atrás con ella (sin huecos). Por eso las
+reservas deben hacerse dentro de la transacción que guarda los documentos.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+def reservar_numeros(tenant, serie, cantidad=1, semilla=None):
+    """
+    Reservar `cantidad` números consecutivos de la serie y devolverlos como range
+
+    semilla: función que devuelve el último número ya usado cuando la serie
+    todavía no existe (p. ej. para continuar la numeración de datos previos).
+    """
+    from apps.core.models import DocumentSequence
+
+    if cantidad < 1:
+        return range(0)
+
+    secuencias = DocumentSequence.objects.filter(tenant=tenant, series=serie)
+    with transaction.atomic():
+        actualizadas = secuencias.update(last_value=F('last_value') + cantidad, updated_at=timezone.now())
+        if not actualizadas:
+            inicial = semilla() if semilla else 0
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(tenant=tenant, series=serie, last_value=inicial + cantidad)
+                return range(inicial + 1, inicial + cantidad + 1)
+            except IntegrityError:
+                # Otra transacción creó la serie al mismo tiempo
+                secuencias.update(last_value=F('last_value') + cantidad, updated_at=timezone.now())
+
+        ultimo = secuencias.values_list('last_value', flat=True).get()
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+def ultimo_sufijo(queryset, campo, prefijo):
+    """
+    Mayor sufijo numérico de los valores de `campo` que empiezan con `prefijo`
+
+    Se usa como semilla la primera vez que se reserva una serie, para
+    continuar la numeración de los documentos creados antes de la tabla.
+    """
+    ultimo = 0
+    for valor in queryset.filter(**{f'{campo}__startswith': prefijo}).values_list(campo, flat=True):
+        try:
+            ultimo = max(ultimo, int(valor[len(prefijo):]))
+        except ValueError:
+            continue
+    return ultimo
+
+
+def reservar_codigos(tenant, prefijo, queryset, campo, cantidad=1, anio=None, digitos=4):
+    """
+    Reservar códigos con formato PREFIJO-AAAA-NNNN (serie por prefijo y año)
+
+    queryset/campo identifican los documentos existentes del tenant para
+    sembrar la serie la primera vez.
+    """
+    anio = anio or timezone.localdate().year
+    serie = f'{prefijo}-{anio}'
+    numeros = reservar_numeros(
+        tenant, serie, cantidad,
+        semilla=lambda: ultimo_sufijo(queryset, campo, f'{serie}-')
+    )
+    return [f'{serie}-{numero:0{digitos}d}' for numero in numeros]
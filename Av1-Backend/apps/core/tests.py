@@ -3,12 +3,15 @@ Tests del Core App - Arte Ideas
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import Tenant, UserProfile, RolePermission
+from .agregaciones import histograma_choices, histograma_por_valor
+from .perfilado import PerfilConsultas, PerfilConsultasTestMixin, forma_sql, limpiar_resumen
 
 User = get_user_model()
 
@@ -570,4 +573,127 @@ class HU01RoleAPITest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['role'], 'produccion')
-        self.assertEqual(response.data['role_display'], 'Producción')
\ No newline at end of file
+        self.assertEqual(response.data['role_display'], 'Producción')
+
+
+class HistogramaChoicesTest(TestCase):
+    """Tests para el histograma por campo con choices"""
+    
+    def crear_tenant(self, slug, location_type):
+        return Tenant.objects.create(
+            name=f"Studio {slug}",
+            slug=slug,
+            business_name="Test Business",
+            business_address="Test Address",
+            business_phone="123456789",
+            business_email=f"{slug}@test.com",
+            business_ruc="12345678901",
+            location_type=location_type
+        )
+    
+    def test_una_consulta_con_ceros(self):
+        """Test conteo agrupado en una consulta con las opciones vacías en cero"""
+        self.crear_tenant('a', 'lima')
+        self.crear_tenant('b', 'lima')
+        
+        with self.assertNumQueries(1):
+            histograma = histograma_choices(Tenant.objects.all(), 'location_type')
+        
+        self.assertEqual(histograma, [
+            {'valor': 'lima', 'nombre': 'Lima - Acceso Completo', 'count': 2},
+            {'valor': 'provincia', 'nombre': 'Provincia - Acceso Limitado', 'count': 0},
+        ])
+    
+    def test_valores_fuera_de_choices_y_sumas(self):
+        """Test valores guardados fuera de los choices y sumas por grupo"""
+        self.crear_tenant('a', 'lima')
+        Tenant.objects.filter(slug='a').update(location_type='otro')
+        self.crear_tenant('b', 'provincia')
+        
+        histograma = histograma_por_valor(Tenant.objects.all(), 'location_type', {'suma_ids': 'id'})
+        
+        self.assertEqual(list(histograma), ['lima', 'provincia', 'otro'])
+        self.assertEqual(histograma['lima']['suma_ids'], 0)
+        self.assertEqual(histograma['otro']['count'], 1)
+        self.assertEqual(histograma['otro']['nombre'], 'otro')
+
+
+
+class QueryProfilerTest(PerfilConsultasTestMixin, APITestCase):
+    """Tests del perfilado de consultas y su middleware"""
+    
+    def setUp(self):
+        limpiar_resumen()
+        self.superadmin = User.objects.create_user(
+            username="perfilador",
+            email="perfilador@test.com",
+            password="testpass123",
+            role="super_admin"
+        )
+        for slug in ['a', 'b', 'c']:
+            Tenant.objects.create(
+                name=f"Estudio {slug}",
+                slug=f"perfil-{slug}",
+                business_name="Test Business",
+                business_address="Test Address",
+                business_phone="123456789",
+                business_email=f"{slug}@test.com",
+                business_ruc="12345678901"
+            )
+    
+    def test_forma_sql(self):
+        """Test forma de la consulta sin valores"""
+        self.assertEqual(
+            forma_sql('SELECT *  FROM "t"\nWHERE "t"."id" IN (%s, %s, %s) AND "t"."x" = \'a\' LIMIT 21'),
+            'SELECT * FROM "t" WHERE "t"."id" IN (...) AND "t"."x" = ? LIMIT ?'
+        )
+    
+    def test_detecta_consultas_repetidas_con_origen(self):
+        """Test N+1: misma forma de SQL repetida y el punto del código que la lanza"""
+        with PerfilConsultas() as perfil:
+            for tenant_id in Tenant.objects.values_list('id', flat=True):
+                Tenant.objects.get(pk=tenant_id)
+        
+        self.assertEqual(perfil.total, 4)
+        duplicadas = perfil.duplicadas()
+        self.assertEqual(len(duplicadas), 1)
+        self.assertEqual(duplicadas[0]['veces'], 3)
+        self.assertIn('apps/core/tests.py', duplicadas[0]['origenes'][0])
+        
+        with self.assertRaises(AssertionError):
+            with self.assertSinConsultasRepetidas():
+                for tenant in Tenant.objects.all():
+                    Tenant.objects.filter(pk=tenant.pk).exists()
+    
+    def test_middleware_desactivado_por_defecto(self):
+        """Test sin QUERY_PROFILER_ENABLED no hay cabecera"""
+        response = self.client.get('/api/core/health/')
+        self.assertNotIn('Server-Timing', response)
+    
+    @override_settings(QUERY_PROFILER_ENABLED=True)
+    def test_server_timing_y_resumen_por_endpoint(self):
+        """Test cabecera Server-Timing y resumen por endpoint en /api/core/profiler/"""
+        self.client.force_authenticate(user=self.superadmin)
+        response = self.client.get('/api/core/users/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('consultas', response['Server-Timing'])
+        
+        response = self.client.get('/api/core/profiler/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['enabled'])
+        endpoints = {fila['endpoint']: fila for fila in response.data['endpoints']}
+        self.assertIn('GET /api/core/users/profile/', endpoints)
+        self.assertEqual(endpoints['GET /api/core/users/profile/']['muestras'], 1)
+        
+        response = self.client.delete('/api/core/profiler/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_resumen_solo_super_admin(self):
+        """Test el resumen del perfilado es solo para super admin"""
+        user = User.objects.create_user(
+            username="admin-perfil", email="admin-perfil@test.com", password="testpass123", role="admin"
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/core/profiler/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
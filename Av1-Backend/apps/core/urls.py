@@ -4,7 +4,7 @@ Estructura modular reorganizada según buenas prácticas
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CoreHealthCheckView
+from .views import CoreHealthCheckView, QueryProfilerView
 
 app_name = 'core'
 
@@ -18,6 +18,9 @@ urlpatterns = [
     # Health Check
     path('health/', CoreHealthCheckView.as_view(), name='health_check'),
     
+    # Perfilado de consultas por endpoint
+    path('profiler/', QueryProfilerView.as_view(), name='query_profiler'),
+    
     # Módulo de Autenticación (login, logout, permisos)
     path('auth/', include('apps.core.autenticacion.urls')),
     
@@ -26,4 +29,7 @@ urlpatterns = [
     
     # Módulo de Configuración del Sistema (administración, usuarios, negocio)
     path('config/', include('apps.core.configuracion_sistema.urls')),
+    
+    # Búsqueda de clientes, pedidos y contratos
+    path('busqueda/', include('apps.core.busqueda.urls')),
 ]
\ No newline at end of file
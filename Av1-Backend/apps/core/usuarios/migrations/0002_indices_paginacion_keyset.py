@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='usuarios_us_user_id_bf6ae9_idx'),
+        ),
+    ]
@@ -77,6 +77,9 @@ class UserActivity(models.Model):
         verbose_name = 'Actividad de Usuario'
         verbose_name_plural = 'Actividades de Usuario'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.action} - {self.created_at}"
\ No newline at end of file
@@ -6,6 +6,8 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+
+from apps.core.paginacion import PaginacionKeyset
 from .models import UserActivity
 import random
 
@@ -91,16 +93,26 @@ class ProfileCompletionView(APIView):
 
 
 class ProfileActivityView(APIView):
-    """Vista para actividad reciente del usuario"""
+    """
+    Vista para actividad reciente del usuario
+    
+    Sin parámetros devuelve las últimas 10 actividades; con ?paginacion=cursor
+    (y luego ?cursor=) recorre todo el historial por páginas keyset.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ['-created_at']
     
     def get(self, request):
         """Obtener actividad reciente del usuario"""
-        activities = UserActivity.objects.filter(
-            user=request.user
-        ).order_by('-created_at')[:10]
+        activities = UserActivity.objects.filter(user=request.user)
+        
+        if PaginacionKeyset.solicita_keyset(request):
+            paginator = PaginacionKeyset()
+            page = paginator.paginate_queryset(activities, request, view=self)
+            serializer = UserActivitySerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         
-        serializer = UserActivitySerializer(activities, many=True)
+        serializer = UserActivitySerializer(activities.order_by('-created_at')[:10], many=True)
         return Response(serializer.data)
 
 
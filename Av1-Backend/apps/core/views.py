@@ -4,7 +4,10 @@ Solo contiene vistas compartidas entre módulos
 """
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import permissions
+from rest_framework import permissions, status
+from django.conf import settings
+
+from .perfilado import get_ventana, limpiar_resumen, resumen_endpoints
 
 
 class CoreHealthCheckView(APIView):
@@ -23,4 +26,33 @@ class CoreHealthCheckView(APIView):
                 'multitenancy': 'Multi-tenancy - Gestión de tenants y configuraciones específicas'
             },
             'architecture': 'Modular - Separación clara de responsabilidades'
-        })
\ No newline at end of file
+        })
+
+
+class QueryProfilerView(APIView):
+    """
+    Resumen del perfilado de consultas por endpoint (solo super admin)
+
+    Los datos son del proceso que atiende la request y se llenan solo con
+    QUERY_PROFILER_ENABLED activo (ver apps/core/middleware.py).
+    """
+    
+    def get(self, request):
+        if request.user.role != 'super_admin':
+            return Response({'error': 'Sin permisos para ver el perfilado'},
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        return Response({
+            'enabled': getattr(settings, 'QUERY_PROFILER_ENABLED', False),
+            'window': get_ventana(),
+            'endpoints': resumen_endpoints(),
+        })
+    
+    def delete(self, request):
+        """Descartar las muestras acumuladas"""
+        if request.user.role != 'super_admin':
+            return Response({'error': 'Sin permisos para modificar el perfilado'},
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        limpiar_resumen()
+        return Response(status=status.HTTP_204_NO_CONTENT)
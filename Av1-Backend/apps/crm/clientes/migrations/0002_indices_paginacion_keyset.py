@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['tenant', 'apellidos', 'nombres', 'id'], name='clientes_cl_tenant__460f14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialcliente',
+            index=models.Index(fields=['fecha', 'id'], name='clientes_hi_fecha_481099_idx'),
+        ),
+    ]
@@ -3,11 +3,32 @@ Modelos de Clientes - Arte Ideas CRM
 Gestión de clientes: particulares, colegios y empresas
 """
 from django.db import models
+from django.db.models import Count, Sum, Max, DecimalField
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from decimal import Decimal
 from apps.core.models import Tenant
 
 
+class ClienteQuerySet(models.QuerySet):
+    """QuerySet de clientes con totales de pedidos calculados en la base de datos"""
+
+    def con_estadisticas_pedidos(self):
+        """
+        Anotar por cliente, en una sola consulta agrupada:
+        total_pedidos, valor_total (ventas acumuladas), ultimo_pedido (fecha)
+        y saldo_pendiente (suma de saldos de sus pedidos)
+        """
+        monto = DecimalField(max_digits=12, decimal_places=2)
+        return self.annotate(
+            total_pedidos=Count('pedidos'),
+            valor_total=Coalesce(Sum('pedidos__total'), Decimal('0.00'), output_field=monto),
+            ultimo_pedido=Max('pedidos__order_date'),
+            saldo_pendiente=Coalesce(Sum('pedidos__balance'), Decimal('0.00'), output_field=monto),
+        )
+
+
 class Cliente(models.Model):
     """
     Modelo para clientes del estudio fotográfico
@@ -61,11 +82,17 @@ class Cliente(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
     
+    objects = ClienteQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
         ordering = ['apellidos', 'nombres']
         unique_together = ['tenant', 'dni']
+        indexes = [
+            # Listado por tenant en el orden por defecto (paginación keyset)
+            models.Index(fields=['tenant', 'apellidos', 'nombres', 'id']),
+        ]
     
     def __str__(self):
         if self.tipo_cliente == 'empresa' and self.razon_social:
@@ -127,6 +154,9 @@ class HistorialCliente(models.Model):
         verbose_name = 'Historial de Cliente'
         verbose_name_plural = 'Historiales de Cliente'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.cliente.obtener_nombre_completo()} - {self.get_tipo_interaccion_display()} - {self.fecha}"
@@ -38,12 +38,18 @@ class ClienteListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listado de clientes"""
     nombre_completo = serializers.ReadOnlyField(source='obtener_nombre_completo')
     tipo_cliente_display = serializers.ReadOnlyField(source='get_tipo_cliente_display')
+    # Anotados por Cliente.objects.con_estadisticas_pedidos()
+    total_pedidos = serializers.IntegerField(read_only=True)
+    valor_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    ultimo_pedido = serializers.DateField(read_only=True)
+    saldo_pendiente = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
     class Meta:
         model = Cliente
         fields = [
             'id', 'nombre_completo', 'tipo_cliente', 'tipo_cliente_display',
-            'email', 'telefono', 'dni', 'razon_social', 'activo', 'creado_en'
+            'email', 'telefono', 'dni', 'razon_social', 'activo', 'creado_en',
+            'total_pedidos', 'valor_total', 'ultimo_pedido', 'saldo_pendiente'
         ]
 
 
@@ -72,5 +78,8 @@ class ClienteEstadisticasSerializer(serializers.Serializer):
     total_clientes = serializers.IntegerField()
     clientes_activos = serializers.IntegerField()
     clientes_inactivos = serializers.IntegerField()
+    nuevos_este_mes = serializers.IntegerField()
     por_tipo = serializers.DictField()
-    colegios_por_nivel = serializers.DictField()
\ No newline at end of file
+    colegios_por_nivel = serializers.DictField()
+    colegios_por_grado = serializers.DictField()
+    colegios_por_seccion = serializers.DictField()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Servicios del Módulo de Clientes - Arte Ideas CRM
+"""
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Cliente
+
+
+class ClienteEstadisticasService:
+    """
+    Estadísticas de clientes a partir de una sola consulta agrupada
+
+    Agrupa por (tipo_cliente, activo, nivel_educativo, grado, seccion), con el
+    conteo total y el de clientes creados este mes, y arma todos los
+    desgloses en Python sobre esas pocas filas.
+    """
+    CAMPOS_GRUPO = ['tipo_cliente', 'activo', 'nivel_educativo', 'grado', 'seccion']
+
+    # Widget de la caché de snapshots (invalidado al guardar/eliminar clientes)
+    WIDGET_CACHE = 'crm_clientes_estadisticas'
+
+    def __init__(self, queryset, hoy=None):
+        self.queryset = queryset
+        self.hoy = hoy or timezone.now().date()
+
+    def get_filas(self):
+        inicio_mes = self.hoy.replace(day=1)
+        return self.queryset.order_by().values(*self.CAMPOS_GRUPO).annotate(
+            total=Count('id'),
+            nuevos=Count('id', filter=Q(creado_en__date__gte=inicio_mes)),
+        )
+
+    def calcular(self):
+        """Diccionario con el formato de ClienteEstadisticasSerializer"""
+        tipos = {valor: 0 for valor, _ in Cliente.TIPO_CLIENTE_CHOICES}
+        niveles = {valor: 0 for valor, _ in Cliente._meta.get_field('nivel_educativo').flatchoices}
+        grados = {}
+        secciones = {}
+        total = activos = nuevos = 0
+
+        for fila in self.get_filas():
+            total += fila['total']
+            nuevos += fila['nuevos']
+            if fila['activo']:
+                activos += fila['total']
+            tipos[fila['tipo_cliente']] = tipos.get(fila['tipo_cliente'], 0) + fila['total']
+
+            if fila['tipo_cliente'] != 'colegio':
+                continue
+            if fila['nivel_educativo']:
+                niveles[fila['nivel_educativo']] = niveles.get(fila['nivel_educativo'], 0) + fila['total']
+            if fila['grado']:
+                grados[fila['grado']] = grados.get(fila['grado'], 0) + fila['total']
+            if fila['seccion']:
+                secciones[fila['seccion']] = secciones.get(fila['seccion'], 0) + fila['total']
+
+        return {
+            'total_clientes': total,
+            'clientes_activos': activos,
+            'clientes_inactivos': total - activos,
+            'nuevos_este_mes': nuevos,
+            'por_tipo': {
+                'particulares': tipos.get('particular', 0),
+                'empresas': tipos.get('empresa', 0),
+                'colegios': tipos.get('colegio', 0)
+            },
+            'colegios_por_nivel': niveles,
+            'colegios_por_grado': dict(sorted(grados.items())),
+            'colegios_por_seccion': dict(sorted(secciones.items())),
+        }
+
+    def obtener(self, tenant_id=None, usar_cache=False):
+        """
+        Estadísticas calculadas o servidas desde la caché de snapshots
+
+        En modo caché el resultado se reutiliza hasta que un cliente del
+        tenant se guarda o elimina (ver apps/analytics/dashboard/cache.py).
+        """
+        if not usar_cache:
+            return self.calcular()
+
+        from apps.analytics.dashboard.cache import obtener_snapshot
+        return obtener_snapshot(tenant_id, self.WIDGET_CACHE, self.calcular)
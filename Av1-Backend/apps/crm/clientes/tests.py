@@ -3,6 +3,9 @@ Tests del Módulo de Clientes - Arte Ideas CRM
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 from rest_framework.test import APITestCase
 from rest_framework import status
 from apps.core.models import Tenant
@@ -236,4 +239,156 @@ class ClienteAPITestCase(APITestCase):
         
         response = self.client.get('/api/crm/clientes/clientes/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_list_clientes_paginacion_keyset(self):
+        """Test el modo cursor recorre todo el listado sin OFFSET ni COUNT, con desempate por id"""
+        for i in range(15):
+            Cliente.objects.create(
+                tenant=self.tenant,
+                tipo_cliente='particular',
+                nombres='Ana' if i % 2 else 'Luis',
+                apellidos=['Díaz', 'Gómez', 'Pérez'][i % 3],
+                email=f'cliente{i}@example.com',
+                telefono='987654321',
+                dni=f'2000{i:04d}',
+                direccion='Av. Test 123'
+            )
+        esperados = list(Cliente.objects.order_by('apellidos', 'nombres', 'id').values_list('id', flat=True))
+        
+        vistos = []
+        response = self.client.get('/api/crm/clientes/clientes/', {'paginacion': 'cursor', 'page_size': 4})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            vistos += [cliente['id'] for cliente in response.data['results']]
+            if response.data['next'] is None:
+                break
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+        
+        self.assertEqual(vistos, esperados)
+        
+        response = self.client.get('/api/crm/clientes/clientes/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        # Sin el parámetro se mantiene la paginación por número de página
+        response = self.client.get('/api/crm/clientes/clientes/')
+        self.assertEqual(response.data['count'], 15)
+    
+    def test_list_clientes_con_totales_de_pedidos(self):
+        """Test del listado con totales de pedidos anotados en una sola consulta"""
+        from apps.commerce.pedidos.models import Order
+        
+        cliente = Cliente.objects.create(
+            tenant=self.tenant,
+            tipo_cliente='particular',
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@example.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Av. Test 123'
+        )
+        Cliente.objects.create(
+            tenant=self.tenant,
+            tipo_cliente='particular',
+            nombres='Ana',
+            apellidos='Díaz',
+            email='ana@example.com',
+            telefono='987654322',
+            dni='87654321',
+            direccion='Av. Test 456'
+        )
+        hoy = timezone.now().date()
+        for i, fecha in enumerate([hoy - timedelta(days=10), hoy]):
+            Order.objects.create(
+                tenant=self.tenant,
+                order_number=f'ORD-{i}',
+                cliente=cliente,
+                document_type='proforma',
+                client_type='particular',
+                order_date=fecha,
+                start_date=hoy,
+                delivery_date=hoy + timedelta(days=7)
+            )
+        Order.objects.filter(cliente=cliente).update(total=Decimal('150.00'), balance=Decimal('50.00'))
+        
+        with self.assertNumQueries(1):
+            clientes = {c.dni: c for c in Cliente.objects.filter(tenant=self.tenant).con_estadisticas_pedidos()}
+        
+        self.assertEqual(clientes['12345678'].total_pedidos, 2)
+        self.assertEqual(clientes['12345678'].valor_total, Decimal('300.00'))
+        self.assertEqual(clientes['12345678'].ultimo_pedido, hoy)
+        self.assertEqual(clientes['12345678'].saldo_pendiente, Decimal('100.00'))
+        self.assertEqual(clientes['87654321'].total_pedidos, 0)
+        self.assertEqual(clientes['87654321'].valor_total, Decimal('0.00'))
+        self.assertIsNone(clientes['87654321'].ultimo_pedido)
+        
+        response = self.client.get('/api/crm/clientes/clientes/', {'ordering': '-valor_total'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        primero = response.data['results'][0]
+        self.assertEqual(primero['dni'], '12345678')
+        self.assertEqual(primero['total_pedidos'], 2)
+        self.assertEqual(primero['valor_total'], '300.00')
+        self.assertEqual(primero['ultimo_pedido'], hoy.isoformat())
+    
+    def crear_colegio(self, dni, nivel, grado, seccion, activo=True):
+        return Cliente.objects.create(
+            tenant=self.tenant,
+            tipo_cliente='colegio',
+            nombres='Colegio',
+            apellidos=dni,
+            email='colegio@example.com',
+            telefono='987654321',
+            dni=dni,
+            direccion='Av. Test 123',
+            nivel_educativo=nivel,
+            grado=grado,
+            seccion=seccion,
+            activo=activo
+        )
+    
+    def test_estadisticas_en_una_consulta(self):
+        """Test estadísticas y desgloses de colegios con una consulta agrupada"""
+        self.crear_colegio('10000001', 'primaria', '1ro', 'A')
+        self.crear_colegio('10000002', 'primaria', '1ro', 'B')
+        self.crear_colegio('10000003', 'secundaria', '5to', 'A', activo=False)
+        Cliente.objects.create(
+            tenant=self.tenant,
+            tipo_cliente='particular',
+            nombres='Juan',
+            apellidos='Pérez',
+            email='juan@example.com',
+            telefono='987654321',
+            dni='12345678',
+            direccion='Av. Test 123'
+        )
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/crm/clientes/clientes/estadisticas/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_clientes'], 4)
+        self.assertEqual(response.data['clientes_activos'], 3)
+        self.assertEqual(response.data['clientes_inactivos'], 1)
+        self.assertEqual(response.data['nuevos_este_mes'], 4)
+        self.assertEqual(response.data['por_tipo'], {'particulares': 1, 'empresas': 0, 'colegios': 3})
+        self.assertEqual(response.data['colegios_por_nivel'], {'inicial': 0, 'primaria': 2, 'secundaria': 1})
+        self.assertEqual(response.data['colegios_por_grado'], {'1ro': 2, '5to': 1})
+        self.assertEqual(response.data['colegios_por_seccion'], {'A': 2, 'B': 1})
+    
+    def test_estadisticas_modo_cache(self):
+        """Test el modo caché reutiliza el resultado hasta que cambia un cliente"""
+        from apps.analytics.dashboard.cache import get_cache
+        get_cache().clear()
+        self.crear_colegio('10000001', 'inicial', '3 años', 'A')
+        
+        self.client.get('/api/crm/clientes/clientes/estadisticas/', {'cache': 'true'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/crm/clientes/clientes/estadisticas/', {'cache': 'true'})
+        self.assertEqual(response.data['total_clientes'], 1)
+        
+        self.crear_colegio('10000002', 'inicial', '3 años', 'B')
+        response = self.client.get('/api/crm/clientes/clientes/estadisticas/', {'cache': 'true'})
+        self.assertEqual(response.data['total_clientes'], 2)
@@ -9,11 +9,14 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Count, Q
 
+from apps.core.busqueda.filters import BusquedaIndexadaFilter
+from apps.core.paginacion import PaginacionKeyset
 from .models import Cliente, HistorialCliente, ContactoCliente
 from .serializers import (
     ClienteSerializer, ClienteListSerializer, HistorialClienteSerializer,
     ContactoClienteSerializer, ClienteEstadisticasSerializer
 )
+from .services import ClienteEstadisticasService
 
 
 class ClienteViewSet(viewsets.ModelViewSet):
@@ -21,11 +24,16 @@ class ClienteViewSet(viewsets.ModelViewSet):
     ViewSet para gestión completa de clientes
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter, OrderingFilter]
     filterset_fields = ['tipo_cliente', 'activo', 'nivel_educativo']
-    search_fields = ['nombres', 'apellidos', 'email', 'telefono', 'dni', 'razon_social']
-    ordering_fields = ['nombres', 'apellidos', 'creado_en']
+    # ?search= sobre el índice: nombres, razón social, DNI, email y teléfono
+    busqueda_entidad = 'cliente'
+    ordering_fields = [
+        'nombres', 'apellidos', 'creado_en',
+        'total_pedidos', 'valor_total', 'ultimo_pedido', 'saldo_pendiente'
+    ]
     ordering = ['apellidos', 'nombres']
+    pagination_class = PaginacionKeyset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -35,8 +43,14 @@ class ClienteViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar clientes por tenant del usuario"""
         if self.request.user.is_superuser:
-            return Cliente.objects.all()
-        return Cliente.objects.filter(tenant=self.request.user.tenant)
+            queryset = Cliente.objects.all()
+        else:
+            queryset = Cliente.objects.filter(tenant=self.request.user.tenant)
+        
+        if self.action in ['list', 'recientes']:
+            # Totales de pedidos en la misma consulta del listado
+            queryset = queryset.con_estadisticas_pedidos()
+        return queryset
 
     def perform_create(self, serializer):
         """Asignar tenant automáticamente al crear"""
@@ -44,35 +58,14 @@ class ClienteViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
-        """Obtener estadísticas de clientes"""
-        queryset = self.get_queryset()
-        
-        total_clientes = queryset.count()
-        clientes_activos = queryset.filter(activo=True).count()
-        clientes_particulares = queryset.filter(tipo_cliente='particular').count()
-        clientes_empresas = queryset.filter(tipo_cliente='empresa').count()
-        clientes_colegios = queryset.filter(tipo_cliente='colegio').count()
-        
-        # Clientes por nivel educativo (solo colegios)
-        colegios_inicial = queryset.filter(tipo_cliente='colegio', nivel_educativo='inicial').count()
-        colegios_primaria = queryset.filter(tipo_cliente='colegio', nivel_educativo='primaria').count()
-        colegios_secundaria = queryset.filter(tipo_cliente='colegio', nivel_educativo='secundaria').count()
+        """
+        Obtener estadísticas de clientes (una sola consulta agrupada)
+        Parámetros: cache=true para servir el resultado desde la caché de snapshots
+        """
+        usar_cache = request.query_params.get('cache', '').lower() in ('1', 'true', 'si')
+        tenant_id = None if request.user.is_superuser else request.user.tenant_id
         
-        data = {
-            'total_clientes': total_clientes,
-            'clientes_activos': clientes_activos,
-            'clientes_inactivos': total_clientes - clientes_activos,
-            'por_tipo': {
-                'particulares': clientes_particulares,
-                'empresas': clientes_empresas,
-                'colegios': clientes_colegios
-            },
-            'colegios_por_nivel': {
-                'inicial': colegios_inicial,
-                'primaria': colegios_primaria,
-                'secundaria': colegios_secundaria
-            }
-        }
+        data = ClienteEstadisticasService(self.get_queryset()).obtener(tenant_id, usar_cache=usar_cache)
         
         serializer = ClienteEstadisticasSerializer(data)
         return Response(serializer.data)
@@ -154,6 +147,7 @@ class HistorialClienteViewSet(viewsets.ModelViewSet):
     filterset_fields = ['tipo_interaccion', 'cliente']
     search_fields = ['descripcion', 'resultado', 'cliente__nombres', 'cliente__apellidos']
     ordering = ['-fecha']
+    pagination_class = PaginacionKeyset
 
     def get_queryset(self):
         """Filtrar historial por tenant del usuario"""
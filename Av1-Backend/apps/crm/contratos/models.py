@@ -2,7 +2,7 @@
 Modelos de Contratos - Arte Ideas CRM
 Gestión de contratos de servicios fotográficos
 """
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from apps.core.models import Tenant
@@ -96,8 +96,14 @@ class Contrato(models.Model):
         else:
             self.saldo_pendiente = self.monto_total or 0
         
-        self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Asignar el siguiente CT-YYYY-NNNN del tenant si no se indicó número
+            if not self.numero_contrato and self.tenant_id:
+                from .services import ContractDocumentService
+                self.numero_contrato = ContractDocumentService.generate_contract_number(self.tenant)
+            
+            self.full_clean()
+            super().save(*args, **kwargs)
     
     @property
     def porcentaje_adelanto(self):
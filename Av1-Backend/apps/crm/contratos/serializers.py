@@ -16,6 +16,10 @@ class ContratoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contrato
         fields = '__all__'
+        extra_kwargs = {
+            # Si no se envía se asigna el siguiente CT-YYYY-NNNN del tenant
+            'numero_contrato': {'required': False, 'allow_blank': True},
+        }
 
     def validate(self, attrs):
         """Validaciones personalizadas"""
@@ -107,6 +107,24 @@ class ContractExcelService:
     Servicio para generar reportes Excel de contratos
     """
     
+    @staticmethod
+    def filtrar_contratos(queryset, filters):
+        """
+        Aplicar los filtros adicionales de exportación (estado, tipo de servicio
+        y rango de fechas)
+        """
+        if not filters:
+            return queryset
+        if 'estado' in filters:
+            queryset = queryset.filter(estado=filters['estado'])
+        if 'tipo_servicio' in filters:
+            queryset = queryset.filter(tipo_servicio=filters['tipo_servicio'])
+        if 'fecha_desde' in filters:
+            queryset = queryset.filter(fecha_inicio__gte=filters['fecha_desde'])
+        if 'fecha_hasta' in filters:
+            queryset = queryset.filter(fecha_fin__lte=filters['fecha_hasta'])
+        return queryset
+    
     @staticmethod
     def generate_contracts_report(contratos, tenant):
         """
@@ -257,26 +275,17 @@ class ContractDocumentService:
     @staticmethod
     def generate_contract_number(tenant):
         """
-        Generar número de contrato único
+        Reservar el siguiente número de contrato del tenant (CT-YYYY-NNNN)
+        
+        El número sale del contador por tenant y año (apps.core.secuencias),
+        así que dos solicitudes simultáneas nunca reciben el mismo.
         """
+        from apps.core.secuencias import reservar_codigos
         from .models import Contrato
         
-        # Obtener el último número de contrato del tenant
-        last_contract = Contrato.objects.filter(tenant=tenant).order_by('-id').first()
-        
-        if last_contract:
-            # Extraer número del último contrato
-            try:
-                last_number = int(last_contract.numero_contrato.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        # Formato: CT-YYYY-NNNN
-        year = datetime.now().year
-        return f"CT-{year}-{new_number:04d}"
+        return reservar_codigos(
+            tenant, 'CT', Contrato.objects.filter(tenant=tenant), 'numero_contrato'
+        )[0]
     
     @staticmethod
     def create_default_clauses(contrato):
@@ -283,4 +283,64 @@ class ContratoAPITestCase(APITestCase):
         
         response = self.client.get('/api/crm/contratos/contratos/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_exportar_excel_asincrono(self):
+        """Test exportación de contratos encolada en segundo plano"""
+        from apps.analytics.models import ExportJob
+        
+        response = self.client.post(
+            '/api/crm/contratos/contratos/exportar_excel/?estado=activo',
+            {'asincrono': True, 'filters': {'tipo_servicio': 'fotografia'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        job = ExportJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.tipo, 'contratos_excel')
+        self.assertEqual(job.estado, 'pendiente')
+        self.assertEqual(job.parametros, {
+            'query_params': {'estado': ['activo']},
+            'filters': {'tipo_servicio': 'fotografia'},
+        })
+    
+    def test_exportacion_asincrona_mismas_filas_que_la_sincrona(self):
+        """Test el trabajo aplica el alcance, búsqueda, filtros y orden de la vista"""
+        from apps.analytics.Reportes.exportaciones import _contratos_filtrados
+        from apps.analytics.models import ExportJob
+        
+        otro_tenant = Tenant.objects.create(name='Otro', slug='otro', business_name='Otro')
+        for tenant, numero, titulo, tipo in [
+            (self.tenant, 'CT-001', 'Boda Ríos', 'fotografia'),
+            (self.tenant, 'CT-002', 'Boda Salas', 'fotografia'),
+            (self.tenant, 'CT-003', 'Boda Campos', 'evento'),
+            (self.tenant, 'CT-004', 'Bautizo', 'fotografia'),
+            (otro_tenant, 'CT-005', 'Boda ajena', 'fotografia'),
+        ]:
+            cliente = self.cliente if tenant == self.tenant else Cliente.objects.create(
+                tenant=tenant, tipo_cliente='particular', nombres='Ana', apellidos='Ruiz',
+                email='ana@example.com', telefono='1', dni='87654321', direccion='Dir'
+            )
+            Contrato.objects.create(
+                tenant=tenant, cliente=cliente, numero_contrato=numero, titulo=titulo,
+                descripcion='Test', tipo_servicio=tipo, fecha_inicio=date.today(),
+                fecha_fin=date.today() + timedelta(days=30), monto_total=Decimal('500.00')
+            )
+        
+        url = '/api/crm/contratos/contratos/exportar_excel/?search=boda&ordering=numero_contrato'
+        response = self.client.post(
+            url, {'asincrono': True, 'filters': {'tipo_servicio': 'fotografia'}}, format='json'
+        )
+        job = ExportJob.objects.get(pk=response.data['id'])
+        
+        self.assertEqual(
+            list(_contratos_filtrados(job).values_list('numero_contrato', flat=True)),
+            ['CT-001', 'CT-002']
+        )
+    
+    def test_filtros_exportacion_ignoran_cliente(self):
+        """Test los filtros del cuerpo son solo estado, tipo de servicio y fechas"""
+        from .services import ContractExcelService
+        
+        queryset = Contrato.objects.all()
+        self.assertIs(ContractExcelService.filtrar_contratos(queryset, {'cliente': self.cliente.id}), queryset)
@@ -4,12 +4,15 @@ Views del Módulo de Contratos - Arte Ideas CRM
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.request import Request
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Sum, Count, Q
+from django.http import HttpRequest, QueryDict
 from django.utils import timezone
 
+from apps.core.busqueda.filters import BusquedaIndexadaFilter
 from .models import Contrato, ClausulaContrato, PagoContrato, EstadoContrato
 from .serializers import (
     ContratoSerializer, ContratoListSerializer, ClausulaContratoSerializer,
@@ -17,14 +20,23 @@ from .serializers import (
 )
 
 
+def es_asincrono(request):
+    """La exportación se pidió en segundo plano (asincrono=true en cuerpo o query)"""
+    valor = request.data.get('asincrono') if hasattr(request.data, 'get') else None
+    if valor is None:
+        valor = request.query_params.get('asincrono', '')
+    return str(valor).lower() in ('1', 'true', 'si')
+
+
 class ContratoViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gestión completa de contratos
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter, OrderingFilter]
     filterset_fields = ['estado', 'tipo_servicio', 'cliente']
-    search_fields = ['numero_contrato', 'titulo', 'cliente__nombres', 'cliente__apellidos']
+    # ?search= sobre el índice: número, título y datos del cliente
+    busqueda_entidad = 'contrato'
     ordering_fields = ['numero_contrato', 'fecha_inicio', 'monto_total', 'creado_en']
     ordering = ['-creado_en']
 
@@ -211,13 +223,67 @@ class ContratoViewSet(viewsets.ModelViewSet):
         serializer = EstadoContratoSerializer(historial, many=True)
         return Response(serializer.data)
 
+    def encolar_exportacion(self, request, tipo, parametros):
+        """Encolar una exportación en segundo plano y responder 202 con el trabajo"""
+        from apps.analytics.Reportes.exportaciones import encolar_exportacion
+        from apps.analytics.Reportes.serializers import ExportJobSerializer
+        
+        try:
+            job = encolar_exportacion(request.user.tenant, request.user, tipo, parametros)
+        except Exception as e:
+            return Response(
+                {'error': f'Error al encolar la exportación: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    
+    def get_parametros_exportacion(self, request, con_filtros=True):
+        """
+        Datos para repetir la exportación en segundo plano
+
+        La query completa (filtros, ?search= y ?ordering= del listado) y, si
+        la exportación los usa, los filtros adicionales del cuerpo.
+        """
+        parametros = {'query_params': dict(request.query_params.lists())}
+        if con_filtros:
+            parametros['filters'] = request.data.get('filters', {})
+        return parametros
+    
+    @classmethod
+    def queryset_exportacion(cls, usuario, parametros):
+        """
+        Contratos de una exportación en segundo plano
+        
+        Reconstruye la request original (usuario y query) y aplica el mismo
+        get_queryset + filter_queryset que la exportación síncrona, más los
+        filtros del cuerpo, así el archivo tiene las mismas filas y orden.
+        """
+        from .services import ContractExcelService
+        
+        query = QueryDict(mutable=True)
+        for campo, valores in parametros.get('query_params', {}).items():
+            query.setlist(campo, valores)
+        http_request = HttpRequest()
+        http_request.method = 'GET'
+        http_request.GET = query
+        request = Request(http_request)
+        request.user = usuario
+        
+        view = cls(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        return ContractExcelService.filtrar_contratos(queryset, parametros.get('filters', {}))
+    
     @action(detail=True, methods=['get'])
     def generar_pdf(self, request, pk=None):
-        """Generar PDF del contrato"""
+        """Generar PDF del contrato (?asincrono=true para generarlo en segundo plano)"""
         from .services import ContractPDFService, PDFNotImplemented
         
         contrato = self.get_object()
         
+        if es_asincrono(request):
+            return self.encolar_exportacion(request, 'contrato_pdf', {'contrato_id': contrato.pk})
+        
         try:
             return ContractPDFService.generate_response(contrato)
         except PDFNotImplemented:
@@ -233,23 +299,20 @@ class ContratoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def exportar_excel(self, request):
-        """Exportar contratos a Excel"""
+        """Exportar contratos a Excel (asincrono=true para generarlo en segundo plano)"""
         from .services import ContractExcelService
         
+        if es_asincrono(request):
+            return self.encolar_exportacion(
+                request, 'contratos_excel', self.get_parametros_exportacion(request)
+            )
+        
         # Obtener contratos filtrados
         queryset = self.filter_queryset(self.get_queryset())
         
         # Aplicar filtros adicionales si se proporcionan
         filters = request.data.get('filters', {})
-        if filters:
-            if 'estado' in filters:
-                queryset = queryset.filter(estado=filters['estado'])
-            if 'tipo_servicio' in filters:
-                queryset = queryset.filter(tipo_servicio=filters['tipo_servicio'])
-            if 'fecha_desde' in filters:
-                queryset = queryset.filter(fecha_inicio__gte=filters['fecha_desde'])
-            if 'fecha_hasta' in filters:
-                queryset = queryset.filter(fecha_fin__lte=filters['fecha_hasta'])
+        queryset = ContractExcelService.filtrar_contratos(queryset, filters)
         
         try:
             excel_file = ContractExcelService.generate_contracts_report(
@@ -279,9 +342,14 @@ class ContratoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def exportar_pagos_excel(self, request):
-        """Exportar reporte de pagos a Excel"""
+        """Exportar reporte de pagos a Excel (asincrono=true para generarlo en segundo plano)"""
         from .services import ContractExcelService
         
+        if es_asincrono(request):
+            return self.encolar_exportacion(
+                request, 'pagos_contratos_excel', self.get_parametros_exportacion(request, con_filtros=False)
+            )
+        
         # Obtener contratos con pagos
         queryset = self.filter_queryset(self.get_queryset()).prefetch_related('pagos')
         
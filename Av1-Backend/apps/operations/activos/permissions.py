@@ -15,7 +15,7 @@ class ActivosPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de activos
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return 'access:activos' in user_permissions or 'access:operations' in user_permissions
     
     def has_object_permission(self, request, view, obj):
@@ -55,7 +55,7 @@ class MantenimientoPermission(permissions.BasePermission):
             return True
         
         # Operarios pueden gestionar mantenimientos
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return ('access:mantenimiento' in user_permissions or 
                 'access:operations' in user_permissions or
                 request.user.role == 'operario')
@@ -90,7 +90,7 @@ class RepuestosPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de repuestos/inventario
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return ('access:repuestos' in user_permissions or 
                 'access:inventario' in user_permissions or
                 'access:operations' in user_permissions)
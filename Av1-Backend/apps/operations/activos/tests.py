@@ -8,6 +8,7 @@ from rest_framework import status
 from decimal import Decimal
 from datetime import date, timedelta
 
+from apps.core.perfilado import PerfilConsultasTestMixin
 from .models import Activo, Financiamiento, Mantenimiento, Repuesto
 
 User = get_user_model()
@@ -268,3 +269,78 @@ class RepuestosAPITest(TestCase):
         # Verificar que el stock se actualizó
         self.repuesto_normal.refresh_from_db()
         self.assertEqual(self.repuesto_normal.stock_actual, 25)  # 20 + 5
+    
+    def test_actualizar_stock_registra_movimiento(self):
+        """Las salidas sin stock suficiente se rechazan y las válidas quedan en el libro de movimientos"""
+        url = f'/api/operations/activos/api/repuestos/{self.repuesto_bajo.id}/actualizar-stock/'
+        response = self.client.post(url, {'cantidad': 3, 'operacion': 'quitar'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(url, {'cantidad': 2, 'operacion': 'quitar', 'motivo': 'Mantenimiento'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_actual'], 0)
+        
+        response = self.client.get(f'/api/operations/activos/api/repuestos/{self.repuesto_bajo.id}/movimientos/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        movimientos = response.data['results']
+        self.assertEqual(movimientos[0]['motivo'], 'Mantenimiento')
+        self.assertEqual(movimientos[0]['stock_resultante'], 0)
+
+
+
+class ActivosConsultasTest(PerfilConsultasTestMixin, TestCase):
+    """Consultas por request de los endpoints de activos (sin N+1)"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='consultas',
+            email='consultas@test.com',
+            password='testpass123',
+            role='super_admin'
+        )
+        for indice, categoria in enumerate(['impresora', 'maquinaria', 'herramienta', 'maquinaria']):
+            activo = Activo.objects.create(
+                nombre=f'Activo {indice}',
+                categoria=categoria,
+                proveedor='Test Provider',
+                fecha_compra=date.today(),
+                costo_total=Decimal('1200.00'),
+                tipo_pago='contado',
+                vida_util=12,
+                depreciacion_mensual=Decimal('100.00'),
+                estado='activo'
+            )
+            Financiamiento.objects.create(
+                activo=activo,
+                tipo_pago='financiado',
+                entidad_financiera='Banco Test',
+                monto_financiado=Decimal('1200.00'),
+                cuotas_totales=12,
+                cuota_mensual=Decimal('100.00'),
+                fecha_inicio=date.today(),
+                fecha_fin=date.today() + timedelta(days=365),
+                estado='activo'
+            )
+        
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def test_activos_por_categoria_una_consulta(self):
+        """El resumen por categoría se arma con una consulta agrupada"""
+        with self.assertSinConsultasRepetidas(max_consultas=1):
+            response = self.client.get('/api/operations/activos/api/activos/por_categoria/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['categorias']['maquinaria']['count'], 2)
+        self.assertEqual(response.data['categorias']['maquinaria']['valor_total'], 2400.0)
+        self.assertEqual(response.data['categorias']['vehiculo']['count'], 0)
+    
+    def test_financiamientos_sin_n1(self):
+        """Listado y resumen de financiamientos no consultan el activo por fila"""
+        with self.assertSinConsultasRepetidas():
+            response = self.client.get('/api/operations/activos/api/financiamientos/')
+            self.client.get('/api/operations/activos/api/financiamientos/resumen_financiero/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
@@ -9,6 +9,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count, Q, F
 from datetime import date, timedelta
 
+from apps.core.agregaciones import histograma_por_valor
+from apps.commerce.inventario.models import MovimientoStock
+from apps.commerce.inventario.serializers import MovimientoStockSerializer
+from apps.commerce.inventario.services import StockService
 from .models import Activo, Financiamiento, Mantenimiento, Repuesto
 from .serializers import (
     ActivoSerializer, FinanciamientoSerializer, 
@@ -82,18 +86,17 @@ class ActivoViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(activos, many=True)
             return Response(serializer.data)
         else:
-            # Retornar resumen por categoría
+            # Retornar resumen por categoría (una sola consulta agrupada)
+            por_valor = histograma_por_valor(
+                self.get_queryset(), 'categoria', sumas={'valor_total': 'costo_total'}
+            )
             categorias = {}
             for categoria_code, categoria_name in Activo.CATEGORIAS:
-                count = self.get_queryset().filter(categoria=categoria_code).count()
-                valor_total = self.get_queryset().filter(categoria=categoria_code).aggregate(
-                    Sum('costo_total')
-                )['costo_total__sum'] or 0
-                
+                item = por_valor[categoria_code]
                 categorias[categoria_code] = {
                     'name': categoria_name,
-                    'count': count,
-                    'valor_total': float(valor_total)
+                    'count': item['count'],
+                    'valor_total': float(item['valor_total'])
                 }
             return Response({'categorias': categorias})
     
@@ -132,7 +135,7 @@ class ActivoViewSet(viewsets.ModelViewSet):
 
 class FinanciamientoViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de financiamientos"""
-    queryset = Financiamiento.objects.all()
+    queryset = Financiamiento.objects.select_related('activo')
     serializer_class = FinanciamientoSerializer
     permission_classes = [IsAuthenticated, ActivosPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -184,7 +187,7 @@ class FinanciamientoViewSet(viewsets.ModelViewSet):
 
 class MantenimientoViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de mantenimientos"""
-    queryset = Mantenimiento.objects.all()
+    queryset = Mantenimiento.objects.select_related('activo')
     serializer_class = MantenimientoSerializer
     permission_classes = [IsAuthenticated, MantenimientoPermission]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -282,41 +285,48 @@ class RepuestoViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def actualizar_stock(self, request, pk=None):
-        """Actualizar stock de repuesto"""
+        """
+        Registrar una entrada o salida de stock del repuesto
+        Parámetros: cantidad, operacion (agregar/quitar), motivo, referencia
+        """
         repuesto = self.get_object()
-        cantidad = request.data.get('cantidad', 0)
-        operacion = request.data.get('operacion', 'agregar')  # agregar o quitar
         motivo = request.data.get('motivo', 'Ajuste manual')
         
         try:
-            cantidad = int(cantidad)
-            
-            if operacion == 'quitar':
-                if repuesto.stock_actual < cantidad:
-                    return Response(
-                        {'error': f'Stock insuficiente. Stock actual: {repuesto.stock_actual}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                repuesto.stock_actual -= cantidad
-            else:  # agregar
-                repuesto.stock_actual += cantidad
-            
-            repuesto.save()
-            
-            return Response({
-                'message': f'Stock actualizado. Nuevo stock: {repuesto.stock_actual}',
-                'stock_anterior': repuesto.stock_actual - (cantidad if operacion == 'agregar' else -cantidad),
-                'stock_actual': repuesto.stock_actual,
-                'operacion': operacion,
-                'cantidad': cantidad,
-                'motivo': motivo
-            })
-        
-        except (ValueError, TypeError):
-            return Response(
-                {'error': 'Cantidad inválida'},
-                status=status.HTTP_400_BAD_REQUEST
+            movimiento = StockService.mover(
+                repuesto,
+                request.data.get('operacion', 'agregar'),
+                request.data.get('cantidad', 0),
+                motivo=motivo,
+                referencia=request.data.get('referencia', ''),
+                usuario=request.user
             )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': f'Stock actualizado. Nuevo stock: {movimiento.stock_resultante}',
+            'stock_anterior': movimiento.stock_resultante - movimiento.delta,
+            'stock_actual': movimiento.stock_resultante,
+            'operacion': 'agregar' if movimiento.tipo == 'entrada' else 'quitar',
+            'cantidad': movimiento.cantidad,
+            'motivo': motivo,
+            'movimiento_id': movimiento.id,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def movimientos(self, request, pk=None):
+        """Historial de movimientos de stock del repuesto"""
+        repuesto = self.get_object()
+        movimientos = MovimientoStock.objects.filter(
+            categoria=StockService.CATEGORIA_REPUESTO, producto_id=repuesto.pk
+        ).select_related('usuario')
+        page = self.paginate_queryset(movimientos)
+        if page is not None:
+            serializer = MovimientoStockSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = MovimientoStockSerializer(movimientos, many=True)
+        return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def resumen_inventario(self, request):
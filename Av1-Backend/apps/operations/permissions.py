@@ -26,7 +26,7 @@ class OperationsPermission(permissions.BasePermission):
             return True
         
         # Verificar acceso al módulo de operations
-        user_permissions = getattr(request.user, 'get_permissions_list', lambda: [])()
+        user_permissions = getattr(request.user, 'get_permissions', frozenset)()
         return 'access:operations' in user_permissions
     
     def has_object_permission(self, request, view, obj):
@@ -1,7 +1,7 @@
 """
 Modelos del Módulo de Producción - Arte Ideas Operations
 """
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date
@@ -114,7 +114,20 @@ class OrdenProduccion(models.Model):
         elif self.estado == 'terminado' and not self.fecha_finalizacion_real:
             self.fecha_finalizacion_real = timezone.now()
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Asignar el siguiente OP-YYYY-NNNN del tenant si no se indicó número
+            if not self.numero_op and self.tenant_id:
+                self.numero_op = self.generar_numero_op(self.tenant)
+            super().save(*args, **kwargs)
+    
+    @staticmethod
+    def generar_numero_op(tenant):
+        """Reservar el siguiente número de OP del tenant (contador de apps.core.secuencias)"""
+        from apps.core.secuencias import reservar_codigos
+        
+        return reservar_codigos(
+            tenant, 'OP', OrdenProduccion.objects.filter(tenant=tenant), 'numero_op'
+        )[0]
     
     def clean(self):
         """Validaciones personalizadas"""
@@ -18,6 +18,10 @@ class OrdenProduccionSerializer(serializers.ModelSerializer):
             'creado_en', 'actualizado_en'
         ]
         read_only_fields = ['id', 'creado_en', 'actualizado_en', 'tenant', 'cliente']  # cliente se autocompleta
+        extra_kwargs = {
+            # Si no se envía se asigna el siguiente OP-YYYY-NNNN del tenant
+            'numero_op': {'required': False, 'allow_blank': True},
+        }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -84,7 +88,7 @@ class OrdenProduccionSerializer(serializers.ModelSerializer):
     
     def validate_numero_op(self, value):
         # Verificar que el número de OP sea único
-        if OrdenProduccion.objects.filter(numero_op=value).exists():
+        if value and OrdenProduccion.objects.filter(numero_op=value).exists():
             if self.instance and self.instance.numero_op == value:
                 return value
             raise serializers.ValidationError("Este número de orden ya existe.")
@@ -99,7 +103,7 @@ class OrdenProduccionSerializer(serializers.ModelSerializer):
     def validate(self, data):
         # Verificar que todos los campos requeridos estén presentes
         # Nota: tenant y cliente se asignan automáticamente, no son requeridos en la validación
-        required_fields = ['numero_op', 'pedido', 'descripcion', 
+        required_fields = ['pedido', 'descripcion', 
                           'tipo', 'estado', 'prioridad', 'operario', 
                           'fecha_estimada']
         
@@ -195,4 +195,45 @@ class OrdenProduccionAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('pendientes', response.data)
         self.assertEqual(response.data['pendientes'], 1)
-        self.assertEqual(response.data['total'], 1)
\ No newline at end of file
+        self.assertEqual(response.data['total'], 1)
+    
+    def test_histogramas_en_una_consulta(self):
+        """Test dashboard y resúmenes por estado/tipo con una consulta agrupada"""
+        for i, (estado, tipo) in enumerate([
+            ('pendiente', 'enmarcado'), ('pendiente', 'minilab'), ('terminado', 'enmarcado')
+        ]):
+            OrdenProduccion.objects.create(
+                tenant=self.tenant,
+                numero_op=f'OP-HIST-{i}',
+                pedido=self.pedido,
+                descripcion='Test',
+                tipo=tipo,
+                estado=estado,
+                operario=self.operario,
+                fecha_estimada=timezone.now().date() + timedelta(days=3)
+            )
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/operations/produccion/api/ordenes/dashboard/')
+        self.assertEqual(response.data, {
+            'pendientes': 2, 'en_proceso': 0, 'terminados': 1, 'entregados': 0, 'total': 3
+        })
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/operations/produccion/api/ordenes/por_tipo/')
+        tipos = {item['tipo']: item['count'] for item in response.data['tipos_summary']}
+        self.assertEqual(tipos['enmarcado'], 2)
+        self.assertEqual(tipos['corte_laser'], 0)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/operations/produccion/api/ordenes/por_estado/')
+        self.assertEqual(response.data['estados_summary'][0], {
+            'estado': 'pendiente', 'estado_name': 'Pendiente', 'count': 2
+        })
+        
+        # estados + tipos + totales
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/operations/produccion/api/ordenes/resumen_produccion/')
+        self.assertEqual(response.data['total_ordenes'], 3)
+        self.assertEqual(response.data['estados']['terminado']['count'], 1)
+        self.assertEqual(response.data['tipos']['minilab']['count'], 1)
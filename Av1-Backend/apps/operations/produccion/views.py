@@ -6,6 +6,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count, Q
 from datetime import date, timedelta
 
+from apps.core.agregaciones import histograma_choices, histograma_por_valor
 from .models import OrdenProduccion
 from .serializers import OrdenProduccionSerializer
 from .filters import OrdenProduccionFilter
@@ -62,21 +63,15 @@ class OrdenProduccionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Endpoint para obtener estadísticas por estado"""
-        queryset = self.get_queryset()
-        
-        # Calcular estadísticas
-        pendientes = queryset.filter(estado='pendiente').count()
-        en_proceso = queryset.filter(estado='en_proceso').count()
-        terminados = queryset.filter(estado='terminado').count()
-        entregados = queryset.filter(estado='entregado').count()
-        total = queryset.count()
+        # Una sola consulta agrupada por estado
+        estados = histograma_por_valor(self.get_queryset(), 'estado')
         
         return Response({
-            'pendientes': pendientes,
-            'en_proceso': en_proceso,
-            'terminados': terminados,
-            'entregados': entregados,
-            'total': total
+            'pendientes': estados['pendiente']['count'],
+            'en_proceso': estados['en_proceso']['count'],
+            'terminados': estados['terminado']['count'],
+            'entregados': estados['entregado']['count'],
+            'total': sum(item['count'] for item in estados.values())
         })
     
     @action(detail=False, methods=['get'])
@@ -96,14 +91,10 @@ class OrdenProduccionViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         else:
             # Retornar resumen por estado
-            estados_summary = []
-            for estado_code, estado_name in OrdenProduccion.ESTADO_CHOICES:
-                count = self.get_queryset().filter(estado=estado_code).count()
-                estados_summary.append({
-                    'estado': estado_code,
-                    'estado_name': estado_name,
-                    'count': count
-                })
+            estados_summary = [
+                {'estado': item['valor'], 'estado_name': item['nombre'], 'count': item['count']}
+                for item in histograma_choices(self.get_queryset(), 'estado')
+            ]
             
             return Response({'estados_summary': estados_summary})
     
@@ -118,14 +109,10 @@ class OrdenProduccionViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         else:
             # Retornar resumen por tipo
-            tipos_summary = []
-            for tipo_code, tipo_name in OrdenProduccion.TIPO_CHOICES:
-                count = self.get_queryset().filter(tipo=tipo_code).count()
-                tipos_summary.append({
-                    'tipo': tipo_code,
-                    'tipo_name': tipo_name,
-                    'count': count
-                })
+            tipos_summary = [
+                {'tipo': item['valor'], 'tipo_name': item['nombre'], 'count': item['count']}
+                for item in histograma_choices(self.get_queryset(), 'tipo')
+            ]
             
             return Response({'tipos_summary': tipos_summary})
     
@@ -227,43 +214,30 @@ class OrdenProduccionViewSet(viewsets.ModelViewSet):
         """Obtener resumen completo de producción"""
         queryset = self.get_queryset()
         
-        # Totales generales
-        total_ordenes = queryset.count()
-        
-        # Por estado
-        estados = {}
-        for estado_code, estado_name in OrdenProduccion.ESTADO_CHOICES:
-            count = queryset.filter(estado=estado_code).count()
-            estados[estado_code] = {
-                'name': estado_name,
-                'count': count
-            }
-        
-        # Por tipo
-        tipos = {}
-        for tipo_code, tipo_name in OrdenProduccion.TIPO_CHOICES:
-            count = queryset.filter(tipo=tipo_code).count()
-            tipos[tipo_code] = {
-                'name': tipo_name,
-                'count': count
-            }
-        
-        # Órdenes vencidas
+        # Por estado y por tipo (una consulta agrupada cada uno)
+        estados = {
+            item['valor']: {'name': item['nombre'], 'count': item['count']}
+            for item in histograma_choices(queryset, 'estado')
+        }
+        tipos = {
+            item['valor']: {'name': item['nombre'], 'count': item['count']}
+            for item in histograma_choices(queryset, 'tipo')
+        }
+        
+        # Total, vencidas y próximas a vencer en una sola consulta
         today = date.today()
-        vencidas_count = queryset.filter(
-            fecha_estimada__lt=today,
-            estado__in=['pendiente', 'en_proceso']
-        ).count()
-        
-        # Próximas a vencer
         proxima_semana = today + timedelta(days=7)
-        proximas_count = queryset.filter(
-            fecha_estimada__range=[today, proxima_semana],
-            estado__in=['pendiente', 'en_proceso']
-        ).count()
+        activas = Q(estado__in=['pendiente', 'en_proceso'])
+        totales = queryset.aggregate(
+            total_ordenes=Count('id'),
+            vencidas=Count('id', filter=activas & Q(fecha_estimada__lt=today)),
+            proximas=Count('id', filter=activas & Q(fecha_estimada__range=[today, proxima_semana])),
+        )
+        vencidas_count = totales['vencidas']
+        proximas_count = totales['proximas']
         
         return Response({
-            'total_ordenes': total_ordenes,
+            'total_ordenes': totales['total_ordenes'],
             'estados': estados,
             'tipos': tipos,
             'ordenes_vencidas': vencidas_count,
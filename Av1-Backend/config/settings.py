@@ -38,6 +38,7 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     'apps.core',
     'apps.core.autenticacion',
+    'apps.core.busqueda',
     'apps.core.configuracion_sistema',
     'apps.core.multitenancy',
     'apps.core.usuarios',
@@ -67,6 +68,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Solo activo con QUERY_PROFILER_ENABLED
+    'apps.core.middleware.QueryProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -105,13 +108,55 @@ DATABASES = {
     }
 }
 
+# Cache
+# Con varios workers usar un backend compartido (p. ej. FileBasedCache o Redis)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'arte-ideas'),
+    }
+}
+
+# Registro de tenants por slug/id (apps/core/multitenancy/cache.py)
+TENANT_CACHE_ALIAS = 'default'
+TENANT_CACHE_TIMEOUT = int(os.environ.get('TENANT_CACHE_TIMEOUT', 300))
+TENANT_CACHE_LOCAL_TTL = int(os.environ.get('TENANT_CACHE_LOCAL_TTL', 30))
+TENANT_CACHE_LOCAL_SIZE = 256
+
+# Permisos compilados por tenant y rol (apps/core/autenticacion/permisos.py)
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = int(os.environ.get('PERMISSION_CACHE_TIMEOUT', 300))
+PERMISSION_CACHE_LOCAL_TTL = int(os.environ.get('PERMISSION_CACHE_LOCAL_TTL', 30))
+
+# Perfilado de consultas por request (apps/core/perfilado.py)
+QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'False') == 'True'
+QUERY_PROFILER_N1_THRESHOLD = int(os.environ.get('QUERY_PROFILER_N1_THRESHOLD', 3))
+QUERY_PROFILER_WINDOW = 100
+
+# Estado de usuarios para la autenticación JWT (activo y versión de tokens)
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Snapshots del dashboard (apps/analytics/dashboard/cache.py)
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+
+# Hilos para calcular en paralelo las categorías de /api/analytics/reportes/todos/
+REPORTES_RESUMEN_WORKERS = int(os.environ.get('REPORTES_RESUMEN_WORKERS', 6))
+
+# Exportaciones en segundo plano (apps/analytics/Reportes/exportaciones.py)
+# Los archivos se guardan en MEDIA_ROOT/exportaciones/ y se eliminan al vencer el TTL
+EXPORTACIONES_TTL = int(os.environ.get('EXPORTACIONES_TTL', 24 * 60 * 60))
+EXPORTACIONES_TIMEOUT = int(os.environ.get('EXPORTACIONES_TIMEOUT', 30 * 60))
+EXPORTACIONES_WORKERS = int(os.environ.get('EXPORTACIONES_WORKERS', 2))
+
 # Custom User Model
 AUTH_USER_MODEL = 'autenticacion.User'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.core.autenticacion.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -135,6 +180,7 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.core.autenticacion.serializers.TokenRefreshConVersionSerializer',
 }
 
 # CORS Configuration